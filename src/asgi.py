@@ -0,0 +1,318 @@
+"""
+ASGI Uygulaması - Vikipedi Chatbot.
+``/chat`` SSE akışlarını asyncio üzerinde sunar. Her açık akış bir iş
+parçacığı yerine tek bir coroutine tutar; böylece bir süreç binlerce
+beklemedeki akışı taşıyabilir. Diğer tüm endpoint'ler (``asgiref`` kuruluysa)
+Flask uygulamasına devredilir.
+
+Çalıştırma:
+    uvicorn src.asgi:app --host 127.0.0.1 --port 5000
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import traceback
+from urllib.parse import parse_qs
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from src.app import app as flask_app
+    from src.routes.chat_routes import parse_chat_request
+    from src.config import Config
+    from src.sessions import get_session_store
+    from src.response_cache import get_response_cache
+    from src.streaming import CANCELLED_END, SSEEncoder, get_stream_registry, parse_event_id, pump_async
+    from src.observability import get_tracer, metrics, tracing
+except ImportError:
+    from app import app as flask_app
+    from routes.chat_routes import parse_chat_request
+    from config import Config
+    from sessions import get_session_store
+    from response_cache import get_response_cache
+    from streaming import CANCELLED_END, SSEEncoder, get_stream_registry, parse_event_id, pump_async
+    from observability import get_tracer, metrics, tracing
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    _fallback_app = WsgiToAsgi(flask_app)
+except ImportError:
+    _fallback_app = None
+
+# Oturum kilidi beklenirken yoklama aralığı (saniye). Kilit iş parçacığı
+# kilididir; event loop'u bloklamamak için kısa aralıklarla denenir.
+LOCK_POLL_INTERVAL = 0.05
+
+SSE_HEADERS = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-cache"),
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"GET, POST"),
+    (b"access-control-allow-headers", b"Content-Type, Last-Event-ID"),
+    (b"access-control-expose-headers", b"X-Turn-Id"),
+]
+
+session_store = get_session_store()
+response_cache = get_response_cache()
+stream_registry = get_stream_registry()
+tracer = get_tracer()
+
+# Arka planda çalışan turlar (görevlerin çöp toplanmaması için referans tutulur)
+_turn_tasks = set()
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return body
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send_json(send, status: int, payload) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _acquire(lock, timeout: float) -> bool:
+    """İş parçacığı kilidini event loop'u bloklamadan almaya çalışır."""
+    deadline = time.monotonic() + timeout
+    while not lock.acquire(blocking=False):
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+    return True
+
+
+async def chat(scope, receive, send) -> None:
+    """
+    Chat endpoint'i - Flask ``/chat`` ile aynı istek ve SSE biçimini kullanır.
+
+    Request Body:
+        - message: str - Kullanıcı mesajı
+        - chat_id: str - Sohbet kimliği (opsiyonel)
+    """
+    started = time.monotonic()
+    trace = tracer.start_trace("chat", server="asgi")
+    with trace.span("request.parse"):
+        try:
+            data = json.loads(await _read_body(receive) or b"null")
+        except ValueError:
+            data = None
+        # Flask ile aynı doğrulama: nesne gövde, metin message ve chat_id
+        user_message, chat_id, error = parse_chat_request(data)
+    if error:
+        trace.end("rejected")
+        await _send_json(send, 400, {"error": error})
+        return
+
+    with trace.span("session.lookup"):
+        session = session_store.get_or_create(chat_id)
+    trace.set(chat_id=chat_id, message_chars=len(user_message))
+
+    # Yeni mesaj aynı sohbette süren yanıtı durdurur
+    stream_registry.cancel(chat_id, reason="superseded")
+
+    # Tur arka planda üretilir; bu istek ve olası yeniden bağlanmalar tamponu takip eder
+    buffer = stream_registry.open(chat_id, trace)
+    trace.set(turn_id=buffer.turn_id)
+    # Görev oluşturulurken bağlam kopyalanır; iz tur boyunca etkin kalır
+    with tracing.activate(trace):
+        task = asyncio.create_task(_run_turn(session, user_message, buffer, started, trace))
+    _turn_tasks.add(task)
+    task.add_done_callback(_turn_tasks.discard)
+    await _follow(send, buffer, 0)
+
+
+async def _run_turn(session, user_message: str, buffer, started: float, trace) -> None:
+    """
+    Turu arka planda çalıştırır ve SSE çerçevelerini tampona yazar.
+    İstemci kısa süreliğine kopsa da tur tamamlanır ve geçmişe kaydedilir.
+    Tur iptal edilince görev ``cancel()`` edilir; ``CancelledError`` Gemini
+    akışını ve araç beklemesini keser, kısmi yanıt geçmişe yazılır. İz tur bitince kapatılır.
+    """
+    encoder = SSEEncoder(
+        Config.SSE_FLUSH_BYTES, Config.SSE_FLUSH_INTERVAL_MS / 1000, id_prefix=buffer.id_prefix
+    )
+    # İptal başka bir iş parçacığından (ör. Flask ``/cancel``) gelebilir
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    generating = True
+
+    def cancel_generation() -> None:
+        # Loop'ta çalışır; üretim bittikten sonra (kayıt sürerken) görevi kesmez
+        if generating:
+            task.cancel()
+
+    cancel_task = lambda: loop.call_soon_threadsafe(cancel_generation)
+    buffer.cancel_token.add_callback(cancel_task)
+    status = None
+    try:
+        # Aynı sohbette aynı anda tek tur çalışır
+        with trace.span("session.lock"):
+            acquired = await _acquire(session.lock, Config.SESSION_LOCK_TIMEOUT)
+        if not acquired:
+            status = "busy"
+            busy_chunk = {"type": "error", "error": "Bu sohbet için önceki yanıt hâlâ sürüyor."}
+            buffer.append(encoder.finish_frames(busy_chunk))
+            return
+
+        stream = None
+        try:
+            # Kalıcılık katmanı G/Ç yapabileceği için havuzda çalıştırılır
+            with trace.span("session.load"):
+                await asyncio.to_thread(session_store.load, session)
+            if response_cache is not None:
+                stream = response_cache.stream_async(session.chatbot, user_message)
+            else:
+                stream = session.chatbot.chat_stream_async(user_message)
+            await pump_async(metrics.instrument_stream_async(stream, started), encoder, buffer)
+
+        except Exception as e:
+            status = "error"
+            print("🔥 ASGI chat hatası:", traceback.format_exc())
+            error_chunk = {"type": "error", "error": str(e), "trace": traceback.format_exc()}
+            buffer.append(encoder.finish_frames(error_chunk))
+
+        finally:
+            generating = False
+            try:
+                if stream is not None:
+                    await stream.aclose()
+                with trace.span("session.persist"):
+                    await asyncio.to_thread(session_store.persist, session)
+            finally:
+                session.lock.release()
+    except asyncio.CancelledError:
+        buffer.append(encoder.finish_frames(CANCELLED_END))
+        raise
+    finally:
+        buffer.cancel_token.remove_callback(cancel_task)
+        buffer.close()
+        if buffer.cancel_token.cancelled:
+            status = "cancelled"
+            trace.set(cancel_reason=buffer.cancel_token.reason)
+        trace.end(status)
+
+
+async def _follow(send, buffer, after: int) -> None:
+    """
+    Tamponu ``after`` sırasından itibaren istemciye akıtır. Gönderim hata
+    verirse takipçi ayrılır; kimse geri dönmezse tur bekleme süresi sonunda
+    iptal edilir.
+    """
+    headers = SSE_HEADERS + [(b"x-turn-id", buffer.turn_id.encode())]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    frames = buffer.follow_async(after)
+    try:
+        async for text in frames:
+            await send({"type": "http.response.body", "body": text.encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    except Exception:
+        pass  # İstemci bağlantıyı kapatmış
+    finally:
+        await frames.aclose()
+
+
+async def cancel(scope, receive, send) -> None:
+    """
+    Süren yanıtı durdurur - Flask ``/cancel`` ile aynı.
+
+    Request Body:
+        - chat_id: str - Sohbet kimliği
+        - turn_id: str - Tur kimliği (opsiyonel)
+    """
+    try:
+        data = json.loads(await _read_body(receive) or b"null") or {}
+    except ValueError:
+        data = {}
+    chat_id = data.get("chat_id") if isinstance(data, dict) else None
+    if not chat_id:
+        await _send_json(send, 400, {"error": "chat_id gerekli"})
+        return
+
+    cancelled = stream_registry.cancel(chat_id, data.get("turn_id"))
+    await _send_json(send, 200, {"status": "ok", "cancelled": cancelled})
+
+
+async def resume(scope, receive, send) -> None:
+    """
+    Kopan bir yanıt akışına yeniden bağlanır - Flask ``/chat/stream`` ile aynı.
+
+    Query:
+        - chat_id: str - Sohbet kimliği
+        - last_event_id: str - Son alınan olay kimliği (``Last-Event-ID`` başlığı yoksa)
+    """
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    headers = dict(scope.get("headers") or [])
+    chat_id = (query.get("chat_id") or [None])[0]
+    last_event_id = headers.get(b"last-event-id", b"").decode("latin-1") or (query.get("last_event_id") or [None])[0]
+    parsed = parse_event_id(last_event_id)
+    if not chat_id or parsed is None:
+        await _send_json(send, 400, {"error": "chat_id ve Last-Event-ID gerekli"})
+        return
+
+    turn_id, seq = parsed
+    buffer = stream_registry.get(chat_id, turn_id)
+    if buffer is None:
+        await _send_json(send, 404, {"error": "Akış bulunamadı veya süresi doldu"})
+        return
+    buffer.trace.event("stream.resume", after=seq)
+    await _follow(send, buffer, seq)
+
+
+async def _send_metrics(send) -> None:
+    """Prometheus metinlerini döndürür (``asgiref`` olmadan da erişilebilir)."""
+    body = metrics.REGISTRY.render().encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", metrics.CONTENT_TYPE.encode()), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send) -> None:
+    """ASGI giriş noktası."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    if scope["path"] == "/chat" and scope["method"] == "POST":
+        await chat(scope, receive, send)
+    elif scope["path"] == "/chat/stream" and scope["method"] == "GET":
+        await resume(scope, receive, send)
+    elif scope["path"] == "/cancel" and scope["method"] == "POST":
+        await cancel(scope, receive, send)
+    elif scope["path"] == "/metrics" and scope["method"] == "GET":
+        await _send_metrics(send)
+    elif _fallback_app is not None:
+        await _fallback_app(scope, receive, send)
+    else:
+        await _send_json(send, 404, {
+            "error": "Bu endpoint ASGI modunda yalnızca 'asgiref' kuruluysa sunulur: pip install asgiref"
+        })
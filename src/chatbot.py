@@ -4,10 +4,13 @@ Wikipedia entegrasyonlu AI asistan.
 """
 
 import os
-import traceback
+import json
+import asyncio
+import contextvars
 import time
-from typing import Generator, Dict, Any, List, Optional
-import google.generativeai as genai
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_futures
+from typing import AsyncGenerator, Generator, Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 
 # Ortam değişkenlerini yükle
@@ -16,20 +19,83 @@ load_dotenv()
 # Servisleri import et
 try:
     from src.services import calculator, wikipedia
+    from src.services.result_shaper import shape_search_result, outline_search_result
     from src.config import Config
+    from src.streaming import CancelToken, CANCELLED_END
+    from src.history import ConversationHistory, CHARS_PER_TOKEN
+    from src.model_registry import get_model, tool_declarations, TOOL_DECLARATIONS
+    from src.services.calc_log import CalculationLog
+    from src.services.prefetch import get_prefetcher
+    from src.observability import metrics, tracing
 except ImportError:
     # Doğrudan çalıştırılırsa eski import'ları kullan
     from services import calculator
     from services import search as wikipedia
+    from services.result_shaper import shape_search_result, outline_search_result
+    from streaming import CancelToken, CANCELLED_END
+    from history import ConversationHistory, CHARS_PER_TOKEN
+    from model_registry import get_model, tool_declarations, TOOL_DECLARATIONS
+    from services.calc_log import CalculationLog
+    from services.prefetch import get_prefetcher
+    from observability import metrics, tracing
     
     class Config:
         GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
         GEMINI_MODEL = "models/gemini-2.5-flash"
         MAX_HISTORY = 15
-        STREAM_CHUNK_SIZE = 3
+        HISTORY_TOKEN_BUDGET = 8000
+        HISTORY_SUMMARIZE_TOOLS = True
+        TOOL_MAX_WORKERS = 8
+        TOOL_TIMEOUT = 20
+        AGENT_MAX_ROUNDS = 5
+        AGENT_TIME_BUDGET = 60
+        AGENT_TOKEN_BUDGET = 60000
+        CALC_HISTORY_SIZE = 50
+
+# Araç çağrıları için süreç genelinde paylaşılan, sınırlı iş parçacığı havuzu
+_tool_executor = ThreadPoolExecutor(
+    max_workers=Config.TOOL_MAX_WORKERS,
+    thread_name_prefix="tool"
+)
+
+# Metrik etiketleri için bilinen araç adları (model uydurursa "unknown")
+TOOL_NAMES = frozenset(
+    declaration["name"]
+    for group in TOOL_DECLARATIONS
+    for declaration in group["function_declarations"]
+)
+
+# Son turda model'i araç çağırmadan metin yanıtı vermeye zorlar
+NO_TOOLS_CONFIG = {"function_calling_config": {"mode": "NONE"}}
+
+# İptal edilen turun geçmişe yazılan model yanıtına eklenen not
+CANCELLED_NOTE = "[Yanıt kullanıcı tarafından durduruldu.]"
+
+
+def _round_span_name(round_number: int) -> str:
+    """İlk Gemini çağrısı ile araç sonuçlarını gönderen takip çağrılarını ayırır."""
+    return "gemini.call" if round_number == 1 else "gemini.followup"
+
+
+def _abort_upstream(response):
+    """
+    Gemini akışının alttaki bağlantısını kapatır (gRPC çağrısı ``cancel``,
+    REST üreteci ``close``/``aclose``). Kütüphane bunun için genel bir API
+    sunmadığından yanıtın iç yineleyicisine erişilir.
+    
+    Returns:
+        Async yineleyicide beklenmesi gereken nesne, yoksa None
+    """
+    iterator = getattr(response, "_iterator", None)
+    for name in ("cancel", "aclose", "close"):
+        method = getattr(iterator, name, None)
+        if callable(method):
+            try:
+                return method()
+            except Exception:
+                return None  # Akış başka bir iş parçacığında okunuyor
+    return None
 
-# Gemini client başlat
-genai.configure(api_key=Config.GEMINI_API_KEY or os.getenv("GEMINI_API_KEY"))
 
 # Sistem prompt'u
 SYSTEM_PROMPT = """Sen Wikipedia entegrasyonlu uzman bir asistansın. ChatGPT gibi net, anlaşılır ve doğrudan cevaplar ver.
@@ -81,78 +147,107 @@ class WebChatbot:
             model_name: Kullanılacak Gemini model adı (opsiyonel)
         """
         self.system_prompt = SYSTEM_PROMPT
-        self.messages: List[Dict[str, Any]] = []
-        self.user_data: Dict[str, Any] = {
+        self.history = ConversationHistory(
+            token_budget=Config.HISTORY_TOKEN_BUDGET,
+            max_messages=Config.MAX_HISTORY,
+            summarize_tools=Config.HISTORY_SUMMARIZE_TOOLS
+        )
+        self.user_data = {
             "calculations": [],
             "notes": [],
         }
-        self.max_history = Config.MAX_HISTORY
-        self.chunk_size = Config.STREAM_CHUNK_SIZE
         
-        # Gemini modelini başlat
-        model = model_name or Config.GEMINI_MODEL
-        self.model = genai.GenerativeModel(model)
+        # Paylaşılan modeli al (model, araç şeması ve istemci tüm sohbetlerde ortak).
+        # Sistem talimatı modele verilmez; önceki davranış korunur.
+        self.model_name = model_name or Config.GEMINI_MODEL
+        self.model = get_model(self.model_name)
         
     def get_tools(self) -> List[Dict[str, Any]]:
         """
         Fonksiyon tanımlarını döndürür.
+        Tanımlar süreç başında bir kez üretilir ve modele bağlıdır;
+        dönen liste paylaşılan tanımların kopyasıdır.
         
         Returns:
             List[Dict]: Tool tanımları listesi
         """
-        # Hangi modülün kullanıldığını kontrol et
-        try:
-            calc_def = calculator.get_function_def()
-        except AttributeError:
-            from services.calculator import get_function_def as get_calc_def
-            calc_def = get_calc_def()
-            
-        try:
-            search_def = wikipedia.get_function_def()
-        except AttributeError:
-            from services.search import get_function_def as get_search_def
-            search_def = get_search_def()
-        
-        return [
-            {"function_declarations": [calc_def]},
-            {"function_declarations": [search_def]}
-        ]
+        return tool_declarations()
+
+    @property
+    def user_data(self) -> Dict[str, Any]:
+        """Kullanıcı verisi; ``calculations`` sabit kapasiteli bir ``CalculationLog``'dur."""
+        return self._user_data
+
+    @user_data.setter
+    def user_data(self, value: Dict[str, Any]) -> None:
+        data = dict(value or {})
+        calculations = data.get("calculations")
+        if not isinstance(calculations, CalculationLog):
+            data["calculations"] = CalculationLog(Config.CALC_HISTORY_SIZE, calculations or [])
+        self._user_data = data
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        """Sohbetin tam mesaj geçmişi."""
+        return self.history.messages
 
     def reset_history(self) -> None:
         """Sohbet geçmişini sıfırlar."""
-        self.messages = []
+        self.history.clear()
         self.user_data = {"calculations": [], "notes": []}
 
+    def estimate_size(self) -> int:
+        """
+        Sohbetin bellekte kapladığı yaklaşık bayt miktarını döndürür.
+        
+        Returns:
+            int: Tahmini boyut (bayt)
+        """
+        return self.history.total_tokens * CHARS_PER_TOKEN + self.user_data["calculations"].memory_estimate()
+
     def _get_limited_history(self) -> List[Dict[str, Any]]:
         """
-        Kısaltılmış mesaj geçmişini döndürür.
+        Token bütçesine göre kırpılmış mesaj geçmişini döndürür.
+        Turlar bölünmez; eski araç çıktıları özetlenir.
         
         Returns:
-            List[Dict]: Son N mesaj
+            List[Dict]: Model'e gönderilecek mesajlar
         """
-        return self.messages[-self.max_history:]
+        return self.history.window()
 
-    def _stream_text_char_by_char(self, text: str) -> Generator[Dict[str, str], None, None]:
+    def _execute_function(self, fn_name: str, args: Dict[str, Any], question: str = "") -> Dict[str, Any]:
         """
-        Metni küçük parçalar halinde yield eder.
+        Fonksiyon çağrısını yürütür; süresini ve hata durumunu metriklere yazar.
         
         Args:
-            text: Parçalanacak metin
+            fn_name: Fonksiyon adı
+            args: Fonksiyon argümanları
+            question: Kullanıcının sorusu (Wikipedia sonucunu budamak için)
             
-        Yields:
-            Dict: Content chunk'ları
+        Returns:
+            Dict: Fonksiyon sonucu
         """
-        for i in range(0, len(text), self.chunk_size):
-            yield {"type": "content", "content": text[i:i + self.chunk_size]}
-            time.sleep(0.01)
+        tool = fn_name if fn_name in TOOL_NAMES else "unknown"
+        # Argüman değerleri içerik taşıyabilir; yalnızca adları izlenir
+        with tracing.span("tool.call", tool=tool, args=sorted(args or {})) as span:
+            started = time.monotonic()
+            result = self._dispatch_function(fn_name, args, question)
+            metrics.TOOL_DURATION.labels(tool).observe(time.monotonic() - started)
+            if isinstance(result, dict) and "shaping" in result:
+                span.set(saved_bytes=result["shaping"].get("saved_bytes"))
+            if isinstance(result, dict) and "error" in result:
+                metrics.TOOL_ERRORS.labels(tool).inc()
+                span.end("error")
+        return result
 
-    def _execute_function(self, fn_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    def _dispatch_function(self, fn_name: str, args: Dict[str, Any], question: str = "") -> Dict[str, Any]:
         """
-        Fonksiyon çağrısını yürütür.
+        Fonksiyon çağrısını ilgili servise yönlendirir.
         
         Args:
             fn_name: Fonksiyon adı
             args: Fonksiyon argümanları
+            question: Kullanıcının sorusu (Wikipedia sonucunu budamak için)
             
         Returns:
             Dict: Fonksiyon sonucu
@@ -160,10 +255,25 @@ class WebChatbot:
         try:
             if fn_name == "search_info":
                 try:
-                    return wikipedia.search_info(**args)
+                    result = wikipedia.search_info(**args)
                 except AttributeError:
                     from services.search import search_info
-                    return search_info(**args)
+                    result = search_info(**args)
+                
+                # Model yanıtı üretirken bağlantılı sayfaları arka planda önbelleğe al
+                prefetcher = get_prefetcher()
+                if prefetcher is not None:
+                    prefetcher.schedule(result)
+                
+                # Sonucu soruya göre buda (model'e giden bağlamı küçült)
+                if Config.WIKI_FIRST_RESPONSE == "outline":
+                    result = outline_search_result(result)
+                else:
+                    result = shape_search_result(result, question or args.get("query", ""))
+                return result
+            
+            elif fn_name == "get_section":
+                return wikipedia.get_section(**args)
                     
             elif fn_name == "calculate":
                 try:
@@ -171,145 +281,436 @@ class WebChatbot:
                 except AttributeError:
                     from services.calculator import calculate
                     return calculate(**args, user_data=self.user_data)
+            
+            elif fn_name == "calculate_batch":
+                return calculator.calculate_batch(**args, user_data=self.user_data)
+            
+            elif fn_name == "recall_calculations":
+                return calculator.recall_calculations(**args, user_data=self.user_data)
             else:
                 return {"error": f"Bilinmeyen fonksiyon: {fn_name}"}
                 
         except Exception as e:
             return {"error": f"Fonksiyon hatası: {str(e)}"}
 
-    def chat_stream(self, user_message: str) -> Generator[Dict[str, Any], None, None]:
+    def _consume_chunk(
+        self, chunk, function_calls: List[Tuple[str, Dict[str, Any]]], usage: Dict[str, int]
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Tek bir model parçasını işler. Senkron ve asenkron akış ortak kullanır.
+        Metin parçaları olduğu gibi iletilir; birleştirme SSE katmanındadır.
+        
+        Args:
+            chunk: Stream edilen yanıt parçası
+            function_calls: Bulunan (isim, argüman) çiftlerinin ekleneceği liste
+            usage: Turda harcanan token sayısının yazılacağı sözlük
+            
+        Returns:
+            Tuple: (gönderilecek chunk'lar, parçadaki metin)
+        """
+        events: List[Dict[str, Any]] = []
+        text = ""
+        
+        metadata = getattr(chunk, "usage_metadata", None)
+        if metadata and metadata.total_token_count:
+            usage["tokens"] = metadata.total_token_count
+        
+        if not (chunk.candidates and chunk.candidates[0].content):
+            return events, text
+        
+        for part in chunk.candidates[0].content.parts:
+            if "function_call" in part:
+                function_call = type(part.function_call).to_dict(part.function_call)
+                fn_name = function_call.get("name", "")
+                args = function_call.get("args") or {}
+                function_calls.append((fn_name, args))
+                events.append({"type": "function_call", "function": fn_name, "args": args})
+            elif part.text:
+                text += part.text
+                events.append({"type": "content", "content": part.text})
+        return events, text
+
+    def _stream_response(
+        self, response, function_calls: List[Tuple[str, Dict[str, Any]]], usage: Dict[str, Any],
+        cancel: CancelToken
+    ) -> Generator[Dict[str, Any], None, str]:
+        """
+        Model yanıtını stream eder; metin parçalarını yield eder ve
+        fonksiyon çağrılarını ``function_calls`` listesine ekler.
+        İptal edilirse Gemini bağlantısı kapatılır ve o ana kadarki metin döner.
+        
+        Args:
+            response: ``send_message(stream=True)`` yanıtı
+            function_calls: Bulunan (isim, argüman) çiftlerinin ekleneceği liste
+            usage: Turda harcanan token sayısının ve o ana kadar gelen metnin
+                (``text``) yazılacağı sözlük
+            cancel: Turun iptal işareti
+            
+        Yields:
+            Dict: content ve function_call chunk'ları
+            
+        Returns:
+            str: Yanıtın tam (iptalde kısmi) metni
+        """
+        full_content = ""
+        
+        # Bir sonraki parçayı beklerken iptal edilirse bağlantıyı hemen kapat
+        abort = lambda: _abort_upstream(response)
+        cancel.add_callback(abort)
+        try:
+            for chunk in response:
+                if cancel.cancelled:
+                    break
+                events, text = self._consume_chunk(chunk, function_calls, usage)
+                full_content += text
+                usage["text"] = full_content
+                yield from events
+        except GeneratorExit:
+            _abort_upstream(response)
+            raise
+        except Exception:
+            # Kapatılan bağlantının hatası iptalin beklenen sonucudur
+            if not cancel.cancelled:
+                raise
+        finally:
+            cancel.remove_callback(abort)
+        
+        return full_content
+
+    def _submit_function_calls(self, function_calls: List[Tuple[str, Dict[str, Any]]], question: str) -> list:
+        """Fonksiyon çağrılarını paylaşılan havuza gönderir."""
+        futures = []
+        for fn_name, args in function_calls:
+            # Etkin iz havuzdaki iş parçacığına bağlamla birlikte taşınır
+            run = contextvars.copy_context().run
+            futures.append((fn_name, _tool_executor.submit(run, self._execute_function, fn_name, args, question)))
+        return futures
+
+    @staticmethod
+    def _timeout_result() -> Dict[str, Any]:
+        return {"error": f"Fonksiyon zaman aşımına uğradı ({Config.TOOL_TIMEOUT} sn)."}
+
+    @staticmethod
+    def _cancelled_result() -> Dict[str, Any]:
+        return {"error": "Fonksiyon çağrısı yanıt durdurulduğu için iptal edildi."}
+
+    def _collect_results(self, futures: list, done: set, cancelled: bool) -> List[Tuple[str, Dict[str, Any]]]:
+        """Biten çağrıların sonuçlarını toplar; bitmeyenleri iptal edip hata sonucu koyar."""
+        results = []
+        for fn_name, future in futures:
+            if future in done:
+                result = future.result()
+            else:
+                # Henüz başlamamış çağrılar havuzdan düşer; çalışanlar kendi zaman aşımıyla biter
+                future.cancel()
+                result = self._cancelled_result() if cancelled else self._timeout_result()
+            results.append((fn_name, result))
+        return results
+
+    def _run_function_calls(
+        self, function_calls: List[Tuple[str, Dict[str, Any]]], question: str,
+        cancel: CancelToken
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Aynı turdaki fonksiyon çağrılarını paylaşılan havuzda eşzamanlı yürütür.
+        İptal edilirse bekleme hemen biter ve bitmemiş çağrılar iptal edilir.
+        
+        Args:
+            function_calls: (isim, argüman) çiftleri
+            question: Kullanıcının sorusu
+            cancel: Turun iptal işareti
+            
+        Returns:
+            List[Tuple]: Çağrı sırasıyla (isim, sonuç) çiftleri
+        """
+        futures = self._submit_function_calls(function_calls, question)
+        
+        # İptal bekleyen wait() çağrısını uyandıran yardımcı future
+        cancelled = Future()
+        wake = lambda: cancelled.done() or cancelled.set_result(None)
+        cancel.add_callback(wake)
+        
+        # Çağrılar paralel çalıştığı için tümü aynı son tarihi paylaşır
+        deadline = time.monotonic() + Config.TOOL_TIMEOUT
+        pending = {future for _, future in futures}
+        done = set()
+        try:
+            while pending and not cancel.cancelled:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                finished, _ = wait_futures(pending | {cancelled}, timeout=remaining, return_when=FIRST_COMPLETED)
+                finished.discard(cancelled)
+                done |= finished
+                pending -= finished
+        finally:
+            cancel.remove_callback(wake)
+        return self._collect_results(futures, done, cancel.cancelled)
+
+    async def _run_function_calls_async(
+        self, function_calls: List[Tuple[str, Dict[str, Any]]], question: str
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        ``_run_function_calls`` ile aynı işi event loop'u bloklamadan yapar.
+        Wikipedia istekleri havuzdaki iş parçacıklarında çalışır; bekleme
+        sırasında loop diğer akışlara hizmet vermeye devam eder.
+        """
+        futures = self._submit_function_calls(function_calls, question)
+        wrapped = [asyncio.wrap_future(future) for _, future in futures]
+        try:
+            await asyncio.wait(wrapped, timeout=Config.TOOL_TIMEOUT)
+        except asyncio.CancelledError:
+            # Görev iptal edildi; henüz başlamamış çağrıları havuzdan düşür
+            for _, future in futures:
+                future.cancel()
+            raise
+        done = {future for _, future in futures if future.done() and not future.cancelled()}
+        return self._collect_results(futures, done, False)
+
+    @staticmethod
+    def _to_function_response(fn_name: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fonksiyon sonucunu Gemini ``function_response`` parçasına çevirir.
+        Sonuç JSON uyumlu hale getirilir ve model'in ihtiyaç duymadığı
+        ``shaping`` istatistikleri çıkarılır.
+        """
+        response = {k: v for k, v in result.items() if k != "shaping"}
+        payload = json.dumps(response, ensure_ascii=False, default=str)
+        metrics.TOOL_PAYLOAD.labels(fn_name if fn_name in TOOL_NAMES else "unknown").observe(
+            len(payload.encode("utf-8"))
+        )
+        return {"function_response": {"name": fn_name, "response": json.loads(payload)}}
+
+    def _budget_exhausted(self, started: float, tokens_used: int) -> bool:
+        """Ajan döngüsünün süre veya token bütçesini aşıp aşmadığını kontrol eder."""
+        return (time.monotonic() - started >= Config.AGENT_TIME_BUDGET or
+                tokens_used >= Config.AGENT_TOKEN_BUDGET)
+
+    def _start_turn(self, user_message: str):
+        """Gemini'yi önceki geçmişle başlatır, ardından mesajı geçmişe ekler."""
+        chat = self.model.start_chat(history=self._get_limited_history())
+        self.history.append({
+            "role": "user", 
+            "parts": [{"text": user_message}]
+        })
+        return chat
+
+    def _record_model_turn(
+        self, text: str, function_calls: List[Tuple[str, Dict[str, Any]]], final_round: bool
+    ) -> bool:
+        """
+        Model'in tur yanıtını geçmişe ekler.
+        
+        Returns:
+            bool: Yanıt tamamlandıysa True (yürütülecek fonksiyon çağrısı yok)
+        """
+        if not function_calls or final_round:
+            if text:
+                self.history.append({
+                    "role": "model", 
+                    "parts": [{"text": text}]
+                })
+            return True
+
+        model_parts = [{"text": text}] if text else []
+        model_parts += [{"function_call": {"name": n, "args": a}} for n, a in function_calls]
+        self.history.append({"role": "model", "parts": model_parts})
+        return False
+
+    def _record_cancelled_turn(self, text: str, pending_calls: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        İptal edilen turu geçmişte tutarlı biçimde kapatır: yanıtsız kalan
+        fonksiyon çağrılarına iptal sonucu yazılır, ardından o ana kadarki
+        metin iptal notuyla birlikte model yanıtı olarak eklenir. Böylece
+        sonraki tur her zaman kapanmış bir model yanıtının ardından başlar.
+        
+        Args:
+            text: Geçmişe henüz yazılmamış kısmi metin
+            pending_calls: Geçmişe yazılmış ama sonucu yazılmamış çağrılar
+        """
+        if pending_calls:
+            self._record_function_results([(fn_name, self._cancelled_result()) for fn_name, _ in pending_calls])
+        note = f"{text}\n\n{CANCELLED_NOTE}" if text else CANCELLED_NOTE
+        self.history.append({"role": "model", "parts": [{"text": note}]})
+        tracing.current_trace().set(partial_chars=len(text), unanswered_calls=len(pending_calls))
+
+    def _record_function_results(self, results: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Tüm sonuçları tek bir mesajda geçmişe ekler ve sonraki turun girdisi olarak döndürür."""
+        content = {
+            "role": "function",
+            "parts": [self._to_function_response(fn_name, result) for fn_name, result in results]
+        }
+        self.history.append(content)
+        return content
+
+    def chat_stream(self, user_message: str, cancel: Optional[CancelToken] = None) -> Generator[Dict[str, Any], None, None]:
         """
         Kullanıcı mesajını işler ve streaming yanıt döndürür.
         
+        Model araç çağırdıkça sonuçlar ``function_response`` olarak geri
+        gönderilir; döngü ``AGENT_MAX_ROUNDS`` tur, ``AGENT_TIME_BUDGET``
+        saniye veya ``AGENT_TOKEN_BUDGET`` token ile sınırlıdır. Son turda
+        araçlar kapatılır ve model metin yanıtı vermeye zorlanır.
+        
+        ``cancel`` iptal edilirse (veya üreteç kapatılırsa) Gemini akışı ve
+        bekleyen araç çağrıları kesilir, kısmi yanıt geçmişe yazılır ve akış
+        ``{"type": "end", "cancelled": True}`` ile biter.
+        
         Args:
             user_message: Kullanıcının gönderdiği mesaj
+            cancel: Turun iptal işareti (opsiyonel)
             
         Yields:
             Dict: Streaming chunk'ları
         """
+        cancel = cancel or CancelToken()
+        # İptalde geçmişe yazılacak, henüz kaydedilmemiş metin ve yanıtsız çağrılar
+        usage: Dict[str, Any] = {"tokens": 0, "text": ""}
+        pending_calls: List[Tuple[str, Dict[str, Any]]] = []
+        completed = False
         try:
-            # Kullanıcı mesajını geçmişe ekle
-            self.messages.append({
-                "role": "user", 
-                "parts": [{"text": user_message}]
-            })
-            print(f"📝 Kullanıcı mesajı: {user_message}")
-
-            # Gemini'yi çağır
-            chat = self.model.start_chat(history=self._get_limited_history())
+            chat = self._start_turn(user_message)
+            started = time.monotonic()
+            tokens_used = 0
+            content: Any = user_message
             
-            response = chat.send_message(
-                user_message,
-                tools=self.get_tools(),
-                stream=True
-            )
+            for round_number in range(1, Config.AGENT_MAX_ROUNDS + 1):
+                if cancel.cancelled:
+                    break
+                final_round = (round_number == Config.AGENT_MAX_ROUNDS or
+                               self._budget_exhausted(started, tokens_used))
+                
+                round_started = time.monotonic()
+                with tracing.span(_round_span_name(round_number), round=round_number) as span:
+                    response = chat.send_message(
+                        content,
+                        tool_config=NO_TOOLS_CONFIG if final_round else None,
+                        stream=True
+                    )
 
-            full_content = ""
-            function_calls = []
-            accumulated_text = ""
+                    function_calls: List[Tuple[str, Dict[str, Any]]] = []
+                    usage = {"tokens": 0, "text": ""}
+                    text = yield from self._stream_response(response, function_calls, usage, cancel)
+                    span.set(chars=len(text), tokens=usage["tokens"], function_calls=len(function_calls))
+                    if cancel.cancelled:
+                        span.end("cancelled")
+                if cancel.cancelled:
+                    break
+                metrics.GEMINI_ROUND.labels(round_number).observe(time.monotonic() - round_started)
+                function_calls = [(fn_name, args) for fn_name, args in function_calls if fn_name]
+                # usage_metadata yoksa kaba tahmin (~4 karakter = 1 token)
+                tokens_used += usage["tokens"] or (len(str(content)) + len(text)) // 4
 
-            # Response'u stream et
-            for chunk in response:
-                if chunk.candidates and chunk.candidates[0].content:
-                    parts = chunk.candidates[0].content.parts
-                    if parts and hasattr(parts[0], 'text'):
-                        content = parts[0].text
-                        if content:
-                            full_content += content
-                            accumulated_text += content
-                            
-                            if len(accumulated_text) >= 10:
-                                for stream_chunk in self._stream_text_char_by_char(accumulated_text):
-                                    yield stream_chunk
-                                accumulated_text = ""
+                completed = self._record_model_turn(text, function_calls, final_round)
+                usage["text"] = ""
+                if completed:
+                    break
                 
-                # Fonksiyon çağrılarını kontrol et
-                if (chunk.candidates and 
-                    chunk.candidates[0].content and 
-                    chunk.candidates[0].content.parts and 
-                    hasattr(chunk.candidates[0].content.parts[0], 'function_call')):
-                    
-                    function_call = chunk.candidates[0].content.parts[0].function_call
-                    fn_name = function_call.name
-                    
-                    if hasattr(function_call, 'args') and function_call.args:
-                        args = {k: v for k, v in function_call.args.items()}
-                    else:
-                        args = {}
-                    
-                    function_calls.append((fn_name, args))
-                    yield {"type": "function_call", "function": fn_name, "args": args}
-
-            # Kalan text'i gönder
-            if accumulated_text:
-                for stream_chunk in self._stream_text_char_by_char(accumulated_text):
-                    yield stream_chunk
-
-            # Fonksiyon çağrılarını işle
-            if function_calls:
-                for fn_name, args in function_calls:
-                    if not fn_name:
-                        print("⚠️ Boş fonksiyon ismi, atlanıyor...")
-                        continue
-                    
-                    print(f"🔧 Fonksiyon çağrısı: {fn_name} - {args}")
-                    result = self._execute_function(fn_name, args)
-                    yield {"type": "function_result", "result": result}
-
-                    # Fonksiyon sonucunu geçmişe ekle
-                    self.messages.append({
-                        "role": "function",
-                        "parts": [{
-                            "function_response": {
-                                "name": fn_name,
-                                "response": result
-                            }
-                        }]
-                    })
-
-                    # Fonksiyon sonucu ile tekrar çağır
-                    follow_up_response = chat.send_message(
-                        f"Fonksiyon sonucu: {result}",
+                pending_calls = function_calls
+                results = self._run_function_calls(function_calls, user_message, cancel)
+                content = self._record_function_results(results)
+                pending_calls = []
+                for fn_name, result in results:
+                    yield {"type": "function_result", "function": fn_name, "result": result}
+
+            if not completed:
+                self._record_cancelled_turn(usage["text"], pending_calls)
+                yield dict(CANCELLED_END)
+                return
+            yield {"type": "end"}
+
+        except GeneratorExit:
+            # Tüketici akışı bıraktı (ör. bağlantı kapandı)
+            if not completed:
+                cancel.cancel("closed")
+                self._record_cancelled_turn(usage["text"], pending_calls)
+            raise
+
+        except Exception as e:
+            print("🔥 chat_stream hatası:", traceback.format_exc())
+            yield {"type": "error", "error": str(e), "trace": traceback.format_exc()}
+
+    async def chat_stream_async(self, user_message: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        ``chat_stream``'in asyncio karşılığı (ASGI sunucusu için).
+        
+        Gemini yanıtı ``send_message_async`` ile, araç çağrıları havuzda
+        bloklamadan beklenir; böylece bir süreç binlerce açık akışı tek
+        event loop üzerinde taşıyabilir. Üretilen chunk'lar ve geçmiş
+        kayıtları senkron sürümle aynıdır.
+        
+        İptal, akışı çalıştıran görevin ``cancel()`` edilmesiyle yapılır:
+        ``CancelledError`` Gemini bağlantısını ve bekleyen araç çağrılarını
+        keser, kısmi yanıt geçmişe yazılır ve hata yeniden fırlatılır.
+        
+        Args:
+            user_message: Kullanıcının gönderdiği mesaj
+            
+        Yields:
+            Dict: Streaming chunk'ları
+        """
+        response = None
+        text = ""
+        pending_calls: List[Tuple[str, Dict[str, Any]]] = []
+        completed = False
+        try:
+            chat = self._start_turn(user_message)
+            started = time.monotonic()
+            tokens_used = 0
+            content: Any = user_message
+            
+            for round_number in range(1, Config.AGENT_MAX_ROUNDS + 1):
+                final_round = (round_number == Config.AGENT_MAX_ROUNDS or
+                               self._budget_exhausted(started, tokens_used))
+                
+                round_started = time.monotonic()
+                with tracing.span(_round_span_name(round_number), round=round_number) as span:
+                    response = await chat.send_message_async(
+                        content,
+                        tool_config=NO_TOOLS_CONFIG if final_round else None,
                         stream=True
                     )
 
-                    follow_up_content = ""
-                    follow_up_accumulated = ""
-                    
-                    for follow_chunk in follow_up_response:
-                        if follow_chunk.candidates and follow_chunk.candidates[0].content:
-                            parts = follow_chunk.candidates[0].content.parts
-                            if parts and hasattr(parts[0], 'text'):
-                                content = parts[0].text
-                                if content:
-                                    follow_up_content += content
-                                    follow_up_accumulated += content
-                                    
-                                    if len(follow_up_accumulated) >= 10:
-                                        for stream_chunk in self._stream_text_char_by_char(follow_up_accumulated):
-                                            yield stream_chunk
-                                        follow_up_accumulated = ""
-                    
-                    if follow_up_accumulated:
-                        for stream_chunk in self._stream_text_char_by_char(follow_up_accumulated):
-                            yield stream_chunk
-
-                    if follow_up_content:
-                        self.messages.append({
-                            "role": "model", 
-                            "parts": [{"text": follow_up_content}]
-                        })
-            else:
-                if full_content:
-                    self.messages.append({
-                        "role": "model", 
-                        "parts": [{"text": full_content}]
-                    })
+                    function_calls: List[Tuple[str, Dict[str, Any]]] = []
+                    usage = {"tokens": 0}
+                    async for chunk in response:
+                        events, chunk_text = self._consume_chunk(chunk, function_calls, usage)
+                        text += chunk_text
+                        for event in events:
+                            yield event
+                    span.set(chars=len(text), tokens=usage["tokens"], function_calls=len(function_calls))
+                metrics.GEMINI_ROUND.labels(round_number).observe(time.monotonic() - round_started)
+                
+                function_calls = [(fn_name, args) for fn_name, args in function_calls if fn_name]
+                tokens_used += usage["tokens"] or (len(str(content)) + len(text)) // 4
+
+                completed = self._record_model_turn(text, function_calls, final_round)
+                text = ""
+                if completed:
+                    break
+                
+                pending_calls = function_calls
+                results = await self._run_function_calls_async(function_calls, user_message)
+                content = self._record_function_results(results)
+                pending_calls = []
+                for fn_name, result in results:
+                    yield {"type": "function_result", "function": fn_name, "result": result}
 
             yield {"type": "end"}
 
+        except (asyncio.CancelledError, GeneratorExit):
+            if not completed:
+                closing = _abort_upstream(response)
+                if asyncio.iscoroutine(closing):
+                    try:
+                        await closing
+                    except Exception:
+                        pass
+                self._record_cancelled_turn(text, pending_calls)
+            raise
+
         except Exception as e:
-            print("🔥 chat_stream hatası:", traceback.format_exc())
+            print("🔥 chat_stream_async hatası:", traceback.format_exc())
             yield {"type": "error", "error": str(e), "trace": traceback.format_exc()}
 
 
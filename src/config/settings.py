@@ -19,8 +19,46 @@ class Config:
     
     # Chatbot Ayarları
     MAX_HISTORY: int = int(os.getenv("MAX_HISTORY", "15"))
+    # Model'e gönderilen geçmişin token bütçesi (turlar bölünmeden kırpılır)
+    HISTORY_TOKEN_BUDGET: int = int(os.getenv("HISTORY_TOKEN_BUDGET", "8000"))
+    HISTORY_SUMMARIZE_TOOLS: bool = os.getenv("HISTORY_SUMMARIZE_TOOLS", "True").lower() == "true"
     MAX_CHATBOT_INSTANCES: int = int(os.getenv("MAX_INSTANCES", "100"))
-    STREAM_CHUNK_SIZE: int = int(os.getenv("STREAM_CHUNK_SIZE", "3"))
+    SESSION_IDLE_TTL: int = int(os.getenv("SESSION_IDLE_TTL", "3600"))
+    SESSION_MAX_BYTES: int = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+    SESSION_LOCK_TIMEOUT: float = float(os.getenv("SESSION_LOCK_TIMEOUT", "30"))
+    # Oturum kalıcılığı: "" (kapalı), memory://, sqlite:///yol.db, redis://host:6379/0
+    SESSION_BACKEND_URL: str = os.getenv("SESSION_BACKEND_URL", "")
+    # Akış birleştirme (tek katman): metin parçaları bu boyuta ulaşınca veya bu süre
+    # dolunca tek SSE çerçevesinde gönderilir
+    SSE_FLUSH_BYTES: int = int(os.getenv("SSE_FLUSH_BYTES", "512"))
+    SSE_FLUSH_INTERVAL_MS: int = int(os.getenv("SSE_FLUSH_INTERVAL_MS", "100"))
+    # Yeniden bağlanma (Last-Event-ID): tur başına tampon bütçesi ve biten turun saklanma süresi (saniye)
+    STREAM_REPLAY_MAX_BYTES: int = int(os.getenv("STREAM_REPLAY_MAX_BYTES", str(2 * 1024 * 1024)))
+    STREAM_REPLAY_TTL: float = float(os.getenv("STREAM_REPLAY_TTL", "120"))
+    # Son istemci ayrıldıktan sonra yeniden bağlanma beklenen süre; dolunca tur iptal edilir (negatif: kapalı)
+    STREAM_DISCONNECT_GRACE: float = float(os.getenv("STREAM_DISCONNECT_GRACE", "15"))
+    # Flask turları: aynı anda çalışan en fazla tur ve sırada bekleyebilecek tur (doluysa 503)
+    TURN_MAX_WORKERS: int = int(os.getenv("TURN_MAX_WORKERS", "32"))
+    TURN_QUEUE_SIZE: int = int(os.getenv("TURN_QUEUE_SIZE", "64"))
+    
+    # İstek izleme: span'lar bu JSONL dosyasına yazılır ("" ise kapalı); istek başında örneklenir
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "")
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+    TRACE_QUEUE_SIZE: int = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))
+    
+    # Araç (function calling) Ayarları
+    TOOL_MAX_WORKERS: int = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+    TOOL_TIMEOUT: float = float(os.getenv("TOOL_TIMEOUT", "20"))
+    
+    # Çok adımlı araç döngüsü sınırları (tur, saniye, toplam token)
+    AGENT_MAX_ROUNDS: int = int(os.getenv("AGENT_MAX_ROUNDS", "5"))
+    AGENT_TIME_BUDGET: float = float(os.getenv("AGENT_TIME_BUDGET", "60"))
+    AGENT_TOKEN_BUDGET: int = int(os.getenv("AGENT_TOKEN_BUDGET", "60000"))
+    
+    # Yeni sohbetlerdeki aynı ilk sorular için yanıt önbelleği (varsayılan kapalı)
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "False").lower() == "true"
+    RESPONSE_CACHE_TTL: int = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
     
     # Flask Ayarları
     DEBUG: bool = os.getenv("FLASK_DEBUG", "True").lower() == "true"
@@ -32,10 +70,56 @@ class Config:
     CALC_MAX_LEN: int = int(os.getenv("CALC_MAX_LEN", "200"))
     CALC_MAX_OPERATORS: int = int(os.getenv("CALC_MAX_OPERATORS", "60"))
     CALC_MAX_EXPONENT: int = int(os.getenv("CALC_MAX_EXPONENT", "6"))
+    # Derlenmiş numexpr programları için LRU önbellek boyutu
+    CALC_CACHE_SIZE: int = int(os.getenv("CALC_CACHE_SIZE", "512"))
+    # Oturum başına saklanan en fazla hesaplama kaydı (eskiler düşer)
+    CALC_HISTORY_SIZE: int = int(os.getenv("CALC_HISTORY_SIZE", "50"))
+    # Toplu hesaplama: en fazla değer sayısı, tam listelenecek sonuç sayısı, numexpr iş parçacığı (0 = varsayılan)
+    CALC_BATCH_MAX_ITEMS: int = int(os.getenv("CALC_BATCH_MAX_ITEMS", "100000"))
+    CALC_BATCH_RESULT_LIMIT: int = int(os.getenv("CALC_BATCH_RESULT_LIMIT", "50"))
+    CALC_BATCH_THREADS: int = int(os.getenv("CALC_BATCH_THREADS", "0"))
     
     # Wikipedia Ayarları
     WIKI_USER_AGENT: str = os.getenv("WIKI_USER_AGENT", "vikipedi-chatbot/1.0")
     WIKI_LANGUAGE: str = os.getenv("WIKI_LANGUAGE", "tr")
+    # Sorgu dili tespitinde aday diller ve sayfa bulunamazsa bakılacak yedek diller (virgülle ayrılmış)
+    WIKI_LANGUAGES: str = os.getenv("WIKI_LANGUAGES", "tr,en")
+    WIKI_FALLBACK_LANGUAGES: str = os.getenv("WIKI_FALLBACK_LANGUAGES", "en")
+    WIKI_BACKEND: str = os.getenv("WIKI_BACKEND", "api")  # "api" veya "dump"
+    WIKI_DUMP_PATH: str = os.getenv("WIKI_DUMP_PATH", "")
+    WIKI_DUMP_INDEX_PATH: str = os.getenv("WIKI_DUMP_INDEX_PATH", "")
+    
+    # Wikipedia HTTP istemcisi (bağlantı havuzu, zaman aşımları, yeniden deneme)
+    WIKI_POOL_SIZE: int = int(os.getenv("WIKI_POOL_SIZE", "16"))
+    WIKI_CONNECT_TIMEOUT: float = float(os.getenv("WIKI_CONNECT_TIMEOUT", "3.05"))
+    WIKI_READ_TIMEOUT: float = float(os.getenv("WIKI_READ_TIMEOUT", "10"))
+    WIKI_MAX_RETRIES: int = int(os.getenv("WIKI_MAX_RETRIES", "3"))
+    WIKI_RETRY_BACKOFF: float = float(os.getenv("WIKI_RETRY_BACKOFF", "0.5"))
+    
+    # Ön yükleme: search_info sonrasında bağlantılı sayfalar arka planda önbelleğe alınır.
+    # Wikipedia trafiğini katlayabildiği için varsayılan olarak kapalıdır; açılırsa
+    # dakikalık istek bütçesiyle ve kendi küçük bağlantı havuzuyla çalışır (0: bütçe yok)
+    WIKI_PREFETCH_ENABLED: bool = os.getenv("WIKI_PREFETCH_ENABLED", "False").lower() == "true"
+    WIKI_PREFETCH_MAX_PAGES: int = int(os.getenv("WIKI_PREFETCH_MAX_PAGES", "5"))
+    WIKI_PREFETCH_WORKERS: int = int(os.getenv("WIKI_PREFETCH_WORKERS", "1"))
+    WIKI_PREFETCH_MAX_PENDING: int = int(os.getenv("WIKI_PREFETCH_MAX_PENDING", "8"))
+    WIKI_PREFETCH_BUDGET_PER_MINUTE: int = int(os.getenv("WIKI_PREFETCH_BUDGET_PER_MINUTE", "60"))
+    WIKI_PREFETCH_POOL_SIZE: int = int(os.getenv("WIKI_PREFETCH_POOL_SIZE", "2"))
+    
+    # Başlık çözümleme (bulunamayan sayfalar için bulanık eşleşme)
+    WIKI_TITLE_INDEX_PATH: str = os.getenv("WIKI_TITLE_INDEX_PATH", "")
+    WIKI_TITLES_PATH: str = os.getenv("WIKI_TITLES_PATH", "")
+    WIKI_FUZZY_THRESHOLD: float = float(os.getenv("WIKI_FUZZY_THRESHOLD", "0.6"))
+    
+    # Araç sonucu budama bütçesi (karakter; ~4 karakter = 1 token)
+    TOOL_RESULT_MAX_CHARS: int = int(os.getenv("TOOL_RESULT_MAX_CHARS", "6000"))
+    # İlk Wikipedia yanıtı: "ranked" (alakalı bölümler) veya "outline" (özet + içindekiler)
+    WIKI_FIRST_RESPONSE: str = os.getenv("WIKI_FIRST_RESPONSE", "ranked")
+    
+    # Wikipedia Önbellek Ayarları
+    WIKI_CACHE_MAX_BYTES: int = int(os.getenv("WIKI_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    WIKI_CACHE_TTL: int = int(os.getenv("WIKI_CACHE_TTL", "21600"))
+    WIKI_CACHE_DB_PATH: str = os.getenv("WIKI_CACHE_DB_PATH", "")
     
     @classmethod
     def validate(cls) -> bool:
@@ -51,9 +135,17 @@ class Config:
         return {
             "GEMINI_MODEL": cls.GEMINI_MODEL,
             "MAX_HISTORY": cls.MAX_HISTORY,
+            "HISTORY_TOKEN_BUDGET": cls.HISTORY_TOKEN_BUDGET,
             "MAX_CHATBOT_INSTANCES": cls.MAX_CHATBOT_INSTANCES,
+            "SESSION_IDLE_TTL": cls.SESSION_IDLE_TTL,
+            "RESPONSE_CACHE_ENABLED": cls.RESPONSE_CACHE_ENABLED,
             "DEBUG": cls.DEBUG,
             "HOST": cls.HOST,
             "PORT": cls.PORT,
             "WIKI_LANGUAGE": cls.WIKI_LANGUAGE,
+            "WIKI_LANGUAGES": cls.WIKI_LANGUAGES,
+            "WIKI_BACKEND": cls.WIKI_BACKEND,
+            "WIKI_CACHE_MAX_BYTES": cls.WIKI_CACHE_MAX_BYTES,
+            "WIKI_CACHE_TTL": cls.WIKI_CACHE_TTL,
+            "WIKI_CACHE_DB_PATH": cls.WIKI_CACHE_DB_PATH,
         }
@@ -0,0 +1,202 @@
+"""
+Sohbet Geçmişi Yönetimi.
+Mesaj başına yaklaşık token sayısını artımlı olarak tutar ve model'e
+gönderilecek geçmişi token bütçesine göre, turları bölmeden kırpar.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+# Kaba token tahmini: ~4 karakter = 1 token, mesaj başına sabit ek yük
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Özetlenen araç çıktılarında korunacak metin uzunluğu
+SUMMARY_TEXT_CHARS = 300
+# Bu boyutun altındaki araç çıktıları özetlenmez
+SUMMARY_MIN_CHARS = 600
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def estimate_tokens(message: Dict[str, Any]) -> int:
+    """
+    Mesajın yaklaşık token sayısını hesaplar.
+
+    Args:
+        message: ``{"role": ..., "parts": [...]}`` biçiminde mesaj
+
+    Returns:
+        int: Tahmini token sayısı
+    """
+    chars = 0
+    for part in message.get("parts", []):
+        if "text" in part:
+            chars += len(part["text"])
+        else:
+            chars += len(_dumps(part))
+    return chars // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def _compact_value(value: Any) -> Any:
+    """Araç sonucundaki uzun metinleri kısaltır, iç içe listeleri atar."""
+    if isinstance(value, str):
+        if len(value) > SUMMARY_TEXT_CHARS:
+            return value[:SUMMARY_TEXT_CHARS].rstrip() + " …"
+        return value
+    if isinstance(value, dict):
+        return {k: _compact_value(v) for k, v in value.items() if not isinstance(v, list)}
+    return value
+
+
+def summarize_tool_message(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    ``function`` mesajındaki büyük araç çıktılarını kompakt özetlerle değiştirir.
+
+    Args:
+        message: ``function`` rolündeki mesaj
+
+    Returns:
+        Optional[Dict]: Özetlenmiş mesaj; özetlenecek bir şey yoksa None
+    """
+    changed = False
+    parts = []
+    for part in message.get("parts", []):
+        response = part.get("function_response") if isinstance(part, dict) else None
+        if response and len(_dumps(response.get("response"))) > SUMMARY_MIN_CHARS:
+            compact = _compact_value(response.get("response") or {})
+            compact["summarized"] = True
+            parts.append({"function_response": {"name": response.get("name"), "response": compact}})
+            changed = True
+        else:
+            parts.append(part)
+    if not changed:
+        return None
+    return {"role": message["role"], "parts": parts}
+
+
+def _starts_turn(message: Dict[str, Any]) -> bool:
+    """Kullanıcının metin mesajı yeni bir tur başlatır."""
+    return message.get("role") == "user" and any("text" in p for p in message.get("parts", []))
+
+
+class ConversationHistory:
+    """
+    Token bütçeli sohbet geçmişi.
+
+    Her mesajın token tahmini eklendiği anda hesaplanır; ``window`` en yeni
+    turlardan geriye doğru bütçe dolana kadar tam turları seçer. Böylece
+    geçmiş hiçbir zaman yetim bir ``function`` mesajıyla başlamaz.
+    """
+
+    def __init__(self, token_budget: int, max_messages: Optional[int] = None,
+                 summarize_tools: bool = True, keep_recent_turns: int = 1):
+        """
+        Args:
+            token_budget: Model'e gönderilecek geçmiş için token bütçesi
+            max_messages: Penceredeki en fazla mesaj sayısı (opsiyonel)
+            summarize_tools: Eski turlardaki araç çıktılarını özetle
+            keep_recent_turns: Araç çıktıları tam bırakılacak son tur sayısı
+        """
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self.summarize_tools = summarize_tools
+        self.keep_recent_turns = keep_recent_turns
+        self._messages: List[Dict[str, Any]] = []
+        self._tokens: List[int] = []
+        self._compact: List[Optional[Dict[str, Any]]] = []
+        self._compact_tokens: List[int] = []
+        self._total_tokens = 0
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        """Tam (kırpılmamış) mesaj listesi."""
+        return self._messages
+
+    @property
+    def total_tokens(self) -> int:
+        """Tüm geçmişin tahmini token sayısı."""
+        return self._total_tokens
+
+    def append(self, message: Dict[str, Any]) -> None:
+        """
+        Mesajı ekler ve token tahminini günceller.
+
+        Args:
+            message: ``{"role": ..., "parts": [...]}`` biçiminde mesaj
+        """
+        tokens = estimate_tokens(message)
+        compact = summarize_tool_message(message) if message.get("role") == "function" else None
+        self._messages.append(message)
+        self._tokens.append(tokens)
+        self._compact.append(compact)
+        self._compact_tokens.append(estimate_tokens(compact) if compact else tokens)
+        self._total_tokens += tokens
+
+    def extend(self, messages: List[Dict[str, Any]]) -> None:
+        """Birden fazla mesajı sırayla ekler."""
+        for message in messages:
+            self.append(message)
+
+    def clear(self) -> None:
+        """Geçmişi sıfırlar."""
+        self._messages = []
+        self._tokens = []
+        self._compact = []
+        self._compact_tokens = []
+        self._total_tokens = 0
+
+    def _turn_starts(self) -> List[int]:
+        starts = [i for i, m in enumerate(self._messages) if _starts_turn(m)]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        return starts
+
+    def window(self) -> List[Dict[str, Any]]:
+        """
+        Token bütçesine sığan en yeni tam turları döndürür.
+
+        Son ``keep_recent_turns`` tur dışındaki araç çıktıları (açıksa)
+        özetleriyle değiştirilir. En yeni tur bütçeyi tek başına aşsa bile
+        pencereye alınır.
+
+        Returns:
+            List[Dict]: Model'e gönderilecek mesajlar
+        """
+        if not self._messages:
+            return []
+
+        starts = self._turn_starts()
+        ends = starts[1:] + [len(self._messages)]
+        selected: List[List[Dict[str, Any]]] = []
+        used_tokens = 0
+        used_messages = 0
+
+        for turn_index in range(len(starts) - 1, -1, -1):
+            start, end = starts[turn_index], ends[turn_index]
+            compact = self.summarize_tools and len(selected) >= self.keep_recent_turns
+            tokens = sum((self._compact_tokens if compact else self._tokens)[start:end])
+            count = end - start
+
+            if selected and (used_tokens + tokens > self.token_budget or
+                             (self.max_messages and used_messages + count > self.max_messages)):
+                break
+
+            turn = [
+                (self._compact[i] or self._messages[i]) if compact else self._messages[i]
+                for i in range(start, end)
+            ]
+            selected.append(turn)
+            used_tokens += tokens
+            used_messages += count
+
+        return [message for turn in reversed(selected) for message in turn]
+
+    def window_tokens(self) -> int:
+        """``window`` sonucunun tahmini token sayısı."""
+        return sum(estimate_tokens(m) for m in self.window())
+
+    def __len__(self) -> int:
+        return len(self._messages)
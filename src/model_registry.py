@@ -0,0 +1,118 @@
+"""
+Model Kayıt Defteri.
+Süreç genelinde paylaşılan ``GenerativeModel`` nesnelerini ve bir kez
+derlenen araç tanımlarını tutar. Sohbet nesneleri yalnızca geçmişlerini
+taşır; model, araç şeması ve alttaki HTTP/gRPC istemcisi tüm sohbetlerde
+ortaktır.
+"""
+
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import google.generativeai as genai
+from google.generativeai.types import content_types
+
+try:
+    from src.services import calculator, wikipedia
+    from src.config import Config
+except ImportError:
+    from services import calculator
+    from services import wikipedia
+    from config import Config
+
+# Gemini client başlat (istemci ve bağlantı havuzu süreç genelinde tektir)
+genai.configure(api_key=Config.GEMINI_API_KEY or os.getenv("GEMINI_API_KEY"))
+
+_models: Dict[Tuple[str, Optional[str]], genai.GenerativeModel] = {}
+_models_lock = threading.Lock()
+_tool_library = None
+
+
+def _build_tool_declarations() -> Tuple[Dict[str, Any], ...]:
+    return (
+        {"function_declarations": [
+            calculator.get_function_def(),
+            calculator.get_batch_function_def(),
+            calculator.get_recall_function_def()
+        ]},
+        {"function_declarations": [wikipedia.get_function_def(), wikipedia.get_section_function_def()]},
+    )
+
+
+def _freeze(value: Any) -> Any:
+    """Sözlükleri salt okunur görünüme, listeleri demete çevirir (iç içe)."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """``_freeze`` çıktısının değiştirilebilir kopyasını üretir."""
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+# Araç tanımları başlangıçta bir kez üretilir; tüm sohbetler aynı nesneyi
+# paylaştığı için salt okunurdur
+TOOL_DECLARATIONS = _freeze(_build_tool_declarations())
+
+
+def tool_declarations() -> List[Dict[str, Any]]:
+    """Paylaşılan araç tanımlarının değiştirilebilir bir kopyasını döndürür."""
+    return _thaw(TOOL_DECLARATIONS)
+
+
+def get_tool_library() -> content_types.FunctionLibrary:
+    """
+    Araç tanımlarının Gemini ``FunctionLibrary`` karşılığını döndürür.
+    Dönüşüm ilk çağrıda bir kez yapılır.
+    """
+    global _tool_library
+    if _tool_library is None:
+        with _models_lock:
+            if _tool_library is None:
+                _tool_library = content_types.to_function_library(tool_declarations())
+    return _tool_library
+
+
+def get_model(model_name: str, system_instruction: Optional[str] = None) -> genai.GenerativeModel:
+    """
+    Model adı ve sistem talimatına göre paylaşılan modeli döndürür.
+    Aynı (ad, talimat) çifti için her zaman aynı nesne döner.
+
+    Model araç kütüphanesiyle birlikte oluşturulur; ``send_message``
+    çağrılarında araçların her seferinde yeniden dönüştürülmesi gerekmez.
+
+    Args:
+        model_name: Gemini model adı
+        system_instruction: Sistem talimatı (None ise gönderilmez)
+
+    Returns:
+        genai.GenerativeModel: Paylaşılan model
+    """
+    key = (model_name, system_instruction)
+    model = _models.get(key)
+    if model is None:
+        tools = get_tool_library()
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(
+                    model_name,
+                    system_instruction=system_instruction,
+                    tools=tools
+                )
+                _models[key] = model
+    return model
+
+
+def clear() -> None:
+    """Kayıtlı modelleri temizler (testler ve yapılandırma değişikliği için)."""
+    with _models_lock:
+        _models.clear()
@@ -0,0 +1,6 @@
+# Observability package
+from .metrics import (
+    REGISTRY, CONTENT_TYPE, Counter, Histogram, MetricsRegistry,
+    instrument_stream, instrument_stream_async
+)
+from .tracing import JsonlExporter, Tracer, activate, current_trace, get_tracer
@@ -0,0 +1,327 @@
+"""
+Metrik Servisi.
+Sıcak yoldaki gecikmeleri ve sayaçları Prometheus metin biçiminde
+(``/metrics``) dışa aktarır. Harici bağımlılık gerektirmez.
+
+- Sayaç ve histogram güncellemeleri seri başına kısa bir kilitle yapılır;
+  kova indeksi kilit dışında hesaplanır, böylece tam yük altında da
+  açık bırakılabilir.
+- Oturum sayısı, aktif akışlar ve önbellek isabet oranı gibi değerler sıcak
+  yolda tutulmaz; yalnızca ``/metrics`` okunurken geri çağrılarla toplanır.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import (
+    Any, AsyncGenerator, AsyncIterable, Callable, Dict, Generator, Iterable, List, Optional, Sequence, Tuple
+)
+
+# Gecikme histogramlarının varsayılan kova sınırları (saniye)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Bayt histogramlarının kova sınırları
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class _Metric:
+    """Etiketli seriler için ortak taban."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._default = None if self.labelnames else self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: Any):
+        """
+        Etiket değerlerine ait seriyi döndürür (yoksa oluşturur).
+
+        Args:
+            *values: ``labelnames`` sırasıyla etiket değerleri
+        """
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: {len(self.labelnames)} etiket bekleniyordu, {len(key)} verildi")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _series(self) -> List[Tuple[Dict[str, str], Any]]:
+        if self._default is not None:
+            return [({}, self._default)]
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in sorted(items)]
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Yalnızca artan sayaç."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, child in self._series():
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(child.value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Sabit kovalı histogram."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        bounds = self.buckets + (math.inf,)
+        for labels, child in self._series():
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                bucket_labels = dict(labels, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """Değeri yalnızca okunurken bir geri çağrıyla hesaplanan gauge/counter."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Iterable[Sample]],
+                 kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self._callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            samples = list(self._callback())
+        except Exception as e:
+            print(f"⚠️ Metrik okunamadı ({self.name}): {e}")
+            return []
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in samples:
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metriklerin kaydı ve metin biçimine çevrilmesi."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Modül yeniden yüklenirse aynı seri korunur
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, callback: Callable[[], Iterable[Sample]],
+                 kind: str = "gauge") -> None:
+        """Okuma anında hesaplanan metrik ekler; aynı adla tekrar eklenirse yenisi geçerli olur."""
+        with self._lock:
+            self._metrics[name] = CallbackMetric(name, documentation, callback, kind)
+
+    def render(self) -> str:
+        """Tüm metrikleri Prometheus metin biçiminde döndürür."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "chat_time_to_first_token_seconds",
+    "İstek alındıktan ilk metin parçasına kadar geçen süre."
+)
+STREAM_DURATION = REGISTRY.histogram(
+    "chat_stream_duration_seconds",
+    "Bir yanıt akışının toplam süresi.",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS + (120.0,)
+)
+GEMINI_ROUND = REGISTRY.histogram(
+    "gemini_round_seconds",
+    "Ajan turundaki tek Gemini çağrısının (akış sonuna kadar) süresi.",
+    ["round"]
+)
+TOOL_DURATION = REGISTRY.histogram(
+    "tool_call_seconds",
+    "Araç çağrısı süresi.",
+    ["tool"]
+)
+TOOL_ERRORS = REGISTRY.counter(
+    "tool_call_errors_total",
+    "Hata döndüren araç çağrıları.",
+    ["tool"]
+)
+TOOL_PAYLOAD = REGISTRY.histogram(
+    "tool_payload_bytes",
+    "Model'e function_response olarak geri gönderilen JSON boyutu.",
+    ["tool"],
+    buckets=BYTES_BUCKETS
+)
+
+
+def _stream_outcome(event: Optional[Dict[str, Any]]) -> str:
+    if event is None:
+        return "error"
+    if event.get("type") == "error":
+        return "error"
+    if event.get("cancelled"):
+        return "cancelled"
+    return "ok"
+
+
+def instrument_stream(events: Iterable[Dict[str, Any]], started: float) -> Generator[Dict[str, Any], None, None]:
+    """
+    Chunk akışını değiştirmeden geçirir; ilk metin parçasının gecikmesini ve
+    akışın toplam süresini sonuca göre (ok/error/cancelled) kaydeder.
+
+    Args:
+        events: Chunk akışı
+        started: İsteğin alındığı an (``time.monotonic()``)
+    """
+    first_token = True
+    last = None
+    outcome = None
+    try:
+        for event in events:
+            if first_token and event.get("type") == "content":
+                TIME_TO_FIRST_TOKEN.observe(time.monotonic() - started)
+                first_token = False
+            last = event
+            yield event
+        outcome = _stream_outcome(last)
+    except GeneratorExit:
+        outcome = "cancelled"
+        raise
+    finally:
+        STREAM_DURATION.labels(outcome or "error").observe(time.monotonic() - started)
+
+
+async def instrument_stream_async(events: AsyncIterable[Dict[str, Any]],
+                                  started: float) -> AsyncGenerator[Dict[str, Any], None]:
+    """``instrument_stream``'in asyncio karşılığı; görev iptali ``cancelled`` sayılır."""
+    first_token = True
+    last = None
+    outcome = None
+    try:
+        async for event in events:
+            if first_token and event.get("type") == "content":
+                TIME_TO_FIRST_TOKEN.observe(time.monotonic() - started)
+                first_token = False
+            last = event
+            yield event
+        outcome = _stream_outcome(last)
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    finally:
+        STREAM_DURATION.labels(outcome or "error").observe(time.monotonic() - started)
@@ -0,0 +1,339 @@
+"""
+İstek İzleme (Tracing) Servisi.
+Her isteğe bir iz kimliği (trace id) verir ve aşamalarını (istek ayrıştırma,
+oturum, Gemini çağrıları, araç çağrıları, SSE yazımı) span olarak kaydeder.
+
+- Örnekleme istek başında yapılır (head sampling); örneklenmeyen isteklerde
+  span'lar hiçbir şey yapmayan tek bir nesnedir.
+- Span'lar kuyruğa bırakılır, dosyaya arka plandaki tek bir iş parçacığı
+  yazar; kuyruk doluysa kayıt düşürülür, istek asla beklemez.
+- Mesaj metni ve araç argüman değerleri kaydedilmez; yalnızca boyutlar ve
+  argüman adları yazılır.
+
+Etkin iz ``contextvars`` ile taşınır: asyncio görevlerine kendiliğinden,
+iş parçacıklarına ise ``activate`` veya ``contextvars.copy_context`` ile
+aktarılır.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    from src.config import Config
+except ImportError:
+    from config import Config
+
+# Normal bitişte değil de akış kapatılırken/iptal edilirken görülen istisnalar
+_CANCEL_ERRORS = ("GeneratorExit", "CancelledError")
+
+
+class Span:
+    """Bir iz içindeki tek bir aşama. ``with`` ile veya ``end()`` çağrılarak biter."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attrs", "status", "_start", "_t0", "_ended")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.status = "ok"
+        self._start = time.time()
+        self._t0 = time.perf_counter()
+        self._ended = False
+
+    def set(self, **attrs: Any) -> "Span":
+        """Span'a nitelik ekler."""
+        self.attrs.update(attrs)
+        return self
+
+    def end(self, status: Optional[str] = None, **attrs: Any) -> None:
+        """Span'ı bitirir ve dışa aktarır; ikinci çağrı etkisizdir."""
+        if self._ended:
+            return
+        self._ended = True
+        if status:
+            self.status = status
+        self.attrs.update(attrs)
+        self.trace._export(self, time.perf_counter() - self._t0)
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.end()
+        elif exc_type.__name__ in _CANCEL_ERRORS:
+            self.end("cancelled")
+        else:
+            self.end("error", error=exc_type.__name__)
+
+    def to_dict(self, duration: float) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self._start, 6),
+            "duration_ms": round(duration * 1000, 3),
+            "status": self.status,
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    """Örneklenmeyen isteklerin span'ı; tüm çağrılar boştur."""
+
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> "_NoopSpan":
+        return self
+
+    def end(self, status: Optional[str] = None, **attrs: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """
+    Tek bir isteğin izi. Kök span isteğin tamamını kapsar; diğer span'lar
+    kök span'ın çocuğudur (akış üreteçleri arasında güvenle taşınabilsin
+    diye iç içe geçme ``contextvars`` ile izlenmez).
+    """
+
+    sampled = True
+
+    def __init__(self, exporter: "JsonlExporter", name: str, attrs: Dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex
+        self._exporter = exporter
+        self.root = Span(self, name, None, attrs)
+
+    def span(self, name: str, **attrs: Any) -> Span:
+        """Kök span altında yeni bir span başlatır."""
+        return Span(self, name, self.root.span_id, attrs)
+
+    def record(self, name: str, started: float, duration: float, **attrs: Any) -> None:
+        """
+        Zaten ölçülmüş bir aşamayı span olarak yazar (ör. akış boyunca
+        parça parça toplanan SSE yazım süresi).
+
+        Args:
+            name: Span adı
+            started: Başlangıç (``time.time()``)
+            duration: Süre (saniye)
+        """
+        span = Span(self, name, self.root.span_id, attrs)
+        span._start = started
+        span._ended = True
+        self._export(span, duration)
+
+    def event(self, name: str, **attrs: Any) -> None:
+        """
+        Süresi olmayan bir olayı (ör. iptal, yeniden bağlanma) kök span
+        altında yazar. İz bittikten sonra da çağrılabilir.
+        """
+        self.record(name, time.time(), 0.0, **attrs)
+
+    def set(self, **attrs: Any) -> "Trace":
+        """Kök span'a nitelik ekler."""
+        self.root.set(**attrs)
+        return self
+
+    def end(self, status: Optional[str] = None, **attrs: Any) -> None:
+        """İzi (kök span'ı) bitirir."""
+        self.root.end(status, **attrs)
+
+    def _export(self, span: Span, duration: float) -> None:
+        self._exporter.export(span.to_dict(duration))
+
+
+class _NoopTrace:
+    """Örneklenmeyen veya izleme kapalıyken kullanılan iz."""
+
+    sampled = False
+    trace_id = None
+
+    def span(self, name: str, **attrs: Any) -> _NoopSpan:
+        return NOOP_SPAN
+
+    def record(self, name: str, started: float, duration: float, **attrs: Any) -> None:
+        pass
+
+    def event(self, name: str, **attrs: Any) -> None:
+        pass
+
+    def set(self, **attrs: Any) -> "_NoopTrace":
+        return self
+
+    def end(self, status: Optional[str] = None, **attrs: Any) -> None:
+        pass
+
+
+NOOP_TRACE = _NoopTrace()
+
+
+class JsonlExporter:
+    """
+    Span kayıtlarını sınırlı bir kuyruk üzerinden arka plan iş parçacığında
+    JSONL dosyasına yazar. ``export`` hiçbir zaman bloklamaz.
+    """
+
+    def __init__(self, path: str, max_queue: int = 10000, flush_interval: float = 1.0):
+        """
+        Args:
+            path: Hedef JSONL dosyası (sona eklenir)
+            max_queue: Kuyrukta bekleyebilecek en fazla kayıt; aşılırsa düşürülür
+            flush_interval: Yazılmamış kayıtların en fazla bekleme süresi (saniye)
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stats = {"exported": 0, "written": 0, "dropped": 0, "errors": 0}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def export(self, record: Dict[str, Any]) -> None:
+        """Kaydı kuyruğa bırakır; kuyruk doluysa düşürür."""
+        try:
+            self._queue.put_nowait(record)
+            key = "exported"
+        except queue.Full:
+            key = "dropped"
+        with self._lock:
+            self._stats[key] += 1
+
+    def _drain(self, first: Dict[str, Any]) -> List[Dict[str, Any]]:
+        batch = [first]
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                return batch
+            if record is None:
+                self._queue.put(None)  # Kapanış işaretini döngüye bırak
+                return batch
+            batch.append(record)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            key, count = "written", len(batch)
+        except OSError as e:
+            print(f"⚠️ İz dosyası yazılamadı ({self.path}): {e}")
+            key, count = "errors", len(batch)
+        with self._lock:
+            self._stats[key] += count
+
+    def _run(self) -> None:
+        while True:
+            try:
+                record = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if record is None:
+                return
+            self._write(self._drain(record))
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Kuyruktakileri yazar ve iş parçacığını durdurur."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Dışa aktarım sayaçlarını döndürür."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+
+class Tracer:
+    """İz başlatır ve örnekleme kararını verir."""
+
+    def __init__(self, exporter: Optional[JsonlExporter], sample_rate: float,
+                 rng: Callable[[], float] = random.random):
+        """
+        Args:
+            exporter: Span'ların yazılacağı hedef (None ise izleme kapalı)
+            sample_rate: İzlenecek isteklerin oranı (0-1)
+            rng: [0, 1) aralığında sayı üreten fonksiyon (testler için)
+        """
+        self.exporter = exporter
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self._rng = rng
+
+    def start_trace(self, name: str, **attrs: Any):
+        """
+        Yeni bir iz başlatır. Örneklenmezse ``NOOP_TRACE`` döner.
+
+        Args:
+            name: Kök span adı (ör. "chat")
+            **attrs: Kök span nitelikleri
+        """
+        if self.exporter is None or self.sample_rate <= 0 or self._rng() >= self.sample_rate:
+            return NOOP_TRACE
+        return Trace(self.exporter, name, attrs)
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("trace", default=NOOP_TRACE)
+
+
+def current_trace():
+    """Etkin izi döndürür (yoksa ``NOOP_TRACE``)."""
+    return _current.get()
+
+
+def span(name: str, **attrs: Any):
+    """Etkin izde yeni bir span başlatır."""
+    return _current.get().span(name, **attrs)
+
+
+@contextmanager
+def activate(trace) -> Iterator[Any]:
+    """İzi bu iş parçacığında/görevde etkin yapar."""
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Süreç genelinde paylaşılan izleyiciyi döndürür.
+    ``TRACE_FILE`` boşsa izleme kapalıdır.
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            exporter = None
+            if Config.TRACE_FILE:
+                exporter = JsonlExporter(Config.TRACE_FILE, max_queue=Config.TRACE_QUEUE_SIZE)
+            _tracer = Tracer(exporter, Config.TRACE_SAMPLE_RATE)
+        return _tracer
@@ -0,0 +1,338 @@
+"""
+Yanıt Önbelleği.
+Yeni açılan sohbetlerde sorulan aynı ilk soruları tek bir Gemini çağrısına
+indirger:
+
+- Tamamlanmış yanıtlar (normalize mesaj, model, sistem prompt'u) anahtarıyla
+  TTL süresince saklanır ve tam hızda yeniden oynatılır.
+- Aynı soru için devam eden bir akış varsa yeni istekler ona abone olur;
+  lider akışın chunk'ları tüm istemcilere dağıtılır.
+
+Önbellekten veya paylaşılan akıştan gelen yanıtlar ilk chunk olarak
+``{"type": "meta", "cached": true}`` ile işaretlenir.
+"""
+
+import asyncio
+import copy
+import hashlib
+import threading
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Tuple
+
+try:
+    from src.config import Config
+    from src.services.cache import PageCache
+    from src.services.textnorm import fold
+except ImportError:
+    from config import Config
+    from services.cache import PageCache
+    from services.textnorm import fold
+
+
+def _resolve(future: "asyncio.Future") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Broadcast:
+    """
+    Lider akışın chunk'larını abonelere dağıtır.
+    Hem iş parçacığı (Flask) hem asyncio (ASGI) aboneleri desteklenir.
+    """
+
+    __slots__ = ("events", "done", "record", "_cond", "_waiters")
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.done = False
+        self.record: Optional[Dict[str, Any]] = None
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future"]] = []
+
+    def _wake(self) -> None:
+        """Kilit altında çağrılır; bekleyen tüm aboneleri uyandırır."""
+        self._cond.notify_all()
+        waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        with self._cond:
+            self.events.append(event)
+            self._wake()
+
+    def finish(self, record: Optional[Dict[str, Any]]) -> None:
+        """
+        Akışı kapatır. ``record`` None ise lider yanıtı tamamlayamamıştır;
+        abonelere bir hata chunk'ı gönderilir.
+        """
+        with self._cond:
+            if record is None and not (self.events and self.events[-1].get("type") == "error"):
+                self.events.append({"type": "error", "error": "Paylaşılan yanıt yarıda kesildi."})
+            self.record = record
+            self.done = True
+            self._wake()
+
+    def _notify(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def follow(self, cancel=None) -> Generator[Dict[str, Any], None, bool]:
+        """
+        Chunk'ları geldikçe döndürür (iş parçacığını bloklar).
+        ``cancel`` iptal edilince bekleme yeni chunk beklenmeden biter.
+
+        Returns:
+            bool: Akışın tamamı iletildiyse True, iptal edildiyse False
+        """
+        wake = self._notify
+        if cancel is not None:
+            cancel.add_callback(wake)
+        position = 0
+        try:
+            while True:
+                with self._cond:
+                    while position >= len(self.events) and not self.done:
+                        if cancel is not None and cancel.cancelled:
+                            return False
+                        self._cond.wait()
+                    batch = self.events[position:]
+                    done = self.done
+                position += len(batch)
+                for event in batch:
+                    if cancel is not None and cancel.cancelled:
+                        return False
+                    yield event
+                if done:
+                    return True
+        finally:
+            if cancel is not None:
+                cancel.remove_callback(wake)
+
+    async def follow_async(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """Chunk'ları geldikçe döndürür (event loop'u bloklamaz)."""
+        loop = asyncio.get_running_loop()
+        position = 0
+        while True:
+            future = None
+            with self._cond:
+                batch = self.events[position:]
+                done = self.done
+                if not batch and not done:
+                    future = loop.create_future()
+                    self._waiters.append((loop, future))
+            if future is not None:
+                await future
+                continue
+            position += len(batch)
+            for event in batch:
+                yield event
+            if done:
+                return
+
+
+class ResponseCache:
+    """
+    İlk tur yanıtları için önbellek ve istek birleştirici.
+
+    Yalnızca geçmişi boş sohbetler önbelleğe alınır; devam eden sohbetler
+    doğrudan ``chat_stream``'e yönlendirilir.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        """
+        Args:
+            max_bytes: Saklanan yanıtlar için bayt bütçesi
+            ttl: Yanıtların geçerlilik süresi (saniye)
+        """
+        self._cache = PageCache(max_bytes=max_bytes, ttl=ttl)
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Broadcast] = {}
+        self._stats = {"replays": 0, "coalesced": 0, "upstream": 0}
+
+    @staticmethod
+    def key_for(chatbot, message: str) -> Optional[str]:
+        """
+        Önbellek anahtarını üretir; sohbetin geçmişi varsa None döndürür.
+        """
+        if chatbot.messages:
+            return None
+        prompt_hash = hashlib.sha1(chatbot.system_prompt.encode("utf-8")).hexdigest()[:16]
+        return f"{chatbot.model_name}:{prompt_hash}:{fold(message)}"
+
+    def _claim(self, key: str) -> Tuple[_Broadcast, bool]:
+        """Anahtar için devam eden akışı döndürür; yoksa yenisini başlatır."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats["coalesced"] += 1
+                return flight, False
+            flight = self._flights[key] = _Broadcast()
+            self._stats["upstream"] += 1
+            return flight, True
+
+    @staticmethod
+    def _apply(chatbot, message: str, record: Dict[str, Any]) -> None:
+        """Paylaşılan turu sohbetin geçmişine ve kullanıcı verisine işler."""
+        messages = copy.deepcopy(record["messages"])
+        if messages and messages[0].get("role") == "user":
+            messages[0] = {"role": "user", "parts": [{"text": message}]}
+        chatbot.history.extend(messages)
+        chatbot.user_data.setdefault("calculations", []).extend(copy.deepcopy(record["calculations"]))
+
+    def _replay(self, chatbot, message: str, record: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._stats["replays"] += 1
+        self._apply(chatbot, message, record)
+        return [{"type": "meta", "cached": True}] + record["events"] + [{"type": "end"}]
+
+    @staticmethod
+    def _calculation_count(chatbot) -> int:
+        calculations = chatbot.user_data.get("calculations") or []
+        return getattr(calculations, "total", len(calculations))
+
+    @staticmethod
+    def _calculations_since(chatbot, count: int) -> List[Dict[str, Any]]:
+        calculations = chatbot.user_data.get("calculations") or []
+        if hasattr(calculations, "since"):
+            return calculations.since(count)
+        return list(calculations[count:])
+
+    @staticmethod
+    def _cacheable(events: List[Dict[str, Any]]) -> bool:
+        """
+        Yanıt eksiksiz bittiyse ve hiçbir adımı hata içermiyorsa True.
+        Başarısız bir araç çağrısına (ör. Wikipedia zaman aşımı) dayanan
+        yanıt geçicidir; önbelleğe alınırsa TTL boyunca tekrar oynatılır.
+        """
+        if not events or events[-1].get("type") != "end":
+            return False
+        for event in events:
+            if event.get("type") == "error":
+                return False
+            if event.get("type") == "function_result":
+                result = event.get("result")
+                if isinstance(result, dict) and "error" in result:
+                    return False
+        return True
+
+    def _complete(self, key: str, flight: _Broadcast, chatbot, calculations_before: int) -> None:
+        """Lider akış bittiğinde sonucu saklar ve aboneleri serbest bırakır."""
+        record = None
+        events = flight.events
+        if self._cacheable(events):
+            record = {
+                "events": events[:-1],
+                "messages": list(chatbot.messages),
+                "calculations": self._calculations_since(chatbot, calculations_before)
+            }
+            self._cache.set(key, record)
+        with self._lock:
+            self._flights.pop(key, None)
+        flight.finish(record)
+
+    def stream(self, chatbot, message: str, cancel=None) -> Generator[Dict[str, Any], None, None]:
+        """
+        ``chatbot.chat_stream`` yerine kullanılır; uygun isteklerde önbellekten
+        oynatır veya devam eden aynı akışa abone olur.
+
+        ``cancel`` iptal edilirse abone yalnızca kendi akışını bırakır; lider
+        iptal edilirse yanıt saklanmaz ve abonelere hata chunk'ı gönderilir.
+        """
+        key = self.key_for(chatbot, message)
+        if key is None:
+            yield from chatbot.chat_stream(message, cancel)
+            return
+
+        record = self._cache.get(key)
+        if record is not None:
+            yield from self._replay(chatbot, message, record)
+            return
+
+        flight, leader = self._claim(key)
+        if not leader:
+            yield {"type": "meta", "cached": True, "coalesced": True}
+            finished = yield from flight.follow(cancel)
+            if not finished:
+                # Tur geçmişe hiç yazılmadı; bırakmak yeterli
+                yield {"type": "end", "cancelled": True}
+                return
+            if flight.record is not None:
+                self._apply(chatbot, message, flight.record)
+            return
+
+        calculations_before = self._calculation_count(chatbot)
+        try:
+            for event in chatbot.chat_stream(message, cancel):
+                # İptal edilen liderin yanıtı eksiktir; abonelere iletilmez
+                if not event.get("cancelled"):
+                    flight.publish(event)
+                yield event
+        finally:
+            self._complete(key, flight, chatbot, calculations_before)
+
+    async def stream_async(self, chatbot, message: str) -> AsyncGenerator[Dict[str, Any], None]:
+        """``stream``'in asyncio karşılığı (``chat_stream_async`` üzerine)."""
+        key = self.key_for(chatbot, message)
+        if key is None:
+            async for event in chatbot.chat_stream_async(message):
+                yield event
+            return
+
+        record = self._cache.get(key)
+        if record is not None:
+            for event in self._replay(chatbot, message, record):
+                yield event
+            return
+
+        flight, leader = self._claim(key)
+        if not leader:
+            yield {"type": "meta", "cached": True, "coalesced": True}
+            async for event in flight.follow_async():
+                yield event
+            if flight.record is not None:
+                self._apply(chatbot, message, flight.record)
+            return
+
+        calculations_before = self._calculation_count(chatbot)
+        try:
+            async for event in chatbot.chat_stream_async(message):
+                flight.publish(event)
+                yield event
+        finally:
+            self._complete(key, flight, chatbot, calculations_before)
+
+    def clear(self) -> None:
+        """Saklanan yanıtları temizler."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Önbellek ve birleştirme istatistiklerini döndürür."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+        cache_stats = self._cache.stats()
+        stats.update(entries=cache_stats["entries"], bytes=cache_stats["bytes"],
+                     expirations=cache_stats["expirations"], evictions=cache_stats["evictions"])
+        return stats
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Süreç genelinde paylaşılan yanıt önbelleğini döndürür.
+    ``RESPONSE_CACHE_ENABLED`` kapalıysa None döner.
+    """
+    global _response_cache
+    if not Config.RESPONSE_CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    max_bytes=Config.RESPONSE_CACHE_MAX_BYTES,
+                    ttl=Config.RESPONSE_CACHE_TTL
+                )
+    return _response_cache
@@ -4,38 +4,245 @@ Tüm chat ile ilgili endpoint'ler burada tanımlı.
 """
 
 from flask import Blueprint, request, Response, jsonify
-import json
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 import traceback
-from typing import Dict, Any
+from typing import Any, Optional, Tuple
+
+try:
+    from src.config import Config
+    from src.sessions import get_session_store
+    from src.response_cache import get_response_cache
+    from src.streaming import CANCELLED_END, SSEEncoder, get_stream_registry, parse_event_id, pump
+    from src.observability import get_tracer, metrics, tracing
+except ImportError:
+    from config import Config
+    from sessions import get_session_store
+    from response_cache import get_response_cache
+    from streaming import CANCELLED_END, SSEEncoder, get_stream_registry, parse_event_id, pump
+    from observability import get_tracer, metrics, tracing
 
 # Blueprint oluştur
 chat_bp = Blueprint('chat', __name__)
 
-# Chatbot instance'larını tutan dictionary
-chatbot_instances: Dict[str, Any] = {}
+# Oturum deposu (LRU + TTL + bellek bütçesi, iş parçacığı güvenli)
+session_store = get_session_store()
+
+# Aynı ilk sorular için yanıt önbelleği (RESPONSE_CACHE_ENABLED kapalıysa None)
+response_cache = get_response_cache()
+
+# (chat_id, tur) başına yeniden oynatma tamponları (Last-Event-ID ile devam)
+stream_registry = get_stream_registry()
+
+# Örneklenen isteklerin span'larını JSONL dosyasına yazar (TRACE_FILE boşsa kapalı)
+tracer = get_tracer()
+
+
+class TurnPool:
+    """
+    Turları sınırlı bir iş parçacığı havuzunda çalıştırır. Çalışan ve
+    sırada bekleyen turların toplamı sınıra ulaşınca yeni tur reddedilir;
+    böylece yük altında istek başına sınırsız iş parçacığı açılmaz.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int):
+        """
+        Args:
+            max_workers: Aynı anda çalışan en fazla tur
+            queue_size: Sırada bekleyebilecek en fazla tur
+        """
+        self.max_workers = max(max_workers, 1)
+        self.limit = self.max_workers + max(queue_size, 0)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chat-turn")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
 
-# Maksimum instance sayısı
-MAX_INSTANCES = 100
+    def reserve(self) -> bool:
+        """Tur için yer ayırır; havuz doluysa False."""
+        with self._lock:
+            if self._pending >= self.limit:
+                self._rejected += 1
+                return False
+            self._pending += 1
+            return True
 
+    def release(self) -> None:
+        """``reserve`` ile ayrılan yeri bırakır (tur başlatılamadıysa)."""
+        with self._lock:
+            self._pending -= 1
 
-def get_chatbot_class():
-    """WebChatbot sınıfını lazy import eder."""
-    from src.chatbot import WebChatbot
-    return WebChatbot
+    def submit(self, fn, *args) -> None:
+        """Yer ayrılmış turu havuza verir; tur bitince yer bırakılır."""
+        def run():
+            try:
+                fn(*args)
+            finally:
+                self.release()
+        try:
+            self._executor.submit(run)
+        except RuntimeError:
+            # Havuz kapatılmış
+            self.release()
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "running": min(self._pending, self.max_workers),
+                "limit": self.limit,
+                "rejected": self._rejected
+            }
+
+
+# /chat turlarının çalıştığı sınırlı havuz
+turn_pool = TurnPool(Config.TURN_MAX_WORKERS, Config.TURN_QUEUE_SIZE)
+
+
+def _wiki_cache_lookups():
+    from src.services.wikipedia import get_cache_stats
+    stats = get_cache_stats()
+    return [({"result": "hit"}, stats["hits"]), ({"result": "disk_hit"}, stats["disk_hits"]),
+            ({"result": "miss"}, stats["misses"])]
+
+
+def _wiki_cache_hit_ratio():
+    from src.services.wikipedia import get_cache_stats
+    return [({}, get_cache_stats()["hit_ratio"])]
+
+
+# Okuma anında toplanan metrikler (sıcak yolda maliyeti yoktur)
+metrics.REGISTRY.callback(
+    "chat_active_streams", "Üretimi süren yanıt akışları.",
+    lambda: [({}, stream_registry.stats()["active"])]
+)
+metrics.REGISTRY.callback(
+    "chat_turns_pending", "Çalışan ve sırada bekleyen turlar.",
+    lambda: [({}, turn_pool.stats()["pending"])]
+)
+metrics.REGISTRY.callback(
+    "session_store_sessions", "Bellekteki sohbet oturumları.",
+    lambda: [({}, session_store.stats()["active_sessions"])]
+)
+metrics.REGISTRY.callback(
+    "session_store_bytes", "Oturum deposunun tahmini bellek kullanımı.",
+    lambda: [({}, session_store.stats()["memory_estimate_bytes"])]
+)
+metrics.REGISTRY.callback(
+    "wiki_cache_lookups_total", "Wikipedia sayfa önbelleği okumaları.", _wiki_cache_lookups, kind="counter"
+)
+metrics.REGISTRY.callback("wiki_cache_hit_ratio", "Wikipedia sayfa önbelleği isabet oranı.", _wiki_cache_hit_ratio)
+
+
+def parse_chat_request(data: Any) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    ``/chat`` istek gövdesini doğrular. Flask ve ASGI aynı kuralları kullanır.
+    
+    Args:
+        data: Çözümlenmiş JSON gövdesi (geçersizse None)
+        
+    Returns:
+        Tuple: (mesaj, chat_id, hata); hata varsa istek 400 ile reddedilir
+    """
+    if not isinstance(data, dict) or not data:
+        return None, None, 'JSON verisi bulunamadı'
+    user_message = data.get('message', '')
+    if not isinstance(user_message, str):
+        return None, None, 'message metin olmalı'
+    chat_id = data.get('chat_id', 'default')
+    if not isinstance(chat_id, str) or not chat_id:
+        return None, None, 'chat_id metin olmalı'
+    user_message = user_message.strip()
+    if not user_message:
+        return None, None, 'Mesaj boş olamaz'
+    return user_message, chat_id, None
 
 
-def cleanup_old_instances():
+def _run_turn(session, user_message: str, buffer, started: float, trace) -> None:
     """
-    Eski chatbot instance'larını temizler.
-    Memory leak'i önlemek için maksimum instance sayısını kontrol eder.
+    Turu arka planda çalıştırır ve SSE çerçevelerini tampona yazar.
+    İstemci kısa süreliğine kopsa da tur tamamlanır ve geçmişe kaydedilir;
+    tur iptal edilirse (``/cancel``, yeni mesaj, geri dönmeyen istemci)
+    Gemini akışı kesilir ve kısmi yanıt kaydedilir.
+    
+    Args:
+        session: Sohbet oturumu
+        user_message: Kullanıcı mesajı
+        buffer: Turun yeniden oynatma tamponu
+        started: İsteğin alındığı an (metrikler için)
+        trace: İsteğin izi (tur bitince kapatılır)
     """
-    global chatbot_instances
-    if len(chatbot_instances) > MAX_INSTANCES:
-        # En eski instance'ları sil (ilk eklenenler)
-        keys_to_remove = list(chatbot_instances.keys())[:len(chatbot_instances) - MAX_INSTANCES]
-        for key in keys_to_remove:
-            del chatbot_instances[key]
-            print(f"🧹 Eski chatbot temizlendi: {key}")
+    # Metin parçaları toplanır, yanıt tek bir end/error olayıyla kapanır
+    encoder = SSEEncoder(
+        Config.SSE_FLUSH_BYTES, Config.SSE_FLUSH_INTERVAL_MS / 1000, id_prefix=buffer.id_prefix
+    )
+    status = None
+    with tracing.activate(trace):
+        try:
+            # Aynı sohbette aynı anda tek tur çalışır
+            with trace.span("session.lock"):
+                acquired = session.lock.acquire(timeout=Config.SESSION_LOCK_TIMEOUT)
+            if not acquired:
+                status = "busy"
+                busy_chunk = {'type': 'error', 'error': 'Bu sohbet için önceki yanıt hâlâ sürüyor.'}
+                buffer.append(encoder.finish_frames(busy_chunk))
+                return
+            
+            cancel = buffer.cancel_token
+            try:
+                if cancel.cancelled:
+                    # Kilit beklenirken iptal edildi; tur hiç başlamadı
+                    buffer.append(encoder.finish_frames(CANCELLED_END))
+                    return
+                # Başka bir worker'ın eklediği mesajları tamamla
+                with trace.span("session.load"):
+                    session_store.load(session)
+                if response_cache is not None:
+                    stream = response_cache.stream(session.chatbot, user_message, cancel)
+                else:
+                    stream = session.chatbot.chat_stream(user_message, cancel)
+                pump(metrics.instrument_stream(stream, started), encoder, buffer)
+            
+            except Exception as e:
+                status = "error"
+                error_chunk = {
+                    'type': 'error',
+                    'error': str(e),
+                    'trace': traceback.format_exc()
+                }
+                buffer.append(encoder.finish_frames(error_chunk))
+            
+            finally:
+                try:
+                    with trace.span("session.persist"):
+                        session_store.persist(session)
+                finally:
+                    session.lock.release()
+        finally:
+            buffer.close()
+            if buffer.cancel_token.cancelled:
+                status = "cancelled"
+                trace.set(cancel_reason=buffer.cancel_token.reason)
+            trace.end(status)
+
+
+def _sse_response(body, turn_id: str) -> Response:
+    """Tur kimliğini başlıkta taşıyan SSE yanıtı oluşturur."""
+    return Response(
+        body,
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Turn-Id': turn_id,
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET, POST',
+            'Access-Control-Allow-Headers': 'Content-Type, Last-Event-ID',
+            'Access-Control-Expose-Headers': 'X-Turn-Id'
+        }
+    )
 
 
 @chat_bp.route('/chat', methods=['POST'])
@@ -50,68 +257,102 @@ def chat():
     Returns:
         SSE stream veya JSON hata
     """
+    started = time.monotonic()
+    # Örnekleme istek başında yapılır; mesaj metni izlere yazılmaz
+    trace = tracer.start_trace("chat", server="flask")
     try:
-        # JSON verisini al
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'JSON verisi bulunamadı'}), 400
-
-        # Kullanıcı mesajını al ve boş mu kontrol et
-        user_message = data.get('message', '').strip()
-        if not user_message:
-            return jsonify({'error': 'Mesaj boş olamaz'}), 400
-
-        # Frontend'den chat_id'yi al
-        chat_id = data.get('chat_id', 'default')
-        
-        # Eski instance'ları temizle
-        cleanup_old_instances()
+        with trace.span("request.parse"):
+            # Geçersiz JSON, nesne olmayan gövde veya metin olmayan alanlar 400 döner
+            user_message, chat_id, error = parse_chat_request(request.get_json(silent=True))
+        if error:
+            trace.end("rejected")
+            return jsonify({'error': error}), 400
         
-        # Bu sohbet için chatbot yoksa yeni bir tane oluştur
-        WebChatbot = get_chatbot_class()
-        if chat_id not in chatbot_instances:
-            chatbot_instances[chat_id] = WebChatbot()
-            print(f"🆕 Yeni chatbot oluşturuldu: {chat_id}")
-        
-        # İlgili sohbetin chatbot'unu al
-        chatbot = chatbot_instances[chat_id]
-        
-        print(f"📝 Kullanıcı mesajı (Chat: {chat_id}): {user_message}")
+        # Bu sohbetin oturumunu al (yoksa oluşturulur, erişim LRU sırasını günceller)
+        with trace.span("session.lookup"):
+            session = session_store.get_or_create(chat_id)
+        trace.set(chat_id=chat_id, message_chars=len(user_message))
 
-        # Streaming response generator
-        def generate():
-            try:
-                for chunk in chatbot.chat_stream(user_message):
-                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
-                yield f"data: {json.dumps({'type': 'end'}, ensure_ascii=False)}\n\n"
+        # Havuz doluysa süren turu iptal etmeden reddet
+        if not turn_pool.reserve():
+            trace.end("overloaded")
+            return jsonify({'error': 'Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin'}), 503
 
-            except Exception as e:
-                error_chunk = {
-                    'type': 'error',
-                    'error': str(e),
-                    'trace': traceback.format_exc()
-                }
-                yield f"data: {json.dumps(error_chunk, ensure_ascii=False)}\n\n"
+        # Yeni mesaj aynı sohbette süren yanıtı durdurur (oturum kilidi hemen boşalır)
+        stream_registry.cancel(chat_id, reason="superseded")
+
+        # Tur arka planda üretilir; bu istek ve olası yeniden bağlanmalar tamponu takip eder
+        try:
+            buffer = stream_registry.open(chat_id, trace)
+        except Exception:
+            turn_pool.release()
+            raise
+        trace.set(turn_id=buffer.turn_id)
+        try:
+            turn_pool.submit(_run_turn, session, user_message, buffer, started, trace)
+        except RuntimeError:
+            buffer.close()
+            raise
 
         # SSE response döndür
-        return Response(
-            generate(),
-            mimetype='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
-        )
+        return _sse_response(buffer.follow(), buffer.turn_id)
 
     except Exception as e:
         error_msg = f"Server hatası: {str(e)}"
         print("🔥 Chat hatası:", traceback.format_exc())
+        trace.end("error", error=type(e).__name__)
         return jsonify({'error': error_msg}), 500
 
 
+@chat_bp.route('/chat/stream', methods=['GET'])
+def resume_chat():
+    """
+    Kopan bir yanıt akışına yeniden bağlanır; yanıt yeniden üretilmez.
+    
+    Query:
+        - chat_id: str - Sohbet kimliği
+        - last_event_id: str - Son alınan olay kimliği (``Last-Event-ID`` başlığı yoksa)
+        
+    Returns:
+        SSE stream (kaçırılan olaylardan itibaren) veya JSON hata
+    """
+    chat_id = request.args.get('chat_id')
+    parsed = parse_event_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    if not chat_id or parsed is None:
+        return jsonify({'error': 'chat_id ve Last-Event-ID gerekli'}), 400
+    
+    turn_id, seq = parsed
+    buffer = stream_registry.get(chat_id, turn_id)
+    if buffer is None:
+        return jsonify({'error': 'Akış bulunamadı veya süresi doldu'}), 404
+    
+    buffer.trace.event("stream.resume", after=seq)
+    return _sse_response(buffer.follow(seq), turn_id)
+
+
+@chat_bp.route('/cancel', methods=['POST'])
+def cancel_chat():
+    """
+    Süren yanıtı durdurur. Gemini akışı ve bekleyen araç çağrıları kesilir,
+    o ana kadarki yanıt geçmişe yazılır ve akış ``end`` olayıyla
+    (``cancelled: true``) kapanır.
+    
+    Request Body:
+        - chat_id: str - Sohbet kimliği
+        - turn_id: str - Tur kimliği (opsiyonel, yoksa sohbetin tüm süren turları)
+        
+    Returns:
+        JSON status ve iptal edilen turlar
+    """
+    data = request.get_json(silent=True) or {}
+    chat_id = data.get('chat_id')
+    if not chat_id:
+        return jsonify({'error': 'chat_id gerekli'}), 400
+    
+    cancelled = stream_registry.cancel(chat_id, data.get('turn_id'))
+    return jsonify({'status': 'ok', 'cancelled': cancelled})
+
+
 @chat_bp.route('/reset', methods=['POST'])
 def reset_chat():
     """
@@ -127,13 +368,15 @@ def reset_chat():
         data = request.get_json()
         chat_id = data.get('chat_id', 'default') if data else 'default'
         
-        WebChatbot = get_chatbot_class()
-        if chat_id in chatbot_instances:
-            chatbot_instances[chat_id].reset_history()
-            print(f"🔄 Sohbet geçmişi sıfırlandı: {chat_id}")
-        else:
-            chatbot_instances[chat_id] = WebChatbot()
-            print(f"🆕 Yeni chatbot oluşturuldu (reset): {chat_id}")
+        stream_registry.cancel(chat_id, reason="reset")
+        session = session_store.get_or_create(chat_id)
+        if not session.lock.acquire(timeout=Config.SESSION_LOCK_TIMEOUT):
+            return jsonify({'error': 'Sohbet şu anda meşgul, tekrar deneyin'}), 409
+        try:
+            session_store.reset(session)
+        finally:
+            session.lock.release()
+        print(f"🔄 Sohbet geçmişi sıfırlandı: {chat_id}")
 
         return jsonify({'status': 'ok', 'message': 'Sohbet geçmişi temizlendi'})
     
@@ -160,8 +403,8 @@ def delete_chat():
         if not chat_id:
             return jsonify({'error': 'chat_id gerekli'}), 400
         
-        if chat_id in chatbot_instances:
-            del chatbot_instances[chat_id]
+        stream_registry.cancel(chat_id, reason="deleted")
+        if session_store.delete(chat_id):
             print(f"🗑️ Sohbet silindi: {chat_id}")
         
         return jsonify({'status': 'ok', 'message': 'Sohbet silindi'})
@@ -171,16 +414,68 @@ def delete_chat():
         return jsonify({'error': str(e)}), 500
 
 
+@chat_bp.route('/calculations', methods=['GET'])
+def get_calculations():
+    """
+    Bir sohbetin son hesaplamalarını döndürür.
+    
+    Query:
+        - chat_id: str - Sohbet kimliği
+        - limit: int - En fazla kayıt (opsiyonel, varsayılan 10)
+        - query: str - İfadede aranacak metin (opsiyonel)
+        
+    Returns:
+        JSON: Kayıtlar ve hesaplama geçmişinin bellek kullanımı
+    """
+    chat_id = request.args.get('chat_id')
+    if not chat_id:
+        return jsonify({'error': 'chat_id gerekli'}), 400
+    
+    session = session_store.get(chat_id)
+    if session is None:
+        return jsonify({'error': 'Sohbet bulunamadı'}), 404
+    
+    calculations = session.chatbot.user_data['calculations']
+    limit = request.args.get('limit', default=10, type=int)
+    return jsonify({
+        'calculations': calculations.recent(max(limit, 1), request.args.get('query')),
+        'stats': calculations.stats()
+    })
+
+
 @chat_bp.route('/stats', methods=['GET'])
 def get_stats():
     """
     Aktif sohbet istatistiklerini döndürür.
     
     Returns:
-        JSON: Aktif sohbet sayısı ve diğer istatistikler
+        JSON: Oturum deposu ve Wikipedia önbelleği istatistikleri
     """
+    from src.services.wikipedia import get_cache_stats, get_transport_stats
+    from src.services.prefetch import get_prefetcher
+
+    store_stats = session_store.stats()
+    prefetcher = get_prefetcher()
     return jsonify({
-        'active_chats': len(chatbot_instances),
-        'max_instances': MAX_INSTANCES,
-        'chat_ids': list(chatbot_instances.keys())
+        'active_chats': store_stats['active_sessions'],
+        'max_instances': store_stats['max_sessions'],
+        'sessions': store_stats,
+        'wiki_cache': get_cache_stats(),
+        'wiki_transport': get_transport_stats(),
+        'wiki_prefetch': prefetcher.stats() if prefetcher is not None else None,
+        'response_cache': response_cache.stats() if response_cache is not None else None,
+        'streams': stream_registry.stats(),
+        'turns': turn_pool.stats(),
+        'tracing': tracer.exporter.stats() if tracer.exporter is not None else None
     })
+
+
+@chat_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Prometheus metin biçiminde metrikleri döndürür.
+    
+    Returns:
+        text/plain: Gecikme histogramları, sayaçlar ve anlık değerler
+    """
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
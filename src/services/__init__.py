@@ -1,3 +1,10 @@
 # Services package
-from .calculator import calculate, get_function_def as get_calculator_def
-from .wikipedia import search_info, get_function_def as get_search_def
+from .calculator import calculate, calculate_batch, get_function_def as get_calculator_def
+from .calculator import get_batch_function_def as get_calculator_batch_def
+from .calculator import recall_calculations, get_recall_function_def as get_recall_def
+from .calc_log import CalculationLog, CalculationRecord
+from .wikipedia import search_info, get_section, get_pages, get_cache_stats, get_transport_stats
+from .wikipedia import get_client, cache_key, get_function_def as get_search_def
+from .wikipedia import get_section_function_def as get_section_def
+from .wiki_client import WikiClient, WikiPage, WikiTransportError
+from .langdetect import detect_language
@@ -0,0 +1,271 @@
+"""
+Sayfa Önbellek Servisi.
+Wikipedia sayfaları için iki katmanlı (bellek + disk) önbellek.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Flight:
+    """Aynı anahtar için devam eden tek bir yükleme işlemini temsil eder."""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _DiskTier:
+    """
+    SQLite tabanlı ikinci katman.
+    Süreç yeniden başlatıldığında da kayıtların korunmasını sağlar.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0], row[1]
+
+    def set(self, key: str, payload: str, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PageCache:
+    """
+    Bayt bütçeli, TTL destekli LRU önbellek.
+
+    - Birinci katman: süreç içi ``OrderedDict`` (LRU sırası).
+    - İkinci katman (opsiyonel): SQLite dosyası.
+    - ``get_or_load`` aynı anahtar için eşzamanlı istekleri tek bir
+      yüklemeye indirger (single-flight).
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, db_path: Optional[str] = None):
+        """
+        Args:
+            max_bytes: Bellek katmanı için toplam bayt bütçesi
+            ttl: Kayıtların geçerlilik süresi (saniye)
+            db_path: Disk katmanı için SQLite dosya yolu (boşsa devre dışı)
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._disk = _DiskTier(db_path) if db_path else None
+        self._stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    @staticmethod
+    def _serialize(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+    def _store(self, key: str, value: Any, size: int, expires_at: float) -> None:
+        """Kaydı bellek katmanına yazar ve bütçe aşılırsa LRU tahliyesi yapar."""
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._stats["evictions"] += 1
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        """Önce bellek, sonra disk katmanına bakar. (bulundu, değer) döndürür."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, value
+                del self._entries[key]
+                self._bytes -= size
+                self._stats["expirations"] += 1
+
+        if self._disk is not None:
+            row = self._disk.get(key)
+            if row is not None:
+                payload, expires_at = row
+                value = json.loads(payload)
+                with self._lock:
+                    self._store(key, value, len(payload.encode("utf-8")), expires_at)
+                    self._stats["disk_hits"] += 1
+                return True, value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return False, None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Anahtarın değerini döndürür; yoksa veya süresi dolmuşsa None."""
+        return self._lookup(key)[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Değeri her iki katmana da yazar."""
+        payload = self._serialize(value)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, len(payload.encode("utf-8")), expires_at)
+        if self._disk is not None:
+            self._disk.set(key, payload, expires_at)
+
+    def get_or_load(self, key: str, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        Değeri önbellekten döndürür, yoksa ``loader`` ile yükler.
+
+        Aynı anahtar için eşzamanlı çağrılar tek bir ``loader`` çağrısını
+        bekler. ``loader`` None döndürürse sonuç önbelleğe yazılmaz.
+
+        Args:
+            key: Önbellek anahtarı
+            loader: Değeri kaynaktan getiren fonksiyon
+
+        Returns:
+            Önbellekteki veya yeni yüklenen değer
+        """
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        with self._lock:
+            # Lider yüklemeyi bitirmiş olabilir; tekrar kontrol et
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > time.time():
+                self._entries.move_to_end(key)
+                return entry[0]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._stats["loads"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def invalidate(self, key: str) -> None:
+        """Anahtarı her iki katmandan da siler."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+        if self._disk is not None:
+            self._disk.delete(key)
+
+    def clear(self) -> None:
+        """Tüm kayıtları ve sayaçları temizler."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            for name in self._stats:
+                self._stats[name] = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[2] > time.time()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Önbellek sayaçlarını döndürür.
+
+        Returns:
+            Dict: hit/miss/eviction sayaçları ve boyut bilgisi
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        stats["max_bytes"] = self.max_bytes
+        stats["disk_enabled"] = self._disk is not None
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
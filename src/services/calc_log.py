@@ -0,0 +1,171 @@
+"""
+Hesaplama Geçmişi.
+Oturum başına sabit kapasiteli, kompakt hesaplama kaydı. Kapasite dolunca
+en eski kayıt O(1) ile düşer; böylece uzun süren sohbetlerde bellek artmaz.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Kayıtta ayrı alan olarak tutulan anahtarlar; diğerleri ``extra`` içine gider
+_BASE_FIELDS = ("expression", "result", "formatted")
+# Toplu sonuçlarda saklanmayan büyük alanlar
+_DROPPED_FIELDS = ("sample",)
+
+
+class CalculationRecord:
+    """Tek bir hesaplama kaydı."""
+
+    __slots__ = ("expression", "result", "formatted", "timestamp", "extra")
+
+    def __init__(self, expression: str, result: Any, formatted: Optional[str] = None,
+                 timestamp: Optional[float] = None, extra: Optional[Dict[str, Any]] = None):
+        self.expression = expression
+        self.result = result
+        self.formatted = formatted
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CalculationRecord":
+        extra = {k: v for k, v in data.items()
+                 if k not in _BASE_FIELDS and k not in _DROPPED_FIELDS and k != "timestamp"}
+        return cls(data.get("expression", ""), data.get("result"), data.get("formatted"),
+                   data.get("timestamp"), extra)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"expression": self.expression, "result": self.result}
+        if self.formatted is not None:
+            data["formatted"] = self.formatted
+        if self.extra:
+            data.update(self.extra)
+        data["timestamp"] = self.timestamp
+        return data
+
+    def size(self) -> int:
+        """Kaydın yaklaşık bellek boyutu (bayt)."""
+        total = sys.getsizeof(self) + sys.getsizeof(self.expression) + sys.getsizeof(self.result)
+        if self.formatted is not None:
+            total += sys.getsizeof(self.formatted)
+        if self.extra:
+            total += sys.getsizeof(self.extra) + sum(sys.getsizeof(v) for v in self.extra.values())
+        return total
+
+
+class CalculationLog:
+    """
+    Sabit kapasiteli halka tampon.
+
+    Liste gibi kullanılabilir: ``append``, ``extend``, ``len``, indeks ve
+    dilim erişimi sözlük döndürür. ``total`` silinenler dahil eklenen tüm
+    kayıtların sayısıdır; ``since(total)`` o noktadan sonra eklenenleri verir.
+
+    Aynı turdaki araç çağrıları havuzdaki farklı iş parçacıklarında
+    çalışıp aynı kayda yazabildiği için tüm erişimler kilitle korunur.
+    """
+
+    def __init__(self, capacity: int, items: Iterable[Dict[str, Any]] = ()):
+        """
+        Args:
+            capacity: Saklanacak en fazla kayıt
+            items: Başlangıç kayıtları (sözlük)
+        """
+        self.capacity = max(int(capacity), 1)
+        self._records: deque = deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.total = 0
+        self.extend(items)
+
+    @staticmethod
+    def _to_record(calculation: Dict[str, Any]) -> CalculationRecord:
+        if isinstance(calculation, CalculationRecord):
+            return calculation
+        return CalculationRecord.from_dict(calculation)
+
+    def _append_locked(self, record: CalculationRecord) -> None:
+        if len(self._records) == self.capacity:
+            self._bytes -= self._records[0].size()
+        self._records.append(record)
+        self._bytes += record.size()
+        self.total += 1
+
+    def _snapshot(self) -> List[CalculationRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def append(self, calculation: Dict[str, Any]) -> None:
+        """Hesaplamayı ekler; kapasite doluysa en eskisi düşer."""
+        record = self._to_record(calculation)
+        with self._lock:
+            self._append_locked(record)
+
+    def extend(self, calculations: Iterable[Dict[str, Any]]) -> None:
+        records = [self._to_record(c) for c in calculations]
+        with self._lock:
+            for record in records:
+                self._append_locked(record)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._bytes = 0
+
+    def since(self, total: int) -> List[Dict[str, Any]]:
+        """``total`` sayacından sonra eklenen (hâlâ tamponda olan) kayıtlar."""
+        with self._lock:
+            count = min(self.total - total, len(self._records))
+            records = list(self._records)[-count:] if count > 0 else []
+        return [r.to_dict() for r in records]
+
+    def recent(self, limit: int = 5, query: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        En yeni kayıtları (yeniden eskiye) döndürür.
+
+        Args:
+            limit: En fazla kayıt sayısı
+            query: İfadede aranacak metin (opsiyonel)
+        """
+        results = []
+        needle = (query or "").replace(" ", "")
+        for record in reversed(self._snapshot()):
+            if needle and needle not in record.expression.replace(" ", ""):
+                continue
+            results.append(record.to_dict())
+            if len(results) >= limit:
+                break
+        return results
+
+    def memory_estimate(self) -> int:
+        """Tamponun yaklaşık bellek boyutu (bayt)."""
+        with self._lock:
+            return sys.getsizeof(self._records) + self._bytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = len(self._records), self.total
+        return {
+            "count": count,
+            "capacity": self.capacity,
+            "total": total,
+            "memory_estimate_bytes": self.memory_estimate()
+        }
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [r.to_dict() for r in self._snapshot()]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (r.to_dict() for r in self._snapshot())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [r.to_dict() for r in self._snapshot()[index]]
+        with self._lock:
+            record = self._records[index]
+        return record.to_dict()
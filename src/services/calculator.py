@@ -3,9 +3,11 @@ Güvenli Hesaplama Servisi.
 Matematiksel ifadeleri güvenli bir şekilde hesaplar.
 """
 
-import re
-from typing import Dict, Any, Optional
+import threading
+from functools import lru_cache, wraps
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 import numexpr as ne
+import numpy as np
 import sys
 import os
 
@@ -22,8 +24,167 @@ MAX_LEN = Config.CALC_MAX_LEN
 MAX_OPERATORS = Config.CALC_MAX_OPERATORS
 MAX_EXPONENT_DIGITS = Config.CALC_MAX_EXPONENT
 
-# İzin verilen karakterler regex'i
-ALLOWED_CHARS_RE = re.compile(r'^[0-9+\-*/().\s]+$')
+MAX_EXPONENT_VALUE = 10000
+MAX_OPERATOR_RUN = 5
+
+# Toplu hesaplama sınırları
+MAX_BATCH_ITEMS = Config.CALC_BATCH_MAX_ITEMS
+MAX_BATCH_EXPRESSIONS = 100
+MAX_BATCH_VARIABLES = 10
+BATCH_RESULT_LIMIT = Config.CALC_BATCH_RESULT_LIMIT
+BATCH_SAMPLE_SIZE = 10
+RECALL_MAX_LIMIT = 20
+
+if Config.CALC_BATCH_THREADS:
+    ne.set_num_threads(Config.CALC_BATCH_THREADS)
+
+# Tarayıcının karakter sınıfları
+_DIGITS = frozenset("0123456789")
+_OPERATORS = frozenset("+-*/().")
+_ARITHMETIC = frozenset("+-*/")
+_NAME_START = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+_NAME_CHARS = _NAME_START | _DIGITS
+# Aralarındaki boşluk silinirse birleşip anlamı değişen karakterler (ör. "1 2", "x 2")
+_WORD_CHARS = _NAME_CHARS | frozenset(".")
+
+INVALID_CHARS_ERROR = "Geçersiz karakter; sadece sayılar ve aritmetik operatörlere izin verilir."
+
+
+def _per_thread(builder):
+    """
+    ``builder`` sonuçlarını iş parçacığı başına ayrı bir LRU önbellekte tutar.
+
+    Derlenmiş bir ``NumExpr`` nesnesi ara sonuçlarını kendi bellek
+    tamponunda hesaplar; aynı nesne iki iş parçacığında aynı anda
+    çalıştırılırsa sonuçlar birbirine karışır. Ortak önbellek bir kilitle
+    korunursa tüm hesaplamalar (büyük toplu hesaplar dahil) sıraya girer.
+    Her iş parçacığı kendi programlarını tuttuğu için çalıştırma kilitsizdir;
+    numexpr çalışırken GIL'i bıraktığı için hesaplamalar paralel ilerler.
+    ``cache_info``/``cache_clear`` çağıran iş parçacığının önbelleğine uygulanır.
+    """
+    local = threading.local()
+
+    def cached():
+        cache = getattr(local, "cache", None)
+        if cache is None:
+            cache = local.cache = lru_cache(maxsize=Config.CALC_CACHE_SIZE)(builder)
+        return cache
+
+    @wraps(builder)
+    def wrapper(*key):
+        return cached()(*key)
+
+    wrapper.cache_info = lambda: cached().cache_info()
+    wrapper.cache_clear = lambda: cached().cache_clear()
+    return wrapper
+
+
+def _scan(expr: str, names: Optional[Iterable[str]] = None) -> Tuple[Optional[str], str]:
+    """
+    İfadeyi tek geçişte doğrular ve önbellek anahtarını üretir.
+
+    Kontroller (sırasıyla): izin verilen karakterler, operatör sayısı,
+    üs basamak sayısı ve değeri, ardışık operatör tekrarı.
+
+    Args:
+        expr: Uzunluğu kontrol edilmiş, boşlukları kırpılmış ifade
+        names: İzin verilen değişken adları (None ise harfler geçersizdir)
+
+    Returns:
+        Tuple: (hata mesajı veya None, boşlukları normalize edilmiş ifade)
+    """
+    operator_count = 0
+    operator_run = 0
+    longest_run = 0
+    star_run = 0
+    pending_exponent = False   # "**" ve ardından yalnızca boşluk görüldü
+    exponent_start = -1        # Devam eden üs basamaklarının başlangıcı
+    exponent_error = None
+    key = []
+    last = ""
+    space_seen = False
+    i, length = 0, len(expr)
+
+    while i < length:
+        ch = expr[i]
+        token = ch
+        if ch.isspace():
+            operator_run = 0
+            star_run = 0
+            space_seen = True
+            if exponent_start >= 0:
+                exponent_error = exponent_error or _check_exponent(expr[exponent_start:i])
+                exponent_start = -1
+            i += 1
+            continue
+
+        if ch in _DIGITS:
+            if pending_exponent:
+                exponent_start = i
+                pending_exponent = False
+            operator_run = 0
+            star_run = 0
+        elif ch in _OPERATORS:
+            operator_count += 1
+            if exponent_start >= 0:
+                exponent_error = exponent_error or _check_exponent(expr[exponent_start:i])
+                exponent_start = -1
+            if ch in _ARITHMETIC:
+                operator_run += 1
+                longest_run = max(longest_run, operator_run)
+            else:
+                operator_run = 0
+            star_run = star_run + 1 if ch == "*" else 0
+            pending_exponent = star_run >= 2
+        elif names is not None and ch in _NAME_START and exponent_start < 0:
+            end = i + 1
+            while end < length and expr[end] in _NAME_CHARS:
+                end += 1
+            token = expr[i:end]
+            if token not in names:
+                return f"Bilinmeyen değişken: {token}", ""
+            operator_run = 0
+            star_run = 0
+            pending_exponent = False
+        else:
+            return INVALID_CHARS_ERROR, ""
+
+        if space_seen and last and ((last in _WORD_CHARS and ch in _WORD_CHARS) or
+                                    (last == ch and ch in "*/")):
+            key.append(" ")
+        space_seen = False
+        key.append(token)
+        last = token[-1]
+        i += len(token)
+
+    if exponent_start >= 0:
+        exponent_error = exponent_error or _check_exponent(expr[exponent_start:])
+
+    if operator_count > MAX_OPERATORS:
+        return f"İfade çok karmaşık (maksimum {MAX_OPERATORS} operatör).", ""
+    if exponent_error:
+        return exponent_error, ""
+    if longest_run >= MAX_OPERATOR_RUN:
+        return "Aşırı operatör tekrarı tespit edildi.", ""
+    return None, "".join(key)
+
+
+def _check_exponent(digits: str) -> Optional[str]:
+    """Üs basamaklarını sınırlara göre kontrol eder."""
+    if len(digits) > MAX_EXPONENT_DIGITS:
+        return f"Üs kısmı çok büyük (maksimum {MAX_EXPONENT_DIGITS} basamak)."
+    if int(digits) > MAX_EXPONENT_VALUE:
+        return f"Üs değeri çok büyük (maksimum {MAX_EXPONENT_VALUE})."
+    return None
+
+
+@_per_thread
+def _compile(key: str) -> "ne.NumExpr":
+    """
+    Normalize ifadeyi numexpr programına derler (iş parçacığı başına LRU önbellekli).
+    Derleme hataları (ör. sıfıra bölme) önbelleğe alınmaz.
+    """
+    return ne.NumExpr(key)
 
 
 def calculate(expression: str, user_data: Optional[Dict] = None) -> Dict[str, Any]:
@@ -46,33 +207,15 @@ def calculate(expression: str, user_data: Optional[Dict] = None) -> Dict[str, An
     if len(expr) > MAX_LEN:
         return {"error": f"İfade çok uzun (maksimum {MAX_LEN} karakter)."}
 
-    # İzin verilen karakterler kontrolü (harf/alt çizgi vs. engellenir)
-    if not ALLOWED_CHARS_RE.match(expr):
-        return {"error": "Geçersiz karakter; sadece sayılar ve aritmetik operatörlere izin verilir."}
-
-    # Operatör sayısı kontrolü (aşırı karmaşık ifadeleri engellemek için)
-    operator_count = sum(expr.count(op) for op in ['+', '-', '*', '/', '(', ')', '.'])
-    if operator_count > MAX_OPERATORS:
-        return {"error": f"İfade çok karmaşık (maksimum {MAX_OPERATORS} operatör)."}
-
-    # Çok büyük üs (exponent) girişlerini sınırlama
-    for m in re.finditer(r'\*\*\s*(\d+)', expr):
-        exp_digits = len(m.group(1))
-        if exp_digits > MAX_EXPONENT_DIGITS:
-            return {"error": f"Üs kısmı çok büyük (maksimum {MAX_EXPONENT_DIGITS} basamak)."}
-        try:
-            if int(m.group(1)) > 10000:
-                return {"error": "Üs değeri çok büyük (maksimum 10000)."}
-        except Exception:
-            return {"error": "Üs ifadesi hatalı."}
-
-    # Ek güvenlik: ardışık operatörlerin aşırı tekrarını engelle
-    if re.search(r'[\+\-*/]{5,}', expr):
-        return {"error": "Aşırı operatör tekrarı tespit edildi."}
+    # Karakter, operatör, üs ve tekrar kontrolleri tek geçişte
+    error, key = _scan(expr)
+    if error:
+        return {"error": error}
 
     try:
-        # numexpr ile hesapla
-        result = ne.evaluate(expr)
+        # Derlenmiş programı önbellekten al ve çalıştır
+        program = _compile(key)
+        result = program()
 
         # numexpr numpy scalar/array döndürebilir - scalar değeri elde et
         value = _extract_scalar_value(result)
@@ -100,6 +243,173 @@ def calculate(expression: str, user_data: Optional[Dict] = None) -> Dict[str, An
         return {"error": f"Hesaplama hatası: {str(e)}"}
 
 
+def _normalize_variables(variables) -> Tuple[Optional[str], Dict[str, "np.ndarray"]]:
+    """
+    Değişkenleri ``{ad: float64 dizi}`` biçimine çevirir ve doğrular.
+    ``[{"name": ..., "values": [...]}]`` listesi veya ``{ad: değerler}`` kabul edilir.
+    """
+    if isinstance(variables, dict):
+        items = list(variables.items())
+    else:
+        items = [(v.get("name"), v.get("values")) for v in variables or [] if isinstance(v, dict)]
+
+    if len(items) > MAX_BATCH_VARIABLES:
+        return f"Çok fazla değişken (maksimum {MAX_BATCH_VARIABLES}).", {}
+
+    arrays: Dict[str, np.ndarray] = {}
+    length = 1
+    for name, values in items:
+        if not isinstance(name, str) or not name or name[0] not in _NAME_START or \
+                any(c not in _NAME_CHARS for c in name):
+            return f"Geçersiz değişken adı: {name}", {}
+        try:
+            array = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        except (TypeError, ValueError):
+            return f"Değişken değerleri sayı olmalı: {name}", {}
+        if array.ndim != 1 or array.size == 0:
+            return f"Değişken değerleri düz bir sayı listesi olmalı: {name}", {}
+        if array.size > MAX_BATCH_ITEMS:
+            return f"Çok fazla değer (maksimum {MAX_BATCH_ITEMS}).", {}
+        if array.size > 1:
+            if length > 1 and array.size != length:
+                return "Değişken listeleri aynı uzunlukta olmalı.", {}
+            length = array.size
+        arrays[name] = array
+    return None, arrays
+
+
+@_per_thread
+def _compile_vector(key: str, names: Tuple[str, ...]) -> "ne.NumExpr":
+    """Değişkenli ifadeyi ``names`` sırasıyla argüman alan programa derler."""
+    return ne.NumExpr(key, signature=[(name, np.float64) for name in names])
+
+
+def _summarize_values(values: "np.ndarray") -> Dict[str, Any]:
+    """Büyük sonuç dizileri için özet istatistikler."""
+    finite = values[np.isfinite(values)]
+    summary = {"count": int(values.size), "non_finite": int(values.size - finite.size)}
+    if finite.size:
+        summary.update(
+            min=float(finite.min()),
+            max=float(finite.max()),
+            mean=float(finite.mean()),
+            sum=float(finite.sum()),
+            std=float(finite.std())
+        )
+    return summary
+
+
+def _to_list(values: "np.ndarray") -> List[Optional[float]]:
+    """Diziyi JSON uyumlu listeye çevirir (NaN/sonsuz değerler None olur)."""
+    return [float(v) if np.isfinite(v) else None for v in values.tolist()]
+
+
+def calculate_batch(
+    expression: Optional[str] = None,
+    variables=None,
+    expressions: Optional[List[str]] = None,
+    user_data: Optional[Dict] = None
+) -> Dict[str, Any]:
+    """
+    Toplu hesaplama.
+
+    İki kullanım biçimi vardır:
+
+    - ``expression`` + ``variables``: değişkenli tek ifade, tüm değerler
+      üzerinde tek bir vektörel (çok iş parçacıklı) numexpr çağrısıyla
+      hesaplanır. Örn. ``x * 1.8 + 32`` ve ``x = [0, 10, 20]``.
+    - ``expressions``: birden fazla sabit ifade; her biri ``calculate`` ile
+      aynı kurallarla doğrulanır ve derlenmiş program önbelleğini paylaşır.
+
+    Sonuç ``CALC_BATCH_RESULT_LIMIT`` değerden uzunsa yalnızca özet
+    istatistikler ve ilk değerlerden bir örnek döndürülür.
+
+    Args:
+        expression: Değişkenli ifade
+        variables: ``[{"name": "x", "values": [...]}]`` veya ``{"x": [...]}``
+        expressions: Sabit ifadeler listesi
+        user_data: Kullanıcı verilerini saklamak için optional dict
+
+    Returns:
+        Dict: Toplu sonuç veya hata mesajı
+    """
+    if expressions:
+        if expression:
+            return {"error": "'expression' ve 'expressions' birlikte kullanılamaz."}
+        if len(expressions) > MAX_BATCH_EXPRESSIONS:
+            return {"error": f"Çok fazla ifade (maksimum {MAX_BATCH_EXPRESSIONS})."}
+        results = [calculate(str(e), user_data) for e in expressions]
+        return {
+            "count": len(results),
+            "errors": sum(1 for r in results if "error" in r),
+            "results": results
+        }
+
+    expr = (expression or "").strip()
+    if not expr:
+        return {"error": "İfade boş olamaz."}
+    if len(expr) > MAX_LEN:
+        return {"error": f"İfade çok uzun (maksimum {MAX_LEN} karakter)."}
+
+    error, arrays = _normalize_variables(variables)
+    if error:
+        return {"error": error}
+
+    error, key = _scan(expr, arrays)
+    if error:
+        return {"error": error}
+
+    names = tuple(sorted(arrays))
+    try:
+        program = _compile_vector(key, names)
+        values = np.atleast_1d(program(*(arrays[name] for name in names)))
+    except ZeroDivisionError:
+        return {"error": "Sıfıra bölme hatası."}
+    except Exception as e:
+        return {"error": f"Hesaplama hatası: {str(e)}"}
+
+    values = values.astype(np.float64, copy=False).ravel()
+    batch: Dict[str, Any] = {"expression": expression, "variables": list(names), "count": int(values.size)}
+    if values.size <= BATCH_RESULT_LIMIT:
+        batch["results"] = _to_list(values)
+        batch["formatted"] = [_format_result(v) if v is not None else "—" for v in batch["results"]]
+    else:
+        batch["summary"] = _summarize_values(values)
+        batch["sample"] = _to_list(values[:BATCH_SAMPLE_SIZE])
+        batch["truncated"] = True
+
+    if isinstance(user_data, dict):
+        user_data.setdefault("calculations", []).append(
+            {k: v for k, v in batch.items() if k != "formatted"}
+        )
+    return batch
+
+
+def recall_calculations(query: Optional[str] = None, limit: int = 5,
+                        user_data: Optional[Dict] = None) -> Dict[str, Any]:
+    """
+    Oturumda daha önce yapılan hesaplamaları döndürür (yeniden eskiye).
+    Model önceki sonuçları yeniden hesaplamak yerine buradan kullanabilir.
+
+    Args:
+        query: İfadede aranacak metin (opsiyonel)
+        limit: En fazla kayıt sayısı
+        user_data: Hesaplama geçmişini içeren kullanıcı verisi
+
+    Returns:
+        Dict: Kayıtlar ve geçmiş istatistikleri
+    """
+    calculations = (user_data or {}).get("calculations") or []
+    limit = max(1, min(int(limit or 5), RECALL_MAX_LIMIT))
+    if hasattr(calculations, "recent"):
+        results = calculations.recent(limit, query)
+    else:
+        needle = (query or "").replace(" ", "")
+        results = [c for c in reversed(list(calculations))
+                   if not needle or needle in str(c.get("expression", "")).replace(" ", "")][:limit]
+    return {"count": len(results), "calculations": results}
+
+
 def _extract_scalar_value(result) -> Optional[float]:
     """Numpy sonucundan scalar değer çıkarır."""
     try:
@@ -157,6 +467,83 @@ def get_function_def() -> Dict[str, Any]:
     }
 
 
+def get_batch_function_def() -> Dict[str, Any]:
+    """
+    ``calculate_batch`` için Gemini fonksiyon tanımını döndürür.
+    
+    Returns:
+        Dict: Fonksiyon tanımı
+    """
+    return {
+        "name": "calculate_batch",
+        "description": (
+            "Toplu hesaplama yapar. Değişkenli tek bir ifadeyi değer listeleri üzerinde "
+            "(dönüşüm tabloları, 'ya şöyle olsaydı' aralıkları) tek çağrıda hesaplar "
+            "veya birden fazla ifadeyi birlikte hesaplar. Çok sayıda sonuçta özet "
+            "istatistikler döner."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "expression": {
+                    "type": "string",
+                    "description": "Değişkenli ifade (örn: 'x * 1.8 + 32' veya 'p * (1 + r) ** n')"
+                },
+                "variables": {
+                    "type": "array",
+                    "description": "Değişkenler; tek değerli listeler tüm satırlara uygulanır",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string", "description": "Değişken adı (örn: 'x')"},
+                            "values": {
+                                "type": "array",
+                                "items": {"type": "number"},
+                                "description": "Değer listesi"
+                            }
+                        },
+                        "required": ["name", "values"]
+                    }
+                },
+                "expressions": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Birlikte hesaplanacak sabit ifadeler (örn: ['2**10', '15/4'])"
+                }
+            }
+        }
+    }
+
+
+def get_recall_function_def() -> Dict[str, Any]:
+    """
+    ``recall_calculations`` için Gemini fonksiyon tanımını döndürür.
+    
+    Returns:
+        Dict: Fonksiyon tanımı
+    """
+    return {
+        "name": "recall_calculations",
+        "description": (
+            "Bu sohbette daha önce yapılan hesaplamaları ve sonuçlarını getirir. "
+            "Önceki bir sonucu kullanmak için yeniden hesaplamak yerine bunu çağır."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "İfadede aranacak metin (örn: '1.8'); boşsa en son hesaplamalar"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": f"En fazla kayıt sayısı (varsayılan 5, en fazla {RECALL_MAX_LIMIT})"
+                }
+            }
+        }
+    }
+
+
 # Test için
 if __name__ == "__main__":
     test_cases = [
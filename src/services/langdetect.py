@@ -0,0 +1,96 @@
+"""
+Dil Tespiti.
+Kısa sorguların (çoğunlukla sayfa başlıkları) hangi Vikipedi diline ait
+olduğunu harf ve sık kelime ipuçlarıyla tahmin eder. Model gerektirmez;
+yalnızca yapılandırılmış aday diller arasında seçim yapar.
+"""
+
+import re
+from typing import Dict, Iterable, Optional
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Dile özgü harfler (ağırlıklı), o dilde bulunmayan harfler ve sık kelimeler
+_PROFILES: Dict[str, Dict] = {
+    "tr": {
+        "letters": {"ğ": 3, "Ğ": 3, "ı": 3, "İ": 3, "ş": 3, "Ş": 3, "ç": 1, "Ç": 1, "ö": 1, "Ö": 1, "ü": 1, "Ü": 1},
+        "foreign": set("qwxQWX"),
+        "words": {"ve", "bir", "bu", "ile", "için", "nedir", "kimdir", "nerede", "nasıl", "hangi",
+                  "tarihi", "savaşı", "ne", "mi", "mı", "da", "de", "en", "olan", "hakkında"},
+    },
+    "en": {
+        "letters": {},
+        "foreign": set("çğışöüÇĞİŞÖÜ"),
+        "words": {"the", "of", "and", "in", "is", "what", "who", "where", "how", "which",
+                  "history", "war", "about", "was", "for", "on", "to", "a", "an"},
+    },
+    "de": {
+        "letters": {"ä": 3, "Ä": 3, "ß": 3, "ö": 1, "Ö": 1, "ü": 1, "Ü": 1},
+        "foreign": set("çğışÇĞİŞ"),
+        "words": {"der", "die", "das", "und", "ist", "von", "was", "wer", "wie", "geschichte", "krieg"},
+    },
+    "fr": {
+        "letters": {"é": 2, "è": 3, "ê": 3, "à": 2, "ù": 3, "œ": 3, "â": 2, "î": 2, "ô": 2, "ç": 1},
+        "foreign": set("ğışĞİŞ"),
+        "words": {"le", "la", "les", "de", "des", "et", "est", "qui", "quoi", "histoire", "guerre", "du"},
+    },
+    "es": {
+        "letters": {"ñ": 3, "Ñ": 3, "¿": 3, "¡": 3, "á": 2, "í": 2, "ó": 2, "ú": 2},
+        "foreign": set("ğışĞİŞ"),
+        "words": {"el", "la", "los", "las", "de", "y", "es", "que", "quién", "historia", "guerra", "del"},
+    },
+}
+
+# Adayda olmayan bir dile ait harf görülürse düşülen puan
+FOREIGN_PENALTY = 2
+
+
+def score_language(text: str, language: str) -> int:
+    """
+    Metnin verilen dile uygunluk puanını hesaplar.
+
+    Args:
+        text: Sorgu metni
+        language: Dil kodu
+
+    Returns:
+        int: Puan (profili olmayan diller için 0)
+    """
+    profile = _PROFILES.get(language)
+    if profile is None:
+        return 0
+    chars = set(text)
+    score = sum(weight for letter, weight in profile["letters"].items() if letter in chars)
+    if chars & profile["foreign"]:
+        score -= FOREIGN_PENALTY
+    score += len(set(_WORD_RE.findall(text.lower())) & profile["words"])
+    return score
+
+
+def detect_language(text: str, candidates: Iterable[str], default: str) -> str:
+    """
+    Metnin dilini aday diller arasından tahmin eder.
+
+    Başka bir dil için olumlu bir ipucu yoksa (veya en iyi puan varsayılan
+    dille eşitse) varsayılan dil döner; yabancı harf cezası tek başına
+    dil değiştirmez.
+
+    Args:
+        text: Sorgu metni
+        candidates: Aday dil kodları
+        default: Varsayılan dil kodu
+
+    Returns:
+        str: Tahmin edilen dil kodu
+    """
+    if not text:
+        return default
+    best: Optional[str] = None
+    best_score = max(score_language(text, default), 0)
+    for language in candidates:
+        if language == default:
+            continue
+        score = score_language(text, language)
+        if score > best_score:
+            best, best_score = language, score
+    return best or default
@@ -0,0 +1,273 @@
+"""
+Wikipedia Ön Yükleme Servisi.
+Model bir ``search_info`` sonucundan yanıt üretirken, sayfanın metinde ilk
+geçen bağlantılı sayfalarını arka planda sayfa önbelleğine alır; böylece
+sık görülen devam soruları ("peki ya ...?") ağ isteği beklemeden yanıtlanır.
+
+- Sayfa başına en fazla ``max_pages`` bağlantı, tek toplu istekle çekilir.
+- Küçük bir iş parçacığı havuzu kullanılır; kuyruk doluysa yeni işler
+  beklemek yerine düşürülür, böylece kullanıcı istekleriyle yarışmaz.
+- Kullanıcı isteklerinin bağlantı havuzu yerine kendi küçük API
+  istemcilerini kullanır ve dakikalık istek bütçesini aşmaz.
+- Ön yüklenen sayfaların sonradan önbellekten okunma oranı ölçülür.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+try:
+    from src.config import Config
+    from src.services import wikipedia
+    from src.services.textnorm import fold
+    from src.services.wiki_client import WikiClient
+except ImportError:
+    from config import Config
+    from services import wikipedia
+    from services.textnorm import fold
+    from services.wiki_client import WikiClient
+
+# Metinde aranacak en fazla karakter (özet + ilk bölümler)
+RANK_TEXT_LIMIT = 20000
+# İsabet ölçümü için hatırlanan en fazla ön yüklenmiş sayfa
+MAX_TRACKED_PAGES = 4096
+# İstek bütçesinin yenilendiği süre (saniye)
+BUDGET_WINDOW = 60.0
+
+
+def _page_text(data: Dict[str, Any]) -> str:
+    """Sayfanın özetini ve bölüm içeriklerini okunma sırasıyla birleştirir."""
+    parts = [data.get("summary") or ""]
+    stack = list(reversed(data.get("sections") or []))
+    length = len(parts[0])
+    while stack and length < RANK_TEXT_LIMIT:
+        section = stack.pop()
+        content = section.get("content") or ""
+        parts.append(content)
+        length += len(content)
+        stack.extend(reversed(section.get("subsections") or []))
+    return "\n".join(parts)[:RANK_TEXT_LIMIT]
+
+
+def rank_links(links: List[str], data: Dict[str, Any], limit: int) -> List[str]:
+    """
+    Bağlantıları sayfa metninde ilk geçtikleri yere göre sıralar.
+    Metinde hiç geçmeyen bağlantılar (gezinti kutuları vb.) elenir.
+
+    Args:
+        links: Bağlantılı sayfa başlıkları
+        data: Sayfa verisi
+        limit: En fazla sonuç
+
+    Returns:
+        List[str]: Öncelik sırasına göre başlıklar
+    """
+    text = fold(_page_text(data))
+    own_title = data.get("title")
+    positions = []
+    for title in dict.fromkeys(links):
+        if title == own_title:
+            continue
+        position = text.find(fold(title))
+        if position >= 0:
+            positions.append((position, title))
+    positions.sort()
+    return [title for _, title in positions[:limit]]
+
+
+class Prefetcher:
+    """
+    Bağlantılı sayfaları arka planda önbelleğe alan düşük öncelikli havuz.
+    """
+
+    def __init__(self, max_pages: int = 5, max_workers: int = 1, max_pending: int = 8,
+                 budget_per_minute: int = 0, pool_size: int = 2, clock=time.monotonic):
+        """
+        Args:
+            max_pages: Sonuç başına ön yüklenecek en fazla sayfa
+            max_workers: İş parçacığı sayısı
+            max_pending: Kuyrukta bekleyebilecek en fazla iş (fazlası düşürülür)
+            budget_per_minute: Dakikada en fazla Wikipedia isteği (0: sınırsız)
+            pool_size: Ön yükleme istemcilerinin bağlantı havuzu boyutu
+            clock: Bütçe penceresi için saat (testler için)
+        """
+        self.max_pages = max_pages
+        self.max_pending = max_pending
+        self.budget_per_minute = budget_per_minute
+        self.pool_size = pool_size
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix="wiki-prefetch")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active: set = set()
+        self._clients: Dict[str, WikiClient] = {}
+        self._window_start = clock()
+        self._window_used = 0
+        self._prefetched: "OrderedDict[str, None]" = OrderedDict()
+        self._stats = {
+            "scheduled": 0, "dropped": 0, "over_budget": 0, "errors": 0,
+            "requests": 0, "fetched": 0, "hits": 0, "expired": 0
+        }
+        wikipedia.add_lookup_listener(self._on_lookup)
+
+    def schedule(self, result: Dict[str, Any]) -> bool:
+        """
+        ``search_info`` sonucunun bağlantılı sayfalarını ön yüklemek üzere kuyruğa alır.
+
+        Args:
+            result: ``search_info`` çıktısı
+
+        Returns:
+            bool: İş kuyruğa alındıysa True
+        """
+        data = result.get("result") if isinstance(result, dict) else None
+        if not isinstance(data, dict) or not data.get("title"):
+            return False
+        language = result.get("language") or Config.WIKI_LANGUAGE
+        key = wikipedia.cache_key(data["title"], language)
+
+        with self._lock:
+            if key in self._active:
+                return False
+            if self._budget_left() <= 0:
+                self._stats["over_budget"] += 1
+                return False
+            if self._pending >= self.max_pending:
+                self._stats["dropped"] += 1
+                return False
+            self._pending += 1
+            self._active.add(key)
+            self._stats["scheduled"] += 1
+        try:
+            self._executor.submit(self._run, key, data, language)
+        except RuntimeError:
+            # Havuz kapatılmış
+            self._finish(key)
+            return False
+        return True
+
+    def _budget_left(self) -> float:
+        """Kilit altında çağrılır; bu dakika kalan istek sayısı."""
+        if not self.budget_per_minute:
+            return float("inf")
+        now = self._clock()
+        if now - self._window_start >= BUDGET_WINDOW:
+            self._window_start = now
+            self._window_used = 0
+        return self.budget_per_minute - self._window_used
+
+    def _take_budget(self, requests: int) -> int:
+        """En fazla ``requests`` isteklik bütçe ayırır; ayrılanı döndürür."""
+        with self._lock:
+            granted = int(min(requests, max(self._budget_left(), 0)))
+            self._window_used += granted
+            self._stats["requests"] += granted
+            if granted < requests:
+                self._stats["over_budget"] += 1
+            return granted
+
+    def _client(self, language: str) -> WikiClient:
+        """Dil için ön yüklemeye ayrılmış küçük havuzlu istemci."""
+        with self._lock:
+            client = self._clients.get(language)
+            if client is None:
+                client = self._clients[language] = wikipedia.create_client(language, pool_size=self.pool_size)
+            return client
+
+    def _finish(self, key: str) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._active.discard(key)
+
+    def _run(self, key: str, data: Dict[str, Any], language: str) -> None:
+        try:
+            if not self._take_budget(1):
+                return
+            client = self._client(language)
+            links = wikipedia.get_links(data["title"], language, client=client)
+            candidates = [
+                title for title in rank_links(links, data, self.max_pages * 2)
+                if wikipedia.cache_key(title, language) not in wikipedia.page_cache
+            ][:self.max_pages]
+            if not candidates:
+                return
+            # Toplu bilgi isteği + sayfa başına bir metin isteği
+            granted = self._take_budget(len(candidates) + 1)
+            candidates = candidates[:max(granted - 1, 0)]
+            if not candidates:
+                return
+            pages = wikipedia.get_pages(candidates, language, client=client)
+            fetched = [(title, page) for title, page in pages.items() if page is not None]
+            with self._lock:
+                for title, page in fetched:
+                    self._track(wikipedia.cache_key(title, language))
+                    if page.get("title") and page["title"] != title:
+                        self._track(wikipedia.cache_key(page["title"], language))
+                self._stats["fetched"] += len(fetched)
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            print(f"⚠️ Ön yükleme hatası ({data.get('title')}): {e}")
+        finally:
+            self._finish(key)
+
+    def _track(self, key: str) -> None:
+        """Kilit altında çağrılır; ön yüklenen anahtarı hatırlar."""
+        self._prefetched[key] = None
+        self._prefetched.move_to_end(key)
+        while len(self._prefetched) > MAX_TRACKED_PAGES:
+            self._prefetched.popitem(last=False)
+
+    def _on_lookup(self, key: str, cached: bool) -> None:
+        """Kullanıcı okumasında ön yüklenmiş sayfa önbellekten geldiyse isabet sayar."""
+        with self._lock:
+            if key not in self._prefetched:
+                return
+            del self._prefetched[key]
+            self._stats["hits" if cached else "expired"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Ön yükleme ve isabet istatistiklerini döndürür."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = self._pending
+            clients = dict(self._clients)
+        stats["transport"] = {language: client.stats() for language, client in clients.items()}
+        stats["hit_rate"] = round(stats["hits"] / stats["fetched"], 4) if stats["fetched"] else 0.0
+        return stats
+
+    def close(self, wait: bool = False) -> None:
+        """Havuzu ve istemcilerin oturumlarını kapatır, okuma izlemeyi bırakır."""
+        wikipedia.remove_lookup_listener(self._on_lookup)
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.session.close()
+
+
+_prefetcher: Optional[Prefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> Optional[Prefetcher]:
+    """
+    Süreç genelinde paylaşılan ön yükleyiciyi döndürür.
+    ``WIKI_PREFETCH_ENABLED`` kapalıysa None döner.
+    """
+    global _prefetcher
+    if not Config.WIKI_PREFETCH_ENABLED:
+        return None
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = Prefetcher(
+                    max_pages=Config.WIKI_PREFETCH_MAX_PAGES,
+                    max_workers=Config.WIKI_PREFETCH_WORKERS,
+                    max_pending=Config.WIKI_PREFETCH_MAX_PENDING,
+                    budget_per_minute=Config.WIKI_PREFETCH_BUDGET_PER_MINUTE,
+                    pool_size=Config.WIKI_PREFETCH_POOL_SIZE
+                )
+    return _prefetcher
@@ -0,0 +1,230 @@
+"""
+Araç Sonucu Şekillendirme Servisi.
+Wikipedia sonuçlarını kullanıcının sorusuna göre önem sırasına koyar ve
+model'e gönderilecek içeriği karakter bütçesi içinde tutar.
+"""
+
+import json
+import math
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+import sys
+import os
+
+try:
+    from src.config import Config
+    from src.services.textnorm import tokenize
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import Config
+    from services.textnorm import tokenize
+
+
+# BM25 parametreleri
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Bölüm başlıklarındaki eşleşmeler içerikten daha değerli sayılır
+TITLE_WEIGHT = 3
+
+TRUNCATION_MARK = " …"
+
+
+def flatten_sections(sections: List[Dict[str, Any]], parent: str = "") -> List[Dict[str, Any]]:
+    """
+    Hiyerarşik bölüm ağacını ``Üst / Alt`` yollu düz listeye çevirir.
+
+    Args:
+        sections: ``extract_sections`` çıktısı
+        parent: Üst bölüm yolu
+
+    Returns:
+        List[Dict]: path, title, content ve level alanlı bölüm listesi
+    """
+    flat = []
+    for section in sections:
+        path = f"{parent} / {section['title']}" if parent else section["title"]
+        flat.append({
+            "path": path,
+            "title": section["title"],
+            "content": section.get("content") or "",
+            "level": section.get("level", 0)
+        })
+        flat.extend(flatten_sections(section.get("subsections") or [], path))
+    return flat
+
+
+def score_sections(sections: List[Dict[str, Any]], question: str) -> List[float]:
+    """
+    Bölümleri soruya göre BM25 ile puanlar.
+
+    Args:
+        sections: ``flatten_sections`` çıktısı
+        question: Kullanıcının sorusu
+
+    Returns:
+        List[float]: Her bölüm için skor
+    """
+    query_terms = set(tokenize(question))
+    if not sections or not query_terms:
+        return [0.0] * len(sections)
+
+    documents = []
+    for section in sections:
+        terms = tokenize(section["content"]) + tokenize(section["path"]) * TITLE_WEIGHT
+        documents.append(Counter(terms))
+
+    total = len(documents)
+    avg_len = sum(sum(d.values()) for d in documents) / total or 1.0
+    doc_freq = Counter(term for d in documents for term in query_terms if term in d)
+
+    scores = []
+    for document in documents:
+        length = sum(document.values())
+        score = 0.0
+        for term in query_terms:
+            tf = document.get(term, 0)
+            if not tf:
+                continue
+            df = doc_freq[term]
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+        scores.append(score)
+    return scores
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:max(limit - len(TRUNCATION_MARK), 0)].rstrip() + TRUNCATION_MARK
+
+
+def _payload_size(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def select_sections(
+    sections: List[Dict[str, Any]], question: str, budget: int
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Bütçeye sığan en alakalı bölümleri seçer.
+
+    Args:
+        sections: Hiyerarşik bölüm listesi
+        question: Kullanıcının sorusu
+        budget: Bölüm içerikleri için karakter bütçesi
+
+    Returns:
+        Tuple: (makale sırasıyla seçilen bölümler, dışarıda kalan bölüm yolları)
+    """
+    flat = [s for s in flatten_sections(sections) if s["content"].strip()]
+    scores = score_sections(flat, question)
+    ranked = sorted(range(len(flat)), key=lambda i: (-scores[i], i))
+
+    kept: List[int] = []
+    remaining = budget
+    for i in ranked:
+        size = len(flat[i]["content"])
+        if size <= remaining:
+            kept.append(i)
+            remaining -= size
+        elif not kept and remaining > 0:
+            # En alakalı bölüm tek başına sığmıyorsa kırparak al
+            flat[i]["content"] = _truncate(flat[i]["content"], remaining)
+            kept.append(i)
+            remaining = 0
+
+    kept_set = set(kept)
+    selected = [
+        {"title": flat[i]["path"], "content": flat[i]["content"], "level": flat[i]["level"]}
+        for i in sorted(kept)
+    ]
+    omitted = [s["path"] for i, s in enumerate(flat) if i not in kept_set]
+    return selected, omitted
+
+
+def outline_search_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ``search_info`` sonucunu yalnızca özet ve içindekiler listesine indirger.
+    Bölüm içerikleri gerektiğinde ``get_section`` aracıyla istenir.
+
+    Args:
+        result: ``search_info`` çıktısı
+
+    Returns:
+        Dict: Hafif sonuç (hatalı sonuçlar olduğu gibi döner)
+    """
+    data = result.get("result") if isinstance(result, dict) else None
+    if not isinstance(data, dict):
+        return result
+
+    original_bytes = _payload_size(result)
+    shaped = dict(result)
+    shaped["result"] = {
+        "title": data.get("title"),
+        "summary": data.get("summary") or "",
+        "url": data.get("url"),
+        "outline": [s["path"] for s in flatten_sections(data.get("sections") or [])]
+    }
+    if data.get("categories"):
+        shaped["result"]["categories"] = data["categories"]
+
+    shaped_bytes = _payload_size(shaped)
+    shaped["shaping"] = {
+        "original_bytes": original_bytes,
+        "shaped_bytes": shaped_bytes,
+        "saved_bytes": max(original_bytes - shaped_bytes, 0),
+        "kept_sections": 0,
+        "omitted_sections": len(shaped["result"]["outline"])
+    }
+    return shaped
+
+
+def shape_search_result(result: Dict[str, Any], question: str, max_chars: int = None) -> Dict[str, Any]:
+    """
+    ``search_info`` sonucunu soruya göre budar.
+
+    Özet her zaman korunur; bölümler BM25 skoruna göre bütçe dolana kadar
+    eklenir, kalanlar ``omitted_sections`` içinde başlık olarak listelenir.
+    ``shaping`` alanı kazanılan bayt miktarını raporlar.
+
+    Args:
+        result: ``search_info`` çıktısı
+        question: Kullanıcının sorusu
+        max_chars: Karakter bütçesi (varsayılan ``Config.TOOL_RESULT_MAX_CHARS``)
+
+    Returns:
+        Dict: Budanmış sonuç (hatalı sonuçlar olduğu gibi döner)
+    """
+    data = result.get("result") if isinstance(result, dict) else None
+    if not isinstance(data, dict):
+        return result
+
+    budget = max_chars if max_chars is not None else Config.TOOL_RESULT_MAX_CHARS
+    original_bytes = _payload_size(result)
+
+    summary = _truncate(data.get("summary") or "", budget // 2)
+    selected, omitted = select_sections(data.get("sections") or [], question, budget - len(summary))
+
+    shaped_data = {
+        "title": data.get("title"),
+        "summary": summary,
+        "url": data.get("url"),
+        "sections": selected
+    }
+    if omitted:
+        shaped_data["omitted_sections"] = omitted
+    if data.get("categories"):
+        shaped_data["categories"] = data["categories"]
+
+    shaped = dict(result)
+    shaped["result"] = shaped_data
+    shaped_bytes = _payload_size(shaped)
+    shaped["shaping"] = {
+        "original_bytes": original_bytes,
+        "shaped_bytes": shaped_bytes,
+        "saved_bytes": max(original_bytes - shaped_bytes, 0),
+        "kept_sections": len(selected),
+        "omitted_sections": len(omitted)
+    }
+    return shaped
@@ -0,0 +1,76 @@
+"""
+Metin Normalizasyon Yardımcıları.
+Türkçe karakterleri doğru işleyen büyük/küçük harf katlama ve başlık
+normalizasyonu.
+"""
+
+import re
+import unicodedata
+from typing import List
+
+# Türkçe'ye özgü büyük/küçük harf eşlemeleri (str.lower bunları yanlış çevirir)
+_TR_LOWER = str.maketrans({"İ": "i", "I": "ı"})
+# Türkçe harflerin klavyede ASCII olarak yazılan karşılıkları
+_TR_ASCII = str.maketrans({"ş": "s", "ğ": "g", "ı": "i", "ç": "c", "ö": "o", "ü": "u"})
+_WHITESPACE_RE = re.compile(r"[\s_]+")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fold(text: str) -> str:
+    """
+    Metni karşılaştırma için katlar.
+
+    Türkçe İ/I harflerini doğru küçültür, birleşik aksanları ayrıştırmadan
+    korur ve boşlukları tekleştirir.
+
+    Args:
+        text: Katlanacak metin
+
+    Returns:
+        str: Katlanmış metin
+    """
+    text = unicodedata.normalize("NFC", text or "").translate(_TR_LOWER).lower()
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def fold_ascii(text: str) -> str:
+    """
+    Aksan duyarsız anahtar üretir: ``fold`` sonrasında ş/ğ/ı/ç/ö/ü harflerini
+    ASCII karşılıklarına çevirir ve kalan aksanları (â, î, û...) atar.
+    Böylece "Sisli", "Agri Dagi" gibi ASCII yazılmış sorgular da eşleşir.
+
+    Args:
+        text: Ham metin
+
+    Returns:
+        str: Aksansız, katlanmış metin
+    """
+    decomposed = unicodedata.normalize("NFD", fold(text).translate(_TR_ASCII))
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_title(title: str) -> str:
+    """
+    Wikipedia başlığını MediaWiki kurallarına yakın biçimde normalize eder.
+    Alt çizgileri boşluğa çevirir ve fazla boşlukları temizler.
+
+    Args:
+        title: Ham başlık
+
+    Returns:
+        str: Normalize başlık
+    """
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", title or "")).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Metni katlanmış kelimelere ayırır.
+
+    Args:
+        text: Ham metin
+
+    Returns:
+        List[str]: Kelime listesi
+    """
+    return _WORD_RE.findall(fold(text))
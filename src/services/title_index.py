@@ -0,0 +1,346 @@
+"""
+Başlık Çözümleme İndeksi.
+Makale ve yönlendirme başlıkları için önek + trigram indeksi. Yanlış yazılmış,
+farklı büyük/küçük harfle veya Türkçe karakterler olmadan (ör. "Sisli")
+girilmiş sorguları tek çağrıda en olası başlığa çözer.
+
+Önek ve trigram aramaları aksan duyarsız anahtarla (``fold_ascii``) yapılır;
+sıralamada tam katlanmış eşleşme (``fold``) aksansız eşleşmenin önüne geçer.
+
+Dosya formatı (tamamı ``mmap`` ile okunur, açılışta ayrıştırma yapılmaz):
+    başlık       - sihirli değer ve bölüm konumları
+    ofset tablosu- (n + 1) adet uint32, başlık bloğuna ofsetler
+    başlık bloğu - aksansız anahtara göre sıralı "anahtar\\0başlık" kayıtları
+    trigram tablo- sıralı (trigram, posting ofseti, adet) kayıtları
+    postingler   - uint32 başlık numaraları
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from src.services.textnorm import fold, fold_ascii, normalize_title
+except ImportError:
+    from services.textnorm import fold, fold_ascii, normalize_title
+
+
+INDEX_MAGIC = b"TTIX\x02"
+_HEADER = struct.Struct("<5sIIIIII")  # magic, başlık, trigram, ofset/blok/trigram/posting konumları
+_U32 = struct.Struct("<I")
+_TRIGRAM = struct.Struct("<12sII")
+
+# Çok yaygın trigramlar aday üretiminde atlanır (ör. " ba", "lar")
+MAX_POSTINGS_PER_TRIGRAM = 50_000
+# Trigram sayımından sonra ayrıntılı puanlanacak aday sayısı
+CANDIDATE_POOL = 200
+PREFIX_BONUS = 0.1
+# Yalnızca aksanları farklı olan başlığın skoru (tam eşleşme 1.0)
+ASCII_MATCH_SCORE = 0.95
+# İndeks yoksa veya açılamadıysa yeniden deneme aralığı (saniye); başlangıçtan
+# sonra üretilen indeks yeniden başlatma gerektirmeden kullanılmaya başlar
+INDEX_RETRY_INTERVAL = 60.0
+
+
+def trigrams(key: str) -> Set[str]:
+    """Anahtarın kelime sınırlarını da içeren trigram kümesi."""
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a: Set[str], b: Set[str]) -> float:
+    """İki trigram kümesinin Dice benzerliği."""
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def _encode_trigram(trigram: str) -> bytes:
+    return trigram.encode("utf-8").ljust(12, b"\x00")
+
+
+class TitleIndex:
+    """
+    ``mmap`` ile açılan, salt okunur başlık indeksi.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: İndeks dosyası
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self._count, self._trigram_count, self._offsets_pos,
+         self._blob_pos, self._trigrams_pos, self._postings_pos) = _HEADER.unpack_from(self._mm, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"Geçersiz başlık indeksi: {path}")
+
+    @classmethod
+    def build(cls, titles: Iterable[str], path: str) -> "TitleIndex":
+        """
+        Başlık listesinden indeks dosyası üretir ve açar.
+
+        Args:
+            titles: Makale ve yönlendirme başlıkları
+            path: Üretilecek dosya yolu
+
+        Returns:
+            TitleIndex: Açılmış indeks
+        """
+        records: Dict[str, str] = {}
+        for title in titles:
+            title = normalize_title(title)
+            key = fold(title)
+            if key and key not in records:
+                records[key] = title
+
+        # Aynı aksansız anahtarı paylaşan başlıklar (ör. "Şişli", "Sisli") ayrı kayıtlardır
+        entries = sorted((fold_ascii(key), key, title) for key, title in records.items())
+        blob = bytearray()
+        offsets = []
+        postings_map: Dict[str, List[int]] = {}
+        for i, (key, _, title) in enumerate(entries):
+            offsets.append(len(blob))
+            blob += key.encode("utf-8") + b"\x00" + title.encode("utf-8")
+            for trigram in trigrams(key):
+                postings_map.setdefault(trigram, []).append(i)
+        offsets.append(len(blob))
+
+        trigram_table = bytearray()
+        postings = bytearray()
+        position = 0
+        for trigram in sorted(postings_map, key=_encode_trigram):
+            ids = postings_map[trigram]
+            trigram_table += _TRIGRAM.pack(_encode_trigram(trigram), position, len(ids))
+            postings += struct.pack(f"<{len(ids)}I", *ids)
+            position += len(ids)
+
+        offsets_pos = _HEADER.size
+        blob_pos = offsets_pos + _U32.size * len(offsets)
+        trigrams_pos = blob_pos + len(blob)
+        postings_pos = trigrams_pos + len(trigram_table)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(_HEADER.pack(INDEX_MAGIC, len(entries), len(postings_map),
+                                 offsets_pos, blob_pos, trigrams_pos, postings_pos))
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            f.write(blob)
+            f.write(trigram_table)
+            f.write(postings)
+        os.replace(path + ".tmp", path)
+        return cls(path)
+
+    @staticmethod
+    def load_titles_file(path: str) -> Iterable[str]:
+        """
+        Satır başına bir başlık içeren dosyayı okur
+        (ör. ``trwiki-latest-all-titles-in-ns0``).
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                title = line.rstrip("\n")
+                if title and title != "page_title":
+                    yield title
+
+    # --- Düşük seviye erişim ---
+
+    def _record(self, i: int) -> Tuple[str, str]:
+        start = _U32.unpack_from(self._mm, self._offsets_pos + i * 4)[0]
+        end = _U32.unpack_from(self._mm, self._offsets_pos + (i + 1) * 4)[0]
+        raw = self._mm[self._blob_pos + start:self._blob_pos + end]
+        key, _, title = raw.partition(b"\x00")
+        return key.decode("utf-8"), title.decode("utf-8")
+
+    def _key(self, i: int) -> str:
+        return self._record(i)[0]
+
+    def _lower_bound(self, key: str) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _postings(self, trigram: str) -> Tuple[int, int]:
+        """Trigram'ın posting konumunu ve adedini ikili arama ile bulur."""
+        target = _encode_trigram(trigram)
+        lo, hi = 0, self._trigram_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            encoded, position, count = _TRIGRAM.unpack_from(self._mm, self._trigrams_pos + mid * _TRIGRAM.size)
+            if encoded < target:
+                lo = mid + 1
+            elif encoded > target:
+                hi = mid
+            else:
+                return position, count
+        return 0, 0
+
+    # --- Sorgular ---
+
+    def get(self, title: str) -> Optional[str]:
+        """Katlanmış (aksanları koruyan) eşleşme ile başlığın kanonik yazımını döndürür."""
+        exact = fold(title)
+        key = fold_ascii(exact)
+        i = self._lower_bound(key)
+        while i < self._count:
+            found_key, found_title = self._record(i)
+            if found_key != key:
+                break
+            if fold(found_title) == exact:
+                return found_title
+            i += 1
+        return None
+
+    def prefix(self, text: str, limit: int = 10) -> List[str]:
+        """Verilen önekle (aksan duyarsız) başlayan başlıkları sıralı döndürür."""
+        key = fold_ascii(text)
+        results = []
+        i = self._lower_bound(key)
+        while i < self._count and len(results) < limit:
+            found_key, found_title = self._record(i)
+            if not found_key.startswith(key):
+                break
+            results.append(found_title)
+            i += 1
+        return results
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Sorguya en yakın başlıkları puanlarıyla döndürür.
+
+        Tam (katlanmış) eşleşme 1.0, yalnızca aksanları farklı eşleşme
+        ``ASCII_MATCH_SCORE`` alır; diğer adaylar aksansız anahtarların
+        trigram Dice benzerliği ile puanlanır ve önek eşleşmeleri küçük bir
+        bonus alır. Eşit skorlarda aksanları da tutan aday önce gelir.
+
+        Args:
+            query: Kullanıcının yazdığı başlık
+            limit: Döndürülecek en fazla aday
+
+        Returns:
+            List[Dict]: ``title`` ve ``score`` alanlı adaylar
+        """
+        exact = fold(query)
+        key = fold_ascii(exact)
+        if not key or not self._count:
+            return []
+
+        query_trigrams = trigrams(key)
+        exact_trigrams = trigrams(exact)
+        counts: Counter = Counter()
+        for trigram in query_trigrams:
+            position, count = self._postings(trigram)
+            if not count or count > MAX_POSTINGS_PER_TRIGRAM:
+                continue
+            start = self._postings_pos + position * 4
+            counts.update(struct.unpack_from(f"<{count}I", self._mm, start))
+
+        candidates = {i for i, _ in counts.most_common(CANDIDATE_POOL)}
+        lower = self._lower_bound(key)
+        candidates.update(range(lower, min(lower + limit, self._count)))
+
+        scored = []
+        for i in candidates:
+            found_key, found_title = self._record(i)
+            found_exact = fold(found_title)
+            if found_exact == exact:
+                score = 1.0
+            elif found_key == key:
+                score = ASCII_MATCH_SCORE
+            else:
+                score = _dice(query_trigrams, trigrams(found_key))
+                if found_key.startswith(key):
+                    score = min(score + PREFIX_BONUS, ASCII_MATCH_SCORE - 0.01)
+            if score > 0:
+                scored.append((score, _dice(exact_trigrams, trigrams(found_exact)), found_title))
+
+        scored.sort(key=lambda item: (-item[0], -item[1], len(item[2]), item[2]))
+        return [{"title": title, "score": round(score, 3)} for score, _, title in scored[:limit]]
+
+    def resolve(self, query: str, threshold: float, limit: int = 5) -> Dict[str, Any]:
+        """
+        Sorguyu tek çağrıda en iyi başlığa veya öneri listesine çözer.
+
+        Args:
+            query: Kullanıcının yazdığı başlık
+            threshold: Otomatik eşleşme için gereken en düşük skor
+            limit: Öneri sayısı
+
+        Returns:
+            Dict: ``match`` (eşik üstündeyse başlık, değilse None) ve ``suggestions``
+        """
+        candidates = self.search(query, limit)
+        match = candidates[0]["title"] if candidates and candidates[0]["score"] >= threshold else None
+        return {"match": match, "suggestions": candidates}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """Dosya tanıtıcılarını kapatır."""
+        self._mm.close()
+        self._file.close()
+
+
+_index: Optional[TitleIndex] = None
+_index_loaded = False
+_index_retry_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_title_index(path: str, source_titles=None) -> Optional[TitleIndex]:
+    """
+    Süreç genelinde paylaşılan başlık indeksini döndürür.
+
+    Dosya varsa ``mmap`` ile açılır; yoksa (veya eski biçimdeyse) ve
+    ``source_titles`` verilmişse (başlıkları üreten fonksiyon) bir kez
+    üretilip diske yazılır. İndeks
+    bulunamazsa sonuç önbelleğe alınmaz; ``INDEX_RETRY_INTERVAL`` saniye
+    sonra tekrar denenir.
+
+    Args:
+        path: İndeks dosyası
+        source_titles: Başlık iterable'ı döndüren fonksiyon (opsiyonel)
+
+    Returns:
+        Optional[TitleIndex]: İndeks, kaynak yoksa None
+    """
+    global _index, _index_loaded, _index_retry_at
+    if _index_loaded:
+        return _index
+    if time.monotonic() < _index_retry_at:
+        return None
+    with _index_lock:
+        if _index_loaded or time.monotonic() < _index_retry_at:
+            return _index
+        index = None
+        try:
+            if path and os.path.exists(path):
+                try:
+                    index = TitleIndex(path)
+                except (ValueError, struct.error):
+                    # Eski biçimli veya bozuk dosya; kaynak varsa yeniden üretilir
+                    if source_titles is None:
+                        raise
+                    print(f"⚠️ Başlık indeksi geçersiz, yeniden üretiliyor ({path})")
+            if index is None and path and source_titles is not None:
+                titles = source_titles()
+                index = TitleIndex.build(titles, path) if titles is not None else None
+        except Exception as e:
+            print(f"⚠️ Başlık indeksi açılamadı ({path}): {e}")
+        if index is None:
+            _index_retry_at = time.monotonic() + INDEX_RETRY_INTERVAL
+            return None
+        _index = index
+        _index_loaded = True
+    return _index
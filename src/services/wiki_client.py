@@ -0,0 +1,351 @@
+"""
+Wikipedia HTTP İstemcisi.
+MediaWiki API'sine paylaşılan, keep-alive bağlantı havuzu üzerinden erişir.
+
+- Tek bir sayfanın metni, bilgileri ve kategorileri tek istekte
+  (``prop=extracts|info|categories``) alınır.
+- Birden fazla başlıkta bilgi ve kategoriler ``titles=A|B|C`` ile tek
+  istekte alınır. Tam metin (``extracts``) ise API'de istek başına yalnızca
+  bir sayfa için döner (``exlimit=1``); çok başlıklı bir istek sayfa sayısı
+  kadar ardışık ``continue`` turuna dönüşeceği için her sayfanın metni ayrı
+  istekle, eşzamanlı çekilir. ``continue`` yanıtları otomatik birleştirilir.
+- Bağlantı/okuma zaman aşımları ayrı ayrı ayarlanır; geçici hatalarda
+  jitter'lı üstel geri çekilme ile yeniden denenir.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from src.services.wiki_dump import split_sections
+except ImportError:
+    from services.wiki_dump import split_sections
+
+
+# Tek istekte sorgulanabilecek en fazla başlık (MediaWiki sınırı)
+MAX_TITLES_PER_REQUEST = 50
+# ``continue`` yanıtları için güvenlik sınırı
+MAX_CONTINUATIONS = 100
+# Yeniden denenecek HTTP durum kodları
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Yeniden denenecek MediaWiki hata kodları
+RETRY_API_ERRORS = frozenset({"maxlag", "ratelimited", "readonly"})
+MAX_RETRY_AFTER = 30.0
+# Sayfa metni (``prop=extracts``) için ortak parametreler
+_EXTRACT_PARAMS = {"explaintext": 1, "exsectionformat": "wiki"}
+
+
+class WikiTransportError(Exception):
+    """Wikipedia isteği tüm denemelere rağmen başarısız oldu."""
+
+
+class _RetryableResponse(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class WikiSection:
+    """Sayfa bölümü (``wikipediaapi`` bölüm nesneleriyle aynı alanlar)."""
+
+    __slots__ = ("title", "text", "sections")
+
+    def __init__(self, title: str, text: str, sections: List["WikiSection"]):
+        self.title = title
+        self.text = text
+        self.sections = sections
+
+    @classmethod
+    def from_tree(cls, tree: List[Dict[str, Any]]) -> List["WikiSection"]:
+        return [cls(s["title"], s["content"], cls.from_tree(s["subsections"])) for s in tree]
+
+
+class WikiPage:
+    """Tek istekte okunmuş Wikipedia sayfası."""
+
+    __slots__ = ("title", "summary", "fullurl", "sections", "categories", "_exists")
+
+    def __init__(self, title: str, exists: bool = False, summary: str = "", fullurl: str = "",
+                 sections: Optional[List[WikiSection]] = None, categories: Optional[Dict[str, Any]] = None):
+        self.title = title
+        self._exists = exists
+        self.summary = summary
+        self.fullurl = fullurl
+        self.sections = sections or []
+        self.categories = categories or {}
+
+    def exists(self) -> bool:
+        return self._exists
+
+    @classmethod
+    def from_api(cls, page: Dict[str, Any]) -> "WikiPage":
+        """``formatversion=2`` sayfa kaydından sayfa oluşturur."""
+        if page.get("missing") or page.get("invalid"):
+            return cls(page.get("title", ""))
+        summary, tree = split_sections(page.get("extract") or "")
+        categories = {c["title"]: c for c in page.get("categories") or []}
+        return cls(
+            page["title"],
+            exists=True,
+            summary=summary,
+            fullurl=page.get("fullurl", ""),
+            sections=WikiSection.from_tree(tree),
+            categories=categories
+        )
+
+
+class WikiClient:
+    """
+    MediaWiki API istemcisi.
+
+    ``page(title)`` eski ``wikipediaapi.Wikipedia.page`` ile aynı arayüzü
+    sunar; ``pages(titles)`` birden fazla sayfayı toplu çeker.
+    """
+
+    def __init__(self, language: str, user_agent: str, pool_size: int = 16,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 3, backoff: float = 0.5,
+                 session: Optional[requests.Session] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            language: Vikipedi dil kodu (ör. "tr")
+            user_agent: İsteklerde gönderilecek User-Agent
+            pool_size: Bağlantı havuzu boyutu
+            connect_timeout: Bağlantı zaman aşımı (saniye)
+            read_timeout: Okuma zaman aşımı (saniye)
+            max_retries: Geçici hatalarda en fazla yeniden deneme
+            backoff: Geri çekilme taban süresi (saniye)
+            session: Hazır oturum (testler için)
+            sleep: Bekleme fonksiyonu (testler için)
+        """
+        self.language = language
+        self.api_url = f"https://{language}.wikipedia.org/w/api.php"
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._sleep = sleep
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        session.headers.update({"User-Agent": user_agent, "Accept-Encoding": "gzip"})
+        self.session = session
+        # Çok başlıklı sorgularda sayfa metinlerini eşzamanlı çeker
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="wiki")
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "pages": 0, "batches": 0}
+
+    # --- HTTP ---
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+    def _delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter üstel geri çekilme; sunucu Retry-After verdiyse ona uyar."""
+        if retry_after is not None:
+            return min(retry_after, MAX_RETRY_AFTER)
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        try:
+            return float(response.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return None
+
+    def request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        API'ye GET isteği yapar; geçici hatalarda yeniden dener.
+
+        Args:
+            params: Sorgu parametreleri (``format`` ve ``formatversion`` eklenir)
+
+        Returns:
+            Dict: JSON yanıt
+
+        Raises:
+            WikiTransportError: Tüm denemeler başarısız olursa
+        """
+        params = {"format": "json", "formatversion": 2, **params}
+        for attempt in range(self.max_retries + 1):
+            self._count("requests")
+            try:
+                response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+                if response.status_code in RETRY_STATUSES:
+                    raise _RetryableResponse(f"HTTP {response.status_code}", self._retry_after(response))
+                response.raise_for_status()
+                data = response.json()
+                error = data.get("error")
+                if error:
+                    if error.get("code") in RETRY_API_ERRORS:
+                        raise _RetryableResponse(f"API hatası: {error.get('code')}", self._retry_after(response))
+                    raise WikiTransportError(f"Wikipedia API hatası: {error.get('info') or error.get('code')}")
+                return data
+            except (requests.ConnectionError, requests.Timeout, _RetryableResponse) as e:
+                if attempt >= self.max_retries:
+                    self._count("failures")
+                    raise WikiTransportError(f"Wikipedia isteği başarısız: {e}") from e
+                self._count("retries")
+                self._sleep(self._delay(attempt, getattr(e, "retry_after", None)))
+            except requests.RequestException as e:
+                self._count("failures")
+                raise WikiTransportError(f"Wikipedia isteği başarısız: {e}") from e
+        raise WikiTransportError("Wikipedia isteği başarısız.")
+
+    # --- Sayfalar ---
+
+    def _query(self, params: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """
+        Sorguyu ``continue`` yanıtlarıyla birlikte çalıştırır.
+
+        Returns:
+            Tuple: (son başlık -> birleştirilmiş sayfa kaydı, başlık -> yönlendirme/normalize hedefi)
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        aliases: Dict[str, str] = {}
+        continuation: Dict[str, Any] = {}
+
+        for _ in range(MAX_CONTINUATIONS):
+            data = self.request({**params, **continuation})
+            query = data.get("query") or {}
+            for item in (query.get("normalized") or []) + (query.get("redirects") or []):
+                aliases[item["from"]] = item["to"]
+            for page in query.get("pages") or []:
+                current = merged.setdefault(page["title"], {})
+                for key, value in page.items():
+                    if key == "categories":
+                        current.setdefault("categories", []).extend(value)
+                    elif key not in current or (key == "extract" and not current[key]):
+                        current[key] = value
+            if "continue" not in data:
+                break
+            continuation = data["continue"]
+        return merged, aliases
+
+    def _extract(self, title: str) -> str:
+        """Tek sayfanın düz metnini çeker (başlık yönlendirmesi çözülmüş olmalı)."""
+        merged, _ = self._query({**_EXTRACT_PARAMS, "action": "query", "prop": "extracts", "titles": title})
+        page = merged.get(title) or next(iter(merged.values()), {})
+        return page.get("extract") or ""
+
+    def _query_pages(self, titles: List[str]) -> Dict[str, WikiPage]:
+        """
+        En fazla ``MAX_TITLES_PER_REQUEST`` başlığı çeker.
+
+        Tek başlık tek istekte okunur. Birden fazla başlıkta bilgi ve
+        kategoriler tek toplu istekle, var olan sayfaların metinleri ise
+        sayfa başına birer istekle eşzamanlı alınır.
+        """
+        params = {
+            "action": "query",
+            "titles": "|".join(titles),
+            "redirects": 1,
+            "inprop": "url",
+            "cllimit": "max",
+            "clshow": "!hidden",
+        }
+        if len(titles) == 1:
+            merged, aliases = self._query({**params, **_EXTRACT_PARAMS, "prop": "extracts|info|categories"})
+        else:
+            merged, aliases = self._query({**params, "prop": "info|categories"})
+            found = [title for title, page in merged.items()
+                     if not page.get("missing") and not page.get("invalid")]
+            for title, extract in zip(found, self._executor.map(self._extract, found)):
+                merged[title]["extract"] = extract
+
+        result: Dict[str, WikiPage] = {}
+        for title in titles:
+            final = title
+            seen = set()
+            while final in aliases and final not in seen:
+                seen.add(final)
+                final = aliases[final]
+            page = merged.get(final)
+            result[title] = WikiPage.from_api(page) if page else WikiPage(title)
+        self._count("pages", len(titles))
+        self._count("batches")
+        return result
+
+    def pages(self, titles: Iterable[str]) -> Dict[str, WikiPage]:
+        """
+        Birden fazla sayfayı toplu çeker.
+
+        Args:
+            titles: Sayfa başlıkları
+
+        Returns:
+            Dict[str, WikiPage]: İstenen başlık -> sayfa (yoksa ``exists()`` False)
+        """
+        unique = list(dict.fromkeys(t for t in titles if t))
+        result: Dict[str, WikiPage] = {}
+        for start in range(0, len(unique), MAX_TITLES_PER_REQUEST):
+            result.update(self._query_pages(unique[start:start + MAX_TITLES_PER_REQUEST]))
+        return result
+
+    def page(self, title: str) -> WikiPage:
+        """Tek sayfayı tek istekte çeker."""
+        return self.pages([title]).get(title) or WikiPage(title)
+
+    def langlinks(self, title: str, language: str) -> Optional[str]:
+        """
+        Sayfanın başka bir dildeki karşılığının başlığını döndürür.
+
+        Args:
+            title: Bu dildeki sayfa başlığı
+            language: Hedef dil kodu
+
+        Returns:
+            Optional[str]: Hedef dildeki başlık, bağlantı yoksa None
+        """
+        data = self.request({
+            "action": "query",
+            "prop": "langlinks",
+            "titles": title,
+            "redirects": 1,
+            "lllang": language,
+        })
+        for page in (data.get("query") or {}).get("pages") or []:
+            for link in page.get("langlinks") or []:
+                if link.get("lang") == language and link.get("title"):
+                    return link["title"]
+        return None
+
+    def links(self, title: str, limit: int = 500) -> List[str]:
+        """
+        Sayfanın bağlantı verdiği madde başlıklarını (ana ad alanı) döndürür.
+
+        Args:
+            title: Sayfa başlığı
+            limit: En fazla bağlantı sayısı (tek istek, API sınırı 500)
+
+        Returns:
+            List[str]: Bağlantılı sayfa başlıkları (API sırasıyla)
+        """
+        data = self.request({
+            "action": "query",
+            "prop": "links",
+            "titles": title,
+            "redirects": 1,
+            "plnamespace": 0,
+            "pllimit": min(max(int(limit), 1), 500),
+        })
+        return [
+            link["title"]
+            for page in (data.get("query") or {}).get("pages") or []
+            for link in page.get("links") or []
+            if link.get("title")
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """İstek, yeniden deneme ve hata sayaçlarını döndürür."""
+        with self._lock:
+            return dict(self._stats)
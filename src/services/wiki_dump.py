@@ -0,0 +1,373 @@
+"""
+Çevrimdışı Wikipedia Dump İndeksi.
+Wikipedia XML/JSONL dump'larından yerel, disk tabanlı bir indeks üretir ve
+``search_info`` ile aynı sonuç yapısında sayfa döndürür.
+
+Disk formatı iki dosyadan oluşur:
+    <base>.dat  - zlib ile sıkıştırılmış, art arda yazılmış JSON kayıtları
+    <base>.idx  - başlık -> (offset, uzunluk) tablosu
+Veri dosyası ``mmap`` ile açılır; her arama tek bir dict erişimi ve tek bir
+dilim okumasıdır.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+try:
+    from src.services.textnorm import fold, normalize_title
+except ImportError:
+    from services.textnorm import fold, normalize_title
+
+
+INDEX_MAGIC = b"WKDX\x01"
+_HEADER = struct.Struct("<5sI")
+_ENTRY = struct.Struct("<HHQIB")  # anahtar uzunluğu, başlık uzunluğu, offset, uzunluk, bayrak
+FLAG_REDIRECT = 1
+
+# Wikitext temizleme kalıpları
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_REF_RE = re.compile(r"<ref[^>/]*?/>|<ref[^>]*?>.*?</ref>", re.DOTALL | re.IGNORECASE)
+_TEMPLATE_RE = re.compile(r"\{\{[^{}]*\}\}")
+_TABLE_RE = re.compile(r"\{\|[^{}]*?\|\}", re.DOTALL)
+_FILE_LINK_RE = re.compile(r"\[\[(?:Dosya|Resim|File|Image):[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]", re.IGNORECASE)
+_CATEGORY_RE = re.compile(r"\[\[(?:Kategori|Category):([^\]|]+)(?:\|[^\]]*)?\]\]", re.IGNORECASE)
+_LINK_RE = re.compile(r"\[\[(?:[^\]|]*\|)?([^\]]+)\]\]")
+_EXTERNAL_LINK_RE = re.compile(r"\[https?://[^\s\]]+\s*([^\]]*)\]")
+_EMPHASIS_RE = re.compile(r"'{2,}")
+_HTML_TAG_RE = re.compile(r"</?[a-zA-Z][^>]*>")
+_HEADING_RE = re.compile(r"^(={2,6})\s*(.+?)\s*\1\s*$")
+_REDIRECT_RE = re.compile(r"^#(?:REDIRECT|YÖNLENDİRME|YÖNLENDİR)\s*\[\[([^\]|#]+)", re.IGNORECASE)
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def clean_wikitext(text: str) -> Tuple[str, List[str]]:
+    """
+    Wikitext işaretlemesini düz metne çevirir.
+
+    Args:
+        text: Ham wikitext
+
+    Returns:
+        Tuple[str, List[str]]: (düz metin, kategori listesi)
+    """
+    text = _COMMENT_RE.sub("", text)
+    text = _REF_RE.sub("", text)
+
+    # İç içe şablon ve tabloları en içten dışa doğru temizle
+    previous = None
+    while previous != text:
+        previous = text
+        text = _TEMPLATE_RE.sub("", text)
+        text = _TABLE_RE.sub("", text)
+
+    categories = [c.strip() for c in _CATEGORY_RE.findall(text)]
+    text = _CATEGORY_RE.sub("", text)
+    text = _FILE_LINK_RE.sub("", text)
+    text = _LINK_RE.sub(r"\1", text)
+    text = _EXTERNAL_LINK_RE.sub(r"\1", text)
+    text = _EMPHASIS_RE.sub("", text)
+    text = _HTML_TAG_RE.sub("", text)
+    text = _BLANK_LINES_RE.sub("\n\n", text)
+    return text.strip(), categories
+
+
+def split_sections(text: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    ``== Başlık ==`` biçimli düz metni özet ve hiyerarşik bölümlere ayırır.
+    Bölümler ``extract_sections`` ile aynı yapıdadır.
+
+    Args:
+        text: Başlık satırları içeren düz metin
+
+    Returns:
+        Tuple[str, List[Dict]]: (özet, bölüm listesi)
+    """
+    summary_lines: List[str] = []
+    root: List[Dict[str, Any]] = []
+    stack: List[Tuple[int, Dict[str, Any]]] = []
+    current_lines = summary_lines
+
+    def close_current():
+        if stack:
+            stack[-1][1]["content"] = "\n".join(current_lines).strip()
+
+    for line in text.split("\n"):
+        match = _HEADING_RE.match(line.strip())
+        if not match:
+            current_lines.append(line)
+            continue
+
+        close_current()
+        depth = len(match.group(1)) - 2
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+
+        section = {
+            "title": match.group(2).strip(),
+            "content": "",
+            "level": len(stack),
+            "subsections": []
+        }
+        (stack[-1][1]["subsections"] if stack else root).append(section)
+        stack.append((depth, section))
+        current_lines = []
+
+    close_current()
+    return "\n".join(summary_lines).strip(), root
+
+
+def _page_url(title: str, language: str) -> str:
+    return f"https://{language}.wikipedia.org/wiki/{quote(title.replace(' ', '_'))}"
+
+
+def _record_from_text(title: str, text: str, language: str) -> Dict[str, Any]:
+    """Ham wikitext'ten ``search_info`` sonuç yapısında kayıt üretir."""
+    plain, categories = clean_wikitext(text)
+    summary, sections = split_sections(plain)
+    return {
+        "title": title,
+        "summary": summary,
+        "url": _page_url(title, language),
+        "sections": sections,
+        "categories": categories[:10]
+    }
+
+
+def iter_xml_dump(path: str, language: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    MediaWiki XML dump'ını akış halinde okur (dosya belleğe alınmaz).
+
+    Yields:
+        Tuple: (başlık, kayıt, yönlendirme hedefi) - kayıt veya hedeften biri dolu
+    """
+    title = None
+    namespace = "0"
+    redirect = None
+    text = ""
+    root = None
+
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if tag == "title":
+            title = elem.text or ""
+        elif tag == "ns":
+            namespace = (elem.text or "0").strip()
+        elif tag == "redirect":
+            redirect = elem.get("title")
+        elif tag == "text":
+            text = elem.text or ""
+        elif tag == "page":
+            if title and namespace == "0":
+                title = normalize_title(title)
+                if not redirect:
+                    match = _REDIRECT_RE.match(text.strip())
+                    redirect = match.group(1) if match else None
+                if redirect:
+                    yield title, None, normalize_title(redirect)
+                else:
+                    yield title, _record_from_text(title, text, language), None
+            title, namespace, redirect, text = None, "0", None, ""
+            # Temizlenen <page> öğeleri köke bağlı kalır; kökten de ayrılmazsa
+            # bellek sayfa sayısıyla doğrusal büyür
+            root.clear()
+
+
+def iter_jsonl_dump(path: str, language: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Satır başına bir JSON kaydı içeren dump'ı akış halinde okur.
+
+    Kayıtlar hazır sonuç yapısında (``summary``/``sections``) veya ham
+    ``text`` alanıyla gelebilir; ``redirect`` alanı yönlendirme belirtir.
+
+    Yields:
+        Tuple: (başlık, kayıt, yönlendirme hedefi)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            title = normalize_title(item.get("title", ""))
+            if not title:
+                continue
+            if item.get("redirect"):
+                yield title, None, normalize_title(item["redirect"])
+            elif "text" in item and "sections" not in item:
+                yield title, _record_from_text(title, item["text"], language), None
+            else:
+                yield title, {
+                    "title": title,
+                    "summary": item.get("summary", ""),
+                    "url": item.get("url") or _page_url(title, language),
+                    "sections": item.get("sections", []),
+                    "categories": item.get("categories", [])[:10]
+                }, None
+
+
+class DumpIndex:
+    """
+    Dump'tan üretilmiş yerel sayfa indeksi.
+    Başlık tablosu açılışta belleğe alınır, makaleler ``mmap`` üzerinden okunur.
+    """
+
+    def __init__(self, base_path: str):
+        """
+        Args:
+            base_path: İndeks dosyalarının ortak yolu (uzantısız)
+        """
+        self.base_path = base_path
+        self._entries: Dict[str, Tuple[int, int]] = {}
+        self._titles: List[Tuple[str, bool]] = []
+        self._file = open(base_path + ".dat", "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._load_index(base_path + ".idx")
+
+    def _load_index(self, path: str) -> None:
+        with open(path, "rb") as f:
+            raw = f.read()
+        magic, count = _HEADER.unpack_from(raw, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"Geçersiz indeks dosyası: {path}")
+
+        pos = _HEADER.size
+        for _ in range(count):
+            key_len, title_len, offset, length, flags = _ENTRY.unpack_from(raw, pos)
+            pos += _ENTRY.size
+            key = raw[pos:pos + key_len].decode("utf-8")
+            pos += key_len
+            title = raw[pos:pos + title_len].decode("utf-8")
+            pos += title_len
+            self._entries.setdefault(key, (offset, length))
+            self._titles.append((title, bool(flags & FLAG_REDIRECT)))
+
+    @staticmethod
+    def exists(base_path: str) -> bool:
+        """İndeks dosyalarının var olup olmadığını kontrol eder."""
+        return os.path.exists(base_path + ".idx") and os.path.exists(base_path + ".dat")
+
+    @classmethod
+    def build(cls, dump_path: str, base_path: str, language: str) -> "DumpIndex":
+        """
+        Dump dosyasından indeks üretir ve açar.
+
+        Args:
+            dump_path: ``.xml`` veya ``.jsonl`` dump dosyası
+            base_path: Üretilecek indeks dosyalarının ortak yolu
+            language: Sayfa URL'leri için dil kodu
+
+        Returns:
+            DumpIndex: Açılmış indeks
+        """
+        reader = iter_jsonl_dump if dump_path.endswith((".jsonl", ".json")) else iter_xml_dump
+        directory = os.path.dirname(os.path.abspath(base_path))
+        os.makedirs(directory, exist_ok=True)
+
+        articles: Dict[str, Tuple[str, int, int]] = {}
+        redirects: List[Tuple[str, str]] = []
+        offset = 0
+
+        with open(base_path + ".dat.tmp", "wb") as data_file:
+            for title, record, target in reader(dump_path, language):
+                if target is not None:
+                    redirects.append((title, target))
+                    continue
+                blob = zlib.compress(
+                    json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                )
+                data_file.write(blob)
+                articles.setdefault(fold(title), (title, offset, len(blob)))
+                offset += len(blob)
+
+        entries = [(key, title, off, length, 0) for key, (title, off, length) in articles.items()]
+        for title, target in redirects:
+            resolved = articles.get(fold(target))
+            if resolved is not None:
+                entries.append((fold(title), title, resolved[1], resolved[2], FLAG_REDIRECT))
+
+        with open(base_path + ".idx.tmp", "wb") as index_file:
+            index_file.write(_HEADER.pack(INDEX_MAGIC, len(entries)))
+            for key, title, off, length, flags in entries:
+                key_bytes = key.encode("utf-8")
+                title_bytes = title.encode("utf-8")
+                index_file.write(_ENTRY.pack(len(key_bytes), len(title_bytes), off, length, flags))
+                index_file.write(key_bytes)
+                index_file.write(title_bytes)
+
+        os.replace(base_path + ".dat.tmp", base_path + ".dat")
+        os.replace(base_path + ".idx.tmp", base_path + ".idx")
+        return cls(base_path)
+
+    def lookup(self, title: str) -> Optional[Dict[str, Any]]:
+        """
+        Başlığa (büyük/küçük harf duyarsız) karşılık gelen sayfayı döndürür.
+
+        Args:
+            title: Sayfa başlığı
+
+        Returns:
+            Optional[Dict]: Sayfa verisi, bulunamazsa None
+        """
+        entry = self._entries.get(fold(title))
+        if entry is None:
+            return None
+        offset, length = entry
+        return json.loads(zlib.decompress(self._data[offset:offset + length]).decode("utf-8"))
+
+    def titles(self) -> Iterator[Tuple[str, bool]]:
+        """İndeksteki tüm başlıkları (başlık, yönlendirme mi) olarak döndürür."""
+        return iter(self._titles)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, title: str) -> bool:
+        return fold(title) in self._entries
+
+    def close(self) -> None:
+        """Dosya tanıtıcılarını kapatır."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+_index: Optional[DumpIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_dump_index(dump_path: str, base_path: Optional[str], language: str) -> DumpIndex:
+    """
+    Süreç genelinde paylaşılan indeksi döndürür; yoksa dump'tan üretir.
+
+    Args:
+        dump_path: Kaynak dump dosyası
+        base_path: İndeks dosyalarının ortak yolu (boşsa dump yolundan türetilir)
+        language: Dil kodu
+
+    Returns:
+        DumpIndex: Paylaşılan indeks
+    """
+    global _index
+    if _index is not None:
+        return _index
+    with _index_lock:
+        if _index is None:
+            base_path = base_path or os.path.splitext(dump_path)[0] + ".wkdx"
+            if DumpIndex.exists(base_path):
+                _index = DumpIndex(base_path)
+            else:
+                _index = DumpIndex.build(dump_path, base_path, language)
+    return _index
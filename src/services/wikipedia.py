@@ -3,23 +3,70 @@ Wikipedia API Entegrasyonu.
 Vikipedi'den bilgi aramak için kullanılan servis modülü.
 """
 
-import wikipediaapi
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+import re
 import sys
 import os
+import threading
 
 # Config'i import et (src klasöründen çalıştırılırsa)
 try:
     from src.config import Config
+    from src.services.cache import PageCache
+    from src.services.wiki_dump import get_dump_index
+    from src.services.textnorm import fold
+    from src.services.title_index import TitleIndex, get_title_index
+    from src.services.wiki_client import WikiClient, WikiTransportError
+    from src.services.langdetect import detect_language
 except ImportError:
     # Doğrudan çalıştırılırsa
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from config import Config
+    from services.cache import PageCache
+    from services.wiki_dump import get_dump_index
+    from services.textnorm import fold
+    from services.title_index import TitleIndex, get_title_index
+    from services.wiki_client import WikiClient, WikiTransportError
+    from services.langdetect import detect_language
 
-# Wikipedia API client
-wiki = wikipediaapi.Wikipedia(
-    user_agent=Config.WIKI_USER_AGENT,
-    language=Config.WIKI_LANGUAGE
+# Vikipedi dil kodu (ör. "tr", "en", "zh-yue"); API adresine girdiği için doğrulanır
+_LANGUAGE_RE = re.compile(r"^[a-z]{2,3}(-[a-z0-9]+)*$")
+
+
+def create_client(language: str, pool_size: Optional[int] = None) -> WikiClient:
+    """
+    Dil için keep-alive bağlantı havuzlu API istemcisi oluşturur.
+    Kullanıcı istekleri ``get_client`` ile paylaşılan istemciyi kullanır;
+    arka plan servisleri (ör. prefetch) kendi küçük havuzlarını oluşturur.
+    
+    Args:
+        language: Dil kodu
+        pool_size: Bağlantı havuzu boyutu (varsayılan ``Config.WIKI_POOL_SIZE``)
+    """
+    return WikiClient(
+        language=language,
+        user_agent=Config.WIKI_USER_AGENT,
+        pool_size=pool_size or Config.WIKI_POOL_SIZE,
+        connect_timeout=Config.WIKI_CONNECT_TIMEOUT,
+        read_timeout=Config.WIKI_READ_TIMEOUT,
+        max_retries=Config.WIKI_MAX_RETRIES,
+        backoff=Config.WIKI_RETRY_BACKOFF
+    )
+
+
+# Varsayılan dilin Wikipedia API client'ı; diğer diller ilk kullanımda oluşturulur
+wiki = create_client(Config.WIKI_LANGUAGE)
+_clients: Dict[str, WikiClient] = {}
+_clients_lock = threading.Lock()
+
+# ``get_page`` okumalarını izleyen fonksiyonlar: (önbellek anahtarı, önbellekte miydi)
+_lookup_listeners: List[Callable[[str, bool], None]] = []
+
+# Sayfa önbelleği (bellek + opsiyonel SQLite katmanı)
+page_cache = PageCache(
+    max_bytes=Config.WIKI_CACHE_MAX_BYTES,
+    ttl=Config.WIKI_CACHE_TTL,
+    db_path=Config.WIKI_CACHE_DB_PATH or None
 )
 
 
@@ -45,28 +92,108 @@ def extract_sections(sections, level: int = 0) -> List[Dict[str, Any]]:
     return results
 
 
-def search_info(query: str) -> Dict[str, Any]:
+def _language_list(value: str) -> List[str]:
+    """Virgülle ayrılmış dil listesini ayrıştırır."""
+    return [lang.strip().lower() for lang in (value or "").split(",") if lang.strip()]
+
+
+def normalize_language(language: Optional[str]) -> Optional[str]:
     """
-    Vikipedi'den sayfanın içeriklerini başlıklar halinde döndürür.
+    Dil kodunu küçük harfe çevirir ve doğrular.
     
     Args:
-        query: Aranacak konu
+        language: Dil kodu
         
     Returns:
-        Dict: Arama sonuçları veya hata mesajı
+        Optional[str]: Geçerli dil kodu, geçersizse None
     """
-    if not query or not query.strip():
-        return {"query": query, "error": "Arama sorgusu boş olamaz."}
+    language = (language or "").strip().lower().replace("_", "-")
+    return language if _LANGUAGE_RE.match(language) else None
+
+
+def get_client(language: Optional[str] = None) -> WikiClient:
+    """
+    Dil için API istemcisini döndürür; ilk çağrıda oluşturup saklar.
     
-    query = query.strip()
-    page = wiki.page(query)
+    Args:
+        language: Dil kodu (varsayılan ``Config.WIKI_LANGUAGE``)
+        
+    Returns:
+        WikiClient: Dile ait istemci
+    """
+    language = language or Config.WIKI_LANGUAGE
+    if language == Config.WIKI_LANGUAGE:
+        return wiki
+    client = _clients.get(language)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(language)
+            if client is None:
+                client = _clients[language] = create_client(language)
+    return client
+
+
+def cache_key(title: str, language: Optional[str] = None) -> str:
+    """
+    Sayfa önbelleği anahtarını (dil, başlık) çiftinden üretir.
+    Önbelleği dışarıdan dolduran veya yoklayan servisler (ör. prefetch) de kullanır.
+    """
+    return f"{language or Config.WIKI_LANGUAGE}:{title}"
+
+
+def _uses_dump(language: str) -> bool:
+    """Yerel dump yalnızca yapılandırılmış dilin sayfalarını içerir."""
+    return Config.WIKI_BACKEND == "dump" and language == Config.WIKI_LANGUAGE
+
+
+def _load_page(query: str, language: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Sayfayı yapılandırılmış kaynaktan (canlı API veya yerel dump) okur.
+    Dump dışındaki diller her zaman API'den okunur.
     
-    if not page.exists():
-        return {
-            "query": query, 
-            "error": f"'{query}' için bilgi bulunamadı.",
-            "suggestion": "Farklı anahtar kelimeler deneyebilirsiniz."
-        }
+    Args:
+        query: Sayfa başlığı
+        language: Dil kodu
+        
+    Returns:
+        Optional[Dict]: Sayfa verisi, sayfa yoksa None
+    """
+    language = language or Config.WIKI_LANGUAGE
+    if _uses_dump(language):
+        return _load_page_from_dump(query)
+    return _load_page_from_api(query, language)
+
+
+def _load_page_from_dump(query: str) -> Optional[Dict[str, Any]]:
+    """
+    Sayfayı yerel dump indeksinden okur (ağ isteği yapılmaz).
+    
+    Args:
+        query: Sayfa başlığı
+        
+    Returns:
+        Optional[Dict]: Sayfa verisi, sayfa yoksa None
+    """
+    index = get_dump_index(
+        Config.WIKI_DUMP_PATH,
+        Config.WIKI_DUMP_INDEX_PATH or None,
+        Config.WIKI_LANGUAGE
+    )
+    return index.lookup(query)
+
+
+def _page_to_dict(page) -> Optional[Dict[str, Any]]:
+    """
+    API sayfa nesnesini önbellekte saklanan sözlük biçimine çevirir.
+    
+    Args:
+        page: ``wiki.page`` / ``wiki.pages`` sonucu
+        
+    Returns:
+        Optional[Dict]: Sayfa verisi, sayfa yoksa None
+    """
+    if page is None or not page.exists():
+        return None
 
     # summary + bölümler + infobox + tablolar
     data = {
@@ -87,8 +214,386 @@ def search_info(query: str) -> Dict[str, Any]:
     # Kategorileri ekle
     if hasattr(page, 'categories') and page.categories:
         data["categories"] = list(page.categories.keys())[:10]  # İlk 10 kategori
+    
+    return data
+
+
+def _load_page_from_api(query: str, language: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Sayfayı Wikipedia'dan tek API isteğiyle (metin + bilgi + kategoriler) çeker.
+    
+    Args:
+        query: Sayfa başlığı
+        language: Dil kodu
+        
+    Returns:
+        Optional[Dict]: Sayfa verisi, sayfa yoksa None
+    """
+    return _page_to_dict(get_client(language).page(query))
+
+
+def _store_page(title: str, data: Optional[Dict[str, Any]], language: Optional[str] = None) -> None:
+    """Sayfayı istenen ve (yönlendirme varsa) gerçek başlığıyla önbelleğe alır."""
+    if data is None:
+        return
+    page_cache.set(cache_key(title, language), data)
+    if data.get("title") and data["title"] != title:
+        page_cache.set(cache_key(data["title"], language), data)
+
+
+def get_page(title: str, language: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Sayfa verisini önbellek üzerinden döndürür.
+    Aynı başlık için eşzamanlı istekler tek bir ağ isteğine indirgenir.
+    
+    Args:
+        title: Sayfa başlığı
+        language: Dil kodu (varsayılan ``Config.WIKI_LANGUAGE``)
+        
+    Returns:
+        Optional[Dict]: Sayfa verisi, sayfa yoksa None
+    """
+    key = cache_key(title, language)
+    cached = bool(_lookup_listeners) and key in page_cache
+    data = page_cache.get_or_load(key, lambda: _load_page(title, language))
+    for listener in _lookup_listeners:
+        listener(key, cached)
+    
+    # Yönlendirilen sayfaları gerçek başlığıyla da önbelleğe al
+    if data and data.get("title") and data["title"] != title:
+        canonical_key = cache_key(data["title"], language)
+        if canonical_key not in page_cache:
+            page_cache.set(canonical_key, data)
+    
+    return data
+
+
+def get_pages(
+    titles: Iterable[str], language: Optional[str] = None, client: Optional[WikiClient] = None
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Birden fazla sayfayı önbellek üzerinden döndürür.
+    Önbellekte olmayanların bilgileri tek bir toplu API isteğiyle (``titles=A|B|C``),
+    metinleri sayfa başına eşzamanlı isteklerle çekilir.
+    
+    Args:
+        titles: Sayfa başlıkları
+        language: Dil kodu (varsayılan ``Config.WIKI_LANGUAGE``)
+        client: Kullanılacak API istemcisi (varsayılan dilin paylaşılan istemcisi)
+        
+    Returns:
+        Dict[str, Optional[Dict]]: Başlık -> sayfa verisi (yoksa None)
+    """
+    language = language or Config.WIKI_LANGUAGE
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    misses = []
+    for title in dict.fromkeys(t.strip() for t in titles if t and t.strip()):
+        data = page_cache.get(cache_key(title, language))
+        if data is not None:
+            results[title] = data
+        else:
+            misses.append(title)
+    
+    if misses and _uses_dump(language):
+        for title in misses:
+            results[title] = get_page(title, language)
+    elif misses:
+        pages = (client or get_client(language)).pages(misses)
+        for title in misses:
+            data = _page_to_dict(pages.get(title))
+            _store_page(title, data, language)
+            results[title] = data
+    return results
+
+
+def get_links(title: str, language: Optional[str] = None, client: Optional[WikiClient] = None) -> List[str]:
+    """
+    Sayfanın bağlantı verdiği madde başlıklarını döndürür.
+    Yerel dump bağlantı listesi içermediğinden dump dilinde boş liste döner.
+    
+    Args:
+        title: Sayfa başlığı
+        language: Dil kodu
+        client: Kullanılacak API istemcisi (varsayılan dilin paylaşılan istemcisi)
         
-    return {"query": query, "result": data}
+    Returns:
+        List[str]: Bağlantılı sayfa başlıkları
+    """
+    language = language or Config.WIKI_LANGUAGE
+    if _uses_dump(language):
+        return []
+    return (client or get_client(language)).links(title)
+
+
+def add_lookup_listener(listener: Callable[[str, bool], None]) -> None:
+    """
+    ``get_page`` her çağrıldığında (önbellek anahtarı, önbellekte miydi)
+    ile çağrılacak fonksiyonu kaydeder.
+    """
+    if listener not in _lookup_listeners:
+        _lookup_listeners.append(listener)
+
+
+def remove_lookup_listener(listener: Callable[[str, bool], None]) -> None:
+    """Kayıtlı izleme fonksiyonunu kaldırır."""
+    if listener in _lookup_listeners:
+        _lookup_listeners.remove(listener)
+
+
+def _fallback_languages(language: str) -> List[str]:
+    """Sayfa bulunamadığında sırayla bakılacak diğer diller."""
+    languages = [Config.WIKI_LANGUAGE] + _language_list(Config.WIKI_FALLBACK_LANGUAGES)
+    return [lang for lang in dict.fromkeys(languages) if lang != language]
+
+
+def find_in_other_languages(query: str, language: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Sayfa istenen dilde yoksa yedek dillerde arar ve dil bağlantısını izler.
+    
+    Sayfa bir yedek dilde bulunursa ``langlinks`` ile istenen dildeki
+    karşılığı aranır; karşılık varsa o sayfa, yoksa yedek dildeki sayfa döner.
+    İstenen dildeki karşılık sorgu başlığıyla da önbelleğe alınır, böylece
+    aynı sorgu tekrar yedek dile gitmez.
+    
+    Args:
+        query: Sayfa başlığı
+        language: İstenen dil kodu
+        
+    Returns:
+        Optional[Tuple[str, Dict]]: (sayfanın dili, sayfa verisi) veya None
+    """
+    for other in _fallback_languages(language):
+        try:
+            data = get_page(query, other)
+            if data is None:
+                continue
+            linked = None if _uses_dump(other) else get_client(other).langlinks(data["title"], language)
+            target = get_page(linked, language) if linked else None
+        except WikiTransportError as e:
+            print(f"⚠️ Yedek dil araması başarısız ({other}): {e}")
+            continue
+        if target is not None:
+            page_cache.set(cache_key(query, language), target)
+            return language, target
+        return other, data
+    return None
+
+
+def get_transport_stats() -> Dict[str, Any]:
+    """
+    Wikipedia HTTP istemcilerinin istek/yeniden deneme sayaçlarını döndürür.
+    
+    Returns:
+        Dict: Dil kodu -> istemci istatistikleri
+    """
+    clients = dict(_clients)
+    clients[Config.WIKI_LANGUAGE] = wiki
+    stats = {}
+    for language, client in clients.items():
+        client_stats = getattr(client, "stats", None)
+        if callable(client_stats):
+            stats[language] = client_stats()
+    return stats
+
+
+def _title_source():
+    """Başlık indeksini üretmek için kullanılacak başlık kaynağını döndürür."""
+    if Config.WIKI_TITLES_PATH and os.path.exists(Config.WIKI_TITLES_PATH):
+        return TitleIndex.load_titles_file(Config.WIKI_TITLES_PATH)
+    if Config.WIKI_BACKEND == "dump" and Config.WIKI_DUMP_PATH:
+        index = get_dump_index(
+            Config.WIKI_DUMP_PATH,
+            Config.WIKI_DUMP_INDEX_PATH or None,
+            Config.WIKI_LANGUAGE
+        )
+        return (title for title, _ in index.titles())
+    return None
+
+
+def resolve_title(query: str) -> Optional[Dict[str, Any]]:
+    """
+    Sorguyu yerel başlık indeksiyle en olası sayfa başlığına çözer.
+    
+    Args:
+        query: Kullanıcının yazdığı başlık
+        
+    Returns:
+        Optional[Dict]: ``match`` ve ``suggestions``; indeks yoksa None
+    """
+    path = Config.WIKI_TITLE_INDEX_PATH
+    if not path and Config.WIKI_BACKEND == "dump" and Config.WIKI_DUMP_PATH:
+        path = os.path.splitext(Config.WIKI_DUMP_PATH)[0] + ".titles"
+    
+    index = get_title_index(path, _title_source)
+    if index is None:
+        return None
+    return index.resolve(query, threshold=Config.WIKI_FUZZY_THRESHOLD)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Sayfa önbelleği istatistiklerini döndürür.
+    
+    Returns:
+        Dict: hit/miss/eviction sayaçları
+    """
+    return page_cache.stats()
+
+
+def _resolve_language(query: str, language: Optional[str]) -> Optional[str]:
+    """Verilen dil kodunu doğrular; verilmemişse sorgunun dilini tespit eder."""
+    if language:
+        return normalize_language(language)
+    candidates = [Config.WIKI_LANGUAGE] + _language_list(Config.WIKI_LANGUAGES)
+    return detect_language(query, candidates, Config.WIKI_LANGUAGE)
+
+
+def search_info(query: str, language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Vikipedi'den sayfanın içeriklerini başlıklar halinde döndürür.
+    
+    Args:
+        query: Aranacak konu
+        language: Vikipedi dil kodu (verilmezse sorgudan tespit edilir)
+        
+    Returns:
+        Dict: Arama sonuçları veya hata mesajı
+    """
+    if not query or not query.strip():
+        return {"query": query, "error": "Arama sorgusu boş olamaz."}
+    
+    query = query.strip()
+    lang = _resolve_language(query, language)
+    if lang is None:
+        return {"query": query, "error": f"Geçersiz dil kodu: '{language}'."}
+    
+    data = get_page(query, lang)
+    if data is not None:
+        return {"query": query, "language": lang, "result": data}
+    
+    # Yazım farklılıklarını tek çağrıda yerel başlık indeksiyle çöz
+    resolution = resolve_title(query) if lang == Config.WIKI_LANGUAGE else None
+    match = resolution["match"] if resolution else None
+    if match and match != query:
+        data = get_page(match, lang)
+        if data is not None:
+            return {"query": query, "language": lang, "resolved_title": match, "result": data}
+    
+    # Diğer dillerde ara, dil bağlantısıyla istenen dile dön
+    found = find_in_other_languages(query, lang)
+    if found is not None:
+        found_lang, data = found
+        result = {"query": query, "language": found_lang, "result": data}
+        if data.get("title") != query:
+            result["resolved_title"] = data.get("title")
+        if found_lang != lang:
+            result["requested_language"] = lang
+        return result
+    
+    error = {
+        "query": query, 
+        "language": lang,
+        "error": f"'{query}' için bilgi bulunamadı.",
+        "suggestion": "Farklı anahtar kelimeler deneyebilirsiniz."
+    }
+    if resolution and resolution["suggestions"]:
+        error["suggestions"] = [s["title"] for s in resolution["suggestions"]]
+    return error
+
+
+def _split_section_path(path: str) -> List[str]:
+    """``Tarih / Osmanlı dönemi`` biçimli yolu katlanmış parçalara ayırır."""
+    return [fold(part) for part in path.replace(">", "/").split("/") if part.strip()]
+
+
+def _find_section(sections: List[Dict[str, Any]], parts: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Bölüm ağacında başlık yoluna karşılık gelen bölümü bulur.
+    Tam yol eşleşmezse son parçayı ağacın herhangi bir seviyesinde arar.
+    """
+    level = sections
+    found = None
+    for part in parts:
+        found = next((s for s in level if fold(s["title"]) == part), None)
+        if found is None:
+            break
+        level = found.get("subsections") or []
+    if found is not None:
+        return found
+    
+    stack = list(sections)
+    while stack:
+        section = stack.pop(0)
+        if fold(section["title"]) == parts[-1]:
+            return section
+        stack.extend(section.get("subsections") or [])
+    return None
+
+
+def get_outline(sections: List[Dict[str, Any]], parent: str = "") -> List[str]:
+    """
+    Bölüm ağacının içindekiler listesini ``Üst / Alt`` yolları olarak döndürür.
+    
+    Args:
+        sections: Hiyerarşik bölüm listesi
+        parent: Üst bölüm yolu
+        
+    Returns:
+        List[str]: Bölüm yolları
+    """
+    outline = []
+    for section in sections:
+        path = f"{parent} / {section['title']}" if parent else section["title"]
+        outline.append(path)
+        outline.extend(get_outline(section.get("subsections") or [], path))
+    return outline
+
+
+def get_section(title: str, section: str, language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Sayfanın tek bir bölümünü döndürür (sayfa önbellekten okunur).
+    
+    Args:
+        title: Sayfa başlığı
+        section: Bölüm başlığı veya ``Üst / Alt`` biçiminde bölüm yolu
+        language: Sayfanın dil kodu (varsayılan ``Config.WIKI_LANGUAGE``)
+        
+    Returns:
+        Dict: Bölüm içeriği veya hata mesajı
+    """
+    if not title or not title.strip():
+        return {"title": title, "error": "Sayfa başlığı boş olamaz."}
+    
+    parts = _split_section_path(section or "")
+    if not parts:
+        return {"title": title, "error": "Bölüm adı boş olamaz."}
+    
+    lang = normalize_language(language) if language else Config.WIKI_LANGUAGE
+    if lang is None:
+        return {"title": title, "error": f"Geçersiz dil kodu: '{language}'."}
+    
+    title = title.strip()
+    data = get_page(title, lang)
+    if data is None:
+        return {"title": title, "error": f"'{title}' için bilgi bulunamadı."}
+    
+    found = _find_section(data.get("sections") or [], parts)
+    if found is None:
+        return {
+            "title": data["title"],
+            "error": f"'{section}' bölümü bulunamadı.",
+            "outline": get_outline(data.get("sections") or [])
+        }
+    
+    return {
+        "title": data["title"],
+        "section": section,
+        "result": {
+            "title": found["title"],
+            "content": found.get("content", ""),
+            "subsections": get_outline(found.get("subsections") or [])
+        }
+    }
 
 
 def get_function_def() -> Dict[str, Any]:
@@ -107,6 +612,13 @@ def get_function_def() -> Dict[str, Any]:
                 "query": {
                     "type": "string",
                     "description": "Vikipedi'de aranacak konu veya başlık"
+                },
+                "language": {
+                    "type": "string",
+                    "description": (
+                        "Vikipedi dil kodu (örn: 'tr', 'en', 'de'). Boş bırakılırsa sorgunun "
+                        "dilinden tahmin edilir; sayfa bulunamazsa diğer dillere bakılır."
+                    )
                 }
             },
             "required": ["query"]
@@ -114,6 +626,40 @@ def get_function_def() -> Dict[str, Any]:
     }
 
 
+def get_section_function_def() -> Dict[str, Any]:
+    """
+    get_section aracı için Gemini fonksiyon tanımını döndürür.
+    
+    Returns:
+        Dict: Fonksiyon tanımı
+    """
+    return {
+        "name": "get_section",
+        "description": (
+            "search_info ile bulunan bir Vikipedi sayfasının tek bir bölümünü getirir. "
+            "search_info sonucunda yer almayan (omitted_sections/outline) bölümler için kullan."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "title": {
+                    "type": "string",
+                    "description": "Sayfa başlığı (search_info sonucundaki title)"
+                },
+                "section": {
+                    "type": "string",
+                    "description": "Bölüm başlığı veya yolu (örn: 'Tarih / Osmanlı dönemi')"
+                },
+                "language": {
+                    "type": "string",
+                    "description": "Sayfanın dil kodu (search_info sonucundaki language)"
+                }
+            },
+            "required": ["title", "section"]
+        }
+    }
+
+
 # Test için
 if __name__ == "__main__":
     result = search_info("Atatürk")
@@ -0,0 +1,36 @@
+# Sessions package
+import threading
+
+from .backends import SessionBackend, MemoryBackend, SQLiteBackend, RedisBackend, create_backend
+from .store import Session, SessionStore
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _create_chatbot():
+    """WebChatbot sınıfını lazy import eder ve yeni bir örnek oluşturur."""
+    from src.chatbot import WebChatbot
+    return WebChatbot()
+
+
+def _chatbot_size(chatbot) -> int:
+    return chatbot.estimate_size()
+
+
+def get_session_store() -> SessionStore:
+    """Süreç genelinde paylaşılan oturum deposunu döndürür."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from src.config import Config
+                _store = SessionStore(
+                    factory=_create_chatbot,
+                    max_sessions=Config.MAX_CHATBOT_INSTANCES,
+                    idle_ttl=Config.SESSION_IDLE_TTL,
+                    max_bytes=Config.SESSION_MAX_BYTES,
+                    size_fn=_chatbot_size,
+                    backend=create_backend(Config.SESSION_BACKEND_URL, ttl=Config.SESSION_IDLE_TTL)
+                )
+    return _store
@@ -0,0 +1,408 @@
+"""
+Oturum Kalıcılık Katmanı.
+Sohbet geçmişini süreç dışına taşıyarak birden fazla worker'ın aynı sohbete
+hizmet verebilmesini sağlar.
+
+Mesajlar yalnızca eklenir (append-only): her turda sadece yeni mesajlar
+yazılır, bir worker diğerinin eklediği mesajları kaldığı yerden okur.
+
+Her sohbetin bir nesil (generation) numarası vardır; ``delete`` onu artırır.
+Böylece sıfırlanıp yeniden dolan bir sohbet, eski geçmişin devamı sanılmaz.
+Ekleme, yazanın gördüğü uzunluk ve nesil hâlâ geçerliyse yapılır; araya
+başka bir worker girdiyse ``SessionConflict`` fırlatılır.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Bu boyutun üzerindeki kayıtlar zlib ile sıkıştırılır
+COMPRESS_THRESHOLD = 1024
+# MemoryBackend: sıfırlanan sohbetin nesli bu kadar süre yazılmazsa unutulur (saniye)
+GENERATION_TTL = 3600
+
+
+def _json_default(value: Any) -> Any:
+    # Liste benzeri kayıtlar (ör. CalculationLog) liste olarak saklanır
+    if hasattr(value, "to_list"):
+        return value.to_list()
+    return str(value)
+
+
+def encode(value: Any) -> bytes:
+    """Değeri kompakt JSON olarak, büyükse sıkıştırarak kodlar."""
+    raw = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+    if len(raw) > COMPRESS_THRESHOLD:
+        return b"z" + zlib.compress(raw)
+    return b"j" + raw
+
+
+def decode(payload: bytes) -> Any:
+    """``encode`` ile kodlanmış değeri çözer."""
+    if payload[:1] == b"z":
+        return json.loads(zlib.decompress(payload[1:]).decode("utf-8"))
+    return json.loads(payload[1:].decode("utf-8"))
+
+
+class SessionConflict(Exception):
+    """Ekleme sırasında sohbet başka bir worker tarafından değiştirildi."""
+
+
+class SessionBackend(ABC):
+    """Kalıcılık katmanı arayüzü."""
+
+    @abstractmethod
+    def length(self, chat_id: str) -> int:
+        """Sohbette kayıtlı mesaj sayısını döndürür."""
+
+    @abstractmethod
+    def state(self, chat_id: str) -> Tuple[int, int]:
+        """Sohbetin (nesil, mesaj sayısı) çiftini tutarlı biçimde döndürür."""
+
+    @abstractmethod
+    def load_messages(self, chat_id: str, offset: int = 0) -> List[Dict[str, Any]]:
+        """``offset`` konumundan itibaren mesajları döndürür."""
+
+    @abstractmethod
+    def append_messages(self, chat_id: str, messages: List[Dict[str, Any]],
+                        expected_length: Optional[int] = None, generation: Optional[int] = None) -> None:
+        """
+        Mesajları sohbetin sonuna ekler.
+
+        Args:
+            chat_id: Sohbet kimliği
+            messages: Eklenecek mesajlar
+            expected_length: Verilirse sohbetin şu anki uzunluğu bu olmalı
+            generation: Verilirse sohbetin şu anki nesli bu olmalı
+
+        Raises:
+            SessionConflict: Uzunluk veya nesil beklenenden farklıysa
+        """
+
+    @abstractmethod
+    def load_user_data(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        """Kullanıcı verisini döndürür (yoksa None)."""
+
+    @abstractmethod
+    def save_user_data(self, chat_id: str, user_data: Dict[str, Any]) -> None:
+        """Kullanıcı verisini kaydeder."""
+
+    @abstractmethod
+    def delete(self, chat_id: str) -> None:
+        """Sohbetin tüm kayıtlarını siler ve neslini artırır."""
+
+
+def _check_expected(chat_id: str, current: Tuple[int, int],
+                    expected_length: Optional[int], generation: Optional[int]) -> None:
+    current_generation, length = current
+    if generation is not None and generation != current_generation:
+        raise SessionConflict(f"{chat_id}: sohbet sıfırlanmış (nesil {current_generation}, beklenen {generation})")
+    if expected_length is not None and expected_length != length:
+        raise SessionConflict(f"{chat_id}: {length} mesaj var, {expected_length} bekleniyordu")
+
+
+class MemoryBackend(SessionBackend):
+    """
+    Süreç içi katman (tek worker ve testler için).
+
+    Yalnızca sıfırlanmış sohbetlerin nesli tutulur; kayıt son yazımdan
+    ``generation_ttl`` saniye sonra düşürülür. Nesiller süreç genelinde
+    artan bir sayaçtan verildiği için unutulan bir nesil tekrar kullanılmaz.
+    """
+
+    def __init__(self, generation_ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            generation_ttl: Sıfırlanan sohbetin neslinin saklanma süresi
+                (saniye, varsayılan ``GENERATION_TTL``)
+            clock: Süre ölçümü için saat (testler için)
+        """
+        self._messages: Dict[str, List[bytes]] = {}
+        self._user_data: Dict[str, bytes] = {}
+        # chat_id -> (nesil, son yazım); son yazıma göre sıralı
+        self._generations: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._last_generation = 0
+        self.generation_ttl = generation_ttl or GENERATION_TTL
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def _generation(self, chat_id: str) -> int:
+        entry = self._generations.get(chat_id)
+        return entry[0] if entry is not None else 0
+
+    def _touch(self, chat_id: str) -> None:
+        """Kilit altında çağrılır; yazılan sohbetin neslini tazeler, süresi dolanları düşürür."""
+        now = self._clock()
+        entry = self._generations.get(chat_id)
+        if entry is not None:
+            self._generations[chat_id] = (entry[0], now)
+            self._generations.move_to_end(chat_id)
+        while self._generations:
+            oldest, (_, touched) = next(iter(self._generations.items()))
+            if now - touched < self.generation_ttl:
+                break
+            del self._generations[oldest]
+
+    def length(self, chat_id: str) -> int:
+        with self._lock:
+            return len(self._messages.get(chat_id, []))
+
+    def state(self, chat_id: str) -> Tuple[int, int]:
+        with self._lock:
+            return self._generation(chat_id), len(self._messages.get(chat_id, []))
+
+    def load_messages(self, chat_id: str, offset: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            payloads = list(self._messages.get(chat_id, [])[offset:])
+        return [decode(p) for p in payloads]
+
+    def append_messages(self, chat_id: str, messages: List[Dict[str, Any]],
+                        expected_length: Optional[int] = None, generation: Optional[int] = None) -> None:
+        payloads = [encode(m) for m in messages]
+        with self._lock:
+            current = (self._generation(chat_id), len(self._messages.get(chat_id, [])))
+            _check_expected(chat_id, current, expected_length, generation)
+            if payloads:
+                self._messages.setdefault(chat_id, []).extend(payloads)
+            self._touch(chat_id)
+
+    def load_user_data(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._user_data.get(chat_id)
+        return decode(payload) if payload is not None else None
+
+    def save_user_data(self, chat_id: str, user_data: Dict[str, Any]) -> None:
+        payload = encode(user_data)
+        with self._lock:
+            self._user_data[chat_id] = payload
+            self._touch(chat_id)
+
+    def delete(self, chat_id: str) -> None:
+        with self._lock:
+            self._messages.pop(chat_id, None)
+            self._user_data.pop(chat_id, None)
+            # Eski kayıt düşürülür; sohbet yeni (hiç kullanılmamış) bir nesille başlar
+            self._generations.pop(chat_id, None)
+            self._last_generation += 1
+            self._generations[chat_id] = (self._last_generation, self._clock())
+            self._touch(chat_id)
+
+
+class SQLiteBackend(SessionBackend):
+    """
+    SQLite dosyası üzerinde kalıcılık.
+    WAL modu sayesinde aynı makinedeki birden fazla worker paylaşabilir.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " chat_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " payload BLOB NOT NULL,"
+            " PRIMARY KEY (chat_id, seq))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_data ("
+            " chat_id TEXT PRIMARY KEY,"
+            " payload BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS generations ("
+            " chat_id TEXT PRIMARY KEY,"
+            " generation INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _state(self, chat_id: str) -> Tuple[int, int]:
+        row = self._conn.execute(
+            "SELECT COALESCE((SELECT generation FROM generations WHERE chat_id = ?), 0),"
+            " COALESCE((SELECT MAX(seq) + 1 FROM messages WHERE chat_id = ?), 0)",
+            (chat_id, chat_id)
+        ).fetchone()
+        return row[0], row[1]
+
+    def length(self, chat_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+        return row[0]
+
+    def state(self, chat_id: str) -> Tuple[int, int]:
+        with self._lock:
+            return self._state(chat_id)
+
+    def load_messages(self, chat_id: str, offset: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM messages WHERE chat_id = ? AND seq >= ? ORDER BY seq",
+                (chat_id, offset)
+            ).fetchall()
+        return [decode(row[0]) for row in rows]
+
+    def append_messages(self, chat_id: str, messages: List[Dict[str, Any]],
+                        expected_length: Optional[int] = None, generation: Optional[int] = None) -> None:
+        if not messages:
+            return
+        payloads = [encode(m) for m in messages]
+        with self._lock:
+            with self._conn:
+                # Diğer süreçlerin araya girmemesi için kontrol ve ekleme tek yazma işleminde
+                self._conn.execute("BEGIN IMMEDIATE")
+                current = self._state(chat_id)
+                _check_expected(chat_id, current, expected_length, generation)
+                start = current[1]
+                self._conn.executemany(
+                    "INSERT INTO messages (chat_id, seq, payload) VALUES (?, ?, ?)",
+                    [(chat_id, start + i, p) for i, p in enumerate(payloads)]
+                )
+
+    def load_user_data(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM user_data WHERE chat_id = ?", (chat_id,)
+            ).fetchone()
+        return decode(row[0]) if row else None
+
+    def save_user_data(self, chat_id: str, user_data: Dict[str, Any]) -> None:
+        payload = encode(user_data)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO user_data (chat_id, payload) VALUES (?, ?)",
+                    (chat_id, payload)
+                )
+
+    def delete(self, chat_id: str) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+                self._conn.execute("DELETE FROM user_data WHERE chat_id = ?", (chat_id,))
+                self._conn.execute(
+                    "INSERT INTO generations (chat_id, generation) VALUES (?, 1)"
+                    " ON CONFLICT(chat_id) DO UPDATE SET generation = generation + 1",
+                    (chat_id,)
+                )
+
+
+class RedisBackend(SessionBackend):
+    """
+    Redis protokolü üzerinde kalıcılık.
+    Mesajlar ``RPUSH`` ile listeye eklenir, ``LRANGE`` ile kaldığı yerden
+    okunur. ``redis-py`` ile uyumlu her istemci (ör. fakeredis) kullanılabilir.
+    """
+
+    def __init__(self, client, prefix: str = "chat:", ttl: Optional[int] = None):
+        """
+        Args:
+            client: redis-py uyumlu istemci
+            prefix: Anahtar öneki
+            ttl: Kayıtların boşta kalma süresi (saniye, opsiyonel)
+        """
+        self._client = client
+        self._prefix = prefix
+        self._ttl = ttl
+
+    def _keys(self, chat_id: str):
+        base = f"{self._prefix}{chat_id}"
+        return f"{base}:messages", f"{base}:user_data"
+
+    def _generation_key(self, chat_id: str) -> str:
+        # Silmede korunur; bu yüzden ``_keys`` içinde değildir
+        return f"{self._prefix}{chat_id}:generation"
+
+    def length(self, chat_id: str) -> int:
+        return int(self._client.llen(self._keys(chat_id)[0]))
+
+    def state(self, chat_id: str) -> Tuple[int, int]:
+        pipe = self._client.pipeline()
+        pipe.get(self._generation_key(chat_id))
+        pipe.llen(self._keys(chat_id)[0])
+        generation, length = pipe.execute()
+        return int(generation or 0), int(length)
+
+    def load_messages(self, chat_id: str, offset: int = 0) -> List[Dict[str, Any]]:
+        return [decode(p) for p in self._client.lrange(self._keys(chat_id)[0], offset, -1)]
+
+    def append_messages(self, chat_id: str, messages: List[Dict[str, Any]],
+                        expected_length: Optional[int] = None, generation: Optional[int] = None) -> None:
+        if not messages:
+            return
+        messages_key, user_data_key = self._keys(chat_id)
+        generation_key = self._generation_key(chat_id)
+        payloads = [encode(m) for m in messages]
+        with self._client.pipeline() as pipe:
+            if expected_length is not None or generation is not None:
+                # WATCH: kontrol ile ekleme arasında anahtar değişirse EXEC başarısız olur
+                pipe.watch(messages_key, generation_key)
+                current = (int(pipe.get(generation_key) or 0), int(pipe.llen(messages_key)))
+                _check_expected(chat_id, current, expected_length, generation)
+                pipe.multi()
+            pipe.rpush(messages_key, *payloads)
+            if self._ttl:
+                pipe.expire(messages_key, self._ttl)
+                pipe.expire(user_data_key, self._ttl)
+            try:
+                pipe.execute()
+            except Exception as e:
+                if type(e).__name__ == "WatchError":
+                    raise SessionConflict(f"{chat_id}: ekleme sırasında sohbet değişti") from e
+                raise
+
+    def load_user_data(self, chat_id: str) -> Optional[Dict[str, Any]]:
+        payload = self._client.get(self._keys(chat_id)[1])
+        return decode(payload) if payload is not None else None
+
+    def save_user_data(self, chat_id: str, user_data: Dict[str, Any]) -> None:
+        self._client.set(self._keys(chat_id)[1], encode(user_data), ex=self._ttl or None)
+
+    def delete(self, chat_id: str) -> None:
+        pipe = self._client.pipeline()
+        pipe.delete(*self._keys(chat_id))
+        pipe.incr(self._generation_key(chat_id))
+        if self._ttl:
+            pipe.expire(self._generation_key(chat_id), self._ttl)
+        pipe.execute()
+
+
+def create_backend(url: str, ttl: Optional[int] = None) -> Optional[SessionBackend]:
+    """
+    URL'den kalıcılık katmanı oluşturur.
+
+    Desteklenen biçimler: ``memory://``, ``sqlite:///yol/sessions.db``,
+    ``redis://host:6379/0``. Boş URL kalıcılığı kapatır.
+
+    Args:
+        url: Katman adresi
+        ttl: Redis kayıtlarının ve bellek katmanındaki nesil kayıtlarının boşta kalma süresi
+
+    Returns:
+        Optional[SessionBackend]: Katman veya None
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryBackend(generation_ttl=ttl)
+    if parsed.scheme == "sqlite":
+        return SQLiteBackend(url[len("sqlite:///"):] if url.startswith("sqlite:///") else parsed.path)
+    if parsed.scheme in ("redis", "rediss"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("Redis oturum katmanı için 'redis' paketi gerekli: pip install redis") from e
+        return RedisBackend(redis.Redis.from_url(url), ttl=ttl)
+    raise ValueError(f"Desteklenmeyen oturum katmanı: {url}")
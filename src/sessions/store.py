@@ -0,0 +1,275 @@
+"""
+Oturum Deposu.
+Sohbet başına ``WebChatbot`` nesnelerini LRU sırasıyla, boşta kalma süresi
+(TTL) ve bellek bütçesiyle sınırlı olarak tutar. Bir kalıcılık katmanı
+verilirse yerel nesneler yalnızca önbellek görevi görür; asıl geçmiş
+katmandadır ve her istekte eksik mesajlar oradan tamamlanır.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from src.sessions.backends import SessionBackend, SessionConflict
+except ImportError:
+    from sessions.backends import SessionBackend, SessionConflict
+
+# Eşzamanlı yazma çakışmasında yeniden deneme sayısı
+PERSIST_RETRIES = 3
+
+
+class Session:
+    """Tek bir sohbetin durumu ve tur kilidi."""
+
+    __slots__ = ("chat_id", "chatbot", "lock", "last_access", "size", "persisted", "generation")
+
+    def __init__(self, chat_id: str, chatbot: Any):
+        self.chat_id = chat_id
+        self.chatbot = chatbot
+        # Aynı sohbette eşzamanlı /chat ve /reset işlemlerini sıraya sokar
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+        self.size = 0
+        # Kalıcılık katmanına yazılmış mesaj sayısı ve sohbetin o andaki nesli
+        self.persisted = 0
+        self.generation = 0
+
+
+class SessionStore:
+    """
+    İş parçacığı güvenli, LRU + TTL + bellek bütçeli oturum deposu.
+
+    Erişim sırası ``OrderedDict`` ile tutulur; her erişim O(1) olarak
+    oturumu sona taşır. Süresi dolan oturumlar listenin başında biriktiği
+    için tahliye yalnızca gereken kayıtları dolaşır.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_sessions: int, idle_ttl: float,
+                 max_bytes: int, size_fn: Optional[Callable[[Any], int]] = None,
+                 backend: Optional[SessionBackend] = None):
+        """
+        Args:
+            factory: Yeni sohbet nesnesi üreten fonksiyon
+            max_sessions: En fazla oturum sayısı
+            idle_ttl: Boşta kalan oturumun silinme süresi (saniye)
+            max_bytes: Tüm oturumlar için tahmini bellek bütçesi
+            size_fn: Sohbet nesnesinin tahmini boyutunu hesaplayan fonksiyon
+            backend: Süreçler arası paylaşılan kalıcılık katmanı (opsiyonel)
+        """
+        self._factory = factory
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self._size_fn = size_fn or (lambda chatbot: 0)
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "evictions": 0, "expirations": 0, "deleted": 0}
+
+    def _remove_locked(self, chat_id: str) -> Optional[Session]:
+        session = self._sessions.pop(chat_id, None)
+        if session is not None:
+            self._bytes -= session.size
+        return session
+
+    def _evict_locked(self, now: float) -> None:
+        """
+        Süresi dolan, ardından sayı/bellek sınırını aşan en eski oturumları siler.
+
+        Turu süren (kilidi tutulan) oturumlar atlanır: silinseler aynı sohbete
+        gelen sonraki istek yeni bir kilitle paralel tur başlatır ve süren
+        turun geçmişi kaybolur. Bu yüzden sınır geçici olarak aşılabilir.
+        """
+        expired = []
+        for chat_id, session in self._sessions.items():
+            if now - session.last_access < self.idle_ttl:
+                break
+            if not session.lock.locked():
+                expired.append(chat_id)
+        for chat_id in expired:
+            self._remove_locked(chat_id)
+            self._stats["expirations"] += 1
+
+        count, size = len(self._sessions), self._bytes
+        if count <= self.max_sessions and size <= self.max_bytes:
+            return
+        victims = []
+        for chat_id, session in self._sessions.items():
+            if count <= self.max_sessions and size <= self.max_bytes:
+                break
+            if session.lock.locked():
+                continue
+            victims.append(chat_id)
+            count -= 1
+            size -= session.size
+        for chat_id in victims:
+            self._remove_locked(chat_id)
+            self._stats["evictions"] += 1
+
+    def get(self, chat_id: str) -> Optional[Session]:
+        """Oturumu döndürür ve erişim zamanını günceller; yoksa None."""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(chat_id)
+            if session is None:
+                return None
+            if now - session.last_access >= self.idle_ttl and not session.lock.locked():
+                self._remove_locked(chat_id)
+                self._stats["expirations"] += 1
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(chat_id)
+            return session
+
+    def get_or_create(self, chat_id: str) -> Session:
+        """
+        Oturumu döndürür; yoksa yeni bir sohbet nesnesiyle oluşturur.
+
+        Args:
+            chat_id: Sohbet kimliği
+
+        Returns:
+            Session: Mevcut veya yeni oturum
+        """
+        session = self.get(chat_id)
+        if session is not None:
+            return session
+
+        chatbot = self._factory()
+        now = time.monotonic()
+        with self._lock:
+            # Başka bir istek aynı anda oluşturmuş olabilir
+            session = self._sessions.get(chat_id)
+            if session is None:
+                session = Session(chat_id, chatbot)
+                self._sessions[chat_id] = session
+                self._stats["created"] += 1
+                self._evict_locked(now)
+            session.last_access = now
+            self._sessions.move_to_end(chat_id)
+            return session
+
+    def record_size(self, session: Session) -> None:
+        """Bir tur sonrasında oturumun tahmini boyutunu günceller."""
+        size = self._size_fn(session.chatbot)
+        with self._lock:
+            if self._sessions.get(session.chat_id) is session:
+                self._bytes += size - session.size
+                session.size = size
+                self._evict_locked(time.monotonic())
+            else:
+                session.size = size
+
+    def load(self, session: Session) -> None:
+        """
+        Oturumu kalıcılık katmanıyla eşitler (tur kilidi altında çağrılır).
+
+        Yalnızca başka bir worker'ın eklediği mesajlar okunur. Sohbet başka
+        yerde sıfırlandıysa (nesil değiştiyse) geçmiş baştan yüklenir; yeni
+        sohbet eskisinden uzun olsa bile eski geçmişin devamı sayılmaz.
+        """
+        if self.backend is None:
+            return
+        chatbot = session.chatbot
+        generation, total = self.backend.state(session.chat_id)
+        if generation == session.generation and total == session.persisted:
+            return
+        if generation != session.generation or total < session.persisted:
+            chatbot.reset_history()
+            session.persisted = 0
+            session.generation = generation
+
+        messages = self.backend.load_messages(session.chat_id, session.persisted)
+        if self.backend.state(session.chat_id)[0] != generation:
+            # Okurken sıfırlandı; yeni nesli baştan yükle
+            self.load(session)
+            return
+        chatbot.history.extend(messages)
+        session.persisted += len(messages)
+        user_data = self.backend.load_user_data(session.chat_id)
+        if user_data is not None:
+            chatbot.user_data = user_data
+
+    def _append_new_messages(self, session: Session) -> None:
+        """
+        Turda eklenen mesajları, katman yerel kopyanın bıraktığı yerdeyse yazar.
+
+        Araya başka bir worker'ın turu girdiyse yerel geçmiş katmandan
+        yenilenir ve bu turun mesajları onun ardına eklenir; sohbet başka
+        yerde sıfırlandıysa bu tur eski sohbete ait olduğu için yazılmaz.
+        """
+        new_messages = list(session.chatbot.messages[session.persisted:])
+        for _ in range(PERSIST_RETRIES):
+            if not new_messages:
+                return
+            try:
+                self.backend.append_messages(
+                    session.chat_id, new_messages,
+                    expected_length=session.persisted, generation=session.generation
+                )
+                session.persisted += len(new_messages)
+                return
+            except SessionConflict:
+                generation = session.generation
+                session.chatbot.reset_history()
+                session.persisted = 0
+                self.load(session)
+                if session.generation != generation:
+                    print(f"⚠️ Sohbet başka bir worker'da sıfırlandı, tur kaydedilmedi: {session.chat_id}")
+                    return
+                session.chatbot.history.extend(new_messages)
+        print(f"⚠️ Sohbet geçmişi eşzamanlı yazmalar nedeniyle kaydedilemedi: {session.chat_id}")
+
+    def persist(self, session: Session) -> None:
+        """Turda eklenen yeni mesajları ve kullanıcı verisini katmana yazar."""
+        if self.backend is not None:
+            self._append_new_messages(session)
+            self.backend.save_user_data(session.chat_id, session.chatbot.user_data)
+        self.record_size(session)
+
+    def reset(self, session: Session) -> None:
+        """Oturumun geçmişini hem yerelde hem katmanda sıfırlar."""
+        session.chatbot.reset_history()
+        session.persisted = 0
+        if self.backend is not None:
+            self.backend.delete(session.chat_id)
+            session.generation = self.backend.state(session.chat_id)[0]
+        self.record_size(session)
+
+    def delete(self, chat_id: str) -> bool:
+        """Oturumu siler. Silindiyse True döndürür."""
+        if self.backend is not None:
+            self.backend.delete(chat_id)
+        with self._lock:
+            removed = self._remove_locked(chat_id) is not None
+            if removed:
+                self._stats["deleted"] += 1
+            return removed
+
+    def __contains__(self, chat_id: str) -> bool:
+        with self._lock:
+            return chat_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Depo istatistiklerini döndürür.
+
+        Returns:
+            Dict: Oturum sayısı, tahliye sayaçları ve bellek tahmini
+        """
+        with self._lock:
+            self._evict_locked(time.monotonic())
+            stats = dict(self._stats)
+            stats["active_sessions"] = len(self._sessions)
+            stats["memory_estimate_bytes"] = self._bytes
+        stats["max_sessions"] = self.max_sessions
+        stats["max_bytes"] = self.max_bytes
+        stats["idle_ttl"] = self.idle_ttl
+        stats["backend"] = type(self.backend).__name__ if self.backend is not None else None
+        return stats
@@ -0,0 +1,5 @@
+# Streaming package
+from .coalescer import ChunkCoalescer
+from .sse import SSEEncoder, encode_events, encode_events_async, format_event
+from .cancel import CANCELLED_END, CancelToken
+from .replay import ReplayBuffer, StreamRegistry, get_stream_registry, parse_event_id, pump, pump_async
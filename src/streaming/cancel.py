@@ -0,0 +1,72 @@
+"""
+İptal İşareti.
+Bir turu üreten iş parçacığı/görev ile onu durdurmak isteyen taraflar
+(``/cancel`` isteği, yeni mesaj, kopan bağlantı) arasında paylaşılır.
+İptal edildiğinde kayıtlı geri çağrılar hemen çalışır; böylece bekleyen
+bir Gemini akışı veya araç çağrısı bir sonraki parçayı beklemeden kesilir.
+"""
+
+import threading
+from typing import Callable, List, Optional
+
+# Yanıt iptal edildiğinde gönderilen bitiş chunk'ı (tek bitiş olayı kuralı korunur)
+CANCELLED_END = {"type": "end", "cancelled": True}
+
+
+class CancelToken:
+    """
+    İş parçacıkları arasında güvenle paylaşılan, tek seferlik iptal işareti.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """
+        İptal eder ve geri çağrıları çalıştırır.
+
+        Args:
+            reason: İptal nedeni (ör. "cancelled", "superseded", "disconnected")
+
+        Returns:
+            bool: Bu çağrı iptal ettiyse True, zaten iptal edilmişse False
+        """
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ İptal geri çağrısı hatası: {e}")
+        return True
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """İptalde çağrılacak fonksiyonu kaydeder; zaten iptal edildiyse hemen çağırır."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """Kayıtlı geri çağrıyı kaldırır."""
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """İptal edilene kadar (en fazla ``timeout`` saniye) bekler."""
+        return self._event.wait(timeout)
@@ -0,0 +1,85 @@
+"""
+Akış Birleştirici.
+Model'den gelen küçük metin parçalarını bayt eşiği veya zaman penceresine
+göre birleştirerek istemciye gönderir. Yapay bekleme (sleep) kullanılmaz;
+parçalar geldiği anda değerlendirilir. Üretici yeni parça göndermeden
+beklerken (ör. araç çağrısı sürerken) zaman penceresinin dolduğunu
+``time_left``/``poll`` ile tamponu tutan taraf denetler.
+"""
+
+import time
+from typing import Callable, List, Optional
+
+
+class ChunkCoalescer:
+    """
+    Bayt eşiği / zaman penceresi tabanlı parça birleştirici.
+
+    - İlk parça beklemeden gönderilir (ilk token süresi kısa kalır).
+    - Sonraki parçalar tampon ``min_bytes`` boyutuna ulaşınca veya tamponun
+      en eski parçası ``max_delay`` saniyedir bekliyorsa gönderilir.
+    """
+
+    def __init__(self, min_bytes: int, max_delay: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            min_bytes: Tamponun gönderileceği en küçük boyut (UTF-8 bayt)
+            max_delay: Bir parçanın tamponda bekleyebileceği en uzun süre (saniye)
+            clock: Zaman kaynağı (testler için değiştirilebilir)
+        """
+        self.min_bytes = min_bytes
+        self.max_delay = max_delay
+        self._clock = clock
+        self._parts: List[str] = []
+        self._size = 0
+        self._since: Optional[float] = None
+        self._started = False
+
+    def push(self, text: str) -> Optional[str]:
+        """
+        Parçayı tampona ekler; gönderim zamanı geldiyse birleşik metni döndürür.
+
+        Args:
+            text: Model'den gelen metin parçası
+
+        Returns:
+            Optional[str]: Gönderilecek metin veya None
+        """
+        if not text:
+            return None
+
+        now = self._clock()
+        if self._since is None:
+            self._since = now
+        self._parts.append(text)
+        self._size += len(text.encode("utf-8"))
+
+        if not self._started or self._size >= self.min_bytes or now - self._since >= self.max_delay:
+            self._started = True
+            return self.flush()
+        return None
+
+    def time_left(self) -> Optional[float]:
+        """
+        Tampondaki en eski parçanın gönderilmesine kalan süre (saniye).
+        Tampon boşsa None; süre dolduysa 0.
+        """
+        if self._since is None:
+            return None
+        return max(0.0, self._since + self.max_delay - self._clock())
+
+    def poll(self) -> Optional[str]:
+        """Zaman penceresi dolduysa tamponu boşaltır; yeni parça beklemez."""
+        if self._since is not None and self._clock() - self._since >= self.max_delay:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        """Tampondaki metni boşaltır ve döndürür (tampon boşsa None)."""
+        if not self._parts:
+            return None
+        text = "".join(self._parts)
+        self._parts = []
+        self._size = 0
+        self._since = None
+        return text
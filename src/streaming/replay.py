@@ -0,0 +1,500 @@
+"""
+Yeniden Oynatma Tamponu.
+Her ``/chat`` turu arka planda üretilir ve çerçeveleri (chat_id, tur)
+başına sınırlı bir tampona yazılır. İstemciler tamponu takip eder; bağlantı
+koparsa ``Last-Event-ID`` ile aynı tampona yeniden bağlanıp eksik kısımdan
+devam eder. Böylece yeniden bağlanmak Gemini çağrısını ve Wikipedia
+isteklerini tekrarlamaz, kısa kopmalarda üretim yarıda kalmaz.
+
+Son takipçi ayrıldıktan sonra ``disconnect_grace`` saniye içinde kimse
+yeniden bağlanmazsa tur iptal edilir; böylece kapatılan sekmeler için
+Gemini kotası ve worker zamanı harcanmaz.
+"""
+
+import asyncio
+import heapq
+import threading
+import time
+import uuid
+from collections import deque
+from typing import (
+    Any, AsyncGenerator, AsyncIterable, Dict, Generator, Iterable, List, Optional, Tuple
+)
+
+try:
+    from src.config import Config
+    from src.observability import tracing
+except ImportError:
+    from config import Config
+    from observability import tracing
+
+from .cancel import CancelToken
+from .sse import SSEEncoder, error_chunk
+
+# Tamponda artık bulunmayan bir noktadan devam istenirse gönderilen olay
+GAP_ERROR = {"type": "error", "error": "Yanıtın kaçırılan kısmı artık saklanmıyor, mesajı tekrar gönderin."}
+
+
+def _resolve(future: "asyncio.Future") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def parse_event_id(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """
+    ``<tur>:<sıra>`` biçimli olay kimliğini ayrıştırır.
+
+    Args:
+        value: ``Last-Event-ID`` değeri
+
+    Returns:
+        Optional[Tuple[str, int]]: (tur kimliği, sıra) veya geçersizse None
+    """
+    turn_id, _, seq = (value or "").strip().rpartition(":")
+    if not turn_id or not seq.isdigit():
+        return None
+    return turn_id, int(seq)
+
+
+class ReplayBuffer:
+    """
+    Tek bir turun sıra numaralı SSE çerçeveleri.
+
+    Bayt bütçesi aşılınca en eski çerçeveler düşer; takip eden istemciler
+    hem iş parçacığı (Flask) hem asyncio (ASGI) üzerinden beklenebilir.
+    """
+
+    def __init__(self, chat_id: str, turn_id: str, max_bytes: int,
+                 disconnect_grace: Optional[float] = None, trace=None):
+        """
+        Args:
+            chat_id: Sohbet kimliği
+            turn_id: Tur kimliği (olay kimliklerinin öneki)
+            max_bytes: Saklanacak en fazla çerçeve boyutu
+            disconnect_grace: Son takipçi ayrıldıktan sonra turun iptal
+                edilmesi için beklenecek süre (saniye); None veya negatifse
+                tur istemci olmadan da tamamlanır
+            trace: Turu başlatan isteğin izi; iptal ve yeniden bağlanma
+                olayları buraya yazılır (yoksa ``NOOP_TRACE``)
+        """
+        self.chat_id = chat_id
+        self.turn_id = turn_id
+        self.max_bytes = max_bytes
+        self.disconnect_grace = disconnect_grace
+        self.trace = trace if trace is not None else tracing.NOOP_TRACE
+        self.cancel_token = CancelToken()
+        self.followers = 0
+        self._detaches = 0
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.bytes = 0
+        self._frames: deque = deque()
+        self._dropped = 0
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future"]] = []
+
+    @property
+    def id_prefix(self) -> str:
+        return f"{self.turn_id}:"
+
+    def _wake(self) -> None:
+        """Kilit altında çağrılır; bekleyen tüm takipçileri uyandırır."""
+        self._cond.notify_all()
+        waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def append(self, frames: List[Tuple[int, str]]) -> None:
+        """Çerçeveleri ekler; bütçe aşılırsa en eskileri düşürür (sonuncusu hep kalır)."""
+        if not frames:
+            return
+        with self._cond:
+            for seq, frame in frames:
+                self._frames.append((seq, frame))
+                self.bytes += len(frame)
+            while self.bytes > self.max_bytes and len(self._frames) > 1:
+                seq, frame = self._frames.popleft()
+                self.bytes -= len(frame)
+                self._dropped = seq
+            self._wake()
+
+    def close(self) -> None:
+        """Turun bittiğini işaretler."""
+        with self._cond:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._wake()
+
+    def _attach(self) -> None:
+        with self._cond:
+            self.followers += 1
+
+    def _detach(self) -> None:
+        """Takipçi ayrıldı; kimse kalmadıysa bekleme süresi sonunda turu iptal eder."""
+        with self._cond:
+            self.followers -= 1
+            if self.followers or self.done or self.disconnect_grace is None or self.disconnect_grace < 0:
+                return
+            self._detaches += 1
+            generation = self._detaches
+        timer = threading.Timer(self.disconnect_grace, self._cancel_if_abandoned, args=(generation,))
+        timer.daemon = True
+        timer.start()
+
+    def _cancel_if_abandoned(self, generation: int) -> None:
+        with self._cond:
+            # Arada yeniden bağlanıp tekrar ayrılan olduysa yeni zamanlayıcı karar verir
+            abandoned = generation == self._detaches and self.followers == 0 and not self.done
+        if abandoned and self.cancel_token.cancel("disconnected"):
+            self.trace.event("stream.abandoned", grace=self.disconnect_grace)
+
+    def _collect(self, after: int) -> Tuple[Optional[List[str]], bool]:
+        """
+        Kilit altında çağrılır; ``after`` sırasından sonraki çerçeveleri döndürür.
+        Aradaki çerçeveler düşmüşse liste yerine None döner.
+        """
+        if after < self._dropped:
+            return None, self.done
+        return [frame for seq, frame in self._frames if seq > after], self.done
+
+    def _gap_frame(self) -> str:
+        encoder = SSEEncoder()
+        return encoder.finish(GAP_ERROR)
+
+    def follow(self, after: int = 0) -> Generator[str, None, None]:
+        """
+        ``after`` sırasından sonraki çerçeveleri geldikçe döndürür
+        (iş parçacığını bloklar). İstemci bağlantısı kapanınca sunucu üreteci
+        kapatır (``GeneratorExit``) ve takipçi ayrılmış sayılır.
+        """
+        self._attach()
+        try:
+            while True:
+                with self._cond:
+                    batch, done = self._collect(after)
+                    while batch == [] and not done:
+                        self._cond.wait()
+                        batch, done = self._collect(after)
+                    last = self._frames[-1][0] if self._frames else after
+                if batch is None:
+                    yield self._gap_frame()
+                    return
+                if batch:
+                    after = last
+                    yield "".join(batch)
+                if done:
+                    return
+        finally:
+            self._detach()
+
+    async def follow_async(self, after: int = 0) -> AsyncGenerator[str, None]:
+        """``follow``'un asyncio karşılığı (event loop'u bloklamaz)."""
+        loop = asyncio.get_running_loop()
+        self._attach()
+        try:
+            while True:
+                future = None
+                with self._cond:
+                    batch, done = self._collect(after)
+                    last = self._frames[-1][0] if self._frames else after
+                    if batch == [] and not done:
+                        future = loop.create_future()
+                        self._waiters.append((loop, future))
+                if future is not None:
+                    await future
+                    continue
+                if batch is None:
+                    yield self._gap_frame()
+                    return
+                if batch:
+                    after = last
+                    yield "".join(batch)
+                if done:
+                    return
+        finally:
+            self._detach()
+
+
+class _FlushScheduler:
+    """
+    Bekleyen metnin zaman penceresi dolduğunda gönderilmesi için tek bir
+    arka plan iş parçacığı. Üretici yeni chunk göndermeden beklerken
+    (ör. araç çağrısı sürerken) birleştirilen metin en geç ``max_delay``
+    sonra istemciye ulaşır. Tur başına iş parçacığı açılmaz.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._seq = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def call_at(self, deadline: float, callback) -> None:
+        """``callback``'i ``time.monotonic()`` ``deadline``'a ulaşınca çağırır."""
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (deadline, self._seq, callback))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sse-flush", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                _, _, callback = heapq.heappop(self._heap)
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Zamanlı SSE gönderimi başarısız: {e}")
+
+
+_scheduler = _FlushScheduler()
+
+# Zamanlayıcının aynı tur için art arda uyanmasını önleyen alt sınır (saniye)
+_MIN_FLUSH_WAIT = 0.001
+
+
+class _FrameWriter:
+    """
+    Çerçeveleri kodlayıp tampona yazar. İstek izleniyorsa yazımların toplam
+    süresini, çerçeve ve bayt sayısını tek bir ``sse.write`` span'ı olarak
+    kaydeder (çerçeve başına span üretmek izi şişirirdi).
+
+    Kodlayıcı hem üretici hem zamanlayıcı tarafından kullanıldığından
+    yazımlar kilit altında yapılır.
+    """
+
+    __slots__ = ("buffer", "trace", "started", "seconds", "frames", "bytes", "lock", "pending", "closed")
+
+    def __init__(self, buffer: ReplayBuffer):
+        self.buffer = buffer
+        self.trace = tracing.current_trace()
+        self.started = time.time()
+        self.seconds = 0.0
+        self.frames = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.pending = False
+        self.closed = False
+
+    def write(self, encode, *args) -> None:
+        with self.lock:
+            self._write(encode, *args)
+
+    def _write(self, encode, *args) -> None:
+        if not self.trace.sampled:
+            self.buffer.append(encode(*args))
+            return
+        t0 = time.perf_counter()
+        frames = encode(*args)
+        self.buffer.append(frames)
+        self.seconds += time.perf_counter() - t0
+        self.frames += len(frames)
+        self.bytes += sum(len(frame) for _, frame in frames)
+
+    def schedule(self, encoder: SSEEncoder) -> None:
+        """Bekleyen metin varsa zaman penceresi sonunda gönderilmesini planlar."""
+        with self.lock:
+            if self.pending or self.closed:
+                return
+            left = encoder.time_left()
+            if left is None:
+                return
+            self.pending = True
+        _scheduler.call_at(time.monotonic() + max(left, _MIN_FLUSH_WAIT), lambda: self._deadline(encoder))
+
+    def _deadline(self, encoder: SSEEncoder) -> None:
+        with self.lock:
+            self.pending = False
+            if self.closed:
+                return
+            self._write(encoder.poll_frames)
+        self.schedule(encoder)
+
+    def close(self) -> None:
+        """Bitiş olayından sonra zamanlı gönderimleri durdurur."""
+        with self.lock:
+            self.closed = True
+
+    def record(self) -> None:
+        self.trace.record("sse.write", self.started, self.seconds, frames=self.frames, bytes=self.bytes)
+
+
+def pump(events: Iterable[Dict[str, Any]], encoder: SSEEncoder, buffer: ReplayBuffer) -> None:
+    """
+    Chunk akışını kodlayıp tampona yazar; akış hata verse de tek bir bitiş
+    olayı garanti edilir. Tamponu kapatmaz. Üretici boşta beklerken
+    birleştirilen metin zaman penceresi dolunca arka planda gönderilir.
+    """
+    writer = _FrameWriter(buffer)
+    try:
+        for event in events:
+            writer.write(encoder.encode_frames, event)
+            writer.schedule(encoder)
+        writer.write(encoder.finish_frames)
+    except Exception as e:
+        writer.write(encoder.finish_frames, error_chunk(e))
+    finally:
+        writer.close()
+        writer.record()
+
+
+async def pump_async(events: AsyncIterable[Dict[str, Any]], encoder: SSEEncoder, buffer: ReplayBuffer) -> None:
+    """
+    ``pump``'ın asyncio karşılığı. Bekleyen metin varken sonraki chunk
+    zaman aşımıyla beklenir; süre dolarsa metin yeni chunk gelmeden gönderilir.
+    """
+    writer = _FrameWriter(buffer)
+    iterator = events.__aiter__()
+    try:
+        while True:
+            event = await _next_event(iterator, encoder, writer)
+            if event is _END:
+                break
+            writer.write(encoder.encode_frames, event)
+        writer.write(encoder.finish_frames)
+    except Exception as e:
+        writer.write(encoder.finish_frames, error_chunk(e))
+    finally:
+        writer.close()
+        writer.record()
+
+
+_END = object()
+
+
+async def _next_event(iterator, encoder: SSEEncoder, writer: _FrameWriter):
+    """Sonraki olayı bekler; beklerken zaman penceresi dolan metni gönderir."""
+    left = encoder.time_left()
+    if left is None:
+        try:
+            return await iterator.__anext__()
+        except StopAsyncIteration:
+            return _END
+    step = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({step}, timeout=max(left, _MIN_FLUSH_WAIT))
+            if done:
+                break
+            writer.write(encoder.poll_frames)
+            left = encoder.time_left()
+            if left is None:
+                await asyncio.wait({step})
+                break
+    except asyncio.CancelledError:
+        # Üreticiye iptali iletip kısmi turu kaydetmesini bekle
+        step.cancel()
+        await asyncio.gather(step, return_exceptions=True)
+        raise
+    try:
+        return step.result()
+    except StopAsyncIteration:
+        return _END
+
+
+class StreamRegistry:
+    """
+    (chat_id, tur) başına yeniden oynatma tamponları.
+    Biten turların tamponları ``ttl`` saniye sonra silinir.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, disconnect_grace: Optional[float] = None):
+        """
+        Args:
+            max_bytes: Tampon başına bayt bütçesi
+            ttl: Biten turun tamponunun saklanma süresi (saniye)
+            disconnect_grace: Takipçisiz kalan turun iptali için bekleme süresi (saniye)
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disconnect_grace = disconnect_grace
+        self._lock = threading.Lock()
+        self._streams: Dict[Tuple[str, str], ReplayBuffer] = {}
+
+    def _sweep(self) -> None:
+        """Kilit altında çağrılır; süresi dolmuş tamponları siler."""
+        now = time.monotonic()
+        expired = [key for key, buffer in self._streams.items()
+                   if buffer.done and now - buffer.finished_at >= self.ttl]
+        for key in expired:
+            del self._streams[key]
+
+    def open(self, chat_id: str, trace=None) -> ReplayBuffer:
+        """
+        Sohbet için yeni bir tur tamponu oluşturur.
+
+        Args:
+            chat_id: Sohbet kimliği
+            trace: Turu başlatan isteğin izi (opsiyonel)
+        """
+        buffer = ReplayBuffer(chat_id, uuid.uuid4().hex[:12], self.max_bytes, self.disconnect_grace, trace)
+        with self._lock:
+            self._sweep()
+            self._streams[(chat_id, buffer.turn_id)] = buffer
+        return buffer
+
+    def get(self, chat_id: str, turn_id: str) -> Optional[ReplayBuffer]:
+        """Tur tamponunu döndürür; yoksa veya süresi dolduysa None."""
+        with self._lock:
+            self._sweep()
+            return self._streams.get((chat_id, turn_id))
+
+    def cancel(self, chat_id: str, turn_id: Optional[str] = None, reason: str = "cancelled") -> List[str]:
+        """
+        Sohbetin süren turlarını iptal eder.
+
+        Args:
+            chat_id: Sohbet kimliği
+            turn_id: Yalnızca bu tur (None ise sohbetin tüm süren turları)
+            reason: İptal nedeni
+
+        Returns:
+            List[str]: İptal edilen tur kimlikleri
+        """
+        with self._lock:
+            buffers = [
+                buffer for (chat, turn), buffer in self._streams.items()
+                if chat == chat_id and (turn_id is None or turn == turn_id) and not buffer.done
+            ]
+        cancelled = []
+        for buffer in buffers:
+            if buffer.cancel_token.cancel(reason):
+                buffer.trace.event("turn.cancel", reason=reason)
+                cancelled.append(buffer.turn_id)
+        return cancelled
+
+    def stats(self) -> Dict[str, Any]:
+        """Tampon sayısı ve toplam boyutu."""
+        with self._lock:
+            self._sweep()
+            buffers = list(self._streams.values())
+        return {
+            "streams": len(buffers),
+            "active": sum(1 for b in buffers if not b.done),
+            "cancelled": sum(1 for b in buffers if b.cancel_token.cancelled),
+            "followers": sum(b.followers for b in buffers),
+            "bytes": sum(b.bytes for b in buffers)
+        }
+
+
+_registry: Optional[StreamRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_stream_registry() -> StreamRegistry:
+    """Süreç genelinde paylaşılan tampon kaydını döndürür."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = StreamRegistry(
+                    max_bytes=Config.STREAM_REPLAY_MAX_BYTES,
+                    ttl=Config.STREAM_REPLAY_TTL,
+                    disconnect_grace=Config.STREAM_DISCONNECT_GRACE
+                )
+    return _registry
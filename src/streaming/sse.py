@@ -0,0 +1,183 @@
+"""
+SSE Kodlayıcı.
+Sohbet chunk'larını Server-Sent Events çerçevelerine çevirir.
+
+- Metin parçaları JSON zarfı olmadan ``event: delta`` ile gönderilir ve
+  ``ChunkCoalescer`` ile birkaç parça tek çerçevede toplanır.
+- Yapısal olaylar (``function_call``, ``function_result``, ``meta``, ``error``)
+  olay adıyla ve tek seferlik oluşturulmuş JSON kodlayıcıyla gönderilir;
+  ``type`` alanı olay adında taşındığı için veriden çıkarılır.
+- Her yanıt tam olarak bir bitiş olayıyla (``end`` veya ``error``) kapanır;
+  sonrasında gelen olaylar yok sayılır.
+- ``id_prefix`` verilirse her çerçeve ``id: <önek><sıra>`` taşır; istemci
+  bağlantı koparsa ``Last-Event-ID`` ile kaldığı yerden devam edebilir.
+"""
+
+import json
+import time
+import traceback
+from typing import Any, AsyncGenerator, AsyncIterable, Callable, Dict, Generator, Iterable, List, Optional, Tuple
+
+from .coalescer import ChunkCoalescer
+
+DELTA_EVENT = "delta"
+TERMINAL_EVENTS = frozenset({"end", "error"})
+
+# Tüm çerçevelerde paylaşılan kodlayıcı (kompakt ayraçlar, UTF-8 korunur)
+_encode_json = json.JSONEncoder(
+    ensure_ascii=False, separators=(",", ":"), check_circular=False, default=str
+).encode
+
+
+def format_event(name: str, data: str, event_id: Optional[str] = None) -> str:
+    """
+    Tek bir SSE çerçevesi üretir. Çok satırlı veri birden fazla ``data:``
+    satırına bölünür (istemci satırları ``\\n`` ile birleştirir).
+
+    Args:
+        name: Olay adı
+        data: Olay verisi
+        event_id: Olay kimliği (opsiyonel)
+
+    Returns:
+        str: ``event: ...\\ndata: ...\\n\\n`` çerçevesi
+    """
+    head = f"id: {event_id}\nevent: {name}\n" if event_id is not None else f"event: {name}\n"
+    if "\n" not in data and "\r" not in data:
+        return f"{head}data: {data}\n\n"
+    lines = data.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return head + "".join(f"data: {line}\n" for line in lines) + "\n"
+
+
+class SSEEncoder:
+    """
+    Chunk sözlüklerini SSE metnine çeviren, durum tutan kodlayıcı.
+    Her yanıt için yeni bir örnek oluşturulur.
+    """
+
+    def __init__(self, flush_bytes: int = 512, flush_interval: float = 0.1,
+                 clock: Callable[[], float] = time.monotonic, id_prefix: Optional[str] = None):
+        """
+        Args:
+            flush_bytes: Metin çerçevesinin gönderileceği en küçük boyut (UTF-8 bayt)
+            flush_interval: Metnin çerçevede bekleyebileceği en uzun süre (saniye)
+            clock: Zaman kaynağı (testler için değiştirilebilir)
+            id_prefix: Olay kimliği öneki; verilirse çerçeveler ``id:`` taşır
+        """
+        self._coalescer = ChunkCoalescer(flush_bytes, flush_interval, clock)
+        self.id_prefix = id_prefix
+        self.terminated = False
+        self.frames = 0
+
+    def _frame(self, name: str, data: str) -> Tuple[int, str]:
+        self.frames += 1
+        event_id = f"{self.id_prefix}{self.frames}" if self.id_prefix is not None else None
+        return self.frames, format_event(name, data, event_id)
+
+    def encode_frames(self, event: Dict[str, Any]) -> List[Tuple[int, str]]:
+        """
+        Chunk'ı kodlar ve (sıra numarası, çerçeve) listesi döndürür;
+        metin tamponda bekliyorsa liste boştur.
+
+        Args:
+            event: ``chat_stream`` chunk'ı
+
+        Returns:
+            List[Tuple[int, str]]: Gönderilecek çerçeveler
+        """
+        if self.terminated:
+            return []
+
+        event_type = event.get("type") or "message"
+        if event_type == "content":
+            text = self._coalescer.push(event.get("content") or "")
+            return [self._frame(DELTA_EVENT, text)] if text else []
+
+        frames = []
+        pending = self._coalescer.flush()
+        if pending:
+            frames.append(self._frame(DELTA_EVENT, pending))
+        payload = _encode_json({k: v for k, v in event.items() if k != "type"})
+        frames.append(self._frame(event_type, payload))
+        if event_type in TERMINAL_EVENTS:
+            self.terminated = True
+        return frames
+
+    def time_left(self) -> Optional[float]:
+        """Bekleyen metnin gönderilmesine kalan süre (bekleyen metin yoksa None)."""
+        return None if self.terminated else self._coalescer.time_left()
+
+    def poll_frames(self) -> List[Tuple[int, str]]:
+        """
+        Zaman penceresi dolmuş metni yeni chunk beklemeden çerçeveler.
+        Üretici boşta beklerken tamponu tutan taraf (``pump``) çağırır.
+        """
+        if self.terminated:
+            return []
+        text = self._coalescer.poll()
+        return [self._frame(DELTA_EVENT, text)] if text else []
+
+    def finish_frames(self, error: Optional[Dict[str, Any]] = None) -> List[Tuple[int, str]]:
+        """
+        Yanıtı kapatır: tamponu boşaltır ve henüz gönderilmediyse bitiş olayını
+        (``error`` verildiyse onu, yoksa ``end``) ekler.
+
+        Args:
+            error: Hata chunk'ı (opsiyonel)
+
+        Returns:
+            List[Tuple[int, str]]: Kalan çerçeveler (yanıt zaten kapandıysa boş)
+        """
+        return self.encode_frames(error or {"type": "end"})
+
+    def encode(self, event: Dict[str, Any]) -> str:
+        """``encode_frames`` çıktısını tek metin olarak döndürür."""
+        return "".join(frame for _, frame in self.encode_frames(event))
+
+    def finish(self, error: Optional[Dict[str, Any]] = None) -> str:
+        """``finish_frames`` çıktısını tek metin olarak döndürür."""
+        return "".join(frame for _, frame in self.finish_frames(error))
+
+
+def error_chunk(e: Exception) -> Dict[str, Any]:
+    """İstisnadan hata chunk'ı üretir."""
+    return {"type": "error", "error": str(e), "trace": traceback.format_exc()}
+
+
+def encode_events(events: Iterable[Dict[str, Any]], encoder: SSEEncoder) -> Generator[str, None, None]:
+    """
+    Chunk akışını SSE metin akışına çevirir; akış hata verse de tek bir
+    bitiş olayı garanti edilir.
+
+    Args:
+        events: Chunk akışı
+        encoder: Yanıtın kodlayıcısı
+
+    Yields:
+        str: SSE çerçeveleri
+    """
+    try:
+        for event in events:
+            frame = encoder.encode(event)
+            if frame:
+                yield frame
+        tail = encoder.finish()
+    except Exception as e:
+        tail = encoder.finish(error_chunk(e))
+    if tail:
+        yield tail
+
+
+async def encode_events_async(events: AsyncIterable[Dict[str, Any]],
+                              encoder: SSEEncoder) -> AsyncGenerator[str, None]:
+    """``encode_events``'in asyncio karşılığı."""
+    try:
+        async for event in events:
+            frame = encoder.encode(event)
+            if frame:
+                yield frame
+        tail = encoder.finish()
+    except Exception as e:
+        tail = encoder.finish(error_chunk(e))
+    if tail:
+        yield tail
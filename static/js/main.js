@@ -16,12 +16,18 @@ const appContainer = document.querySelector('.app-container');
 // ===== State =====
 let isStreaming = false;
 let currentBotMessage = null;
+let activeTurn = null;
 let chats = [];
 let activeChat = null;
 
 // ===== Storage Key =====
 const STORAGE_KEY = 'wikipedia_chats';
 
+// ===== Stream Resume =====
+// Bağlantı koparsa aynı yanıta Last-Event-ID ile yeniden bağlanma denemeleri
+const STREAM_RESUME_ATTEMPTS = 3;
+const STREAM_RESUME_DELAY_MS = 500;
+
 // ===== Initialization =====
 document.addEventListener('DOMContentLoaded', () => {
     createParticles();
@@ -34,7 +40,22 @@ document.addEventListener('DOMContentLoaded', () => {
  * Event listener'ları başlatır
  */
 function initEventListeners() {
-    sendBtn.addEventListener("click", sendMessage);
+    // Yanıt sürerken aynı düğme yanıtı durdurur
+    sendBtn.addEventListener("click", () => {
+        if (isStreaming) {
+            cancelActiveTurn();
+        } else {
+            sendMessage();
+        }
+    });
+    
+    // Sekme kapanırken süren yanıtı durdur (sunucu kota harcamasın)
+    window.addEventListener("pagehide", () => {
+        if (activeTurn) {
+            const body = JSON.stringify({ chat_id: activeTurn.chatId, turn_id: activeTurn.turnId });
+            navigator.sendBeacon('/cancel', new Blob([body], { type: 'application/json' }));
+        }
+    });
     
     userInput.addEventListener("keydown", (e) => {
         if (e.key === "Enter" && !e.shiftKey && !isStreaming) {
@@ -318,8 +339,8 @@ async function sendMessage() {
     appendMessage(message, "user");
     userInput.value = "";
     isStreaming = true;
-    sendBtn.disabled = true;
-    sendBtn.innerHTML = '<i class="fas fa-spinner fa-spin" aria-hidden="true"></i>';
+    sendBtn.innerHTML = '<i class="fas fa-stop" aria-hidden="true"></i>';
+    sendBtn.setAttribute('aria-label', 'Yanıtı durdur');
     
     // Typing indicator
     currentBotMessage = createTypingIndicator();
@@ -351,59 +372,121 @@ async function sendMessage() {
     
     // Cleanup
     isStreaming = false;
+    activeTurn = null;
     sendBtn.disabled = false;
     sendBtn.innerHTML = '<i class="fas fa-paper-plane" aria-hidden="true"></i>';
+    sendBtn.setAttribute('aria-label', 'Mesaj gönder');
     currentBotMessage = null;
 }
 
+/**
+ * Süren yanıtı durdurur. Sunucu o ana kadarki yanıtı kaydeder ve akışı
+ * cancelled işaretli end olayıyla kapatır.
+ */
+async function cancelActiveTurn() {
+    if (!activeTurn) return;
+    sendBtn.disabled = true;
+    try {
+        await fetch('/cancel', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ chat_id: activeTurn.chatId, turn_id: activeTurn.turnId })
+        });
+    } catch (err) {
+        console.error('Durdurma hatası:', err);
+        sendBtn.disabled = false;
+    }
+}
+
 /**
  * Stream response'u işler
  * @param {Response} response - Fetch response
  * @param {Object} chat - Aktif sohbet
  */
 async function handleStreamResponse(response, chat) {
-    const reader = response.body.getReader();
-    const decoder = new TextDecoder();
-    let buffer = '';
+    const turnId = response.headers.get('X-Turn-Id');
     let botContent = '';
+    let finished = false;
+    let cancelled = false;
+    activeTurn = turnId ? { chatId: chat.id, turnId } : null;
     
     currentBotMessage.className = "message bot";
     currentBotMessage.innerHTML = "";
+    const typewriter = createTypewriter(currentBotMessage);
     
-    while (true) {
-        const { value, done } = await reader.read();
-        if (done) break;
+    const parser = createSSEParser((event, data) => {
+        if (finished) return;
         
-        buffer += decoder.decode(value, { stream: true });
-        const lines = buffer.split('\n');
-        buffer = lines.pop() || '';
+        if (event === 'delta') {
+            // Metin parçaları JSON zarfı olmadan gelir
+            botContent += data;
+            typewriter.push(data);
+        } else if (event === 'error') {
+            finished = true;
+            const payload = parseEventData(data);
+            typewriter.cancel();
+            currentBotMessage.innerHTML = `
+                <i class="fas fa-exclamation-triangle" aria-hidden="true"></i> 
+                Hata: ${escapeHtml(payload.error || 'Bilinmeyen hata')}
+            `;
+            console.error('Stream Error:', payload);
+        } else if (event === 'end') {
+            finished = true;
+            cancelled = Boolean(parseEventData(data).cancelled);
+        }
+    });
+    
+    // Bitiş olayı gelmeden bağlantı koparsa sunucudaki tampondan devam et
+    let current = response;
+    let lastError = null;
+    let attempts = 0;
+    while (true) {
+        if (current) {
+            try {
+                await readStream(current, parser);
+            } catch (error) {
+                lastError = error;
+                console.warn('Akış koptu, yeniden bağlanılacak:', error);
+            }
+        }
+        if (finished || !turnId || attempts >= STREAM_RESUME_ATTEMPTS) break;
         
-        for (const line of lines) {
-            if (line.startsWith('data: ')) {
-                try {
-                    const data = JSON.parse(line.slice(6));
-                    
-                    if (data.type === 'content') {
-                        botContent += data.content;
-                        currentBotMessage.innerHTML = marked.parse(botContent);
-                        chatBox.scrollTop = chatBox.scrollHeight;
-                    } else if (data.type === 'error') {
-                        currentBotMessage.innerHTML = `
-                            <i class="fas fa-exclamation-triangle" aria-hidden="true"></i> 
-                            Hata: ${escapeHtml(data.error)}
-                        `;
-                        console.error('Stream Error:', data);
-                        break;
-                    } else if (data.type === 'end') {
-                        break;
-                    }
-                } catch (e) {
-                    console.error('JSON parse error:', e, line);
+        attempts++;
+        await new Promise(resolve => setTimeout(resolve, STREAM_RESUME_DELAY_MS * attempts));
+        try {
+            current = await fetch(`/chat/stream?chat_id=${encodeURIComponent(chat.id)}`, {
+                headers: {
+                    'Accept': 'text/event-stream',
+                    'Last-Event-ID': parser.lastEventId || `${turnId}:0`
                 }
+            });
+            if (current.status === 400 || current.status === 404) {
+                // Tampon süresi dolmuş; yeniden denemenin anlamı yok
+                lastError = new Error(`HTTP ${current.status}`);
+                break;
             }
+            if (!current.ok) current = null;
+        } catch (error) {
+            lastError = error;
+            current = null;
         }
     }
     
+    if (!finished && lastError) {
+        typewriter.cancel();
+        throw lastError;
+    }
+    
+    // Yazma efekti bitene kadar bekle
+    await typewriter.finish();
+    
+    if (cancelled) {
+        const note = document.createElement('div');
+        note.className = 'message-note';
+        note.textContent = 'Yanıt durduruldu';
+        currentBotMessage.appendChild(note);
+    }
+    
     // Mesajı kaydet
     if (botContent) {
         chat.messages.push({ 
@@ -416,6 +499,140 @@ async function handleStreamResponse(response, chat) {
     }
 }
 
+/**
+ * Yanıt gövdesini sonuna kadar okuyup ayrıştırıcıya verir
+ * @param {Response} response - Fetch response
+ * @param {Object} parser - SSE ayrıştırıcı
+ */
+async function readStream(response, parser) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        parser.push(decoder.decode(value, { stream: true }));
+    }
+    parser.push(decoder.decode());
+}
+
+/**
+ * SSE akışını olaylara ayıran artımlı ayrıştırıcı.
+ * Her olay için onEvent(eventName, data) çağrılır; çok satırlı
+ * data: alanları satır sonuyla birleştirilir. Son olay kimliği
+ * lastEventId alanında tutulur (yeniden bağlanırken gönderilir).
+ * @param {Function} onEvent - Olay işleyici
+ * @returns {Object} push metodu ve lastEventId
+ */
+function createSSEParser(onEvent) {
+    let buffer = '';
+    let eventName = 'message';
+    let eventId = null;
+    let dataLines = [];
+    
+    const parser = {
+        lastEventId: null,
+        push(text) {
+            buffer += text;
+            const lines = buffer.split('\n');
+            buffer = lines.pop() || '';
+            
+            for (const rawLine of lines) {
+                const line = rawLine.endsWith('\r') ? rawLine.slice(0, -1) : rawLine;
+                if (line === '') {
+                    dispatch();
+                } else if (line.startsWith('id:')) {
+                    eventId = line.slice(3).trim();
+                } else if (line.startsWith('event:')) {
+                    eventName = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    const value = line.slice(5);
+                    dataLines.push(value.startsWith(' ') ? value.slice(1) : value);
+                }
+            }
+        }
+    };
+    
+    function dispatch() {
+        if (dataLines.length) {
+            // Kimlik olay işlendikten sonra güncellenir; kopmada olay tekrar istenir
+            onEvent(eventName, dataLines.join('\n'));
+            if (eventId !== null) parser.lastEventId = eventId;
+        }
+        eventName = 'message';
+        eventId = null;
+        dataLines = [];
+    }
+    
+    return parser;
+}
+
+/**
+ * Yapısal olayların JSON verisini çözer.
+ * @param {string} data - Olay verisi
+ * @returns {Object} Çözülen nesne (hatalıysa ham veri error alanında)
+ */
+function parseEventData(data) {
+    try {
+        return JSON.parse(data);
+    } catch (e) {
+        console.error('JSON parse error:', e, data);
+        return { error: data };
+    }
+}
+
+/**
+ * Gelen metni animasyon karesi başına bir kez render eden yazma efekti.
+ * Sunucu parçaları beklemeden gönderir; görsel akış tamamen istemcidedir.
+ * @param {HTMLElement} element - Bot mesaj elementi
+ * @returns {Object} push/finish/cancel metodları
+ */
+function createTypewriter(element) {
+    let target = '';
+    let shown = 0;
+    let frame = null;
+    let resolveFinish = null;
+    
+    function tick() {
+        const backlog = target.length - shown;
+        if (backlog > 0) {
+            // Birikme arttıkça daha hızlı yaz
+            shown = Math.min(target.length, shown + Math.max(2, Math.ceil(backlog / 15)));
+            element.innerHTML = marked.parse(target.slice(0, shown));
+            chatBox.scrollTop = chatBox.scrollHeight;
+        }
+        
+        if (shown < target.length) {
+            frame = requestAnimationFrame(tick);
+        } else {
+            frame = null;
+            if (resolveFinish) {
+                resolveFinish();
+                resolveFinish = null;
+            }
+        }
+    }
+    
+    return {
+        push(text) {
+            target += text;
+            if (!frame) frame = requestAnimationFrame(tick);
+        },
+        finish() {
+            if (!frame) return Promise.resolve();
+            return new Promise(resolve => { resolveFinish = resolve; });
+        },
+        cancel() {
+            if (frame) cancelAnimationFrame(frame);
+            frame = null;
+            shown = target.length;
+            if (resolveFinish) {
+                resolveFinish();
+                resolveFinish = null;
+            }
+        }
+    };
+}
+
 /**
  * Hata durumunu işler
  * @param {Error} error - Hata objesi
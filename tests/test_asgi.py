@@ -0,0 +1,204 @@
+"""
+ASGI Tests.
+ASGI yönlendiricisi, ``/chat`` SSE çerçeveleri ve ``/cancel`` için testler.
+Uygulama doğrudan scope/receive/send ile çağrılır; sunucu gerekmez.
+"""
+
+import pytest
+import sys
+import os
+import warnings
+from unittest.mock import patch
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import asyncio
+import json
+import threading
+
+from src import asgi
+from src.sessions.store import SessionStore
+from src.streaming import StreamRegistry
+
+
+class FakeChatbot:
+    """Metin parçaları üreten ve isteğe bağlı olarak takılan sahte sohbet."""
+
+    hang = False
+
+    def __init__(self):
+        self.messages = []
+
+    async def chat_stream_async(self, message):
+        self.messages.append(message)
+        yield {"type": "content", "content": "Merhaba "}
+        if self.hang:
+            await asyncio.sleep(10)
+        yield {"type": "content", "content": "dünya"}
+        yield {"type": "end"}
+
+
+@pytest.fixture(autouse=True)
+def app_state():
+    store = SessionStore(factory=FakeChatbot, max_sessions=10, idle_ttl=60, max_bytes=10 ** 6)
+    registry = StreamRegistry(max_bytes=1 << 20, ttl=60)
+    with patch.object(asgi, "session_store", store), \
+         patch.object(asgi, "stream_registry", registry), \
+         patch.object(asgi, "response_cache", None):
+        yield store
+
+
+class Response:
+    """Gönderilen ASGI mesajlarından oluşturulan yanıt."""
+
+    def __init__(self):
+        self.status = None
+        self.headers = {}
+        self.chunks = []
+        self.started = asyncio.Event()
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            self.headers = {k.decode(): v.decode() for k, v in message["headers"]}
+        else:
+            self.chunks.append(message.get("body", b""))
+            if message.get("body"):
+                self.started.set()
+
+    @property
+    def text(self):
+        return b"".join(self.chunks).decode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def events(self):
+        """SSE çerçevelerini (id, event, data) olarak ayrıştırır."""
+        parsed = []
+        for frame in self.text.split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in frame.splitlines() if ": " in line)
+            if fields:
+                parsed.append(fields)
+        return parsed
+
+
+async def call(method, path, body=None, response=None):
+    payload = body if isinstance(body, bytes) else json.dumps(body).encode() if body is not None else b""
+    scope = {"type": "http", "method": method, "path": path, "headers": [], "query_string": b""}
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    response = response or Response()
+    await asgi.app(scope, receive, response.send)
+    return response
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestChatValidation:
+    """Geçersiz istek gövdeleri."""
+
+    @pytest.mark.parametrize("body", [b"", b"not json", b"[]", b'"merhaba"', b"42"])
+    def test_non_object_body(self, body):
+        """Nesne olmayan JSON 500 değil 400 döndürmeli."""
+        response = run(call("POST", "/chat", body))
+        assert response.status == 400
+        assert response.json() == {"error": "JSON verisi bulunamadı"}
+
+    def test_empty_message(self):
+        """Boş mesaj 400 döndürmeli."""
+        response = run(call("POST", "/chat", {"message": "  "}))
+        assert response.status == 400
+
+    @pytest.mark.parametrize("body", [
+        {"message": 42},
+        {"message": ["soru"]},
+        {"message": "soru", "chat_id": ["a"]},
+        {"message": "soru", "chat_id": 7},
+        {"message": "soru", "chat_id": ""},
+    ])
+    def test_non_string_fields(self, body, app_state):
+        """Metin olmayan message veya chat_id 400 döndürmeli, oturum açılmamalı."""
+        response = run(call("POST", "/chat", body))
+        assert response.status == 400
+        assert app_state.stats()["active_sessions"] == 0
+
+
+class TestChatStream:
+    """SSE akışı."""
+
+    def test_sse_framing(self, app_state):
+        """Yanıt adlandırılmış SSE olaylarıyla ve tek bir end olayıyla bitmeli."""
+        response = run(call("POST", "/chat", {"message": "selam", "chat_id": "a"}))
+
+        assert response.status == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        turn_id = response.headers["x-turn-id"]
+        events = response.events()
+        assert [e["event"] for e in events].count("end") == 1
+        assert events[-1]["event"] == "end"
+        assert all(e["id"].startswith(f"{turn_id}:") for e in events)
+        text = "".join(e["data"] for e in events if e["event"] == "delta")
+        assert text == "Merhaba dünya"
+        assert app_state.get("a").chatbot.messages == ["selam"]
+
+    def test_cancel(self):
+        """/cancel süren turu hemen bitirmeli."""
+        async def scenario():
+            response = Response()
+            with patch.object(FakeChatbot, "hang", True):
+                chat = asyncio.create_task(call("POST", "/chat", {"message": "selam", "chat_id": "c"}, response))
+                await asyncio.wait_for(response.started.wait(), 2)
+                cancelled = await call("POST", "/cancel", {"chat_id": "c"})
+                await asyncio.wait_for(chat, 2)
+            return response, cancelled
+
+        response, cancelled = run(scenario())
+        assert cancelled.status == 200
+        assert cancelled.json()["cancelled"] == [response.headers["x-turn-id"]]
+        events = response.events()
+        assert events[-1]["event"] == "end"
+        assert json.loads(events[-1]["data"]).get("cancelled") is True
+
+    def test_cancel_requires_chat_id(self):
+        """chat_id olmadan /cancel 400 döndürmeli."""
+        assert run(call("POST", "/cancel", [])).status == 400
+        assert run(call("POST", "/cancel", {})).status == 400
+
+
+class TestRouting:
+    """Yönlendirme ve yardımcılar."""
+
+    def test_metrics(self):
+        """/metrics Prometheus metni döndürmeli."""
+        response = run(call("GET", "/metrics"))
+        assert response.status == 200
+        assert "chat_stream_duration_seconds" in response.text
+
+    def test_unknown_path_without_fallback(self):
+        """asgiref yoksa diğer yollar 404 dönmeli."""
+        with patch.object(asgi, "_fallback_app", None):
+            assert run(call("GET", "/stats")).status == 404
+
+    def test_acquire(self):
+        """Kilit tutulurken zaman aşımına uğramalı, bırakılınca alınabilmeli."""
+        lock = threading.Lock()
+        lock.acquire()
+        assert run(asgi._acquire(lock, 0.1)) is False
+        lock.release()
+        assert run(asgi._acquire(lock, 0.1)) is True
+        lock.release()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
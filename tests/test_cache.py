@@ -0,0 +1,118 @@
+"""
+Page Cache Tests.
+Sayfa önbelleğinin birim testleri.
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.cache import PageCache
+
+
+class TestPageCache:
+    """PageCache sınıfı için testler."""
+    
+    def test_set_and_get(self):
+        """Yazılan değer okunabilmeli."""
+        cache = PageCache(max_bytes=10_000, ttl=60)
+        cache.set("tr:Ankara", {"title": "Ankara"})
+        assert cache.get("tr:Ankara") == {"title": "Ankara"}
+        assert cache.stats()["hits"] == 1
+    
+    def test_miss(self):
+        """Olmayan anahtar None döndürmeli."""
+        cache = PageCache(max_bytes=10_000, ttl=60)
+        assert cache.get("yok") is None
+        assert cache.stats()["misses"] == 1
+    
+    def test_ttl_expiration(self):
+        """Süresi dolan kayıt döndürülmemeli."""
+        cache = PageCache(max_bytes=10_000, ttl=0.01)
+        cache.set("a", {"x": 1})
+        time.sleep(0.02)
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+    
+    def test_lru_eviction_by_bytes(self):
+        """Bayt bütçesi aşılınca en az kullanılan kayıt silinmeli."""
+        cache = PageCache(max_bytes=60, ttl=60)
+        cache.set("a", "x" * 20)
+        cache.set("b", "y" * 20)
+        cache.get("a")  # a en son kullanılan olsun
+        cache.set("c", "z" * 20)
+        
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] <= 60
+    
+    def test_oversized_value_not_stored(self):
+        """Bütçeden büyük değer bellek katmanına yazılmamalı."""
+        cache = PageCache(max_bytes=10, ttl=60)
+        cache.set("big", "x" * 100)
+        assert len(cache) == 0
+    
+    def test_get_or_load_single_flight(self):
+        """Eşzamanlı isteklerde yükleyici tek kez çağrılmalı."""
+        cache = PageCache(max_bytes=10_000, ttl=60)
+        calls = []
+        barrier = threading.Barrier(20)
+        
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"title": "İstanbul"}
+        
+        results = []
+        
+        def worker():
+            barrier.wait()
+            results.append(cache.get_or_load("tr:İstanbul", loader))
+        
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert len(calls) == 1
+        assert all(r == {"title": "İstanbul"} for r in results)
+    
+    def test_get_or_load_propagates_error(self):
+        """Yükleyici hatası çağırana iletilmeli ve önbelleğe yazılmamalı."""
+        cache = PageCache(max_bytes=10_000, ttl=60)
+        
+        def loader():
+            raise RuntimeError("ağ hatası")
+        
+        with pytest.raises(RuntimeError):
+            cache.get_or_load("a", loader)
+        assert cache.get("a") is None
+    
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Disk katmanındaki kayıt yeni örnekte okunabilmeli."""
+        db_path = str(tmp_path / "pages.db")
+        first = PageCache(max_bytes=10_000, ttl=60, db_path=db_path)
+        first.set("tr:Atatürk", {"title": "Atatürk"})
+        
+        second = PageCache(max_bytes=10_000, ttl=60, db_path=db_path)
+        assert second.get("tr:Atatürk") == {"title": "Atatürk"}
+        assert second.stats()["disk_hits"] == 1
+    
+    def test_clear(self):
+        """clear tüm kayıtları silmeli."""
+        cache = PageCache(max_bytes=10_000, ttl=60)
+        cache.set("a", 1)
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.stats()["bytes"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
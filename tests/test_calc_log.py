@@ -0,0 +1,135 @@
+"""
+Calculation Log Tests.
+Hesaplama geçmişi halka tamponunun birim testleri.
+"""
+
+import pytest
+import sys
+import os
+import threading
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.calc_log import CalculationLog, CalculationRecord
+from src.services.calculator import calculate, calculate_batch, recall_calculations
+
+
+class TestCalculationLog:
+    """CalculationLog sınıfı için testler."""
+    
+    def test_capacity_drops_oldest(self):
+        """Kapasite dolunca en eski kayıt düşmeli."""
+        log = CalculationLog(3)
+        for i in range(5):
+            log.append({"expression": f"{i}+0", "result": i})
+        
+        assert len(log) == 3
+        assert log.total == 5
+        assert [c["result"] for c in log] == [2, 3, 4]
+        assert log[0]["expression"] == "2+0"
+        assert log[-1]["result"] == 4
+    
+    def test_memory_is_bounded(self):
+        """Bellek tahmini kapasiteyle sınırlı kalmalı."""
+        log = CalculationLog(10)
+        for i in range(10):
+            log.append({"expression": "1+1", "result": 2})
+        full = log.memory_estimate()
+        for i in range(100):
+            log.append({"expression": "1+1", "result": 2})
+        assert log.memory_estimate() == full
+        assert log.stats()["memory_estimate_bytes"] == full
+    
+    def test_since_counts_dropped_records(self):
+        """since, düşen kayıtlara rağmen yeni eklenenleri döndürmeli."""
+        log = CalculationLog(2)
+        log.append({"expression": "1", "result": 1})
+        before = log.total
+        log.extend([{"expression": "2", "result": 2}, {"expression": "3", "result": 3}])
+        assert [c["result"] for c in log.since(before)] == [2, 3]
+    
+    def test_recent_with_query(self):
+        """recent yeniden eskiye sıralı ve filtreli dönmeli."""
+        log = CalculationLog(10)
+        for expression in ("5*1.8", "2+2", "10 * 1.8"):
+            log.append({"expression": expression, "result": 0})
+        assert [c["expression"] for c in log.recent(5)] == ["10 * 1.8", "2+2", "5*1.8"]
+        assert [c["expression"] for c in log.recent(5, "*1.8")] == ["10 * 1.8", "5*1.8"]
+    
+    def test_concurrent_appends(self):
+        """Eşzamanlı ekleme ve okumalar sayaçları bozmamalı, hata vermemeli."""
+        log = CalculationLog(50)
+        errors = []
+        interval = sys.getswitchinterval()
+        
+        def write():
+            for i in range(2000):
+                log.append({"expression": "1+1", "result": 2})
+        
+        def read():
+            try:
+                for _ in range(500):
+                    log.recent(10)
+                    log.since(log.total - 5)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=write) for _ in range(4)] + [threading.Thread(target=read)]
+        sys.setswitchinterval(1e-6)
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            sys.setswitchinterval(interval)
+        
+        assert errors == []
+        assert log.total == 8000
+        assert len(log) == 50
+        single = CalculationLog(50)
+        single.extend({"expression": "1+1", "result": 2} for _ in range(50))
+        assert log.memory_estimate() == single.memory_estimate()
+    
+    def test_record_roundtrip(self):
+        """Kayıt sözlüğe dönüştürülüp geri okunabilmeli."""
+        record = CalculationRecord.from_dict({"expression": "x+1", "result": None, "count": 3})
+        data = record.to_dict()
+        assert data["count"] == 3
+        assert CalculationRecord.from_dict(data).to_dict() == data
+
+
+class TestCalculatorIntegration:
+    """Hesaplama fonksiyonlarının geçmişle çalışması."""
+    
+    def test_calculate_appends_to_log(self):
+        """calculate sonucu halka tampona eklenmeli."""
+        user_data = {"calculations": CalculationLog(5)}
+        calculate("5+3", user_data)
+        calculate_batch("x*2", {"x": [1, 2]}, user_data=user_data)
+        assert len(user_data["calculations"]) == 2
+        assert user_data["calculations"][0]["result"] == 8
+        assert user_data["calculations"][1]["results"] == [2.0, 4.0]
+    
+    def test_recall_calculations(self):
+        """Önceki hesaplamalar sorgulanabilmeli."""
+        user_data = {"calculations": CalculationLog(5)}
+        calculate("5+3", user_data)
+        calculate("7*6", user_data)
+        
+        result = recall_calculations(limit=1, user_data=user_data)
+        assert result["calculations"][0]["result"] == 42
+        
+        result = recall_calculations(query="5+", user_data=user_data)
+        assert result["count"] == 1
+    
+    def test_recall_with_plain_list(self):
+        """Düz liste kullanan eski kullanıcı verisi de desteklenmeli."""
+        user_data = {"calculations": []}
+        calculate("5+3", user_data)
+        assert recall_calculations(user_data=user_data)["calculations"][0]["result"] == 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
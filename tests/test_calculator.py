@@ -6,11 +6,14 @@ Hesaplama servisinin birim testleri.
 import pytest
 import sys
 import os
+import threading
 
 # src klasörünü path'e ekle
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.services.calculator import calculate, get_function_def
+from src.services.calculator import (
+    calculate, calculate_batch, get_function_def, get_batch_function_def, _compile, _compile_vector, _scan
+)
 
 
 class TestCalculate:
@@ -104,6 +107,107 @@ class TestCalculate:
         """Formatlanmış sonuç."""
         result = calculate("1000+234")
         assert "formatted" in result
+    
+    def test_compiled_expression_cache(self):
+        """Boşluk farkı olan aynı ifade derlenmiş programı paylaşmalı."""
+        _compile.cache_clear()
+        assert calculate("2 * (3 + 4)")["result"] == 14
+        assert calculate("2*(3+4)")["result"] == 14
+        info = _compile.cache_info()
+        assert info.misses == 1
+        assert info.hits == 1
+    
+    def test_normalization_keeps_token_boundaries(self):
+        """Boşluk silinirken anlamı değişecek yerlerde ayraç korunmalı."""
+        assert _scan("1 2")[1] == "1 2"
+        assert _scan("2 * * 3")[1] == "2* *3"
+        assert _scan("2 ** 3")[1] == "2**3"
+        assert "error" in calculate("2 * * 3")
+    
+    def test_exponent_after_whitespace(self):
+        """Boşlukla ayrılmış büyük üs değerleri de engellenmeli."""
+        result = calculate("2 **  10001")
+        assert result["error"] == "Üs değeri çok büyük (maksimum 10000)."
+
+
+class TestCalculateBatch:
+    """calculate_batch fonksiyonu için testler."""
+    
+    def test_vectorized_expression(self):
+        """Değişkenli ifade tüm değerler için hesaplanmalı."""
+        result = calculate_batch("x * 1.8 + 32", [{"name": "x", "values": [0, 10, 100]}])
+        assert result["results"] == [32.0, 50.0, 212.0]
+        assert result["count"] == 3
+    
+    def test_scalar_broadcast(self):
+        """Tek değerli değişkenler tüm satırlara uygulanmalı."""
+        result = calculate_batch("p * (1 + r) ** n", {"p": [1000], "r": [0.1], "n": [0, 1, 2]})
+        assert result["results"] == pytest.approx([1000.0, 1100.0, 1210.0])
+    
+    def test_large_result_is_summarized(self):
+        """Çok sayıda sonuçta özet istatistik dönmeli."""
+        result = calculate_batch("x * 2", {"x": list(range(1000))})
+        assert result["truncated"] is True
+        assert "results" not in result
+        assert result["summary"]["count"] == 1000
+        assert result["summary"]["max"] == 1998.0
+        assert len(result["sample"]) == 10
+    
+    def test_multiple_expressions(self):
+        """Birden fazla sabit ifade tek çağrıda hesaplanmalı."""
+        result = calculate_batch(expressions=["2**10", "15/4", "abc"])
+        assert result["count"] == 3
+        assert result["errors"] == 1
+        assert result["results"][0]["result"] == 1024
+    
+    def test_unknown_variable(self):
+        """Tanımlanmamış adlar reddedilmeli."""
+        result = calculate_batch("x + y", {"x": [1, 2]})
+        assert result["error"] == "Bilinmeyen değişken: y"
+    
+    def test_mismatched_lengths(self):
+        """Farklı uzunluktaki listeler reddedilmeli."""
+        result = calculate_batch("x + y", {"x": [1, 2], "y": [1, 2, 3]})
+        assert "error" in result
+    
+    def test_same_safety_limits(self):
+        """Tekil hesaplamadaki güvenlik sınırları geçerli olmalı."""
+        result = calculate_batch("x ** 99999", {"x": [2]})
+        assert "üs" in result["error"].lower()
+    
+    def test_concurrent_batches(self):
+        """Aynı ifade farklı iş parçacıklarında kilitsiz ve doğru hesaplanmalı."""
+        size = 50_000
+        results = {}
+        
+        def work(k):
+            results[k] = calculate_batch("x * 2 + 1", {"x": [k] * size})
+        
+        threads = [threading.Thread(target=work, args=(k,)) for k in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for k in range(8):
+            assert results[k]["summary"]["sum"] == pytest.approx((2 * k + 1) * size)
+    
+    def test_programs_per_thread(self):
+        """Derlenmiş programlar iş parçacığı başına ayrı tutulmalı."""
+        programs = []
+        
+        def work():
+            programs.append(_compile_vector("x*2", ("x",)))
+            programs.append(_compile_vector("x*2", ("x",)))
+        
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        assert programs[0] is programs[1]
+        assert _compile_vector("x*2", ("x",)) is not programs[0]
+    
+    def test_batch_function_def(self):
+        """Toplu hesaplama tanımı doğru adla dönmeli."""
+        assert get_batch_function_def()["name"] == "calculate_batch"
 
 
 class TestGetFunctionDef:
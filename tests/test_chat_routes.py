@@ -0,0 +1,121 @@
+"""
+Chat Routes Tests.
+Flask ``/chat`` uç noktası ve turların çalıştığı sınırlı havuz için testler.
+Gemini'ye istek gönderilmez; sohbet sahte bir nesneyle değiştirilir.
+"""
+
+import pytest
+import sys
+import os
+import warnings
+from unittest.mock import patch
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import threading
+
+from flask import Flask
+
+from src.routes import chat_routes
+from src.routes.chat_routes import TurnPool
+from src.sessions.store import SessionStore
+from src.streaming import StreamRegistry
+
+
+class FakeChatbot:
+    """İzin verilene kadar bekleyen sahte sohbet."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def chat_stream(self, message, cancel=None):
+        yield {"type": "content", "content": "Merhaba"}
+        self.release.wait(5)
+        yield {"type": "end"}
+
+
+@pytest.fixture
+def store():
+    return SessionStore(factory=FakeChatbot, max_sessions=10, idle_ttl=60, max_bytes=10 ** 6)
+
+
+@pytest.fixture
+def client(store):
+    app = Flask(__name__)
+    app.register_blueprint(chat_routes.chat_bp)
+    registry = StreamRegistry(max_bytes=1 << 20, ttl=60)
+    with patch.object(chat_routes, "session_store", store), \
+         patch.object(chat_routes, "stream_registry", registry), \
+         patch.object(chat_routes, "response_cache", None), \
+         patch.object(chat_routes, "turn_pool", TurnPool(max_workers=1, queue_size=0)):
+        yield app.test_client()
+
+
+class TestTurnPool:
+    """Sınırlı tur havuzu testleri."""
+
+    def test_limit(self):
+        """Çalışan ve bekleyen turlar sınıra ulaşınca yer ayrılmamalı."""
+        pool = TurnPool(max_workers=1, queue_size=1)
+        assert pool.reserve() and pool.reserve()
+        assert not pool.reserve()
+        pool.release()
+        assert pool.reserve()
+        assert pool.stats() == {"pending": 2, "running": 1, "limit": 2, "rejected": 1}
+
+    def test_slot_released_after_turn(self):
+        """Tur bitince (hata verse de) yer bırakılmalı."""
+        pool = TurnPool(max_workers=1, queue_size=0)
+        done = threading.Event()
+
+        def broken():
+            done.set()
+            raise RuntimeError("koptu")
+
+        assert pool.reserve()
+        pool.submit(broken)
+        assert done.wait(5)
+        pool._executor.shutdown(wait=True)
+        assert pool.stats()["pending"] == 0
+
+
+class TestChatRoute:
+    """``/chat`` uç noktası testleri."""
+
+    @pytest.mark.parametrize("kwargs", [
+        {"data": b"not json", "content_type": "application/json"},
+        {"json": [1]},
+        {"json": "x"},
+        {"json": {}},
+        {"json": {"message": 42}},
+        {"json": {"message": "  "}},
+        {"json": {"message": "soru", "chat_id": ["a"]}},
+        {"json": {"message": "soru", "chat_id": 7}},
+    ])
+    def test_invalid_body(self, client, store, kwargs):
+        """Geçersiz gövde 500 değil 400 döndürmeli, oturum açılmamalı."""
+        response = client.post("/chat", **kwargs)
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+        assert store.stats()["active_sessions"] == 0
+
+    def test_saturated_returns_503(self, client, store):
+        """Havuz doluysa 503 dönmeli ve süren tur iptal edilmemeli."""
+        first = client.post("/chat", json={"message": "soru", "chat_id": "a"})
+        assert first.status_code == 200
+        turn_id = first.headers["X-Turn-Id"]
+
+        busy = client.post("/chat", json={"message": "yeni", "chat_id": "a"})
+        assert busy.status_code == 503
+        assert "error" in busy.get_json()
+        assert not chat_routes.stream_registry.get("a", turn_id).cancel_token.cancelled
+
+        store.get("a").chatbot.release.set()
+        assert first.get_data(as_text=True).rstrip().endswith("data: {}")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
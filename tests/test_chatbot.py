@@ -0,0 +1,307 @@
+"""
+Chatbot Tests.
+Araç çağrılarının eşzamanlı yürütülmesi ve ajan döngüsü için birim testleri.
+Gemini yerine sahte bir model kullanılır; ağ erişimi gerekmez.
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+import threading
+import time
+import warnings
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+from google.generativeai import protos
+
+from src import chatbot as chatbot_module
+from src.chatbot import WebChatbot
+from src.streaming import CancelToken
+
+
+def chunk(*parts):
+    """Tek bir akış parçası (candidates[0].content.parts) üretir."""
+    content = protos.Content(role="model", parts=list(parts))
+    return SimpleNamespace(candidates=[SimpleNamespace(content=content)], usage_metadata=None)
+
+
+def text(value):
+    return protos.Part(text=value)
+
+
+def call(name, **args):
+    return protos.Part(function_call=protos.FunctionCall(name=name, args=args))
+
+
+class FakeChat:
+    """``send_message`` çağrılarını kaydeden ve senaryodaki yanıtları dönen sohbet."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def send_message(self, content, **kwargs):
+        self.model.calls.append((content, kwargs))
+        return iter(self.model.next_response())
+
+    async def send_message_async(self, content, **kwargs):
+        self.model.calls.append((content, kwargs))
+        return AsyncResponse(self.model.next_response())
+
+
+class AsyncResponse:
+    """``send_message_async`` akışı; ``None`` öğesinde takılır."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.chunks:
+            raise StopAsyncIteration
+        item = self.chunks.pop(0)
+        if item is None:
+            await asyncio.sleep(10)
+        return item
+
+
+class FakeModel:
+    """Sırayla senaryodaki yanıtları döndüren sahte Gemini modeli."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = []
+
+    def next_response(self):
+        return self.script.pop(0)
+
+    def start_chat(self, history=None):
+        return FakeChat(self)
+
+
+@pytest.fixture
+def bot():
+    return WebChatbot()
+
+
+class SlowTools:
+    """Çağrı adına göre bekleyen sahte araçlar."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.release = threading.Event()
+        self.started = []
+
+    def __call__(self, fn_name, args, question=""):
+        self.started.append(fn_name)
+        delay = self.delays[fn_name]
+        if delay is None:
+            # Takılan araç: test bitince serbest bırakılır
+            self.release.wait(5)
+        else:
+            time.sleep(delay)
+        return {"tool": fn_name, "args": args}
+
+
+@pytest.fixture
+def tools(bot):
+    holder = {}
+
+    def install(delays):
+        holder["tools"] = SlowTools(delays)
+        bot._dispatch_function = holder["tools"]
+        return holder["tools"]
+
+    yield install
+    if "tools" in holder:
+        holder["tools"].release.set()
+
+
+class TestFunctionCalls:
+    """Aynı turdaki araç çağrılarının paylaşılan havuzda yürütülmesi."""
+
+    def test_runs_concurrently(self, bot, tools):
+        """İki yavaş araç toplam değil en uzun süre kadar sürmeli."""
+        tools({"search_info": 0.3, "calculate": 0.3})
+        started = time.monotonic()
+        results = bot._run_function_calls(
+            [("search_info", {"query": "a"}), ("calculate", {"expression": "1+1"})], "", CancelToken()
+        )
+        elapsed = time.monotonic() - started
+        assert elapsed < 0.5
+        assert [name for name, _ in results] == ["search_info", "calculate"]
+
+    def test_results_in_call_order(self, bot, tools):
+        """Önce biten çağrı olsa da sonuçlar çağrı sırasıyla dönmeli."""
+        tools({"search_info": 0.2, "calculate": 0.0})
+        results = bot._run_function_calls(
+            [("search_info", {"query": "a"}), ("calculate", {"expression": "1+1"})], "", CancelToken()
+        )
+        assert [r["tool"] for _, r in results] == ["search_info", "calculate"]
+        assert results[1][1]["args"] == {"expression": "1+1"}
+
+    def test_shared_timeout(self, bot, tools):
+        """Takılan araç zaman aşımı sonucu üretmeli, diğerinin sonucu korunmalı."""
+        tools({"search_info": None, "calculate": 0.0})
+        with patch.object(chatbot_module.Config, "TOOL_TIMEOUT", 0.2):
+            started = time.monotonic()
+            results = bot._run_function_calls(
+                [("search_info", {"query": "a"}), ("calculate", {"expression": "1"})], "", CancelToken()
+            )
+        assert time.monotonic() - started < 1.0
+        assert "zaman aşımı" in results[0][1]["error"]
+        assert results[1][1] == {"tool": "calculate", "args": {"expression": "1"}}
+
+    def test_cancel_wakes_wait(self, bot, tools):
+        """İptal, bekleyen araçları beklemeden sonuç döndürmeli."""
+        tools({"search_info": None})
+        cancel = CancelToken()
+        threading.Timer(0.1, cancel.cancel).start()
+        started = time.monotonic()
+        results = bot._run_function_calls([("search_info", {"query": "a"})], "", cancel)
+        assert time.monotonic() - started < 1.0
+        assert "iptal" in results[0][1]["error"]
+
+    def test_batched_function_response(self, bot, tools):
+        """Tüm sonuçlar tek bir function mesajında, çağrı sırasıyla gönderilmeli."""
+        tools({"search_info": 0.1, "calculate": 0.0})
+        bot.model = FakeModel([
+            [chunk(call("search_info", query="a"), call("calculate", expression="2"))],
+            [chunk(text("Tamam."))],
+        ])
+        events = list(bot.chat_stream("soru"))
+
+        assert events[-1] == {"type": "end"}
+        follow_up, _ = bot.model.calls[1]
+        assert follow_up["role"] == "function"
+        names = [p["function_response"]["name"] for p in follow_up["parts"]]
+        assert names == ["search_info", "calculate"]
+        assert [m["role"] for m in bot.messages] == ["user", "model", "function", "model"]
+
+
+class TestAgentLoop:
+    """Çok turlu araç döngüsünün sınırları."""
+
+    def _stubborn_model(self, rounds, tokens=None):
+        """Her turda yine araç isteyen model."""
+        responses = []
+        for i in range(rounds):
+            part = chunk(text(f"adım {i} "), call("calculate", expression=f"{i}+1"))
+            if tokens is not None:
+                part.usage_metadata = SimpleNamespace(total_token_count=tokens)
+            responses.append([part])
+        return FakeModel(responses)
+
+    def test_stops_at_max_rounds(self, bot, tools):
+        """Döngü AGENT_MAX_ROUNDS'ta durmalı, son tur araçsız olmalı."""
+        tools({"calculate": 0.0})
+        bot.model = self._stubborn_model(5)
+        with patch.object(chatbot_module.Config, "AGENT_MAX_ROUNDS", 3):
+            events = list(bot.chat_stream("soru"))
+
+        assert events[-1] == {"type": "end"}
+        assert len(bot.model.calls) == 3
+        configs = [kwargs["tool_config"] for _, kwargs in bot.model.calls]
+        assert configs[:2] == [None, None]
+        assert configs[2] is chatbot_module.NO_TOOLS_CONFIG
+
+    def test_history_order(self, bot, tools):
+        """Model çağrıları ve function_response'lar doğru rol ve sırayla kaydedilmeli."""
+        tools({"calculate": 0.0})
+        bot.model = self._stubborn_model(5)
+        with patch.object(chatbot_module.Config, "AGENT_MAX_ROUNDS", 3):
+            list(bot.chat_stream("soru"))
+
+        roles = [m["role"] for m in bot.messages]
+        assert roles == ["user", "model", "function", "model", "function", "model"]
+        for model_turn, function_turn in ((bot.messages[1], bot.messages[2]), (bot.messages[3], bot.messages[4])):
+            call_part = model_turn["parts"][-1]["function_call"]
+            response_part = function_turn["parts"][0]["function_response"]
+            assert response_part["name"] == call_part["name"] == "calculate"
+            assert response_part["response"]["args"] == call_part["args"]
+        # Son turdaki araç isteği yürütülmez; yalnızca metin kaydedilir
+        assert bot.messages[-1]["parts"] == [{"text": "adım 2 "}]
+
+    def test_time_budget(self, bot, tools):
+        """Süre bütçesi tükenince ilk tur araçsız olmalı."""
+        tools({"calculate": 0.0})
+        bot.model = self._stubborn_model(5)
+        with patch.object(chatbot_module.Config, "AGENT_TIME_BUDGET", 0):
+            list(bot.chat_stream("soru"))
+
+        assert len(bot.model.calls) == 1
+        assert bot.model.calls[0][1]["tool_config"] is chatbot_module.NO_TOOLS_CONFIG
+
+    def test_token_budget(self, bot, tools):
+        """Token bütçesi aşılınca sonraki tur son tur olmalı."""
+        tools({"calculate": 0.0})
+        bot.model = self._stubborn_model(5, tokens=1000)
+        with patch.object(chatbot_module.Config, "AGENT_TOKEN_BUDGET", 500):
+            list(bot.chat_stream("soru"))
+
+        assert len(bot.model.calls) == 2
+        assert bot.model.calls[1][1]["tool_config"] is chatbot_module.NO_TOOLS_CONFIG
+
+
+
+class TestChatStreamAsync:
+    """``chat_stream_async``'in senkron sürümle aynı davranması."""
+
+    def test_tool_round_and_events(self, bot, tools):
+        """Araç turu ve metin chunk'ları senkron sürümle aynı olmalı."""
+        tools({"calculate": 0.0})
+        script = [
+            [chunk(call("calculate", expression="2+2"))],
+            [chunk(text("Sonuç 4."))],
+        ]
+
+        async def collect():
+            return [e async for e in bot.chat_stream_async("soru")]
+
+        bot.model = FakeModel([list(r) for r in script])
+        async_events = asyncio.run(collect())
+        async_messages = list(bot.messages)
+
+        sync_bot = WebChatbot()
+        sync_bot._dispatch_function = bot._dispatch_function
+        sync_bot.model = FakeModel([list(r) for r in script])
+        sync_events = list(sync_bot.chat_stream("soru"))
+
+        assert async_events == sync_events
+        assert async_messages == sync_bot.messages
+        assert async_events[-1] == {"type": "end"}
+
+    def test_task_cancel_records_partial_turn(self, bot):
+        """Görev iptal edilince kısmi yanıt iptal notuyla kaydedilmeli."""
+        bot.model = FakeModel([[chunk(text("Yarım yanıt")), None]])
+
+        async def scenario():
+            received = []
+
+            async def consume():
+                async for event in bot.chat_stream_async("soru"):
+                    received.append(event)
+
+            task = asyncio.create_task(consume())
+            while not received:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+        assert [m["role"] for m in bot.messages] == ["user", "model"]
+        note = bot.messages[-1]["parts"][0]["text"]
+        assert note.startswith("Yarım yanıt") and chatbot_module.CANCELLED_NOTE in note
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
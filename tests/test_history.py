@@ -0,0 +1,132 @@
+"""
+Conversation History Tests.
+Token bütçeli sohbet geçmişinin birim testleri.
+"""
+
+import pytest
+import sys
+import os
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.history import ConversationHistory, estimate_tokens, summarize_tool_message
+
+
+def user(text):
+    return {"role": "user", "parts": [{"text": text}]}
+
+
+def model(text):
+    return {"role": "model", "parts": [{"text": text}]}
+
+
+def call(name):
+    return {"role": "model", "parts": [{"function_call": {"name": name, "args": {"query": "x"}}}]}
+
+
+def tool(name, summary):
+    return {"role": "function", "parts": [{"function_response": {
+        "name": name,
+        "response": {"query": "x", "result": {"title": "X", "summary": summary, "sections": [{"title": "a"}]}}
+    }}]}
+
+
+class TestEstimateTokens:
+    """estimate_tokens fonksiyonu için testler."""
+    
+    def test_text_message(self):
+        """Metin uzunluğuyla orantılı olmalı."""
+        assert estimate_tokens(user("a" * 400)) > estimate_tokens(user("a" * 40))
+    
+    def test_function_response(self):
+        """Araç çıktıları da sayılmalı."""
+        assert estimate_tokens(tool("search_info", "b" * 4000)) > 1000
+
+
+class TestSummarizeToolMessage:
+    """summarize_tool_message fonksiyonu için testler."""
+    
+    def test_large_output_summarized(self):
+        """Büyük araç çıktısı kısaltılmalı ve listeler atılmalı."""
+        compact = summarize_tool_message(tool("search_info", "b" * 4000))
+        response = compact["parts"][0]["function_response"]["response"]
+        assert response["summarized"] is True
+        assert len(response["result"]["summary"]) < 400
+        assert "sections" not in response["result"]
+    
+    def test_small_output_untouched(self):
+        """Küçük çıktılar özetlenmemeli."""
+        assert summarize_tool_message(tool("calculate", "kısa")) is None
+
+
+class TestConversationHistory:
+    """ConversationHistory sınıfı için testler."""
+    
+    def test_incremental_token_count(self):
+        """Toplam token sayısı eklemeyle güncellenmeli."""
+        history = ConversationHistory(token_budget=1000)
+        history.append(user("merhaba"))
+        history.append(model("selam"))
+        assert history.total_tokens == estimate_tokens(user("merhaba")) + estimate_tokens(model("selam"))
+        assert len(history) == 2
+    
+    def test_window_within_budget(self):
+        """Pencere bütçeyi aşmamalı ve en yeni turları içermeli."""
+        history = ConversationHistory(token_budget=200)
+        for i in range(20):
+            history.append(user(f"soru {i} " + "a" * 100))
+            history.append(model(f"cevap {i} " + "b" * 100))
+        window = history.window()
+        assert sum(estimate_tokens(m) for m in window) <= 200
+        assert window[-1]["parts"][0]["text"].startswith("cevap 19")
+    
+    def test_window_starts_with_user_turn(self):
+        """Pencere hiçbir zaman yetim fonksiyon mesajıyla başlamamalı."""
+        history = ConversationHistory(token_budget=300, summarize_tools=False)
+        history.extend([user("eski"), call("search_info"), tool("search_info", "c" * 2000), model("cevap")])
+        history.extend([user("yeni"), model("kısa cevap")])
+        window = history.window()
+        assert window[0]["role"] == "user"
+        assert window[0]["parts"][0]["text"] == "yeni"
+    
+    def test_latest_turn_always_included(self):
+        """Tek başına bütçeyi aşan son tur yine de dahil edilmeli."""
+        history = ConversationHistory(token_budget=10)
+        history.extend([user("a" * 1000), model("b" * 1000)])
+        assert len(history.window()) == 2
+    
+    def test_old_tool_outputs_summarized(self):
+        """Eski turlardaki araç çıktıları özetlenmeli, son tur tam kalmalı."""
+        history = ConversationHistory(token_budget=10_000, keep_recent_turns=1)
+        history.extend([user("eski"), call("search_info"), tool("search_info", "c" * 4000), model("cevap")])
+        history.extend([user("yeni"), call("search_info"), tool("search_info", "d" * 4000), model("cevap")])
+        window = history.window()
+        old_response = window[2]["parts"][0]["function_response"]["response"]
+        new_response = window[6]["parts"][0]["function_response"]["response"]
+        assert old_response.get("summarized") is True
+        assert "summarized" not in new_response
+        # Orijinal mesaj değişmemeli
+        assert "summarized" not in history.messages[2]["parts"][0]["function_response"]["response"]
+    
+    def test_max_messages(self):
+        """Mesaj sayısı sınırı tam turlar halinde uygulanmalı."""
+        history = ConversationHistory(token_budget=10_000, max_messages=4)
+        for i in range(5):
+            history.extend([user(f"s{i}"), model(f"c{i}")])
+        window = history.window()
+        assert len(window) == 4
+        assert window[0]["parts"][0]["text"] == "s3"
+    
+    def test_clear(self):
+        """clear geçmişi ve sayaçları sıfırlamalı."""
+        history = ConversationHistory(token_budget=100)
+        history.append(user("x"))
+        history.clear()
+        assert len(history) == 0
+        assert history.total_tokens == 0
+        assert history.window() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,182 @@
+"""
+Metrics Tests.
+Prometheus metin dışa aktarıcısının ve akış ölçümünün birim testleri.
+"""
+
+import pytest
+import sys
+import os
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+
+from src.observability import MetricsRegistry
+from src.observability import metrics
+
+
+def _sample(text: str, series: str) -> float:
+    """Metin çıktısından tek bir serinin değerini bulur."""
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{series} bulunamadı:\n{text}")
+
+
+class TestCounter:
+    """Sayaç testleri."""
+
+    def test_labels_render(self):
+        """Etiketli seriler ayrı satırlarda yazılmalı."""
+        registry = MetricsRegistry()
+        counter = registry.counter("errors_total", "Hatalar.", ["tool"])
+        counter.labels("search_info").inc()
+        counter.labels("search_info").inc(2)
+        counter.labels("calculate").inc()
+
+        text = registry.render()
+        assert "# TYPE errors_total counter" in text
+        assert _sample(text, 'errors_total{tool="search_info"}') == 3
+        assert _sample(text, 'errors_total{tool="calculate"}') == 1
+
+    def test_label_count_checked(self):
+        """Eksik etiket değeri hata vermeli."""
+        counter = MetricsRegistry().counter("c_total", "C.", ["a", "b"])
+        with pytest.raises(ValueError):
+            counter.labels("x")
+
+    def test_label_escaping(self):
+        """Tırnak, ters bölü ve satır sonu kaçırılmalı."""
+        registry = MetricsRegistry()
+        registry.counter("c_total", "C.", ["v"]).labels('a"b\\c\nd').inc()
+        assert 'c_total{v="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+    def test_concurrent_increments(self):
+        """Eşzamanlı artışlar kaybolmamalı."""
+        registry = MetricsRegistry()
+        counter = registry.counter("c_total", "C.")
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert _sample(registry.render(), "c_total") == 8000
+
+    def test_same_name_returns_existing(self):
+        """Aynı adla tekrar kayıt aynı metriği döndürmeli."""
+        registry = MetricsRegistry()
+        assert registry.counter("c_total", "C.") is registry.counter("c_total", "C.")
+
+
+class TestHistogram:
+    """Histogram testleri."""
+
+    def test_cumulative_buckets(self):
+        """Kovalar kümülatif, +Inf toplam sayıya eşit olmalı."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Gecikme.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        text = registry.render()
+        assert _sample(text, 'latency_seconds_bucket{le="0.1"}') == 2
+        assert _sample(text, 'latency_seconds_bucket{le="1"}') == 3
+        assert _sample(text, 'latency_seconds_bucket{le="+Inf"}') == 4
+        assert _sample(text, "latency_seconds_count") == 4
+        assert _sample(text, "latency_seconds_sum") == pytest.approx(3.65)
+
+    def test_labelled_series(self):
+        """Etiketli histogramda ``le`` etiketi sona eklenmeli."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("round_seconds", "Tur.", ["round"], buckets=(1.0,))
+        histogram.labels(1).observe(0.5)
+        text = registry.render()
+        assert _sample(text, 'round_seconds_bucket{round="1",le="1"}') == 1
+        assert _sample(text, 'round_seconds_count{round="1"}') == 1
+
+
+class TestCallbackMetric:
+    """Okuma anında hesaplanan metrik testleri."""
+
+    def test_evaluated_on_render(self):
+        """Geri çağrı yalnızca render sırasında çalışmalı."""
+        registry = MetricsRegistry()
+        calls = []
+
+        def active():
+            calls.append(1)
+            return [({}, len(calls))]
+
+        registry.callback("active_streams", "Aktif.", active)
+        assert calls == []
+        assert _sample(registry.render(), "active_streams") == 1
+        assert _sample(registry.render(), "active_streams") == 2
+
+    def test_failing_callback_skipped(self):
+        """Hata veren geri çağrı diğer metrikleri bozmamalı."""
+        registry = MetricsRegistry()
+        registry.callback("broken", "Bozuk.", lambda: 1 / 0)
+        registry.counter("ok_total", "Sağlam.").inc()
+        text = registry.render()
+        assert "broken" not in text
+        assert _sample(text, "ok_total") == 1
+
+
+class TestInstrumentStream:
+    """Akış ölçümü testleri."""
+
+    def _count(self, outcome: str) -> int:
+        return metrics.STREAM_DURATION.labels(outcome).snapshot()[2]
+
+    def test_passthrough_and_ttft(self):
+        """Chunk'lar değişmeden geçmeli, ilk içerikte TTFT kaydedilmeli."""
+        events = [{"type": "function_call", "name": "x"}, {"type": "content", "content": "a"},
+                  {"type": "content", "content": "b"}, {"type": "end"}]
+        ttft_before = _sample(metrics.REGISTRY.render(), "chat_time_to_first_token_seconds_count")
+        ok_before = self._count("ok")
+
+        assert list(metrics.instrument_stream(iter(events), 0.0)) == events
+        assert _sample(metrics.REGISTRY.render(), "chat_time_to_first_token_seconds_count") == ttft_before + 1
+        assert self._count("ok") == ok_before + 1
+
+    def test_outcomes(self):
+        """Hata ve iptal bitişleri ayrı etiketle sayılmalı."""
+        error_before = self._count("error")
+        cancelled_before = self._count("cancelled")
+
+        list(metrics.instrument_stream(iter([{"type": "error", "error": "x"}]), 0.0))
+        list(metrics.instrument_stream(iter([{"type": "end", "cancelled": True}]), 0.0))
+        assert self._count("error") == error_before + 1
+        assert self._count("cancelled") == cancelled_before + 1
+
+    def test_closed_early_counts_cancelled(self):
+        """Yarıda kapatılan akış ``cancelled`` sayılmalı."""
+        before = self._count("cancelled")
+        stream = metrics.instrument_stream(iter([{"type": "content", "content": "a"}, {"type": "end"}]), 0.0)
+        next(stream)
+        stream.close()
+        assert self._count("cancelled") == before + 1
+
+    def test_async(self):
+        """Async sürüm aynı şekilde ölçmeli."""
+        async def source():
+            yield {"type": "content", "content": "a"}
+            yield {"type": "end"}
+
+        async def collect():
+            return [e async for e in metrics.instrument_stream_async(source(), 0.0)]
+
+        before = self._count("ok")
+        assert asyncio.run(collect()) == [{"type": "content", "content": "a"}, {"type": "end"}]
+        assert self._count("ok") == before + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
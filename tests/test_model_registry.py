@@ -0,0 +1,108 @@
+"""
+Model Registry Tests.
+Paylaşılan model ve araç tanımları için birim testleri.
+Model nesneleri oluşturulur ancak Gemini'ye istek gönderilmez.
+"""
+
+import pytest
+import sys
+import os
+import threading
+import warnings
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+from src import model_registry
+from src.chatbot import WebChatbot
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    model_registry.clear()
+    yield
+    model_registry.clear()
+
+
+class TestGetModel:
+    """Model paylaşımı testleri."""
+
+    def test_same_key_shared(self):
+        """Aynı (ad, talimat) için aynı model dönmeli."""
+        first = model_registry.get_model("gemini-test")
+        assert model_registry.get_model("gemini-test") is first
+        assert model_registry.get_model("gemini-test", "talimat") is model_registry.get_model("gemini-test", "talimat")
+
+    def test_different_key_separate(self):
+        """Farklı ad veya talimat ayrı model üretmeli."""
+        base = model_registry.get_model("gemini-test")
+        assert model_registry.get_model("gemini-other") is not base
+        assert model_registry.get_model("gemini-test", "talimat") is not base
+
+    def test_concurrent_first_use(self):
+        """Eşzamanlı ilk çağrılar tek bir model oluşturmalı."""
+        results = []
+        barrier = threading.Barrier(8)
+
+        def work():
+            barrier.wait()
+            results.append(model_registry.get_model("gemini-test"))
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len({id(m) for m in results}) == 1
+
+    def test_clear(self):
+        """clear sonrası yeni model oluşturulmalı."""
+        first = model_registry.get_model("gemini-test")
+        model_registry.clear()
+        assert model_registry.get_model("gemini-test") is not first
+
+    def test_chatbots_share_model(self):
+        """Sohbetler modeli ve araç kütüphanesini paylaşmalı."""
+        a, b = WebChatbot("gemini-test"), WebChatbot("gemini-test")
+        assert a.model is b.model
+        assert a.model._tools is model_registry.get_tool_library()
+
+    def test_no_system_instruction(self):
+        """Sohbet modeli sistem talimatı göndermemeli (önceki davranış)."""
+        assert WebChatbot("gemini-test").model._system_instruction is None
+
+
+class TestToolDeclarations:
+    """Araç tanımlarının paylaşımı testleri."""
+
+    def test_frozen(self):
+        """Paylaşılan tanımlar değiştirilememeli."""
+        group = model_registry.TOOL_DECLARATIONS[0]
+        with pytest.raises(TypeError):
+            group["function_declarations"] = ()
+        with pytest.raises(TypeError):
+            group["function_declarations"][0]["name"] = "x"
+        with pytest.raises(AttributeError):
+            group["function_declarations"].append({})
+
+    def test_copy_is_independent(self):
+        """get_tools kopya döndürmeli; kopyayı değiştirmek paylaşılanı etkilememeli."""
+        tools = WebChatbot("gemini-test").get_tools()
+        name = tools[0]["function_declarations"][0]["name"]
+        tools[0]["function_declarations"][0]["name"] = "degisti"
+        tools.append({})
+        assert model_registry.TOOL_DECLARATIONS[0]["function_declarations"][0]["name"] == name
+        assert len(model_registry.tool_declarations()) == len(model_registry.TOOL_DECLARATIONS)
+
+    def test_library_built_once(self):
+        """Araç kütüphanesi bir kez dönüştürülmeli."""
+        library = model_registry.get_tool_library()
+        assert model_registry.get_tool_library() is library
+        names = {d["name"] for g in model_registry.tool_declarations() for d in g["function_declarations"]}
+        assert {"search_info", "calculate"} <= names
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
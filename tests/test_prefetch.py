@@ -0,0 +1,220 @@
+"""
+Prefetch Service Tests.
+Bağlantılı sayfaların arka planda ön yüklenmesi ve isabet ölçümü testleri.
+"""
+
+import pytest
+import sys
+import os
+import threading
+from unittest.mock import patch, MagicMock
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import wikipedia
+from src.services.prefetch import Prefetcher, rank_links
+
+
+PAGE = {
+    "title": "Ankara",
+    "summary": "Ankara, Türkiye'nin başkentidir. Kızılırmak havzasında, İç Anadolu Bölgesi'nde yer alır.",
+    "sections": [
+        {"title": "Tarih", "content": "Şehir Galatlar döneminde önem kazandı.", "level": 0, "subsections": []}
+    ]
+}
+
+
+def search_result(data=PAGE, language="tr"):
+    return {"query": data["title"], "language": language, "result": data}
+
+
+class TestRankLinks:
+    """rank_links fonksiyonu için testler."""
+
+    def test_orders_by_first_mention(self):
+        """Bağlantılar metinde ilk geçtikleri sıraya göre dizilmeli."""
+        links = ["Galatlar", "İç Anadolu Bölgesi", "Türkiye", "Kızılırmak"]
+        assert rank_links(links, PAGE, 10) == ["Türkiye", "Kızılırmak", "İç Anadolu Bölgesi", "Galatlar"]
+
+    def test_drops_unmentioned_and_self(self):
+        """Metinde geçmeyen bağlantılar ve sayfanın kendisi elenmeli."""
+        links = ["Ankara", "Ankara Üniversitesi", "Türkiye"]
+        assert rank_links(links, PAGE, 10) == ["Türkiye"]
+
+    def test_limit(self):
+        """Sonuç sayısı sınırlanmalı."""
+        links = ["Galatlar", "Türkiye", "Kızılırmak"]
+        assert rank_links(links, PAGE, 2) == ["Türkiye", "Kızılırmak"]
+
+
+class TestPrefetcher:
+    """Prefetcher sınıfı için testler."""
+
+    def setup_method(self):
+        wikipedia.page_cache.clear()
+        self.prefetcher = Prefetcher(max_pages=2, max_workers=1, max_pending=4)
+
+    def teardown_method(self):
+        self.prefetcher.close(wait=True)
+        wikipedia.page_cache.clear()
+
+    def wait_idle(self):
+        self.prefetcher._executor.submit(lambda: None).result(timeout=5)
+
+    def test_prefetches_top_links(self):
+        """En önde geçen bağlantılar tek toplu istekle önbelleğe alınmalı."""
+        fetched = {}
+
+        def fake_get_pages(titles, language, client=None):
+            fetched["titles"] = list(titles)
+            pages = {t: {"title": t, "summary": t} for t in titles}
+            for title, page in pages.items():
+                wikipedia.page_cache.set(wikipedia.cache_key(title, language), page)
+            return pages
+
+        with patch.object(wikipedia, "get_links", return_value=["Galatlar", "Türkiye", "Kızılırmak"]), \
+                patch.object(wikipedia, "get_pages", side_effect=fake_get_pages):
+            assert self.prefetcher.schedule(search_result())
+            self.wait_idle()
+
+        assert fetched["titles"] == ["Türkiye", "Kızılırmak"]
+        assert self.prefetcher.stats()["fetched"] == 2
+
+    def test_skips_cached_links(self):
+        """Önbellekte olan bağlantılar tekrar çekilmemeli."""
+        wikipedia.page_cache.set("tr:Türkiye", {"title": "Türkiye"})
+        get_pages = MagicMock(return_value={})
+        with patch.object(wikipedia, "get_links", return_value=["Türkiye"]), \
+                patch.object(wikipedia, "get_pages", get_pages):
+            self.prefetcher.schedule(search_result())
+            self.wait_idle()
+        get_pages.assert_not_called()
+
+    def test_hit_rate(self):
+        """Ön yüklenen sayfa önbellekten okunursa isabet sayılmalı."""
+        def fake_get_pages(titles, language, client=None):
+            pages = {t: {"title": t, "summary": t} for t in titles}
+            for title, page in pages.items():
+                wikipedia.page_cache.set(wikipedia.cache_key(title, language), page)
+            return pages
+
+        with patch.object(wikipedia, "get_links", return_value=["Türkiye", "Kızılırmak"]), \
+                patch.object(wikipedia, "get_pages", side_effect=fake_get_pages):
+            self.prefetcher.schedule(search_result())
+            self.wait_idle()
+
+        with patch("src.services.wikipedia.wiki") as mock_wiki:
+            assert wikipedia.get_page("Türkiye")["title"] == "Türkiye"
+            mock_wiki.page.assert_not_called()
+
+        stats = self.prefetcher.stats()
+        assert stats["hits"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_evicted_page_not_hit(self):
+        """Kullanılmadan düşen sayfa isabet sayılmamalı."""
+        with patch.object(wikipedia, "get_links", return_value=["Türkiye"]), \
+                patch.object(wikipedia, "get_pages", return_value={"Türkiye": {"title": "Türkiye"}}):
+            self.prefetcher.schedule(search_result())
+            self.wait_idle()
+
+        with patch("src.services.wikipedia.wiki") as mock_wiki:
+            mock_wiki.page.return_value = MagicMock(exists=MagicMock(return_value=False))
+            wikipedia.get_page("Türkiye")
+
+        stats = self.prefetcher.stats()
+        assert stats["hits"] == 0
+        assert stats["expired"] == 1
+
+    def test_drops_when_queue_full(self):
+        """Kuyruk doluysa yeni işler düşürülmeli."""
+        release = threading.Event()
+        self.prefetcher.max_pending = 1
+        with patch.object(wikipedia, "get_links", side_effect=lambda *a, **kw: release.wait(5) and []):
+            assert self.prefetcher.schedule(search_result())
+            other = dict(PAGE, title="İzmir")
+            assert not self.prefetcher.schedule(search_result(other))
+            release.set()
+            self.wait_idle()
+        assert self.prefetcher.stats()["dropped"] == 1
+
+    def test_ignores_error_results(self):
+        """Hatalı sonuçlar için ön yükleme yapılmamalı."""
+        assert not self.prefetcher.schedule({"query": "x", "error": "yok"})
+
+    def test_errors_counted(self):
+        """Ağ hataları sayılmalı, havuz çalışmaya devam etmeli."""
+        with patch.object(wikipedia, "get_links", side_effect=RuntimeError("ağ yok")):
+            self.prefetcher.schedule(search_result())
+            self.wait_idle()
+        stats = self.prefetcher.stats()
+        assert stats["errors"] == 1
+        assert stats["pending"] == 0
+
+
+    def test_uses_own_client(self):
+        """Ön yükleme kullanıcı isteklerinin istemcisini değil kendi küçük havuzunu kullanmalı."""
+        get_links = MagicMock(return_value=[])
+        with patch.object(wikipedia, "get_links", get_links):
+            self.prefetcher.schedule(search_result())
+            self.wait_idle()
+        client = get_links.call_args.kwargs["client"]
+        assert client is not wikipedia.get_client("tr")
+        assert client.session.get_adapter("https://tr.wikipedia.org").poolmanager.connection_pool_kw["maxsize"] == 2
+        assert "tr" in self.prefetcher.stats()["transport"]
+
+
+class TestPrefetchBudget:
+    """Dakikalık istek bütçesi testleri."""
+
+    class Clock:
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    def setup_method(self):
+        wikipedia.page_cache.clear()
+        self.clock = self.Clock()
+        self.prefetcher = Prefetcher(max_pages=5, max_workers=1, max_pending=4,
+                                     budget_per_minute=4, clock=self.clock)
+
+    def teardown_method(self):
+        self.prefetcher.close(wait=True)
+        wikipedia.page_cache.clear()
+
+    def run(self, data=PAGE, links=("Galatlar", "Türkiye", "Kızılırmak")):
+        fetched = []
+
+        def fake_get_pages(titles, language, client=None):
+            fetched.extend(titles)
+            return {}
+
+        with patch.object(wikipedia, "get_links", return_value=list(links)), \
+                patch.object(wikipedia, "get_pages", side_effect=fake_get_pages):
+            scheduled = self.prefetcher.schedule(search_result(data))
+            self.prefetcher._executor.submit(lambda: None).result(timeout=5)
+        return scheduled, fetched
+
+    def test_candidates_trimmed_to_budget(self):
+        """Bağlantı + toplu istek sonrası kalan bütçe kadar sayfa çekilmeli."""
+        scheduled, fetched = self.run()
+        assert scheduled
+        assert fetched == ["Türkiye", "Kızılırmak"]
+        stats = self.prefetcher.stats()
+        assert stats["requests"] == 4
+        assert stats["over_budget"] == 1
+
+    def test_exhausted_budget_drops_until_next_minute(self):
+        """Bütçe bitince yeni işler düşürülmeli, dakika dolunca yenilenmeli."""
+        self.run()
+        other = dict(PAGE, title="İzmir")
+        assert self.run(other) == (False, [])
+        self.clock.now = 60.0
+        scheduled, fetched = self.run(other)
+        assert scheduled and fetched
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
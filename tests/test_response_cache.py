@@ -0,0 +1,241 @@
+"""
+Response Cache Tests.
+Yanıt önbelleği ve istek birleştiricinin birim testleri.
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.history import ConversationHistory
+from src.response_cache import ResponseCache
+from src.streaming import CancelToken
+
+
+class FakeChatbot:
+    """Sabit yanıt üreten ve çağrı sayısını tutan sahte sohbet nesnesi."""
+    
+    calls = 0
+    
+    def __init__(self, reply="Merhaba!", gate=None, fail=False, tool_error=False):
+        self.model_name = "models/test"
+        self.system_prompt = "prompt"
+        self.history = ConversationHistory(token_budget=1000)
+        self.user_data = {"calculations": [], "notes": []}
+        self.reply = reply
+        self.gate = gate
+        self.fail = fail
+        self.tool_error = tool_error
+    
+    @property
+    def messages(self):
+        return self.history.messages
+    
+    def _events(self, message):
+        FakeChatbot.calls += 1
+        self.history.append({"role": "user", "parts": [{"text": message}]})
+        if self.fail:
+            return [{"type": "error", "error": "hata"}]
+        self.history.append({"role": "model", "parts": [{"text": self.reply}]})
+        self.user_data["calculations"].append({"expression": "1+1", "result": 2})
+        events = [{"type": "content", "content": self.reply}, {"type": "end"}]
+        if self.tool_error:
+            result = {"error": "Fonksiyon zaman aşımına uğradı (30 sn)."}
+            events.insert(0, {"type": "function_result", "function": "search_info", "result": result})
+        return events
+    
+    def chat_stream(self, message, cancel=None):
+        events = self._events(message)
+        yield events[0]
+        if self.gate is not None:
+            self.gate.wait(5)
+        if cancel is not None and cancel.cancelled:
+            yield {"type": "end", "cancelled": True}
+            return
+        yield from events[1:]
+    
+    async def chat_stream_async(self, message):
+        for event in self._events(message):
+            yield event
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    FakeChatbot.calls = 0
+
+
+def make_cache():
+    return ResponseCache(max_bytes=1024 * 1024, ttl=60)
+
+
+def wait_for_subscriber(cache, timeout=5):
+    """Abone akışa katılana kadar bekler."""
+    deadline = time.monotonic() + timeout
+    while cache.stats()["coalesced"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class TestResponseCache:
+    """ResponseCache sınıfı için testler."""
+    
+    def test_replay_from_cache(self):
+        """Aynı ilk soru ikinci kez model çağrılmadan oynatılmalı."""
+        cache = make_cache()
+        first = list(cache.stream(FakeChatbot(), "Atatürk kimdir?"))
+        
+        chatbot = FakeChatbot()
+        second = list(cache.stream(chatbot, "  atatürk   KİMDİR?"))
+        
+        assert FakeChatbot.calls == 1
+        assert first[-1] == {"type": "end"}
+        assert second[0] == {"type": "meta", "cached": True}
+        assert second[1:] == first
+        # Geçmiş ve kullanıcı verisi de işlenmeli
+        assert chatbot.messages[0]["parts"][0]["text"] == "  atatürk   KİMDİR?"
+        assert chatbot.messages[1]["parts"][0]["text"] == "Merhaba!"
+        assert len(chatbot.user_data["calculations"]) == 1
+        assert cache.stats()["replays"] == 1
+    
+    def test_existing_history_bypasses_cache(self):
+        """Geçmişi olan sohbetler önbelleğe alınmamalı."""
+        cache = make_cache()
+        list(cache.stream(FakeChatbot(), "soru"))
+        
+        chatbot = FakeChatbot()
+        chatbot.history.append({"role": "user", "parts": [{"text": "önceki"}]})
+        events = list(cache.stream(chatbot, "soru"))
+        
+        assert FakeChatbot.calls == 2
+        assert events[0]["type"] == "content"
+    
+    def test_errors_are_not_cached(self):
+        """Hatalı yanıtlar saklanmamalı."""
+        cache = make_cache()
+        list(cache.stream(FakeChatbot(fail=True), "soru"))
+        list(cache.stream(FakeChatbot(), "soru"))
+        assert FakeChatbot.calls == 2
+    
+    def test_tool_errors_are_not_cached(self):
+        """Başarısız araç sonucuna dayanan yanıt saklanmamalı."""
+        cache = make_cache()
+        events = list(cache.stream(FakeChatbot(tool_error=True), "soru"))
+        list(cache.stream(FakeChatbot(), "soru"))
+        
+        assert events[-1] == {"type": "end"}
+        assert FakeChatbot.calls == 2
+        # Hatasız ikinci yanıt saklanmalı
+        list(cache.stream(FakeChatbot(), "soru"))
+        assert FakeChatbot.calls == 2
+    
+    def test_concurrent_requests_coalesce(self):
+        """Eşzamanlı aynı istekler tek bir upstream akışı paylaşmalı."""
+        cache = make_cache()
+        gate = threading.Event()
+        leader_events = []
+        
+        leader_stream = cache.stream(FakeChatbot(gate=gate), "soru")
+        leader_events.append(next(leader_stream))  # Lider akış başladı
+        
+        follower = FakeChatbot()
+        follower_events = []
+        thread = threading.Thread(target=lambda: follower_events.extend(cache.stream(follower, "soru")))
+        thread.start()
+        wait_for_subscriber(cache)
+        
+        gate.set()
+        leader_events.extend(leader_stream)
+        thread.join(5)
+        
+        assert FakeChatbot.calls == 1
+        assert follower_events[0] == {"type": "meta", "cached": True, "coalesced": True}
+        assert follower_events[1:] == leader_events
+        assert len(follower.messages) == 2
+        assert cache.stats()["coalesced"] == 1
+    
+    def test_abandoned_leader_releases_followers(self):
+        """Lider akış yarıda kapanırsa aboneler hata ile sonlanmalı."""
+        cache = make_cache()
+        leader_stream = cache.stream(FakeChatbot(gate=threading.Event()), "soru")
+        next(leader_stream)
+        
+        follower_events = []
+        thread = threading.Thread(target=lambda: follower_events.extend(cache.stream(FakeChatbot(), "soru")))
+        thread.start()
+        wait_for_subscriber(cache)
+        leader_stream.close()
+        thread.join(5)
+        
+        assert follower_events[-1]["type"] == "error"
+        assert cache.stats()["in_flight"] == 0
+    
+    def test_cancelled_leader_not_cached(self):
+        """İptal edilen lider yanıtı saklanmamalı, aboneler hata ile sonlanmalı."""
+        cache = make_cache()
+        gate = threading.Event()
+        cancel = CancelToken()
+        leader_stream = cache.stream(FakeChatbot(gate=gate), "soru", cancel)
+        next(leader_stream)
+        
+        follower_events = []
+        thread = threading.Thread(target=lambda: follower_events.extend(cache.stream(FakeChatbot(), "soru")))
+        thread.start()
+        wait_for_subscriber(cache)
+        cancel.cancel()
+        gate.set()
+        leader_events = list(leader_stream)
+        thread.join(5)
+        
+        assert leader_events == [{"type": "end", "cancelled": True}]
+        assert follower_events[-1]["type"] == "error"
+        assert cache.stats()["entries"] == 0
+    
+    def test_cancelled_follower_stops_waiting(self):
+        """İptal edilen abone, lider yeni chunk üretmese de hemen çıkmalı."""
+        cache = make_cache()
+        gate = threading.Event()
+        leader_stream = cache.stream(FakeChatbot(gate=gate), "soru")
+        next(leader_stream)
+        
+        cancel = CancelToken()
+        follower = FakeChatbot()
+        follower_events = []
+        thread = threading.Thread(target=lambda: follower_events.extend(cache.stream(follower, "soru", cancel)))
+        thread.start()
+        wait_for_subscriber(cache)
+        time.sleep(0.05)
+        
+        cancel.cancel()
+        thread.join(1)
+        try:
+            assert not thread.is_alive()
+            assert follower_events[-1] == {"type": "end", "cancelled": True}
+            assert follower.messages == []
+        finally:
+            gate.set()
+            leader_events = list(leader_stream)
+        
+        assert leader_events[-1] == {"type": "end"}
+        assert cache.stats()["entries"] == 1
+    
+    def test_async_stream(self):
+        """Asenkron akış da önbelleği doldurmalı ve oynatmalı."""
+        cache = make_cache()
+        
+        async def collect(chatbot):
+            return [event async for event in cache.stream_async(chatbot, "soru")]
+        
+        first = asyncio.run(collect(FakeChatbot()))
+        second = asyncio.run(collect(FakeChatbot()))
+        
+        assert FakeChatbot.calls == 1
+        assert second[1:] == first
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,140 @@
+"""
+Result Shaper Tests.
+Araç sonucu budama servisinin birim testleri.
+"""
+
+import pytest
+import sys
+import os
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.result_shaper import (
+    flatten_sections, score_sections, select_sections, shape_search_result,
+    outline_search_result
+)
+
+
+def _section(title, content, subsections=None, level=0):
+    return {"title": title, "content": content, "level": level, "subsections": subsections or []}
+
+
+SECTIONS = [
+    _section("Tarih", "Şehir antik çağda kurulmuştur. " * 20, [
+        _section("Osmanlı dönemi", "1453 yılında fethedilmiştir. " * 20, level=1)
+    ]),
+    _section("Coğrafya", "Boğaz iki kıtayı ayırır. " * 20),
+    _section("Ekonomi", "Liman ve ticaret merkezidir. Ekonomi büyüktür. " * 20),
+]
+
+RESULT = {
+    "query": "İstanbul",
+    "result": {
+        "title": "İstanbul",
+        "summary": "İstanbul, Türkiye'nin en kalabalık şehridir.",
+        "url": "https://tr.wikipedia.org/wiki/%C4%B0stanbul",
+        "sections": SECTIONS,
+        "categories": ["Şehirler"]
+    }
+}
+
+
+class TestFlattenSections:
+    """flatten_sections fonksiyonu için testler."""
+    
+    def test_paths(self):
+        """Alt bölümler üst bölüm yoluyla adlandırılmalı."""
+        paths = [s["path"] for s in flatten_sections(SECTIONS)]
+        assert paths == ["Tarih", "Tarih / Osmanlı dönemi", "Coğrafya", "Ekonomi"]
+
+
+class TestScoreSections:
+    """score_sections fonksiyonu için testler."""
+    
+    def test_relevant_section_scores_highest(self):
+        """Soruyla eşleşen bölüm en yüksek skoru almalı."""
+        flat = flatten_sections(SECTIONS)
+        scores = score_sections(flat, "İstanbul ekonomisi ve ticaret")
+        assert scores.index(max(scores)) == 3
+    
+    def test_turkish_case_folding(self):
+        """Türkçe büyük harfli sorgu eşleşmeli."""
+        flat = flatten_sections(SECTIONS)
+        scores = score_sections(flat, "OSMANLI")
+        assert scores[1] > 0
+    
+    def test_empty_question(self):
+        """Boş soruda tüm skorlar sıfır olmalı."""
+        assert score_sections(flatten_sections(SECTIONS), "") == [0.0] * 4
+
+
+class TestSelectSections:
+    """select_sections fonksiyonu için testler."""
+    
+    def test_budget_respected(self):
+        """Seçilen içerik bütçeyi aşmamalı."""
+        selected, omitted = select_sections(SECTIONS, "ticaret", 1200)
+        assert sum(len(s["content"]) for s in selected) <= 1200
+        assert selected[0]["title"] == "Ekonomi"
+        assert "Tarih" in omitted
+    
+    def test_article_order_preserved(self):
+        """Seçilen bölümler makale sırasında dönmeli."""
+        selected, _ = select_sections(SECTIONS, "ticaret osmanlı", 10_000)
+        assert [s["title"] for s in selected][:2] == ["Tarih", "Tarih / Osmanlı dönemi"]
+    
+    def test_oversized_top_section_truncated(self):
+        """Tek başına sığmayan en alakalı bölüm kırpılmalı."""
+        selected, _ = select_sections(SECTIONS, "ticaret", 100)
+        assert len(selected) == 1
+        assert len(selected[0]["content"]) <= 100
+
+
+class TestShapeSearchResult:
+    """shape_search_result fonksiyonu için testler."""
+    
+    def test_reports_saved_bytes(self):
+        """Kazanılan bayt miktarı raporlanmalı."""
+        shaped = shape_search_result(RESULT, "ticaret", max_chars=800)
+        shaping = shaped["shaping"]
+        assert shaping["saved_bytes"] > 0
+        assert shaping["original_bytes"] - shaping["shaped_bytes"] == shaping["saved_bytes"]
+    
+    def test_keeps_core_fields(self):
+        """Başlık, özet ve URL korunmalı."""
+        shaped = shape_search_result(RESULT, "ticaret", max_chars=800)
+        data = shaped["result"]
+        assert data["title"] == "İstanbul"
+        assert data["summary"] == RESULT["result"]["summary"]
+        assert data["url"] == RESULT["result"]["url"]
+        assert "omitted_sections" in data
+    
+    def test_error_result_untouched(self):
+        """Hata sonuçları değiştirilmemeli."""
+        error = {"query": "x", "error": "bulunamadı"}
+        assert shape_search_result(error, "x") is error
+    
+    def test_original_not_mutated(self):
+        """Orijinal sonuç (önbellekteki kopya) değişmemeli."""
+        shape_search_result(RESULT, "ticaret", max_chars=100)
+        assert RESULT["result"]["sections"][2]["content"].startswith("Liman")
+        assert len(RESULT["result"]["sections"][2]["content"]) > 100
+
+
+
+class TestOutlineSearchResult:
+    """outline_search_result fonksiyonu için testler."""
+    
+    def test_outline_only(self):
+        """Bölüm içerikleri yerine yalnızca içindekiler dönmeli."""
+        shaped = outline_search_result(RESULT)
+        data = shaped["result"]
+        assert "sections" not in data
+        assert data["outline"] == ["Tarih", "Tarih / Osmanlı dönemi", "Coğrafya", "Ekonomi"]
+        assert data["summary"] == RESULT["result"]["summary"]
+        assert shaped["shaping"]["saved_bytes"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,315 @@
+"""
+Session Backend Tests.
+Oturum kalıcılık katmanlarının birim testleri.
+"""
+
+import pytest
+import sys
+import os
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.history import ConversationHistory
+from src.sessions.backends import (
+    MemoryBackend, SQLiteBackend, RedisBackend, SessionBackend, SessionConflict, create_backend, encode, decode
+)
+from src.sessions.store import SessionStore
+
+
+class FakeChatbot:
+    """Geçmişi ve kullanıcı verisi olan sahte sohbet nesnesi."""
+    
+    def __init__(self):
+        self.history = ConversationHistory(token_budget=1000)
+        self.user_data = {"calculations": [], "notes": []}
+    
+    @property
+    def messages(self):
+        return self.history.messages
+    
+    def reset_history(self):
+        self.history.clear()
+        self.user_data = {"calculations": [], "notes": []}
+
+
+def user(text):
+    return {"role": "user", "parts": [{"text": text}]}
+
+
+def model(text):
+    return {"role": "model", "parts": [{"text": text}]}
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "sessions.db"))
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisBackend(fakeredis.FakeRedis())
+
+
+class TestEncoding:
+    """Kodlama yardımcıları için testler."""
+    
+    def test_roundtrip_small_and_large(self):
+        """Küçük ve sıkıştırılmış kayıtlar aynı değere çözülmeli."""
+        small = user("Merhaba")
+        large = user("ğ" * 5000)
+        assert decode(encode(small)) == small
+        assert encode(large)[:1] == b"z"
+        assert decode(encode(large)) == large
+
+
+class TestBackends:
+    """Tüm katmanlar için ortak davranış testleri."""
+    
+    def test_append_and_load_from_offset(self, backend):
+        """Mesajlar sırayla eklenmeli ve ofsetten okunabilmeli."""
+        backend.append_messages("c1", [user("a"), model("b")])
+        backend.append_messages("c1", [user("c")])
+        
+        assert backend.length("c1") == 3
+        assert backend.load_messages("c1") == [user("a"), model("b"), user("c")]
+        assert backend.load_messages("c1", 2) == [user("c")]
+        assert backend.length("other") == 0
+    
+    def test_user_data_and_delete(self, backend):
+        """Kullanıcı verisi saklanmalı ve silme tüm kayıtları temizlemeli."""
+        assert backend.load_user_data("c1") is None
+        backend.save_user_data("c1", {"notes": ["x"]})
+        backend.append_messages("c1", [user("a")])
+        assert backend.load_user_data("c1") == {"notes": ["x"]}
+        
+        backend.delete("c1")
+        assert backend.length("c1") == 0
+        assert backend.load_user_data("c1") is None
+
+    
+    def test_delete_bumps_generation(self, backend):
+        """Silme sohbetin neslini artırmalı."""
+        assert backend.state("c1") == (0, 0)
+        backend.append_messages("c1", [user("a")])
+        assert backend.state("c1") == (0, 1)
+        backend.delete("c1")
+        assert backend.state("c1") == (1, 0)
+    
+    def test_conditional_append(self, backend):
+        """Beklenen uzunluk veya nesil tutmazsa ekleme reddedilmeli."""
+        backend.append_messages("c1", [user("a")], expected_length=0, generation=0)
+        with pytest.raises(SessionConflict):
+            backend.append_messages("c1", [user("b")], expected_length=0, generation=0)
+        backend.delete("c1")
+        with pytest.raises(SessionConflict):
+            backend.append_messages("c1", [user("b")], expected_length=0, generation=0)
+        assert backend.length("c1") == 0
+
+
+class TestBackendInterface:
+    """SessionBackend arayüzü için testler."""
+    
+    def test_abstract(self):
+        """Arayüz doğrudan veya eksik uygulamayla örneklenememeli."""
+        with pytest.raises(TypeError):
+            SessionBackend()
+        
+        class Partial(SessionBackend):
+            def length(self, chat_id):
+                return 0
+        
+        with pytest.raises(TypeError):
+            Partial()
+
+
+class FakeClock:
+    """Elle ilerletilen saat."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestMemoryGenerations:
+    """MemoryBackend nesil kayıtlarının budanması."""
+    
+    def make_backend(self):
+        self.clock = FakeClock()
+        return MemoryBackend(generation_ttl=100, clock=self.clock)
+    
+    def test_unused_chats_keep_no_entry(self):
+        """Hiç sıfırlanmamış sohbetler için nesil kaydı tutulmamalı."""
+        backend = self.make_backend()
+        backend.append_messages("c1", [user("a")], expected_length=0, generation=0)
+        backend.save_user_data("c1", {"notes": []})
+        with pytest.raises(SessionConflict):
+            backend.append_messages("c2", [user("a")], expected_length=1)
+        assert backend._generations == {}
+        assert "c2" not in backend._messages
+    
+    def test_expired_generation_dropped(self):
+        """Sıfırlanıp yazılmayan sohbetin nesli süre dolunca düşürülmeli."""
+        backend = self.make_backend()
+        backend.delete("c1")
+        assert backend.state("c1") == (1, 0)
+        self.clock.now = 100
+        backend.delete("c2")
+        assert list(backend._generations) == ["c2"]
+        assert backend.state("c1") == (0, 0)
+    
+    def test_writes_keep_generation(self):
+        """Yazılmaya devam eden sohbetin nesli düşürülmemeli."""
+        backend = self.make_backend()
+        backend.delete("c1")
+        for step in range(1, 4):
+            self.clock.now = step * 60
+            backend.append_messages("c1", [user("a")], generation=1)
+        backend.delete("c2")
+        assert backend.state("c1") == (1, 3)
+    
+    def test_generation_not_reused(self):
+        """Düşürülen nesil aynı sohbet için tekrar verilmemeli."""
+        backend = self.make_backend()
+        backend.delete("c1")
+        self.clock.now = 100
+        backend.delete("c2")
+        backend.delete("c1")
+        assert backend.state("c1")[0] == 3
+        assert len(backend._generations) == 2
+
+
+class TestCreateBackend:
+    """create_backend fonksiyonu için testler."""
+    
+    def test_urls(self, tmp_path):
+        """URL şemasına göre doğru katman üretilmeli."""
+        assert create_backend("") is None
+        assert isinstance(create_backend("memory://"), MemoryBackend)
+        assert isinstance(create_backend(f"sqlite:///{tmp_path / 's.db'}"), SQLiteBackend)
+    
+    def test_unknown_scheme(self):
+        """Bilinmeyen şema hata vermeli."""
+        with pytest.raises(ValueError):
+            create_backend("ftp://example")
+
+
+class TestSharedStore:
+    """Aynı katmanı paylaşan iki worker senaryosu."""
+    
+    def make_store(self, backend):
+        return SessionStore(factory=FakeChatbot, max_sessions=10, idle_ttl=60,
+                            max_bytes=10 ** 6, backend=backend)
+    
+    def test_two_workers_share_history(self, tmp_path):
+        """Bir worker'ın eklediği tur diğerinde görünmeli."""
+        backend = SQLiteBackend(str(tmp_path / "sessions.db"))
+        worker_a, worker_b = self.make_store(backend), self.make_store(backend)
+        
+        session_a = worker_a.get_or_create("c1")
+        worker_a.load(session_a)
+        session_a.chatbot.history.extend([user("soru 1"), model("cevap 1")])
+        session_a.chatbot.user_data["notes"].append("not")
+        worker_a.persist(session_a)
+        
+        session_b = worker_b.get_or_create("c1")
+        worker_b.load(session_b)
+        assert session_b.chatbot.messages == [user("soru 1"), model("cevap 1")]
+        assert session_b.chatbot.user_data["notes"] == ["not"]
+        
+        session_b.chatbot.history.extend([user("soru 2"), model("cevap 2")])
+        worker_b.persist(session_b)
+        
+        # Worker A yalnızca eksik mesajları okumalı
+        worker_a.load(session_a)
+        assert len(session_a.chatbot.messages) == 4
+        assert session_a.persisted == 4
+        assert backend.length("c1") == 4
+    
+    def test_reset_propagates(self, tmp_path):
+        """Bir worker'daki sıfırlama diğerinde eski geçmişi silmeli."""
+        backend = SQLiteBackend(str(tmp_path / "sessions.db"))
+        worker_a, worker_b = self.make_store(backend), self.make_store(backend)
+        
+        session_a = worker_a.get_or_create("c1")
+        session_a.chatbot.history.extend([user("a"), model("b")])
+        worker_a.persist(session_a)
+        session_b = worker_b.get_or_create("c1")
+        worker_b.load(session_b)
+        
+        worker_a.reset(session_a)
+        session_a.chatbot.history.append(user("yeni"))
+        worker_a.persist(session_a)
+        
+        worker_b.load(session_b)
+        assert session_b.chatbot.messages == [user("yeni")]
+    
+    def test_reset_then_longer_history(self, tmp_path):
+        """Sıfırlanıp eskisinden uzun dolan sohbet eski geçmişe eklenmemeli."""
+        backend = SQLiteBackend(str(tmp_path / "sessions.db"))
+        worker_a, worker_b = self.make_store(backend), self.make_store(backend)
+        
+        session_a = worker_a.get_or_create("c1")
+        session_a.chatbot.history.extend([user("eski 1"), model("eski 2")])
+        worker_a.persist(session_a)
+        
+        session_b = worker_b.get_or_create("c1")
+        worker_b.load(session_b)
+        worker_b.reset(session_b)
+        session_b.chatbot.history.extend([user("yeni 1"), model("yeni 2"), user("yeni 3"), model("yeni 4")])
+        worker_b.persist(session_b)
+        
+        worker_a.load(session_a)
+        assert session_a.chatbot.messages == session_b.chatbot.messages
+        assert session_a.persisted == 4
+    
+    def test_concurrent_turns_not_interleaved(self):
+        """Aynı anda tur yazan iki worker'ın mesajları iç içe geçmemeli."""
+        backend = MemoryBackend()
+        worker_a, worker_b = self.make_store(backend), self.make_store(backend)
+        session_a, session_b = worker_a.get_or_create("c1"), worker_b.get_or_create("c1")
+        worker_a.load(session_a)
+        worker_b.load(session_b)
+        
+        session_a.chatbot.history.extend([user("a soru"), model("a cevap")])
+        session_b.chatbot.history.extend([user("b soru"), model("b cevap")])
+        worker_a.persist(session_a)
+        worker_b.persist(session_b)
+        
+        expected = [user("a soru"), model("a cevap"), user("b soru"), model("b cevap")]
+        assert backend.load_messages("c1") == expected
+        assert session_b.chatbot.messages == expected
+        assert session_b.persisted == 4
+    
+    def test_turn_dropped_after_remote_reset(self):
+        """Başka yerde sıfırlanan sohbete eski turun mesajları yazılmamalı."""
+        backend = MemoryBackend()
+        worker_a, worker_b = self.make_store(backend), self.make_store(backend)
+        session_a, session_b = worker_a.get_or_create("c1"), worker_b.get_or_create("c1")
+        session_a.chatbot.history.extend([user("a"), model("b")])
+        worker_a.persist(session_a)
+        worker_b.load(session_b)
+        
+        session_a.chatbot.history.extend([user("c"), model("d")])
+        worker_b.reset(session_b)
+        worker_a.persist(session_a)
+        
+        assert backend.length("c1") == 0
+        assert session_a.chatbot.messages == []
+    
+    def test_delete_removes_backend_records(self):
+        """Oturum silme katmandaki kayıtları da silmeli."""
+        backend = MemoryBackend()
+        store = self.make_store(backend)
+        session = store.get_or_create("c1")
+        session.chatbot.history.append(user("a"))
+        store.persist(session)
+        
+        store.delete("c1")
+        assert backend.length("c1") == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,139 @@
+"""
+Session Store Tests.
+Oturum deposunun birim testleri.
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.sessions.store import SessionStore
+
+
+class FakeChatbot:
+    """Boyutu elle ayarlanan sahte sohbet nesnesi."""
+    
+    def __init__(self):
+        self.size = 10
+
+
+def make_store(**overrides):
+    options = dict(factory=FakeChatbot, max_sessions=3, idle_ttl=60, max_bytes=1000,
+                   size_fn=lambda chatbot: chatbot.size)
+    options.update(overrides)
+    return SessionStore(**options)
+
+
+class TestSessionStore:
+    """SessionStore sınıfı için testler."""
+    
+    def test_get_or_create_reuses_session(self):
+        """Aynı chat_id aynı oturumu döndürmeli."""
+        store = make_store()
+        assert store.get_or_create("a") is store.get_or_create("a")
+        assert store.stats()["created"] == 1
+    
+    def test_lru_eviction_uses_recency(self):
+        """Tahliye ekleme sırasına değil son erişime göre yapılmalı."""
+        store = make_store()
+        for chat_id in ("a", "b", "c"):
+            store.get_or_create(chat_id)
+        store.get("a")  # a en son kullanılan
+        store.get_or_create("d")
+        
+        assert "a" in store
+        assert "b" not in store
+        assert store.stats()["evictions"] == 1
+    
+    def test_busy_session_not_evicted(self):
+        """Turu süren oturum sınır aşılsa da tahliye edilmemeli."""
+        store = make_store(max_sessions=2)
+        busy = store.get_or_create("a")
+        busy.lock.acquire()
+        try:
+            for chat_id in ("b", "c", "d"):
+                store.get_or_create(chat_id)
+            assert store.get("a") is busy
+            assert "b" not in store and "c" not in store
+            assert len(store) == 2
+        finally:
+            busy.lock.release()
+        
+        # Tur bitince normal LRU sırasına döner
+        store.get_or_create("e")
+        assert len(store) == 2
+    
+    def test_busy_session_not_expired(self):
+        """Turu süren oturumun süresi dolsa da silinmemeli."""
+        store = make_store(idle_ttl=0.01)
+        busy = store.get_or_create("a")
+        with busy.lock:
+            time.sleep(0.02)
+            store.get_or_create("b")
+            assert store.get("a") is busy
+    
+    def test_idle_ttl_expiry(self):
+        """Boşta kalan oturum silinmeli."""
+        store = make_store(idle_ttl=0.01)
+        store.get_or_create("a")
+        time.sleep(0.02)
+        assert store.get("a") is None
+        assert store.stats()["expirations"] == 1
+    
+    def test_memory_budget(self):
+        """Bellek bütçesi aşılınca en eski oturum tahliye edilmeli."""
+        store = make_store(max_sessions=10, max_bytes=100)
+        first = store.get_or_create("a")
+        second = store.get_or_create("b")
+        first.chatbot.size = 60
+        store.record_size(first)
+        second.chatbot.size = 60
+        store.record_size(second)
+        
+        assert "b" in store
+        assert "a" not in store
+        assert store.stats()["memory_estimate_bytes"] == 60
+    
+    def test_delete(self):
+        """delete oturumu kaldırmalı."""
+        store = make_store()
+        store.get_or_create("a")
+        assert store.delete("a") is True
+        assert store.delete("a") is False
+        assert len(store) == 0
+    
+    def test_concurrent_create_single_session(self):
+        """Eşzamanlı isteklerde tek oturum oluşmalı."""
+        store = make_store(max_sessions=100)
+        barrier = threading.Barrier(16)
+        sessions = []
+        
+        def worker():
+            barrier.wait()
+            sessions.append(store.get_or_create("ortak"))
+        
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert len({id(s) for s in sessions}) == 1
+        assert len(store) == 1
+    
+    def test_stats_has_no_chat_ids(self):
+        """İstatistikler sohbet kimliklerini içermemeli."""
+        store = make_store()
+        store.get_or_create("gizli-id")
+        stats = store.stats()
+        assert "gizli-id" not in str(stats)
+        assert stats["active_sessions"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,500 @@
+"""
+Streaming Tests.
+Akış birleştirici ve SSE yardımcılarının birim testleri.
+"""
+
+import pytest
+import sys
+import os
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import threading
+import time
+
+from src.streaming import (
+    ChunkCoalescer, SSEEncoder, encode_events, format_event,
+    CancelToken, ReplayBuffer, StreamRegistry, parse_event_id, pump, pump_async
+)
+
+
+class FakeClock:
+    """Elle ilerletilen saat."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestChunkCoalescer:
+    """ChunkCoalescer sınıfı için testler."""
+    
+    def test_first_chunk_immediate(self):
+        """İlk parça beklemeden gönderilmeli."""
+        coalescer = ChunkCoalescer(min_bytes=100, max_delay=1.0, clock=FakeClock())
+        assert coalescer.push("Merhaba") == "Merhaba"
+    
+    def test_small_chunks_buffered(self):
+        """Eşik altındaki parçalar birleştirilmeli."""
+        coalescer = ChunkCoalescer(min_bytes=10, max_delay=1.0, clock=FakeClock())
+        coalescer.push("a")
+        assert coalescer.push("bc") is None
+        assert coalescer.push("def") is None
+        assert coalescer.push("ghijk") == "bcdefghijk"
+    
+    def test_time_window_flush(self):
+        """Zaman penceresi dolunca eşik altı tampon da gönderilmeli."""
+        clock = FakeClock()
+        coalescer = ChunkCoalescer(min_bytes=1000, max_delay=0.05, clock=clock)
+        coalescer.push("ilk")
+        assert coalescer.push("x") is None
+        clock.now = 0.06
+        assert coalescer.push("y") == "xy"
+    
+    def test_byte_threshold_counts_utf8(self):
+        """Eşik UTF-8 bayt üzerinden hesaplanmalı."""
+        coalescer = ChunkCoalescer(min_bytes=4, max_delay=1.0, clock=FakeClock())
+        coalescer.push("-")
+        assert coalescer.push("ğ") is None
+        assert coalescer.push("ş") == "ğş"
+    
+    def test_flush(self):
+        """flush kalan tamponu boşaltmalı."""
+        coalescer = ChunkCoalescer(min_bytes=100, max_delay=1.0, clock=FakeClock())
+        coalescer.push("a")
+        coalescer.push("b")
+        assert coalescer.flush() == "b"
+        assert coalescer.flush() is None
+    
+    def test_empty_ignored(self):
+        """Boş parça yok sayılmalı."""
+        coalescer = ChunkCoalescer(min_bytes=100, max_delay=1.0, clock=FakeClock())
+        assert coalescer.push("") is None
+        assert coalescer.flush() is None
+    
+    def test_poll_without_push(self):
+        """Yeni parça gelmese de süre dolunca poll tamponu boşaltmalı."""
+        clock = FakeClock()
+        coalescer = ChunkCoalescer(min_bytes=100, max_delay=1.0, clock=clock)
+        coalescer.push("a")
+        assert coalescer.time_left() is None
+        coalescer.push("b")
+        clock.now = 0.4
+        assert coalescer.time_left() == pytest.approx(0.6)
+        assert coalescer.poll() is None
+        clock.now = 1.0
+        assert coalescer.time_left() == 0.0
+        assert coalescer.poll() == "b"
+        assert coalescer.time_left() is None
+        assert coalescer.poll() is None
+
+
+def parse_frames(text):
+    """SSE metnini (olay adı, veri) listesine ayırır."""
+    events = []
+    for block in text.split("\n\n"):
+        if not block:
+            continue
+        name, data = "message", []
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                name = line[7:]
+            elif line.startswith("data: "):
+                data.append(line[6:])
+        events.append((name, "\n".join(data)))
+    return events
+
+
+class TestSSEEncoder:
+    """SSE kodlayıcı için testler."""
+    
+    def make_encoder(self, clock=None):
+        return SSEEncoder(flush_bytes=16, flush_interval=1.0, clock=clock or FakeClock())
+    
+    def test_delta_without_json(self):
+        """Metin parçaları JSON zarfı olmadan delta olayıyla gönderilmeli."""
+        frame = self.make_encoder().encode({"type": "content", "content": "Merhaba"})
+        assert frame == "event: delta\ndata: Merhaba\n\n"
+    
+    def test_multiline_delta(self):
+        """Çok satırlı metin birden fazla data satırına bölünmeli."""
+        assert parse_frames(format_event("delta", "a\nb\r\nc")) == [("delta", "a\nb\nc")]
+    
+    def test_deltas_batched(self):
+        """Küçük parçalar tek çerçevede toplanmalı."""
+        encoder = self.make_encoder()
+        assert encoder.encode({"type": "content", "content": "İlk"})
+        for part in ["ab", "cd", "ef"]:
+            assert encoder.encode({"type": "content", "content": part}) == ""
+        tail = encoder.finish()
+        assert parse_frames(tail) == [("delta", "abcdef"), ("end", "{}")]
+    
+    def test_time_window_flush(self):
+        """Süre dolunca tampon gönderilmeli."""
+        clock = FakeClock()
+        encoder = self.make_encoder(clock)
+        encoder.encode({"type": "content", "content": "x"})
+        assert encoder.encode({"type": "content", "content": "a"}) == ""
+        clock.now = 1.5
+        assert parse_frames(encoder.encode({"type": "content", "content": "b"})) == [("delta", "ab")]
+    
+    def test_poll_frames_without_push(self):
+        """Üretici beklerken süre dolunca metin yeni chunk gelmeden çerçevelenmeli."""
+        clock = FakeClock()
+        encoder = self.make_encoder(clock)
+        encoder.encode({"type": "content", "content": "x"})
+        encoder.encode({"type": "content", "content": "a"})
+        assert encoder.poll_frames() == []
+        clock.now = 1.0
+        assert parse_frames(encoder.poll_frames()[0][1]) == [("delta", "a")]
+        assert encoder.time_left() is None
+        assert parse_frames(encoder.finish()) == [("end", "{}")]
+    
+    def test_structured_event_flushes_text(self):
+        """Yapısal olay öncesinde bekleyen metin gönderilmeli."""
+        encoder = self.make_encoder()
+        encoder.encode({"type": "content", "content": "x"})
+        encoder.encode({"type": "content", "content": "y"})
+        frames = parse_frames(encoder.encode({"type": "function_call", "function": "calculate", "args": {"expression": "2+2"}}))
+        assert frames[0] == ("delta", "y")
+        assert frames[1][0] == "function_call"
+        assert json.loads(frames[1][1]) == {"function": "calculate", "args": {"expression": "2+2"}}
+    
+    def test_single_terminal_event(self):
+        """end olayı yalnızca bir kez gönderilmeli."""
+        encoder = self.make_encoder()
+        first = encoder.encode({"type": "end"})
+        assert parse_frames(first) == [("end", "{}")]
+        assert encoder.encode({"type": "content", "content": "geç"}) == ""
+        assert encoder.finish() == ""
+        assert encoder.terminated
+    
+    def test_error_is_terminal(self):
+        """error olayından sonra end gönderilmemeli."""
+        encoder = self.make_encoder()
+        frame = encoder.encode({"type": "error", "error": "Hata ğ"})
+        assert parse_frames(frame) == [("error", '{"error":"Hata ğ"}')]
+        assert encoder.finish() == ""
+    
+    def test_encode_events_adds_end(self):
+        """end içermeyen akış tek bir end ile kapanmalı."""
+        text = "".join(encode_events(iter([{"type": "content", "content": "a"}]), self.make_encoder()))
+        assert [name for name, _ in parse_frames(text)] == ["delta", "end"]
+    
+    def test_encode_events_no_duplicate_end(self):
+        """Akışın kendi end olayı tekrarlanmamalı."""
+        events = [{"type": "content", "content": "a"}, {"type": "end"}]
+        text = "".join(encode_events(iter(events), self.make_encoder()))
+        assert [name for name, _ in parse_frames(text)].count("end") == 1
+    
+    def test_encode_events_error(self):
+        """Akış hata verirse tek bir error olayıyla kapanmalı."""
+        def broken():
+            yield {"type": "content", "content": "a"}
+            raise RuntimeError("koptu")
+        
+        names = [name for name, _ in parse_frames("".join(encode_events(broken(), self.make_encoder())))]
+        assert names == ["delta", "error"]
+
+
+def frame_ids(text):
+    """SSE metnindeki olay kimliklerini döndürür."""
+    return [line[4:] for line in text.split("\n") if line.startswith("id: ")]
+
+
+class TestReplayBuffer:
+    """Yeniden oynatma tamponu için testler."""
+    
+    def make_buffer(self, max_bytes=1 << 20):
+        return ReplayBuffer("chat", "t1", max_bytes)
+    
+    def fill(self, buffer, parts):
+        encoder = SSEEncoder(flush_bytes=0, flush_interval=0, id_prefix=buffer.id_prefix)
+        pump(iter([{"type": "content", "content": p} for p in parts]), encoder, buffer)
+        buffer.close()
+    
+    def test_parse_event_id(self):
+        """Olay kimliği tur ve sıraya ayrılmalı."""
+        assert parse_event_id("abc:12") == ("abc", 12)
+        assert parse_event_id(" abc:3 ") == ("abc", 3)
+        assert parse_event_id("abc") is None
+        assert parse_event_id("abc:x") is None
+        assert parse_event_id(None) is None
+    
+    def test_frames_carry_ids(self):
+        """Her çerçeve tur önekli sıra numarası taşımalı."""
+        buffer = self.make_buffer()
+        self.fill(buffer, ["a", "b"])
+        text = "".join(buffer.follow())
+        assert frame_ids(text) == ["t1:1", "t1:2", "t1:3"]
+        assert [name for name, _ in parse_frames(text)] == ["delta", "delta", "end"]
+    
+    def test_resume_after_id(self):
+        """Verilen sıradan sonra yalnızca eksik çerçeveler gönderilmeli."""
+        buffer = self.make_buffer()
+        self.fill(buffer, ["a", "b", "c"])
+        text = "".join(buffer.follow(2))
+        assert parse_frames(text) == [("delta", "c"), ("end", "{}")]
+    
+    def test_single_terminal_on_error(self):
+        """Akış hata verirse tampon tek bir error olayıyla bitmeli."""
+        def broken():
+            yield {"type": "content", "content": "a"}
+            raise RuntimeError("koptu")
+        
+        buffer = self.make_buffer()
+        pump(broken(), SSEEncoder(flush_bytes=0, flush_interval=0, id_prefix=buffer.id_prefix), buffer)
+        buffer.close()
+        names = [name for name, _ in parse_frames("".join(buffer.follow()))]
+        assert names == ["delta", "error"]
+    
+    def test_gap_after_budget(self):
+        """Düşürülmüş çerçevelerden devam istenirse hata olayı gönderilmeli."""
+        buffer = self.make_buffer(max_bytes=60)
+        self.fill(buffer, ["a" * 20, "b" * 20, "c" * 20])
+        frames = parse_frames("".join(buffer.follow(0)))
+        assert frames[0][0] == "error"
+        assert len(frames) == 1
+        assert parse_frames("".join(buffer.follow(3)))[-1][0] == "end"
+    
+    def test_follow_waits_for_producer(self):
+        """Takipçi üretici yazdıkça çerçeveleri almalı."""
+        buffer = self.make_buffer()
+        encoder = SSEEncoder(flush_bytes=0, flush_interval=0, id_prefix=buffer.id_prefix)
+        received = []
+        reader = threading.Thread(target=lambda: received.extend(buffer.follow()))
+        reader.start()
+        buffer.append(encoder.encode_frames({"type": "content", "content": "a"}))
+        buffer.append(encoder.finish_frames())
+        buffer.close()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+        assert [name for name, _ in parse_frames("".join(received))] == ["delta", "end"]
+    
+    def test_follow_async(self):
+        """asyncio takipçisi de aynı çerçeveleri almalı."""
+        async def events():
+            yield {"type": "content", "content": "a"}
+            yield {"type": "content", "content": "b"}
+        
+        async def run():
+            buffer = self.make_buffer()
+            encoder = SSEEncoder(flush_bytes=0, flush_interval=0, id_prefix=buffer.id_prefix)
+            
+            async def produce():
+                await pump_async(events(), encoder, buffer)
+                buffer.close()
+            
+            task = asyncio.create_task(produce())
+            received = [frame async for frame in buffer.follow_async(1)]
+            await task
+            return "".join(received)
+        
+        assert parse_frames(asyncio.run(run())) == [("delta", "b"), ("end", "{}")]
+    
+    def test_pump_flushes_while_producer_idle(self):
+        """Üretici beklerken birleştirilen metin zaman penceresi sonunda tampona yazılmalı."""
+        buffer = self.make_buffer()
+        encoder = SSEEncoder(flush_bytes=1000, flush_interval=0.05, id_prefix=buffer.id_prefix)
+        release = threading.Event()
+        
+        def events():
+            yield {"type": "content", "content": "a"}
+            yield {"type": "content", "content": "b"}
+            release.wait(5)
+            yield {"type": "content", "content": "c"}
+        
+        producer = threading.Thread(target=pump, args=(events(), encoder, buffer))
+        producer.start()
+        deadline = time.monotonic() + 5
+        while len(buffer._frames) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        frames = [frame for _, frame in buffer._frames]
+        release.set()
+        producer.join(5)
+        buffer.close()
+        assert [parse_frames(f)[0] for f in frames] == [("delta", "a"), ("delta", "b")]
+        assert [name for name, _ in parse_frames("".join(buffer.follow()))] == ["delta", "delta", "delta", "end"]
+    
+    def test_pump_async_flushes_while_producer_idle(self):
+        """asyncio üreticisi beklerken de bekleyen metin gönderilmeli."""
+        async def run():
+            buffer = self.make_buffer()
+            encoder = SSEEncoder(flush_bytes=1000, flush_interval=0.05, id_prefix=buffer.id_prefix)
+            release = asyncio.Event()
+            
+            async def events():
+                yield {"type": "content", "content": "a"}
+                yield {"type": "content", "content": "b"}
+                await release.wait()
+                yield {"type": "content", "content": "c"}
+            
+            task = asyncio.create_task(pump_async(events(), encoder, buffer))
+            await asyncio.sleep(0.2)
+            during = [parse_frames(frame)[0] for _, frame in buffer._frames]
+            release.set()
+            await task
+            buffer.close()
+            return during, [name for name, _ in parse_frames("".join(buffer.follow()))]
+        
+        during, names = asyncio.run(run())
+        assert during == [("delta", "a"), ("delta", "b")]
+        assert names == ["delta", "delta", "delta", "end"]
+    
+    def test_pump_async_cancel_reaches_producer(self):
+        """Zaman aşımıyla beklerken iptal üreticiye iletilmeli."""
+        async def run():
+            buffer = self.make_buffer()
+            encoder = SSEEncoder(flush_bytes=1000, flush_interval=10, id_prefix=buffer.id_prefix)
+            cleaned = []
+            
+            async def events():
+                try:
+                    yield {"type": "content", "content": "a"}
+                    yield {"type": "content", "content": "b"}
+                    await asyncio.sleep(10)
+                finally:
+                    cleaned.append(True)
+            
+            task = asyncio.create_task(pump_async(events(), encoder, buffer))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return cleaned
+        
+        assert asyncio.run(run()) == [True]
+
+
+class TestCancelToken:
+    """İptal işareti için testler."""
+    
+    def test_callbacks_run_once(self):
+        """Geri çağrılar ilk iptalde bir kez çalışmalı."""
+        token = CancelToken()
+        calls = []
+        token.add_callback(lambda: calls.append(1))
+        assert token.cancel("superseded")
+        assert not token.cancel()
+        assert calls == [1]
+        assert token.cancelled and token.reason == "superseded"
+    
+    def test_late_callback_runs_immediately(self):
+        """İptalden sonra eklenen geri çağrı hemen çalışmalı."""
+        token = CancelToken()
+        token.cancel()
+        calls = []
+        token.add_callback(lambda: calls.append(1))
+        assert calls == [1]
+    
+    def test_removed_callback_not_called(self):
+        """Kaldırılan geri çağrı çalışmamalı; hatalı geri çağrı diğerlerini engellememeli."""
+        token = CancelToken()
+        calls = []
+        callback = lambda: calls.append("kaldırıldı")
+        token.add_callback(callback)
+        token.add_callback(lambda: 1 / 0)
+        token.add_callback(lambda: calls.append("çalıştı"))
+        token.remove_callback(callback)
+        token.cancel()
+        assert calls == ["çalıştı"]
+    
+    def test_wait(self):
+        """wait başka iş parçacığından iptal edilince dönmeli."""
+        token = CancelToken()
+        assert not token.wait(0.01)
+        threading.Timer(0.01, token.cancel).start()
+        assert token.wait(5)
+
+
+class TestDisconnectGrace:
+    """Takipçisiz kalan turların iptali için testler."""
+    
+    def test_abandoned_turn_cancelled(self):
+        """Son takipçi ayrılıp kimse dönmezse tur iptal edilmeli."""
+        buffer = ReplayBuffer("chat", "t1", 1024, disconnect_grace=0)
+        follower = buffer.follow()
+        buffer.append([(1, "id: t1:1\nevent: delta\ndata: a\n\n")])
+        next(follower)
+        assert buffer.followers == 1
+        follower.close()
+        assert buffer.followers == 0
+        assert buffer.cancel_token.wait(5)
+        assert buffer.cancel_token.reason == "disconnected"
+    
+    def test_reconnect_keeps_turn(self):
+        """Bekleme süresinde yeniden bağlanılırsa tur sürmeli."""
+        buffer = ReplayBuffer("chat", "t1", 1024, disconnect_grace=0.05)
+        buffer.append([(1, "id: t1:1\nevent: delta\ndata: a\n\n")])
+        first = buffer.follow()
+        next(first)
+        first.close()
+        second = buffer.follow(1)
+        buffer.append([(2, "id: t1:2\nevent: delta\ndata: b\n\n")])
+        next(second)
+        assert not buffer.cancel_token.wait(0.2)
+        second.close()
+    
+    def test_finished_turn_not_cancelled(self):
+        """Biten tur takipçi ayrılınca iptal edilmemeli."""
+        buffer = ReplayBuffer("chat", "t1", 1024, disconnect_grace=0)
+        buffer.append([(1, "id: t1:1\nevent: end\ndata: {}\n\n")])
+        buffer.close()
+        assert list(buffer.follow())
+        assert not buffer.cancel_token.wait(0.05)
+    
+    def test_disabled_grace(self):
+        """Bekleme süresi verilmezse tur istemcisiz de sürmeli."""
+        buffer = ReplayBuffer("chat", "t1", 1024)
+        follower = buffer.follow()
+        buffer.append([(1, "id: t1:1\nevent: delta\ndata: a\n\n")])
+        next(follower)
+        follower.close()
+        assert not buffer.cancel_token.wait(0.05)
+
+
+class TestStreamRegistry:
+    """Tampon kaydı için testler."""
+    
+    def test_open_and_get(self):
+        """Açılan tampon sohbet ve tur kimliğiyle bulunmalı."""
+        registry = StreamRegistry(max_bytes=1024, ttl=60)
+        buffer = registry.open("chat")
+        assert registry.get("chat", buffer.turn_id) is buffer
+        assert registry.get("başka", buffer.turn_id) is None
+        assert registry.stats()["active"] == 1
+    
+    def test_finished_buffer_expires(self):
+        """Biten tur ttl sonunda silinmeli, süren tur silinmemeli."""
+        registry = StreamRegistry(max_bytes=1024, ttl=0)
+        finished = registry.open("chat")
+        running = registry.open("chat")
+        finished.close()
+        assert registry.get("chat", finished.turn_id) is None
+        assert registry.get("chat", running.turn_id) is running
+    
+    def test_cancel(self):
+        """Sohbetin yalnızca süren turları iptal edilmeli."""
+        registry = StreamRegistry(max_bytes=1024, ttl=60)
+        first = registry.open("chat")
+        second = registry.open("chat")
+        other = registry.open("başka")
+        finished = registry.open("chat")
+        finished.close()
+        
+        assert registry.cancel("chat", first.turn_id) == [first.turn_id]
+        assert registry.cancel("chat", first.turn_id) == []
+        assert registry.cancel("chat", reason="superseded") == [second.turn_id]
+        assert second.cancel_token.reason == "superseded"
+        assert not other.cancel_token.cancelled
+        assert not finished.cancel_token.cancelled
+        assert registry.stats()["cancelled"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
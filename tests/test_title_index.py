@@ -0,0 +1,224 @@
+"""
+Title Index Tests.
+Başlık çözümleme indeksinin birim testleri.
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import title_index, wikipedia
+from src.services.title_index import TitleIndex
+from src.services.textnorm import fold, fold_ascii
+
+TITLES = [
+    "İstanbul",
+    "İstanbul Boğazı",
+    "Istanbul (film)",
+    "Ankara",
+    "Mustafa Kemal Atatürk",
+    "Atatürk",
+    "Iğdır",
+    "Şişli",
+    "Çanakkale Savaşı",
+    "Ağrı Dağı",
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    built = TitleIndex.build(TITLES, str(tmp_path / "titles.idx"))
+    yield built
+    built.close()
+
+
+class TestTitleIndex:
+    """TitleIndex sınıfı için testler."""
+    
+    def test_exact_folded_match(self, index):
+        """Türkçe büyük/küçük harf farkı tam eşleşme sayılmalı."""
+        assert index.get("istanbul") == "İstanbul"
+        assert index.get("IĞDIR") == "Iğdır"
+        assert index.get("şişli") == "Şişli"
+    
+    def test_missing(self, index):
+        """Olmayan başlık None döndürmeli."""
+        assert index.get("Paris") is None
+    
+    def test_prefix(self, index):
+        """Önek araması aksan duyarsız ve sıralı olmalı."""
+        assert index.prefix("istanbul b") == ["İstanbul Boğazı"]
+        assert index.prefix("istanbul") == ["İstanbul", "Istanbul (film)", "İstanbul Boğazı"]
+        assert index.prefix("canakkale") == ["Çanakkale Savaşı"]
+    
+    def test_get_keeps_diacritics(self, index):
+        """get tam katlanmış eşleşme istemeli; aksansız yazım eşleşmemeli."""
+        assert index.get("Istanbul (film)") == "Istanbul (film)"
+        assert index.get("sisli") is None
+    
+    @pytest.mark.parametrize("query,title", [
+        ("Sisli", "Şişli"),
+        ("Agri Dagi", "Ağrı Dağı"),
+        ("ataturk", "Atatürk"),
+        ("IGDIR", "Iğdır"),
+    ])
+    def test_ascii_query(self, index, query, title):
+        """Türkçe karakterler olmadan yazılan sorgu eşiği geçmeli."""
+        best = index.search(query)[0]
+        assert best["title"] == title
+        assert best["score"] >= 0.6
+        assert index.resolve(query, threshold=0.6)["match"] == title
+    
+    def test_exact_ranks_above_ascii(self, tmp_path):
+        """Aksanları da tutan başlık aksansız eşinin önüne geçmeli."""
+        built = TitleIndex.build(["Sisli", "Şişli"], str(tmp_path / "t.idx"))
+        assert [r["title"] for r in built.search("Şişli")] == ["Şişli", "Sisli"]
+        assert [r["title"] for r in built.search("sisli")] == ["Sisli", "Şişli"]
+        assert built.search("Şişli")[1]["score"] == title_index.ASCII_MATCH_SCORE
+        built.close()
+    
+    def test_fuzzy_typo(self, index):
+        """Yazım hatası en yakın başlığa çözülmeli."""
+        results = index.search("Canakale Savasi")
+        assert results[0]["title"] == "Çanakkale Savaşı"
+        results = index.search("Mustafa Kemal Ataturk")
+        assert results[0]["title"] == "Mustafa Kemal Atatürk"
+    
+    def test_exact_scores_one(self, index):
+        """Tam eşleşme skoru 1.0 olmalı."""
+        assert index.search("ANKARA")[0] == {"title": "Ankara", "score": 1.0}
+    
+    def test_resolve_threshold(self, index):
+        """Eşik altındaki adaylar yalnızca öneri olarak dönmeli."""
+        resolved = index.resolve("xyz tamamen farklı", threshold=0.9)
+        assert resolved["match"] is None
+        resolved = index.resolve("mustafa kemal ataturk", threshold=0.6)
+        assert resolved["match"] == "Mustafa Kemal Atatürk"
+    
+    def test_reopen_from_disk(self, index, tmp_path):
+        """Kalıcı dosya yeniden açılabilmeli."""
+        reopened = TitleIndex(str(tmp_path / "titles.idx"))
+        assert len(reopened) == len(TITLES)
+        assert reopened.get("ATATÜRK") == "Atatürk"
+        reopened.close()
+    
+    def test_load_titles_file(self, tmp_path):
+        """Başlık listesi dosyası okunabilmeli (alt çizgiler boşluğa çevrilir)."""
+        path = tmp_path / "titles.txt"
+        path.write_text("page_title\nİstanbul_Boğazı\nAnkara\n", encoding="utf-8")
+        built = TitleIndex.build(TitleIndex.load_titles_file(str(path)), str(tmp_path / "t.idx"))
+        assert built.get("istanbul boğazı") == "İstanbul Boğazı"
+        built.close()
+
+
+class TestFoldAscii:
+    """Aksan duyarsız anahtar testleri."""
+    
+    def test_turkish_letters(self):
+        """Türkçe harfler ASCII karşılıklarına çevrilmeli."""
+        assert fold_ascii("ŞİŞLİ ağrı Dağı") == "sisli agri dagi"
+        assert fold_ascii("Çığ Ölçü Üzüm Iğdır") == "cig olcu uzum igdir"
+    
+    def test_circumflex_removed(self):
+        """Şapkalı harfler aksansız eşleşmeli."""
+        assert fold_ascii("Kâğıt hâlâ") == "kagit hala"
+    
+    def test_fold_unchanged(self):
+        """fold aksanları korumalı."""
+        assert fold("Şişli") == "şişli"
+        assert fold("IĞDIR") == "ığdır"
+
+
+class TestGetTitleIndex:
+    """Paylaşılan indeksin yüklenmesi."""
+    
+    @pytest.fixture(autouse=True)
+    def fresh(self):
+        with patch.object(title_index, "_index", None), \
+             patch.object(title_index, "_index_loaded", False), \
+             patch.object(title_index, "_index_retry_at", 0.0):
+            yield
+            if title_index._index is not None:
+                title_index._index.close()
+    
+    def test_missing_not_cached(self, tmp_path):
+        """Başlangıçta olmayan indeks sonradan üretilince yüklenmeli."""
+        path = str(tmp_path / "titles.idx")
+        with patch.object(title_index, "INDEX_RETRY_INTERVAL", 0.0):
+            assert title_index.get_title_index(path) is None
+            TitleIndex.build(TITLES, path).close()
+            loaded = title_index.get_title_index(path)
+        assert loaded is not None
+        assert loaded.resolve("Ankara", threshold=0.5)["match"] == "Ankara"
+    
+    def test_retry_backoff(self, tmp_path):
+        """Başarısız denemeden sonra bekleme süresince tekrar denenmemeli."""
+        path = str(tmp_path / "titles.idx")
+        source = MagicMock(return_value=None)
+        assert title_index.get_title_index(path, source) is None
+        assert title_index.get_title_index(path, source) is None
+        assert source.call_count == 1
+    
+    def test_corrupt_file_retried(self, tmp_path):
+        """Açılamayan dosya hata fırlatmamalı, None dönmeli."""
+        path = tmp_path / "titles.idx"
+        path.write_bytes(b"bozuk")
+        assert title_index.get_title_index(str(path)) is None
+    
+    def test_old_format_rebuilt(self, tmp_path):
+        """Eski biçimli dosya kaynak varsa yeniden üretilmeli."""
+        path = tmp_path / "titles.idx"
+        TitleIndex.build(TITLES, str(path)).close()
+        data = bytearray(path.read_bytes())
+        data[:5] = b"TTIX\x01"
+        path.write_bytes(bytes(data))
+        loaded = title_index.get_title_index(str(path), lambda: TITLES)
+        assert loaded is not None
+        assert loaded.resolve("Sisli", threshold=0.6)["match"] == "Şişli"
+
+
+class TestSearchInfoResolution:
+    """search_info'nun bulunamayan sayfalarda başlık çözümlemesi."""
+    
+    def setup_method(self):
+        wikipedia.page_cache.clear()
+    
+    def teardown_method(self):
+        wikipedia.page_cache.clear()
+    
+    def _page(self, exists, title=""):
+        page = MagicMock()
+        page.exists.return_value = exists
+        page.title = title
+        page.summary = "Özet"
+        page.fullurl = "https://tr.wikipedia.org/wiki/x"
+        page.sections = []
+        return page
+    
+    def test_resolves_misspelled_title(self, index):
+        """Yanlış yazılan başlık tek çağrıda doğru sayfaya çözülmeli."""
+        with patch.object(title_index, "_index", index), \
+             patch.object(title_index, "_index_loaded", True), \
+             patch('src.services.wikipedia.wiki') as mock_wiki:
+            mock_wiki.page.side_effect = lambda t: self._page(t == "Mustafa Kemal Atatürk", t)
+            result = wikipedia.search_info("mustafa kemal ataturk")
+            assert result["resolved_title"] == "Mustafa Kemal Atatürk"
+            assert result["result"]["title"] == "Mustafa Kemal Atatürk"
+    
+    def test_suggestions_on_miss(self, index):
+        """Eşleşme yoksa öneri listesi dönmeli."""
+        with patch.object(title_index, "_index", index), \
+             patch.object(title_index, "_index_loaded", True), \
+             patch('src.services.wikipedia.wiki') as mock_wiki:
+            mock_wiki.page.side_effect = lambda t: self._page(False, t)
+            result = wikipedia.search_info("Çanakkale")
+            assert "error" in result
+            assert "Çanakkale Savaşı" in result["suggestions"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
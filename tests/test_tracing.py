@@ -0,0 +1,282 @@
+"""
+Tracing Tests.
+İstek izleme, örnekleme ve JSONL dışa aktarımının birim testleri.
+"""
+
+import pytest
+import sys
+import os
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import contextvars
+import json
+import threading
+import time
+import warnings
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+from src.observability import JsonlExporter, Tracer, activate, current_trace
+from src.observability import tracing
+from src.streaming import SSEEncoder, ReplayBuffer, StreamRegistry, pump
+from src.chatbot import WebChatbot
+
+
+class MemoryExporter:
+    """Kayıtları listede tutan sahte dışa aktarıcı."""
+    
+    def __init__(self):
+        self.records = []
+    
+    def export(self, record):
+        self.records.append(record)
+    
+    def names(self):
+        return [r["name"] for r in self.records]
+
+
+@pytest.fixture
+def exporter():
+    return MemoryExporter()
+
+
+@pytest.fixture
+def tracer(exporter):
+    return Tracer(exporter, sample_rate=1.0)
+
+
+class TestSampling:
+    """Baş örnekleme testleri."""
+    
+    def test_sampled_below_rate(self, exporter):
+        """Rastgele değer oranın altındaysa iz başlatılmalı."""
+        tracer = Tracer(exporter, sample_rate=0.5, rng=lambda: 0.2)
+        assert tracer.start_trace("chat").sampled
+    
+    def test_not_sampled_above_rate(self, exporter):
+        """Örneklenmeyen iz hiçbir şey yazmamalı."""
+        tracer = Tracer(exporter, sample_rate=0.5, rng=lambda: 0.7)
+        trace = tracer.start_trace("chat")
+        assert trace is tracing.NOOP_TRACE
+        with trace.span("tool.call") as span:
+            span.set(tool="calculate")
+        trace.end()
+        assert exporter.records == []
+    
+    def test_disabled_without_exporter(self):
+        """Dışa aktarıcı yoksa izleme kapalı olmalı."""
+        assert not Tracer(None, sample_rate=1.0).start_trace("chat").sampled
+    
+    def test_zero_rate(self, exporter):
+        """Oran 0 ise hiçbir istek izlenmemeli."""
+        tracer = Tracer(exporter, sample_rate=0.0, rng=lambda: 0.0)
+        assert not tracer.start_trace("chat").sampled
+
+
+class TestSpans:
+    """Span testleri."""
+    
+    def test_parent_and_trace_id(self, tracer, exporter):
+        """Span'lar kök span'ın çocuğu olmalı ve aynı iz kimliğini taşımalı."""
+        trace = tracer.start_trace("chat", chat_id="a")
+        with trace.span("session.lookup"):
+            pass
+        trace.end()
+        
+        child, root = exporter.records
+        assert root["name"] == "chat" and root["parent_id"] is None
+        assert root["attrs"] == {"chat_id": "a"}
+        assert child["parent_id"] == root["span_id"]
+        assert child["trace_id"] == root["trace_id"] == trace.trace_id
+        assert child["duration_ms"] >= 0
+    
+    def test_error_status(self, tracer, exporter):
+        """İstisna span'ı hata durumuyla bitirmeli."""
+        trace = tracer.start_trace("chat")
+        with pytest.raises(ValueError):
+            with trace.span("tool.call"):
+                raise ValueError("x")
+        assert exporter.records[0]["status"] == "error"
+        assert exporter.records[0]["attrs"]["error"] == "ValueError"
+    
+    def test_generator_close_is_cancelled(self, tracer, exporter):
+        """Üreteç kapatılırsa span ``cancelled`` olmalı."""
+        trace = tracer.start_trace("chat")
+        
+        def stream():
+            with trace.span("gemini.call"):
+                yield 1
+                yield 2
+        
+        gen = stream()
+        next(gen)
+        gen.close()
+        assert exporter.records[0]["status"] == "cancelled"
+    
+    def test_end_once(self, tracer, exporter):
+        """Elle bitirilen span ``with`` çıkışında tekrar yazılmamalı."""
+        trace = tracer.start_trace("chat")
+        with trace.span("gemini.call") as span:
+            span.end("cancelled")
+        assert len(exporter.records) == 1
+        assert exporter.records[0]["status"] == "cancelled"
+    
+    def test_record(self, tracer, exporter):
+        """Ölçülmüş süre span olarak yazılmalı."""
+        trace = tracer.start_trace("chat")
+        trace.record("sse.write", 100.0, 0.25, frames=3)
+        record = exporter.records[0]
+        assert record["start"] == 100.0
+        assert record["duration_ms"] == 250.0
+        assert record["attrs"] == {"frames": 3}
+
+
+class TestContext:
+    """Etkin iz testleri."""
+    
+    def test_default_is_noop(self):
+        """Etkin iz yoksa NOOP dönmeli."""
+        assert current_trace() is tracing.NOOP_TRACE
+        assert tracing.span("x") is tracing.NOOP_SPAN
+    
+    def test_activate(self, tracer, exporter):
+        """``activate`` içinde modül düzeyi ``span`` etkin izi kullanmalı."""
+        trace = tracer.start_trace("chat")
+        with activate(trace):
+            with tracing.span("tool.call"):
+                pass
+        assert current_trace() is tracing.NOOP_TRACE
+        assert exporter.records[0]["trace_id"] == trace.trace_id
+    
+    def test_copy_context_to_thread(self, tracer, exporter):
+        """Bağlam kopyasıyla iz başka iş parçacığına taşınmalı."""
+        trace = tracer.start_trace("chat")
+        with activate(trace):
+            run = contextvars.copy_context().run
+        
+        def work():
+            with tracing.span("tool.call"):
+                pass
+        
+        t = threading.Thread(target=run, args=(work,))
+        t.start()
+        t.join()
+        assert exporter.names() == ["tool.call"]
+    
+    def test_asyncio_task_inherits(self, tracer, exporter):
+        """Oluşturulan görev etkin izi devralmalı."""
+        trace = tracer.start_trace("chat")
+        
+        async def work():
+            with tracing.span("session.load"):
+                await asyncio.sleep(0)
+        
+        async def main():
+            with activate(trace):
+                task = asyncio.create_task(work())
+            await task
+        
+        asyncio.run(main())
+        assert exporter.names() == ["session.load"]
+    
+    def test_pump_records_sse_write(self, tracer, exporter):
+        """``pump`` yazımları tek bir ``sse.write`` span'ında toplamalı."""
+        buffer = ReplayBuffer("c", "t1", max_bytes=1 << 20)
+        encoder = SSEEncoder(0, 0, id_prefix=buffer.id_prefix)
+        events = [{"type": "content", "content": "a"}, {"type": "content", "content": "b"}]
+        with activate(tracer.start_trace("chat")):
+            pump(iter(events), encoder, buffer)
+        
+        (record,) = exporter.records
+        assert record["name"] == "sse.write"
+        assert record["attrs"]["frames"] == 3
+        assert record["attrs"]["bytes"] == buffer.bytes
+
+
+class TestTurnEvents:
+    """İptal ve yeniden bağlanma olaylarının tur izine yazılması."""
+    
+    def test_event(self, tracer, exporter):
+        """Olay süresiz bir span olarak yazılmalı."""
+        trace = tracer.start_trace("chat")
+        trace.event("stream.resume", after=3)
+        (record,) = exporter.records
+        assert record["name"] == "stream.resume"
+        assert record["duration_ms"] == 0
+        assert record["parent_id"] == trace.root.span_id
+        assert record["attrs"] == {"after": 3}
+        tracing.NOOP_TRACE.event("stream.resume")
+    
+    def test_registry_cancel(self, tracer, exporter):
+        """İptal edilen tur izine nedeniyle birlikte yazılmalı."""
+        registry = StreamRegistry(max_bytes=1024, ttl=60)
+        trace = tracer.start_trace("chat")
+        buffer = registry.open("chat", trace)
+        other = registry.open("chat")
+        
+        assert registry.cancel("chat", reason="superseded") == [buffer.turn_id, other.turn_id]
+        assert registry.cancel("chat") == []
+        (record,) = exporter.records
+        assert record["name"] == "turn.cancel"
+        assert record["trace_id"] == trace.trace_id
+        assert record["attrs"] == {"reason": "superseded"}
+        assert other.trace is tracing.NOOP_TRACE
+    
+    def test_abandoned(self, tracer, exporter):
+        """Geri dönmeyen istemci yüzünden iptal edilen tur izine yazılmalı."""
+        trace = tracer.start_trace("chat")
+        buffer = ReplayBuffer("chat", "t1", 1024, disconnect_grace=0, trace=trace)
+        follower = buffer.follow()
+        buffer.append([(1, "id: t1:1\nevent: delta\ndata: a\n\n")])
+        next(follower)
+        follower.close()
+        assert buffer.cancel_token.wait(5)
+        deadline = time.monotonic() + 5
+        while not exporter.records and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert exporter.names() == ["stream.abandoned"]
+    
+    def test_cancelled_turn_attrs(self, tracer):
+        """Geçmişe yazılan kısmi tur kök span niteliklerine eklenmeli."""
+        trace = tracer.start_trace("chat")
+        with activate(trace):
+            WebChatbot()._record_cancelled_turn("Yarım", [("calculate", {"expression": "1"})])
+        assert trace.root.attrs == {"partial_chars": 5, "unanswered_calls": 1}
+
+
+class TestJsonlExporter:
+    """JSONL dışa aktarıcı testleri."""
+    
+    def test_writes_lines(self, tmp_path):
+        """Kayıtlar satır satır JSON olarak yazılmalı."""
+        path = tmp_path / "traces" / "spans.jsonl"
+        exporter = JsonlExporter(str(path), flush_interval=0.01)
+        tracer = Tracer(exporter, sample_rate=1.0)
+        trace = tracer.start_trace("chat")
+        with trace.span("tool.call", tool="calculate"):
+            pass
+        trace.end()
+        exporter.close()
+        
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [l["name"] for l in lines] == ["tool.call", "chat"]
+        assert lines[0]["attrs"] == {"tool": "calculate"}
+        assert exporter.stats()["written"] == 2
+    
+    def test_full_queue_drops(self, tmp_path):
+        """Kuyruk doluysa kayıt düşürülmeli, çağıran beklememeli."""
+        exporter = JsonlExporter(str(tmp_path / "spans.jsonl"), max_queue=1, flush_interval=0.01)
+        # Yazıcı iş parçacığını durdurup kuyruğu doldur
+        exporter.close()
+        exporter.export({"n": 1})
+        exporter.export({"n": 2})
+        stats = exporter.stats()
+        assert stats["dropped"] >= 1
+        assert stats["queued"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
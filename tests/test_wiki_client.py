@@ -0,0 +1,284 @@
+"""
+Wiki Client Tests.
+MediaWiki HTTP istemcisinin (toplu sorgu, devam, yeniden deneme) birim testleri.
+"""
+
+import pytest
+import sys
+import os
+import threading
+from unittest.mock import patch
+
+import requests
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.wiki_client import WikiClient, WikiTransportError, MAX_TITLES_PER_REQUEST
+from src.services import wikipedia
+
+
+class FakeResponse:
+    def __init__(self, payload=None, status_code=200, headers=None):
+        self.payload = payload or {}
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """
+    Sırayla hazır yanıtlar (veya istisnalar) döndüren oturum.
+    ``responses`` fonksiyon ise yanıt istek parametrelerine göre seçilir
+    (eşzamanlı isteklerde sıra belirsizdir).
+    """
+
+    def __init__(self, responses):
+        self.route = responses if callable(responses) else None
+        self.responses = [] if self.route else list(responses)
+        self.calls = []
+        self.headers = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self._lock:
+            self.calls.append({"url": url, "params": dict(params), "timeout": timeout})
+            response = None if self.route else self.responses.pop(0)
+        if self.route:
+            response = self.route(params)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def make_client(responses, **kwargs):
+    session = FakeSession(responses)
+    sleeps = []
+    client = WikiClient("tr", "test-agent", session=session, sleep=sleeps.append, **kwargs)
+    return client, session, sleeps
+
+
+def page_payload(pages, **query):
+    return {"query": {"pages": pages, **query}}
+
+
+ATATURK = {
+    "title": "Mustafa Kemal Atatürk",
+    "fullurl": "https://tr.wikipedia.org/wiki/Mustafa_Kemal_Atat%C3%BCrk",
+    "extract": "Özet metni.\n\n== Hayatı ==\nHayat.\n\n=== Çocukluk ===\nÇocukluk.",
+    "categories": [{"ns": 14, "title": "Kategori:1881 doğumlular"}]
+}
+
+
+class TestWikiClientQuery:
+    """Tek istekte sayfa okuma testleri."""
+
+    def test_single_request_combines_props(self):
+        """Metin, bilgi ve kategoriler tek istekte istenir."""
+        client, session, _ = make_client([FakeResponse(page_payload([ATATURK]))])
+        page = client.page("Mustafa Kemal Atatürk")
+
+        assert len(session.calls) == 1
+        params = session.calls[0]["params"]
+        assert params["prop"] == "extracts|info|categories"
+        assert params["formatversion"] == 2
+        assert params["titles"] == "Mustafa Kemal Atatürk"
+        assert session.calls[0]["timeout"] == client.timeout
+
+        assert page.exists()
+        assert page.summary == "Özet metni."
+        assert page.fullurl.startswith("https://tr.wikipedia.org/")
+        assert page.sections[0].title == "Hayatı"
+        assert page.sections[0].sections[0].title == "Çocukluk"
+        assert "Kategori:1881 doğumlular" in page.categories
+
+    def test_missing_page(self):
+        """Olmayan sayfa exists() False döner."""
+        client, _, _ = make_client([FakeResponse(page_payload([{"title": "Yok", "missing": True}]))])
+        assert not client.page("Yok").exists()
+
+    def test_redirect_and_normalized(self):
+        """Normalize edilen ve yönlendirilen başlıklar istenen başlığa eşlenir."""
+        payload = page_payload(
+            [ATATURK],
+            normalized=[{"from": "atatürk", "to": "Atatürk"}],
+            redirects=[{"from": "Atatürk", "to": "Mustafa Kemal Atatürk"}]
+        )
+        client, _, _ = make_client([FakeResponse(payload)])
+        page = client.page("atatürk")
+        assert page.exists()
+        assert page.title == "Mustafa Kemal Atatürk"
+
+    def test_batch_titles(self):
+        """Bilgiler tek istekte, metinler var olan sayfa başına birer istekte alınır."""
+        info = page_payload([
+            {"title": "A", "fullurl": "u/a", "categories": [{"title": "Kategori:X"}]},
+            {"title": "B", "missing": True},
+            {"title": "C", "fullurl": "u/c"}
+        ])
+
+        # Metin istekleri sırayla yapılsaydı ilki bariyerde zaman aşımına uğrardı
+        barrier = threading.Barrier(2, timeout=2)
+
+        def route(params):
+            if params["prop"] == "info|categories":
+                return FakeResponse(info)
+            title = params["titles"]
+            barrier.wait()
+            return FakeResponse(page_payload([{"title": title, "extract": title.lower()}]))
+
+        client, session, _ = make_client(route)
+        pages = client.pages(["A", "B", "C", "A"])
+
+        assert len(session.calls) == 3
+        batch = [c["params"] for c in session.calls if c["params"]["prop"] == "info|categories"]
+        assert [p["titles"] for p in batch] == ["A|B|C"]
+        extracts = sorted(c["params"]["titles"] for c in session.calls if c["params"]["prop"] == "extracts")
+        assert extracts == ["A", "C"]
+        assert pages["A"].summary == "a"
+        assert "Kategori:X" in pages["A"].categories
+        assert not pages["B"].exists()
+        assert pages["C"].summary == "c"
+
+    def test_batch_extracts_follow_redirects(self):
+        """Metin isteği yönlendirilen son başlık için yapılır."""
+        info = page_payload(
+            [{"title": "Mustafa Kemal Atatürk", "fullurl": "u/m"}, {"title": "B", "fullurl": "u/b"}],
+            redirects=[{"from": "Atatürk", "to": "Mustafa Kemal Atatürk"}]
+        )
+
+        def route(params):
+            if params["prop"] == "info|categories":
+                return FakeResponse(info)
+            return FakeResponse(page_payload([{"title": params["titles"], "extract": "metin"}]))
+
+        client, session, _ = make_client(route)
+        pages = client.pages(["Atatürk", "B"])
+
+        extracts = sorted(c["params"]["titles"] for c in session.calls if c["params"]["prop"] == "extracts")
+        assert extracts == ["B", "Mustafa Kemal Atatürk"]
+        assert pages["Atatürk"].title == "Mustafa Kemal Atatürk"
+        assert pages["Atatürk"].summary == "metin"
+
+    def test_batch_split_by_limit(self):
+        """Sınırı aşan başlık listesi parçalara bölünür."""
+        titles = [f"T{i}" for i in range(MAX_TITLES_PER_REQUEST + 1)]
+        client, session, _ = make_client([FakeResponse(page_payload([])), FakeResponse(page_payload([]))])
+        pages = client.pages(titles)
+        assert len(session.calls) == 2
+        assert len(pages) == len(titles)
+
+    def test_continuation_merged(self):
+        """``continue`` yanıtları birleştirilir."""
+        first = {
+            "continue": {"clcontinue": "1|X", "continue": "||"},
+            "query": {"pages": [
+                {"title": "A", "fullurl": "u/a", "categories": [{"title": "Kategori:X"}]},
+                {"title": "B", "fullurl": "u/b"}
+            ]}
+        }
+        second = page_payload([
+            {"title": "A", "fullurl": "u/a", "categories": [{"title": "Kategori:Y"}]},
+            {"title": "B", "fullurl": "u/b"}
+        ])
+        batches = [FakeResponse(first), FakeResponse(second)]
+
+        def route(params):
+            if params["prop"] == "info|categories":
+                return batches.pop(0)
+            return FakeResponse(page_payload([{"title": params["titles"], "extract": params["titles"].lower()}]))
+
+        client, session, _ = make_client(route)
+        pages = client.pages(["A", "B"])
+
+        assert session.calls[1]["params"]["clcontinue"] == "1|X"
+        assert pages["A"].summary == "a"
+        assert set(pages["A"].categories) == {"Kategori:X", "Kategori:Y"}
+        assert pages["B"].summary == "b"
+
+
+class TestWikiClientRetry:
+    """Yeniden deneme testleri."""
+
+    def test_retry_on_server_error(self):
+        """5xx yanıtından sonra yeniden denenir."""
+        client, session, sleeps = make_client([
+            FakeResponse(status_code=503),
+            FakeResponse(page_payload([ATATURK]))
+        ])
+        assert client.page("Mustafa Kemal Atatürk").exists()
+        assert len(session.calls) == 2
+        assert len(sleeps) == 1
+        assert client.stats()["retries"] == 1
+
+    def test_retry_after_header(self):
+        """429 yanıtında Retry-After süresine uyulur."""
+        client, _, sleeps = make_client([
+            FakeResponse(status_code=429, headers={"Retry-After": "2"}),
+            FakeResponse(page_payload([ATATURK]))
+        ])
+        client.page("Mustafa Kemal Atatürk")
+        assert sleeps == [2.0]
+
+    def test_retry_on_connection_error(self):
+        """Bağlantı hatası ve zaman aşımında yeniden denenir."""
+        client, _, sleeps = make_client([
+            requests.ConnectionError("reset"),
+            requests.Timeout("slow"),
+            FakeResponse(page_payload([ATATURK]))
+        ], backoff=0.5)
+        assert client.page("Mustafa Kemal Atatürk").exists()
+        assert len(sleeps) == 2
+        assert 0 <= sleeps[0] <= 0.5
+        assert 0 <= sleeps[1] <= 1.0
+
+    def test_gives_up_after_max_retries(self):
+        """Deneme hakkı bitince WikiTransportError fırlatılır."""
+        client, session, _ = make_client([FakeResponse(status_code=502)] * 3, max_retries=2)
+        with pytest.raises(WikiTransportError):
+            client.page("A")
+        assert len(session.calls) == 3
+        assert client.stats()["failures"] == 1
+
+    def test_api_error_not_retried(self):
+        """Kalıcı API hataları yeniden denenmez."""
+        client, session, _ = make_client([FakeResponse({"error": {"code": "badvalue", "info": "Geçersiz"}})])
+        with pytest.raises(WikiTransportError):
+            client.page("A")
+        assert len(session.calls) == 1
+
+
+class TestGetPages:
+    """wikipedia.get_pages toplu okuma testleri."""
+
+    def setup_method(self):
+        wikipedia.page_cache.clear()
+
+    def test_only_misses_fetched(self):
+        """Önbellekteki sayfalar tekrar istenmez, kalanlar tek toplu istekte çekilir."""
+        wikipedia.page_cache.set(wikipedia.cache_key("A"), {"title": "A", "summary": "önbellek"})
+        client, session, _ = make_client([
+            FakeResponse(page_payload([{"title": "B", "fullurl": "u/b"}, {"title": "C", "missing": True}])),
+            FakeResponse(page_payload([{"title": "B", "extract": "b"}]))
+        ])
+
+        with patch.object(wikipedia, "wiki", client):
+            results = wikipedia.get_pages(["A", "B", "C"])
+
+        assert len(session.calls) == 2
+        assert session.calls[0]["params"]["titles"] == "B|C"
+        assert session.calls[1]["params"]["titles"] == "B"
+        assert results["A"]["summary"] == "önbellek"
+        assert results["B"]["summary"] == "b"
+        assert results["C"] is None
+        assert wikipedia.page_cache.get(wikipedia.cache_key("B")) is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
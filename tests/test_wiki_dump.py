@@ -0,0 +1,157 @@
+"""
+Wikipedia Dump Index Tests.
+Çevrimdışı dump indeksinin birim testleri.
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# src klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import wiki_dump, wikipedia
+from src.services.wiki_dump import DumpIndex, clean_wikitext, split_sections
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+@pytest.fixture
+def xml_index(tmp_path):
+    index = DumpIndex.build(os.path.join(FIXTURES, "trwiki_sample.xml"), str(tmp_path / "xml"), "tr")
+    yield index
+    index.close()
+
+
+@pytest.fixture
+def jsonl_index(tmp_path):
+    index = DumpIndex.build(os.path.join(FIXTURES, "trwiki_sample.jsonl"), str(tmp_path / "jsonl"), "tr")
+    yield index
+    index.close()
+
+
+class TestCleanWikitext:
+    """clean_wikitext fonksiyonu için testler."""
+    
+    def test_links_and_emphasis(self):
+        """Bağlantılar ve vurgu işaretleri temizlenmeli."""
+        text, _ = clean_wikitext("'''Ankara''' [[Türkiye|Türkiye'nin]] başkentidir.")
+        assert text == "Ankara Türkiye'nin başkentidir."
+    
+    def test_nested_templates_removed(self):
+        """İç içe şablonlar silinmeli."""
+        text, _ = clean_wikitext("{{a|b={{c}}}}Metin")
+        assert text == "Metin"
+    
+    def test_categories_collected(self):
+        """Kategoriler ayrıştırılıp metinden çıkarılmalı."""
+        text, categories = clean_wikitext("Metin\n[[Kategori:Şehirler|A]]")
+        assert categories == ["Şehirler"]
+        assert "Kategori" not in text
+
+
+class TestSplitSections:
+    """split_sections fonksiyonu için testler."""
+    
+    def test_summary_and_nesting(self):
+        """Özet ve iç içe bölümler doğru ayrılmalı."""
+        summary, sections = split_sections("Giriş\n== A ==\nx\n=== B ===\ny\n== C ==\nz")
+        assert summary == "Giriş"
+        assert [s["title"] for s in sections] == ["A", "C"]
+        assert sections[0]["subsections"][0]["title"] == "B"
+        assert sections[0]["subsections"][0]["level"] == 1
+        assert sections[0]["subsections"][0]["content"] == "y"
+
+
+class TestDumpIndex:
+    """DumpIndex sınıfı için testler."""
+    
+    def test_xml_lookup(self, xml_index):
+        """XML dump'ından sayfa okunabilmeli."""
+        page = xml_index.lookup("İstanbul")
+        assert page["title"] == "İstanbul"
+        assert page["summary"].startswith("İstanbul, Türkiye'nin en kalabalık şehridir.")
+        assert page["sections"][0]["title"] == "Tarih"
+        assert page["sections"][0]["subsections"][0]["title"] == "Osmanlı dönemi"
+        assert "Marmara Bölgesi" in page["categories"]
+        assert page["url"].startswith("https://tr.wikipedia.org/wiki/")
+    
+    def test_case_insensitive_lookup(self, xml_index):
+        """Türkçe büyük/küçük harf farkı gözetilmemeli."""
+        assert xml_index.lookup("İSTANBUL")["title"] == "İstanbul"
+        assert xml_index.lookup("istanbul")["title"] == "İstanbul"
+    
+    def test_redirect(self, xml_index):
+        """Yönlendirmeler hedef sayfaya çözülmeli."""
+        assert xml_index.lookup("Konstantinopolis")["title"] == "İstanbul"
+    
+    def test_other_namespaces_skipped(self, xml_index):
+        """Makale dışı ad alanları indekslenmemeli."""
+        assert xml_index.lookup("Kullanıcı:Örnek") is None
+        assert len(xml_index) == 3
+    
+    def test_missing(self, xml_index):
+        """Olmayan sayfa None döndürmeli."""
+        assert xml_index.lookup("Olmayan Sayfa") is None
+    
+    def test_jsonl_records(self, jsonl_index):
+        """JSONL dump'ındaki hazır ve ham kayıtlar okunabilmeli."""
+        assert jsonl_index.lookup("Atatürk")["title"] == "Mustafa Kemal Atatürk"
+        izmir = jsonl_index.lookup("İzmir")
+        assert izmir["sections"][0]["title"] == "Ekonomi"
+    
+    def test_processed_pages_detached(self, tmp_path):
+        """İşlenen sayfalar kökten ayrılmalı (bellek sayfa sayısıyla büyümemeli)."""
+        pages = "".join(
+            f"<page><title>Sayfa {i}</title><ns>0</ns><revision><text>Metin {i}</text></revision></page>"
+            for i in range(2000)
+        )
+        path = tmp_path / "dump.xml"
+        path.write_text(f"<mediawiki><siteinfo/>{pages}</mediawiki>", encoding="utf-8")
+        
+        roots = []
+        iterparse = wiki_dump.ET.iterparse
+        
+        def capture(source, events=("end",)):
+            # Kökü yakalamak için "start" olayları her zaman istenir
+            for event, elem in iterparse(source, events=("start", "end")):
+                if not roots:
+                    roots.append(elem)
+                if event in events:
+                    yield event, elem
+        
+        attached = []
+        with patch.object(wiki_dump.ET, "iterparse", capture):
+            for _ in wiki_dump.iter_xml_dump(str(path), "tr"):
+                attached.append(len(roots[0]))
+        assert len(attached) == 2000
+        # Ayrıştırıcı dosyayı parça parça okur; kökte en fazla bir parçalık sayfa birikir
+        assert max(attached) < 500
+        assert len(roots[0]) == 0
+    
+    def test_reopen(self, xml_index, tmp_path):
+        """Üretilen indeks yeniden açılabilmeli."""
+        reopened = DumpIndex(str(tmp_path / "xml"))
+        assert reopened.lookup("Ankara")["title"] == "Ankara"
+        reopened.close()
+
+
+class TestDumpBackend:
+    """search_info'nun dump backend'i ile çalışması."""
+    
+    def test_search_info_from_dump(self, xml_index):
+        """search_info ağ kullanmadan dump'tan sonuç döndürmeli."""
+        wikipedia.page_cache.clear()
+        with patch.object(wikipedia.Config, "WIKI_BACKEND", "dump"), \
+             patch.object(wiki_dump, "_index", xml_index), \
+             patch('src.services.wikipedia.wiki') as mock_wiki:
+            result = wikipedia.search_info("Ankara")
+            assert result["result"]["title"] == "Ankara"
+            assert set(["title", "summary", "url", "sections", "categories"]) <= set(result["result"])
+            mock_wiki.page.assert_not_called()
+        wikipedia.page_cache.clear()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -11,12 +11,26 @@ from unittest.mock import patch, MagicMock
 # src klasörünü path'e ekle
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.services.wikipedia import search_info, get_function_def, extract_sections
+from src.services import wikipedia
+from src.services.wikipedia import (
+    search_info, get_function_def, extract_sections, page_cache,
+    get_section, get_outline, get_section_function_def, get_client
+)
+from src.services.langdetect import detect_language
 
 
 class TestSearchInfo:
     """search_info fonksiyonu için testler."""
     
+    def setup_method(self):
+        """Testler arası önbellek etkileşimini engelle, yedek dillere gidilmesin."""
+        page_cache.clear()
+        self.fallback_patch = patch('src.services.wikipedia.Config.WIKI_FALLBACK_LANGUAGES', "")
+        self.fallback_patch.start()
+    
+    def teardown_method(self):
+        self.fallback_patch.stop()
+    
     def test_empty_query(self):
         """Boş sorgu hatası."""
         result = search_info("")
@@ -84,6 +98,35 @@ class TestSearchInfo:
             assert "summary" in data
             assert "url" in data
             assert "sections" in data
+    
+    def test_repeated_search_uses_cache(self):
+        """Aynı sorgu ikinci kez ağa gitmemeli."""
+        with patch('src.services.wikipedia.wiki') as mock_wiki:
+            mock_page = MagicMock()
+            mock_page.exists.return_value = True
+            mock_page.title = "Test"
+            mock_page.summary = "Summary"
+            mock_page.fullurl = "https://example.com"
+            mock_page.sections = []
+            mock_wiki.page.return_value = mock_page
+            
+            first = search_info("Test")
+            second = search_info("Test")
+            
+            assert first["result"]["summary"] == second["result"]["summary"]
+            assert mock_wiki.page.call_count == 1
+    
+    def test_missing_page_not_cached(self):
+        """Bulunamayan sayfalar önbelleğe yazılmamalı."""
+        with patch('src.services.wikipedia.wiki') as mock_wiki:
+            mock_page = MagicMock()
+            mock_page.exists.return_value = False
+            mock_wiki.page.return_value = mock_page
+            
+            search_info("Yok")
+            search_info("Yok")
+            
+            assert mock_wiki.page.call_count == 2
 
 
 class TestExtractSections:
@@ -125,6 +168,71 @@ class TestExtractSections:
         assert result[0]["subsections"][0]["level"] == 1
 
 
+def _cached_page():
+    """get_section testleri için önbelleğe yazılmış örnek sayfa."""
+    return {
+        "title": "İstanbul",
+        "summary": "Özet",
+        "url": "https://tr.wikipedia.org/wiki/%C4%B0stanbul",
+        "sections": [
+            {"title": "Tarih", "content": "Tarih içeriği", "level": 0, "subsections": [
+                {"title": "Osmanlı dönemi", "content": "1453", "level": 1, "subsections": []}
+            ]},
+            {"title": "Coğrafya", "content": "Boğaz", "level": 0, "subsections": []}
+        ]
+    }
+
+
+class TestGetSection:
+    """get_section fonksiyonu için testler."""
+    
+    def setup_method(self):
+        """Sayfayı önbelleğe yaz, ağ isteği yapılmasın."""
+        page_cache.clear()
+        page_cache.set("tr:İstanbul", _cached_page())
+    
+    def teardown_method(self):
+        page_cache.clear()
+    
+    def test_top_level_section(self):
+        """Üst seviye bölüm döndürülmeli."""
+        with patch('src.services.wikipedia.wiki') as mock_wiki:
+            result = get_section("İstanbul", "Tarih")
+            assert result["result"]["content"] == "Tarih içeriği"
+            assert result["result"]["subsections"] == ["Osmanlı dönemi"]
+            mock_wiki.page.assert_not_called()
+    
+    def test_section_path(self):
+        """Yol ile alt bölüm bulunmalı (büyük/küçük harf duyarsız)."""
+        result = get_section("İstanbul", "TARİH / osmanlı dönemi")
+        assert result["result"]["content"] == "1453"
+    
+    def test_section_by_leaf_title(self):
+        """Yalnızca alt bölüm adı ile de bulunmalı."""
+        result = get_section("İstanbul", "Osmanlı dönemi")
+        assert result["result"]["title"] == "Osmanlı dönemi"
+    
+    def test_missing_section_returns_outline(self):
+        """Olmayan bölümde içindekiler listesi dönmeli."""
+        result = get_section("İstanbul", "Ekonomi")
+        assert "error" in result
+        assert result["outline"] == ["Tarih", "Tarih / Osmanlı dönemi", "Coğrafya"]
+    
+    def test_empty_section(self):
+        """Boş bölüm adı hatası."""
+        assert "error" in get_section("İstanbul", "  ")
+    
+    def test_outline(self):
+        """get_outline yolları makale sırasıyla döndürmeli."""
+        assert get_outline(_cached_page()["sections"])[1] == "Tarih / Osmanlı dönemi"
+    
+    def test_function_def(self):
+        """get_section tanımı title ve section gerektirmeli."""
+        func_def = get_section_function_def()
+        assert func_def["name"] == "get_section"
+        assert set(func_def["parameters"]["required"]) == {"title", "section"}
+
+
 class TestGetFunctionDef:
     """get_function_def fonksiyonu için testler."""
     
@@ -159,5 +267,106 @@ class TestGetFunctionDef:
         assert "query" in func_def["parameters"]["required"]
 
 
+def _mock_page(title, exists=True):
+    page = MagicMock()
+    page.exists.return_value = exists
+    page.title = title
+    page.summary = f"{title} özeti"
+    page.fullurl = f"https://example.com/{title}"
+    page.sections = []
+    page.categories = {}
+    return page
+
+
+class TestLanguageRouting:
+    """Dil tespiti, dil başına istemci ve diller arası yedek testleri."""
+    
+    def setup_method(self):
+        page_cache.clear()
+        self.fallback_patch = patch('src.services.wikipedia.Config.WIKI_FALLBACK_LANGUAGES', "en")
+        self.fallback_patch.start()
+    
+    def teardown_method(self):
+        self.fallback_patch.stop()
+        page_cache.clear()
+    
+    def test_detect_language(self):
+        """Sorgu dili harf ve kelime ipuçlarından tahmin edilmeli."""
+        assert detect_language("The Eiffel Tower", ["tr", "en"], "tr") == "en"
+        assert detect_language("nonexistent_page_12345", ["tr", "en"], "tr") == "tr"
+        assert detect_language("History of the Ottoman Empire", ["tr", "en"], "tr") == "en"
+        assert detect_language("İstanbul'un fethi", ["tr", "en"], "tr") == "tr"
+        assert detect_language("Ankara", ["tr", "en"], "tr") == "tr"
+        assert detect_language("Geschichte der Stadt Köln", ["tr", "en", "de"], "tr") == "de"
+    
+    def test_client_per_language(self):
+        """Her dil için tek istemci oluşturulmalı."""
+        client = get_client("en")
+        assert client is get_client("en")
+        assert client is not get_client("tr")
+        assert client.api_url.startswith("https://en.wikipedia.org/")
+    
+    def test_invalid_language(self):
+        """Geçersiz dil kodu hata döndürmeli."""
+        result = search_info("Test", language="../evil")
+        assert "error" in result
+        assert "dil" in result["error"]
+    
+    def test_explicit_language_uses_language_client(self):
+        """Verilen dilin istemcisi ve önbellek anahtarı kullanılmalı."""
+        en = MagicMock()
+        en.page.return_value = _mock_page("London")
+        with patch('src.services.wikipedia.wiki') as tr, patch.dict(wikipedia._clients, {"en": en}):
+            result = search_info("London", language="EN")
+            tr.page.assert_not_called()
+        assert result["language"] == "en"
+        assert result["result"]["title"] == "London"
+        assert "en:London" in page_cache
+    
+    def test_fallback_follows_langlinks(self):
+        """Sayfa istenen dilde yoksa dil bağlantısıyla karşılığı bulunmalı."""
+        en = MagicMock()
+        en.page.return_value = _mock_page("Eiffel Tower")
+        en.langlinks.return_value = "Eyfel Kulesi"
+        with patch('src.services.wikipedia.wiki') as tr, patch.dict(wikipedia._clients, {"en": en}):
+            tr.page.side_effect = lambda title: _mock_page(title, exists=(title == "Eyfel Kulesi"))
+            first = search_info("Eiffel Tower", language="tr")
+            second = search_info("Eiffel Tower", language="tr")
+        
+        en.langlinks.assert_called_once_with("Eiffel Tower", "tr")
+        assert first["language"] == "tr"
+        assert first["result"]["title"] == "Eyfel Kulesi"
+        assert first["resolved_title"] == "Eyfel Kulesi"
+        # İkinci sorgu önbellekten, yedek dile gitmeden yanıtlanmalı
+        assert second["result"]["title"] == "Eyfel Kulesi"
+        assert en.page.call_count == 1
+    
+    def test_fallback_without_langlink(self):
+        """Karşılık yoksa yedek dildeki sayfa döndürülmeli."""
+        en = MagicMock()
+        en.page.return_value = _mock_page("Obscure Topic")
+        en.langlinks.return_value = None
+        with patch('src.services.wikipedia.wiki') as tr, patch.dict(wikipedia._clients, {"en": en}):
+            tr.page.return_value = _mock_page("Obscure Topic", exists=False)
+            result = search_info("Obscure Topic", language="tr")
+        
+        assert result["language"] == "en"
+        assert result["requested_language"] == "tr"
+        assert result["result"]["title"] == "Obscure Topic"
+    
+    def test_get_section_language(self):
+        """get_section verilen dilin önbellek anahtarını kullanmalı."""
+        page_cache.set("en:Paris", {"title": "Paris", "sections": [
+            {"title": "History", "content": "Old", "level": 0, "subsections": []}
+        ]})
+        result = get_section("Paris", "History", language="en")
+        assert result["result"]["content"] == "Old"
+    
+    def test_function_def_has_language(self):
+        """Araç tanımlarında language parametresi olmalı."""
+        assert "language" in get_function_def()["parameters"]["properties"]
+        assert "language" in get_section_function_def()["parameters"]["properties"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])